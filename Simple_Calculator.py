@@ -1,5 +1,9 @@
 import streamlit as st
-import math
+import uuid
+
+from calc_core.history import HistoryStore, format_record
+from calc_core.operations import (BASIC_OPERATIONS, ELEMENTWISE_NAMES, MATRIX_NAMES, SCIENTIFIC_OPERATIONS,
+                                  arity, array_calculate, calculate)
 
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config(page_title="Python Calculator", page_icon="🧮", layout="centered")
@@ -163,8 +167,15 @@ st.markdown(sparkles_html, unsafe_allow_html=True)
 # ---------------- SIDEBAR ----------------
 st.sidebar.title("⚙️ Extra Features")
 
-if "history" not in st.session_state:
-    st.session_state.history = []
+# History is kept in a SQLite file shared by all sessions (see calc_core.history);
+# each browser session only sees the calculations it made itself.
+@st.cache_resource
+def get_history_store():
+    return HistoryStore()
+
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+history = get_history_store().for_session(st.session_state.session_id)
 
 # Theme toggle
 theme = st.sidebar.radio("Theme Mode", ["🌑 Dark", "🌕 Light"])
@@ -181,58 +192,215 @@ if theme == "🌕 Light":
 # Scientific mode
 sci_mode = st.sidebar.checkbox("🧪 Scientific Mode")
 
+# Statistics mode: summarize a whole column of numbers instead of one calculation
+stats_mode = st.sidebar.checkbox("📊 Statistics Mode")
+
+# Matrix / vector mode: the same operations over NumPy arrays, plus linear algebra
+matrix_mode = st.sidebar.checkbox("🔢 Matrix / Vector Mode")
+
 # History
 st.sidebar.subheader("📜 Calculation History")
-if st.session_state.history:
-    for h in reversed(st.session_state.history[-5:]):
-        st.sidebar.write(h)
+history_query = st.sidebar.text_input("🔍 Search history")
+records = history.search(history_query, limit=5) if history_query else history.recent(5)
+if records:
+    for rec in records:
+        st.sidebar.write(format_record(rec))
+elif history_query:
+    st.sidebar.info("No matching calculations.")
 else:
     st.sidebar.info("No calculations yet.")
 
 # ---------------- MAIN UI ----------------
 st.markdown("<h1 class='title'>🧮 Python Calculator</h1>", unsafe_allow_html=True)
 
-if sci_mode:
-    operations = ("Addition", "Subtraction", "Multiplication", "Division",
-                  "Power", "Modulus", "Square Root", "Sine", "Cosine", "Tangent")
-else:
-    operations = ("Addition", "Subtraction", "Multiplication", "Division")
+# ---------------- MATRIX / VECTOR MODE ----------------
+# Arrays come from pasted text or an uploaded CSV / .npy file; big uploads
+# are memory-mapped (calc_core.arrays). Operations run through NumPy and
+# its BLAS / LAPACK (calc_core.operations). A result is shown as a summary
+# and one page of its elements, never rendered cell by cell.
+PREVIEW_ROWS = 20
+PREVIEW_COLS = 10
 
-operation = st.selectbox("Select an Operation", operations)
-num1 = st.number_input("Enter First Number", value=0.0, step=1.0)
+@st.cache_resource(max_entries=8)
+def load_upload(file_id, name, _upload):
+    from calc_core.arrays import load_array
 
-if operation not in ("Square Root", "Sine", "Cosine", "Tangent"):
-    num2 = st.number_input("Enter Second Number", value=0.0, step=1.0)
-else:
-    num2 = None
+    return load_array(_upload, name)
+
+@st.cache_data(max_entries=32)
+def parse_pasted(text):
+    from calc_core.arrays import parse_array
+
+    return parse_array(text)
 
-if st.button("Calculate"):
-    result = None
+def array_input(label, key):
+    """A pasted or uploaded array, None while nothing is entered."""
+    source = st.radio(label, ["Paste", "Upload"], horizontal=True, key=f"{key}_source")
+    if source == "Paste":
+        text = st.text_area(
+            "Rows on separate lines (or separated by ;), values by commas or spaces",
+            placeholder="1 2 3\n4 5 6",
+            key=f"{key}_text",
+        )
+        return parse_pasted(text) if text.strip() else None
+    upload = st.file_uploader("CSV or .npy file", type=["csv", "tsv", "txt", "npy"], key=f"{key}_file")
+    return None if upload is None else load_upload(upload.file_id, upload.name, upload)
+
+def render_array_result(operation, result, invalid):
+    """Summary, one page of elements and a .npy download of a result."""
+    from calc_core.arrays import preview_window, summary, to_npy_bytes
+
+    if result.ndim == 0:
+        st.markdown(f"<div class='result'>Result: {result.item()}</div>", unsafe_allow_html=True)
+        return
+    info = summary(result)
+    shape = " × ".join(str(n) for n in info["shape"])
+    st.markdown(f"<div class='result'>{operation}: {shape} array</div>", unsafe_allow_html=True)
+    of = info.get("of", "")
+    st.caption(f"min {of} {info['min']:.6g} · max {of} {info['max']:.6g} · mean {of} {info['mean']:.6g}")
+    if invalid:
+        st.warning(f"{invalid} elements are inf or NaN (division by zero, square root of a negative ...).")
+
+    row = col = 0
+    if result.shape[0] > PREVIEW_ROWS or (result.ndim == 2 and result.shape[1] > PREVIEW_COLS):
+        c1, c2 = st.columns(2)
+        row = c1.number_input("First row", 0, max(result.shape[0] - 1, 0), 0, step=PREVIEW_ROWS)
+        if result.ndim == 2:
+            col = c2.number_input("First column", 0, max(result.shape[1] - 1, 0), 0, step=PREVIEW_COLS)
+    window = preview_window(result, row, col, PREVIEW_ROWS, PREVIEW_COLS)
+    st.dataframe(window, column_config={i: str(col + i) for i in range(window.shape[1])})
+
+    # Serializing a large result on every rerun would be wasted work: only on request
+    if st.button("Prepare .npy download"):
+        st.download_button("⬇️ Download result", to_npy_bytes(result), file_name="result.npy")
+
+def render_matrix_mode():
+    operation = st.selectbox("Select an Operation", ELEMENTWISE_NAMES + MATRIX_NAMES, key="matrix_op")
+    two = arity(operation) == 2
     try:
-        if operation == "Addition":
-            result = num1 + num2
-        elif operation == "Subtraction":
-            result = num1 - num2
-        elif operation == "Multiplication":
-            result = num1 * num2
-        elif operation == "Division":
-            result = num1 / num2 if num2 != 0 else "❌ Cannot divide by zero!"
-        elif operation == "Power":
-            result = num1 ** num2
-        elif operation == "Modulus":
-            result = num1 % num2
-        elif operation == "Square Root":
-            result = math.sqrt(num1)
-        elif operation == "Sine":
-            result = math.sin(math.radians(num1))
-        elif operation == "Cosine":
-            result = math.cos(math.radians(num1))
-        elif operation == "Tangent":
-            result = math.tan(math.radians(num1))
-    except Exception as e:
+        a = array_input("First array (A)", "a")
+        b = array_input("Second array (B), or a single number", "b") if two else None
+    except ValueError as e:
         st.error(f"Error: {e}")
+        return
+
+    if st.button("Calculate", key="matrix_calculate"):
+        if a is None or (two and b is None):
+            st.warning("Enter the array(s) first.")
+        else:
+            try:
+                result, invalid = array_calculate(operation, a, b)
+            except Exception as e:  # singular matrix, shapes that do not match ...
+                st.error(f"Error: {e}")
+            else:
+                st.session_state.matrix_result = (operation, result, invalid)
+                expr = f"{operation}: A{a.shape}" + (f", B{b.shape}" if two else "")
+                value = result.item() if result.ndim == 0 else f"array{result.shape}"
+                history.add(expr, value, "matrix")
+
+    stored = st.session_state.get("matrix_result")
+    if stored is not None and stored[0] == operation:
+        render_array_result(*stored)
+
+# ---------------- STATISTICS MODE ----------------
+# Values are streamed from the upload in chunks through one-pass moments
+# and a quantile sketch (calc_core.stats), so memory does not grow with
+# the file. The summary of each file / column is cached.
+STATS_CHUNK = 10_000
 
-    if result is not None:
-        st.markdown(f"<div class='result'>Result: {result}</div>", unsafe_allow_html=True)
-        expr = f"{operation}: {num1}" + (f", {num2}" if num2 is not None else "") + f" = {result}"
-        st.session_state.history.append(expr)
+@st.cache_data(max_entries=16)
+def summarize_upload(file_id, name, column, _upload):
+    import io
+
+    from calc_core.batch import read_expressions
+    from calc_core.stats import summarize_stream
+
+    fmt = "jsonl" if name.lower().endswith(".jsonl") else "csv" if name.lower().endswith(".csv") else "text"
+    _upload.seek(0)
+    text = io.TextIOWrapper(_upload, encoding="utf-8", newline="")
+    try:
+        summary = summarize_stream(read_expressions(text, fmt, column or None), workers=0, chunk_size=STATS_CHUNK)
+    finally:
+        text.detach()   # leave the upload open for the next rerun
+    return summary.as_dict()
+
+@st.cache_data(max_entries=32)
+def summarize_pasted(text):
+    from calc_core.stats import summarize_chunk
+
+    return summarize_chunk(text.replace(",", " ").replace(";", " ").split()).as_dict()
+
+def render_stats_mode():
+    source = st.radio("Values", ["Paste", "Upload"], horizontal=True, key="stats_source")
+    if source == "Paste":
+        text = st.text_area("Numbers separated by spaces, commas or new lines", key="stats_text")
+        result = summarize_pasted(text) if text.strip() else None
+        label = "pasted values"
+    else:
+        upload = st.file_uploader("Text (one value per line), CSV or JSONL file",
+                                  type=["txt", "csv", "jsonl"], key="stats_file")
+        column = st.text_input("Column (CSV header / JSON key; default: the first column)", key="stats_column")
+        result = None if upload is None else summarize_upload(upload.file_id, upload.name, column, upload)
+        label = upload.name if upload is not None else ""
+
+    if result is None:
+        st.info("Paste numbers or upload a file to summarize it.")
+        return
+    if not result["count"]:
+        st.warning("No numbers found.")
+        return
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Count", f"{result['count']:,}")
+    c2.metric("Mean", f"{result['mean']:.6g}")
+    c3.metric("Std. deviation", f"{result['stdev']:.6g}")
+    c1.metric("Min", f"{result['min']:.6g}")
+    c2.metric("Median", f"{result['quantiles'][0.5]:.6g}")
+    c3.metric("Max", f"{result['max']:.6g}")
+    st.table({
+        "Quantile": [f"p{q * 100:g}" for q in result["quantiles"]],
+        "Value": [f"{v:.6g}" for v in result["quantiles"].values()],
+    })
+    st.caption("Quantiles are estimated by a sketch (rank error around 1%); count, mean, "
+               "deviation, min and max are exact.")
+    if result["skipped"]:
+        st.warning(f"{result['skipped']:,} values were not numbers (or were NaN / infinite) and were skipped.")
+
+    if st.button("Save to history", key="stats_save"):
+        history.add(f"Statistics: {label} (n={result['count']})",
+                    f"mean {result['mean']:.6g}, sd {result['stdev']:.6g}", "statistics")
+
+# ---------------- SCALAR MODE ----------------
+def render_scalar_mode():
+    if sci_mode:
+        operations = SCIENTIFIC_OPERATIONS
+    else:
+        operations = BASIC_OPERATIONS
+
+    operation = st.selectbox("Select an Operation", operations)
+    num1 = st.number_input("Enter First Number", value=0.0, step=1.0)
+
+    if arity(operation) == 2:
+        num2 = st.number_input("Enter Second Number", value=0.0, step=1.0)
+    else:
+        num2 = None
+
+    if st.button("Calculate"):
+        result = None
+        try:
+            # calc_core.operations.SCALAR_OPERATIONS: operation name -> function
+            result = calculate(operation, num1, num2)
+        except Exception as e:
+            st.error(f"Error: {e}")
+
+        if result is not None:
+            st.markdown(f"<div class='result'>Result: {result}</div>", unsafe_allow_html=True)
+            expr = f"{operation}: {num1}" + (f", {num2}" if num2 is not None else "")
+            history.add(expr, result, "scientific" if sci_mode else "basic")
+
+if matrix_mode:
+    render_matrix_mode()
+elif stats_mode:
+    render_stats_mode()
+else:
+    render_scalar_mode()
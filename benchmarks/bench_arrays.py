@@ -0,0 +1,87 @@
+"""
+Benchmark: the matrix / vector mode of Simple_Calculator.py.
+
+  - element-wise operations: calculate() once per element (what a loop over
+    the scalar dispatch would do) against one NumPy call (array_calculate)
+  - linear algebra on an n × n matrix (BLAS / LAPACK)
+  - loading a CSV upload into memory against converting it into a
+    memory-mapped .npy file, with the peak Python heap of each
+
+Run from the repository root:
+    python benchmarks/bench_arrays.py [elements] [n]
+"""
+
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from calc_core import arrays
+from calc_core.operations import ELEMENTWISE_NAMES, MATRIX_NAMES, arity, array_calculate, calculate
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - start, out
+
+
+def bench_elementwise(size):
+    rng = np.random.default_rng(0)
+    a = rng.uniform(1, 100, size)
+    b = rng.uniform(1, 5, size)
+    a_list, b_list = a.tolist(), b.tolist()
+    print(f"element-wise, {size} elements")
+    for op in ELEMENTWISE_NAMES:
+        two = arity(op) == 2
+        t_loop, _ = timed(lambda: [calculate(op, x, y) for x, y in zip(a_list, b_list)] if two
+                          else [calculate(op, x) for x in a_list])
+        t_np, _ = timed(array_calculate, op, a, b if two else None)
+        print(f"  {op:<16}{t_loop * 1e3:9.1f}ms loop {t_np * 1e3:8.2f}ms numpy {t_loop / t_np:8.0f}x")
+
+
+def bench_linalg(n):
+    rng = np.random.default_rng(1)
+    m = rng.normal(size=(n, n))
+    sym = m + m.T
+    v = rng.normal(size=n)
+    print(f"linear algebra, {n} × {n}")
+    for op in MATRIX_NAMES:
+        second = {"Matrix Multiply": m, "Solve": v}.get(op)
+        t, _ = timed(array_calculate, op, m, second)
+        line = f"  {op:<16}{t * 1e3:9.1f}ms"
+        if op in ("Eigenvalues", "Eigenvectors"):
+            t_sym, _ = timed(array_calculate, op, sym)
+            line += f"   symmetric (eigh) {t_sym * 1e3:8.1f}ms"
+        print(line)
+
+
+def bench_load(rows, cols=20):
+    rng = np.random.default_rng(2)
+    data = rng.normal(size=(rows, cols))
+    csv = "\n".join(",".join(f"{x:.10g}" for x in row) for row in data).encode()
+    print(f"CSV upload, {rows} × {cols} ({len(csv) / 1e6:.1f} MB)")
+    for label, threshold in (("in memory", len(csv) + 1), ("memory-mapped", 0)):
+        arrays.MMAP_THRESHOLD = threshold
+        tracemalloc.start()
+        t, arr = timed(arrays.load_array, io.BytesIO(csv), "upload.csv")
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert np.allclose(arr, data, rtol=1e-9)
+        print(f"  {label:<16}{t * 1e3:9.1f}ms   peak Python heap {peak / 1e6:7.1f} MB   ({type(arr).__name__})")
+
+
+def main(size=1_000_000, n=500):
+    bench_elementwise(size)
+    bench_linalg(n)
+    bench_load(max(size // 20, 1000))
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
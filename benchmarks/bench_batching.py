@@ -0,0 +1,112 @@
+"""
+Benchmark: server round trips and server time per typed expression when
+keys are buffered in the browser, compared with one rerun per click.
+
+Typing is simulated with seeded inter-key gaps (lognormal around 180 ms,
+with an occasional pause to think). Policies:
+
+  - per key:   every click reruns the script (st.button on_click=press)
+  - window:    keys collected for a fixed window after the first one
+  - debounce:  keys sent when typing pauses (the keypad component), "=" and
+               "%" at once
+
+Server time replays the same batches on a CalculatorState: press() and a
+live preview per key, or apply_events() and one preview per batch.
+
+Run from the repository root:
+    python benchmarks/bench_batching.py [expressions] [window_ms] [debounce_ms]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calc_core.state import EVALUATING_KEYS, CalculatorState
+
+KEYS = ["1", "2", "3", "4", "5", "6", "7", "8", "9", "0", "."]
+OPERATORS = ["➕", "−", "×", "÷"]
+
+
+def typed_expression(rng):
+    """Keys of one expression: AC, numbers and operators, a typo fixed with ⌫, then "="."""
+    keys = ["AC"]
+    for term in range(rng.randint(2, 6)):
+        if term:
+            keys.append(rng.choice(OPERATORS))
+        keys += [rng.choice(KEYS[:10]) for _ in range(rng.randint(1, 4))]
+        if rng.random() < 0.15:
+            keys += [rng.choice(KEYS), "⌫"]
+    keys.append("=")
+    return keys
+
+
+def gaps(rng, n):
+    """Milliseconds before each key."""
+    out = []
+    for _ in range(n):
+        gap = rng.lognormvariate(5.2, 0.45)   # median ~180 ms
+        if rng.random() < 0.05:
+            gap += rng.uniform(600, 2000)     # thinking
+        out.append(gap)
+    return out
+
+
+def batches(keys, delays, policy, ms):
+    """Split keys (pressed after the given delays) into the batches a policy sends."""
+    out = []
+    current = []
+    since_first = since_last = 0.0
+    for key, delay in zip(keys, delays):
+        since_first += delay
+        since_last = delay
+        if current and ((policy == "window" and since_first > ms) or (policy == "debounce" and since_last > ms)):
+            out.append(current)
+            current = []
+        if not current:
+            since_first = 0.0
+        current.append(key)
+        if policy == "per key" or key in EVALUATING_KEYS:
+            out.append(current)
+            current = []
+    if current:
+        out.append(current)
+    return out
+
+
+def replay(all_batches, per_key):
+    calc = CalculatorState()
+    start = time.perf_counter()
+    for batch in all_batches:
+        if per_key:
+            for key in batch:
+                calc.press(key)
+                calc.preview()
+        else:
+            calc.apply_events(batch)
+            calc.preview()
+    return time.perf_counter() - start
+
+
+def main(expressions=2000, window_ms=120, debounce_ms=400):
+    rng = random.Random(0)
+    typed = []
+    for _ in range(expressions):
+        keys = typed_expression(rng)
+        typed.append((keys, gaps(rng, len(keys))))
+    n_keys = sum(len(k) for k, _ in typed)
+    print(f"{expressions} expressions, {n_keys / expressions:.1f} keys each")
+    print(f"  {'policy':<22}{'round trips/expr':>18}{'keys/trip':>11}{'server time':>13}")
+    for policy, ms in (("per key", 0), ("window", window_ms), ("debounce", debounce_ms)):
+        all_batches = [b for keys, delays in typed for b in batches(keys, delays, policy, ms)]
+        seconds = replay(all_batches, per_key=policy == "per key")
+        label = policy if policy == "per key" else f"{policy} {ms} ms"
+        print(f"  {label:<22}{len(all_batches) / expressions:>18.2f}{n_keys / len(all_batches):>11.1f}"
+              f"{seconds * 1e3:>11.1f}ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    main(*args)
@@ -0,0 +1,117 @@
+"""
+Benchmark: integrate / diff / solve (calc_core.calculus) with the expression
+sampled three ways:
+
+  - vectorized: compiled once, many points per NumPy call (the default)
+  - compiled:   compiled once, one closure call per point
+  - naive:      evaluate_expression() per point, on the text with the
+                number substituted for x (parsed and compiled every time)
+
+The same method runs on all three, so the evaluation counts are the same;
+the table shows them with the wall time of each way. The last column is
+a whole calculator line, evaluate_expression("integrate(...)"), compile
+included.
+
+Run from the repository root:
+    python benchmarks/bench_calculus.py
+"""
+
+import math
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calc_core.calculus import compile_function, differentiate, find_root, integrate
+from calc_core.evaluator import clear_cache, evaluate_expression
+
+CASES = [
+    ("integrate", "sin(x)^2", (0, math.pi)),
+    ("integrate", "math.e^(-x^2)", (-10, 10)),
+    ("integrate", "sqrt(x)", (0, 1)),
+    ("integrate", "1/sqrt(x)", (0, 1)),
+    ("integrate", "sin(1/x)", (0.001, 1)),
+    ("diff", "sin(x)", (1,)),
+    ("diff", "ln(x)", (0.001,)),
+    ("solve", "cos(x)-x", (0,)),
+    ("solve", "x^3-2*x-5", (2,)),
+]
+METHODS = {"integrate": integrate, "diff": differentiate, "solve": find_root}
+_X = re.compile(r"\bx\b")
+
+
+class NaiveSampler:
+    """evaluate_expression() of the text with x replaced, for every point."""
+
+    def __init__(self, expr):
+        self.expr = expr
+        self.evaluations = 0
+        clear_cache()   # every run starts cold, as each new point would
+
+    def _value(self, x):
+        result = evaluate_expression(_X.sub(f"({x!r})", self.expr))
+        return math.nan if result == "Error" else float(result)
+
+    def __call__(self, x):
+        self.evaluations += 1
+        y = self._value(x)
+        if not math.isfinite(y):
+            raise ArithmeticError(f"the expression is not finite at {x!r}")
+        return y
+
+    def many(self, xs):
+        self.evaluations += len(xs)
+        return [self._value(x) for x in xs]
+
+
+def timed(fn, repeat=3):
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def fmt(seconds):
+    return f"{seconds * 1e3:.2f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+def line(form, expr, args):
+    return f"{form}({expr}, x, {', '.join(repr(a) for a in args)})".replace(repr(math.pi), "π")
+
+
+def main():
+    print(f"{'line':<40}{'evals':>7}{'vectorized':>12}{'compiled':>12}{'naive':>12}{'line':>12}")
+    for form, expr, args in CASES:
+        method = METHODS[form]
+        samplers = {
+            "vectorized": lambda: compile_function(expr).bind(),
+            "compiled": lambda: compile_function(expr, vectorized=False).bind(),
+            "naive": lambda: NaiveSampler(expr),
+        }
+        cells = []
+        counts = set()
+        for make in samplers.values():
+            f = make()
+            _, seconds = timed(lambda: method(make(), *args))
+            method(f, *args)
+            counts.add(f.evaluations)
+            cells.append(fmt(seconds))
+        text = line(form, expr, args)
+
+        def whole_line():
+            clear_cache()
+            return evaluate_expression(text)
+
+        value, seconds = timed(whole_line)
+        assert value != "Error", text
+        counts = "/".join(str(n) for n in sorted(counts))
+        print(f"{text:<40}{counts:>7}" + "".join(f"{c:>12}" for c in cells) + f"{fmt(seconds):>12}")
+    clear_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Micro-benchmark: old prep + eval() path vs the compiled expression engine.
+
+Run from the repository root:
+    python benchmarks/bench_engine.py
+"""
+
+import math
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calc_core.engine import compile_expression
+from calc_core.evaluator import evaluate_expression, prep_expr_for_eval
+from calc_core.numeric import format_result
+
+EXPRESSIONS = [
+    "2+3×4",
+    "sqrt(16)+sin(π÷2)",
+    "(1.5+2.25)×(3−1)^2÷7",
+    "ln(10)+log(1000)−cos(0)×tan(0.5)",
+    "+".join(f"({i}×{i + 1}−{i}÷3)" for i in range(40)),
+]
+
+
+def eval_path(expr):
+    """The evaluate_expression() implementation before the engine existed."""
+    try:
+        result = eval(prep_expr_for_eval(expr), {"__builtins__": None, "math": math}, {})
+        if isinstance(result, float):
+            result = float(f"{result:.12g}")
+        return result
+    except Exception:
+        return "Error"
+
+
+def main(number=2000):
+    print(f"{'expression':<42}{'eval()':>12}{'engine':>12}{'compiled':>12}{'speedup':>9}")
+    for expr in EXPRESSIONS:
+        assert format_result(eval_path(expr)) == format_result(evaluate_expression(expr)), expr
+        compiled = compile_expression(prep_expr_for_eval(expr))
+        t_eval = timeit.timeit(lambda: eval_path(expr), number=number) / number
+        t_engine = timeit.timeit(lambda: evaluate_expression(expr), number=number) / number
+        t_compiled = timeit.timeit(compiled.evaluate, number=number) / number
+        label = expr if len(expr) <= 40 else expr[:37] + "..."
+        print(
+            f"{label:<42}{t_eval * 1e6:>10.2f}us{t_engine * 1e6:>10.2f}us"
+            f"{t_compiled * 1e6:>10.2f}us{t_eval / t_engine:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: cold-start import cost of the headless calculator core.
+
+Each target is imported in a fresh interpreter with `-X importtime`; the
+table shows the cumulative time of the target module and which heavy
+modules (NumPy, decimal, re, Streamlit) came along with it.
+
+Run from the repository root:
+    python benchmarks/bench_import.py
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = [
+    "calc_core",
+    "calc_core.state",
+    "calc_core.spoken",
+    "calc_core.evaluator",
+    "calc_core.precise",
+]
+
+HEAVY = ["numpy", "decimal", "fractions", "re", "streamlit"]
+
+
+def import_time(module: str):
+    """Return (cumulative microseconds, set of top-level modules imported)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative = 0
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line.split("|")
+        name = name.strip()
+        loaded.add(name)
+        if name == module:
+            cumulative = int(cum)
+    return cumulative, loaded
+
+
+def main(repeat=5):
+    # Warm the bytecode cache so compilation is not counted
+    subprocess.run([sys.executable, "-m", "compileall", "-q", "calc_core"], cwd=ROOT, check=True)
+
+    print(f"{'module':<22}{'best':>10}  heavy modules loaded")
+    for module in TARGETS:
+        runs = [import_time(module) for _ in range(repeat)]
+        best = min(us for us, _ in runs)
+        heavy = sorted(h for h in HEAVY if h in runs[0][1]) or ["-"]
+        print(f"{module:<22}{best / 1e3:>8.2f}ms  {', '.join(heavy)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: building a long expression key by key with a live result after
+every keypress. Compares re-evaluating the whole text each time
+(evaluate_expression) with the incremental CalculatorState.preview(), and
+times ⌫ back to empty and the final "=".
+
+Run from the repository root:
+    python benchmarks/bench_incremental.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calc_core.evaluator import clear_cache, evaluate_expression
+from calc_core.state import CalculatorState
+
+# Button presses, repeated until the expression is long enough
+KEYS = ["➕", "1", "2", "×", "3", "➕", "4", "5", "÷", "6", "−", "7", "x^y", "2",
+        "➕", "(", "8", "−", "9", ")", "×", "sqrt(", "1", "6", ")"]
+
+
+def key_sequence(length):
+    keys = []
+    size = 0
+    while size < length:
+        for key in KEYS:
+            keys.append(key)
+            size += len(key) if key != "x^y" else 1
+    return keys
+
+
+def full_reevaluation(keys):
+    calc = CalculatorState()
+    start = time.perf_counter()
+    for key in keys:
+        calc.press(key)
+        evaluate_expression(calc.expression)
+    return time.perf_counter() - start, calc.expression
+
+
+def incremental(keys):
+    calc = CalculatorState()
+    start = time.perf_counter()
+    for key in keys:
+        calc.press(key)
+        calc.preview()
+    typed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    calc.press("=")
+    equals = time.perf_counter() - start
+    value = calc.display_result
+
+    calc.display_result = ""
+    start = time.perf_counter()
+    while calc.expression:
+        calc.press("⌫")
+        calc.preview()
+    backspace = time.perf_counter() - start
+    return typed, equals, backspace, value
+
+
+def main():
+    print(f"{'chars':>6}{'full/key':>12}{'live/key':>12}{'speedup':>9}"
+          f"{'⌫/key':>10}{'= full':>10}{'= live':>10}")
+    for length in (100, 250, 500, 1000, 2000):
+        keys = key_sequence(length)
+        clear_cache()
+        t_full, expr = full_reevaluation(keys)
+
+        clear_cache()
+        start = time.perf_counter()
+        expected = evaluate_expression(expr)
+        eq_full = time.perf_counter() - start
+
+        t_live, eq_live, t_back, value = incremental(keys)
+        assert value == expected, (value, expected)
+
+        n = len(keys)
+        print(f"{len(expr):>6}{t_full / n * 1e6:>10.1f}us{t_live / n * 1e6:>10.1f}us"
+              f"{t_full / t_live:>8.1f}x{t_back / len(expr) * 1e6:>8.1f}us"
+              f"{eq_full * 1e3:>8.2f}ms{eq_live * 1e3:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark: cost of each numeric backend (float / decimal / fraction)
+across expression sizes, plus the display formatting step on its own.
+
+Run from the repository root:
+    python benchmarks/bench_numeric.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calc_core.evaluator import get_compiled
+from calc_core.numeric import format_result
+
+
+def make_expr(terms: int, scientific: bool) -> str:
+    """terms pieces like (3×7÷11−0.25), optionally with sqrt( / sin( calls."""
+    parts = []
+    for i in range(1, terms + 1):
+        piece = f"({i}×{i + 6}÷{i + 10}−0.25)"
+        if scientific and i % 3 == 0:
+            piece = f"sqrt({i}.5)+sin({i}÷7)"
+        parts.append(piece)
+    return "+".join(parts)
+
+
+BACKENDS = [("float", 28), ("decimal", 28), ("decimal", 100), ("fraction", 28)]
+
+
+def main(number=200):
+    header = "".join(f"{m + ('' if m != 'decimal' else f'/{p}'):>14}" for m, p in BACKENDS)
+    for scientific in (False, True):
+        print(f"\n{'scientific' if scientific else 'arithmetic'} expressions (us per evaluation)")
+        print(f"{'terms':>6}{header}{'format':>10}")
+        for terms in (1, 10, 50, 200):
+            expr = make_expr(terms, scientific)
+            row = f"{terms:>6}"
+            for mode, prec in BACKENDS:
+                compiled = get_compiled(expr, mode, prec)
+                t = timeit.timeit(compiled.evaluate, number=number) / number
+                row += f"{t * 1e6:>14.1f}"
+            value = get_compiled(expr).evaluate()
+            t_fmt = timeit.timeit(lambda: format_result(value), number=number) / number
+            row += f"{t_fmt * 1e6:>10.2f}"
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark: big-integer and number-theory operations (calc_core.numtheory)
+on numbers of 10^3 to 10^6 decimal digits.
+
+  - to_base / from_base against CPython's str() / int(), which are
+    quadratic (run with --full to time them at 10^6 digits too, ~20 s)
+  - factorial and binomial with results of the given size; binomial
+    against math.comb
+  - gcd, lcm, modpow and is_prime on operands of the given size
+  - factorize on semiprimes, by size of the smaller factor (Pollard rho
+    runs in about the square root of it, whatever the size of n)
+
+An operation is not run at the next size when its time, growing
+quadratically (cubically for is_prime), would exceed --budget seconds.
+
+Run from the repository root:
+    python benchmarks/bench_numtheory.py [--budget 30] [--full]
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calc_core.limits import configure_limits
+from calc_core.numtheory import (binomial, factorial, factorize, from_base, gcd, is_prime, lcm,
+                                 modpow, primes_upto, to_base)
+
+SIZES = (10**3, 10**4, 10**5, 10**6)
+LOG2_10 = math.log2(10)
+
+
+def timed(fn, *args):
+    # Best of up to 5 runs, as many as fit in about a second
+    best = math.inf
+    total = 0.0
+    for _ in range(5):
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+        if total > 1.0:
+            break
+    return best
+
+
+def number(digits, seed):
+    return random.Random(seed).getrandbits(int(digits * LOG2_10)) | 1
+
+
+def rough_number(digits, seed):
+    # No prime factor below 1000, so is_prime() gets to Miller-Rabin
+    n = number(digits, seed)
+    while math.gcd(n, math.prod(primes_upto(1000))) != 1:
+        n += 2
+    return n
+
+
+def factorial_arg(digits):
+    # Smallest n whose n! has about `digits` digits
+    lo, hi = 1, 10**8
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if math.lgamma(mid + 1) / math.log(10) < digits:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def call(fn, *args):
+    # The operands are built here, outside the timed call
+    return lambda: fn(*args)
+
+
+def cases(full):
+    # name -> (ours, reference or None, growth per size step): ours / reference are functions
+    # of the digit count returning what to time
+    def quadratic(fn):
+        return lambda d: None if d > 10**5 and not full else fn(d)
+
+    def comb(d):
+        n = int(d * LOG2_10)   # C(n, n/2) has about n·log10(2) digits
+        return n, n // 2
+
+    return {
+        "to_base(n, 10)": (lambda d: call(to_base, number(d, 1)),
+                           quadratic(lambda d: call(str, number(d, 1))), 100),
+        "to_base(n, 7)": (lambda d: call(to_base, number(d, 1), 7), None, 100),
+        "from_base(s, 10)": (lambda d: call(from_base, to_base(number(d, 1))),
+                             quadratic(lambda d: call(int, to_base(number(d, 1)))), 100),
+        "factorial": (lambda d: call(factorial, factorial_arg(d)), None, 100),
+        "binomial(n, n/2)": (lambda d: call(binomial, *comb(d)),
+                             lambda d: call(math.comb, *comb(d)), 100),
+        "gcd": (lambda d: call(gcd, number(d, 1) * 3, number(d, 2) * 3), None, 100),
+        "lcm": (lambda d: call(lcm, number(d, 1), number(d, 2)), None, 100),
+        "modpow (64-bit exp.)": (lambda d: call(modpow, number(d, 1), 2**64 - 59, number(d, 2)),
+                                 lambda d: call(pow, number(d, 1), 2**64 - 59, number(d, 2)), 100),
+        "is_prime (composite)": (lambda d: call(is_prime, rough_number(d, 3)), None, 1000),
+    }
+
+
+def fmt(seconds):
+    if seconds is None:
+        return "—"
+    return f"{seconds * 1e3:.2f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+def bench_sizes(budget, full):
+    print(f"{'operation':<22}" + "".join(f"{f'10^{len(str(d)) - 1} digits':>24}" for d in SIZES))
+    for name, (ours, reference, growth) in cases(full).items():
+        cells = []
+        over = False
+        for d in SIZES:
+            if over:
+                cells.append("—")
+                continue
+            t = timed(ours(d))
+            over = t * growth > budget
+            cell = fmt(t)
+            ref = reference(d) if reference else None
+            if ref is not None:
+                t_ref = timed(ref)
+                cell += f" ({t_ref / t:.1f}x)"
+            cells.append(cell)
+        print(f"{name:<22}" + "".join(f"{c:>24}" for c in cells))
+    print("(Nx: speedup over str() / int() / math.comb / pow)")
+
+
+def random_prime(digits, rng):
+    while True:
+        p = rng.randrange(10 ** (digits - 1), 10 ** digits) | 1
+        if is_prime(p):
+            return p
+
+
+def bench_factorize(budget):
+    print("factorize p·q, by digits of p (q has twice as many)")
+    rng = random.Random(5)
+    for digits in (6, 8, 10, 12, 14, 16):
+        p = random_prime(digits, rng)
+        q = random_prime(2 * digits, rng)
+        t = timed(factorize, p * q, 0)
+        print(f"  {digits:>2}-digit p: {fmt(t)}")
+        if t * 10 > budget:   # rho: ~10x per two more digits of p
+            break
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--budget", type=float, default=30.0,
+                        help="longest expected run of one operation at the next size, in seconds")
+    parser.add_argument("--full", action="store_true",
+                        help="also time str() / int() at 10^6 digits")
+    args = parser.parse_args(argv)
+    sys.set_int_max_str_digits(0)
+    configure_limits(max_bits=10**8)
+    bench_sizes(args.budget, args.full)
+    bench_factorize(args.budget)
+
+
+if __name__ == "__main__":
+    main()
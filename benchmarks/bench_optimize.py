@@ -0,0 +1,101 @@
+"""
+Benchmark: compiled expressions with and without the calc_core.optimize
+pass (constant folding, identities, common subexpressions), on the paths
+that evaluate one compiled expression many times:
+
+  - scalar: CompiledExpression.evaluate() once per row, as the HTTP
+    service does for rows with variables and for non-float modes,
+  - vectorized: one NumPy evaluation over whole columns (evaluate_batch).
+
+Results are checked to agree within float tolerance.
+
+Run from the repository root:
+    python benchmarks/bench_optimize.py [rows]
+"""
+
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calc_core.engine import compile_expression, parse
+from calc_core.evaluator import prep_expr_for_eval
+from calc_core.numeric import get_backend
+
+# Expressions the way the scientific tab builds them: π and math.e expand to
+# literals and mix with constant calls like sqrt(2) and log(100).
+EXPRESSIONS = [
+    "π×x^2+sqrt(2)×(x+1)^2+log(100)×(x+1)−sin(π÷6)",
+    "(x×1+0)^2+math.e^2×y−ln(10)÷log(1000)",
+    "sqrt((x−y)^2+(x+y)^2)+cos(π÷3)×(x−y)^2",
+    "x^2+x^2×2+x^2×3+sqrt(x^2+1)",
+]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - start, out
+
+
+def scalar_rows(compiled, rows):
+    return [compiled.evaluate(row) for row in rows]
+
+
+def close(a, b):
+    return math.isclose(float(a), float(b), rel_tol=1e-9, abs_tol=1e-12)
+
+
+def bench_scalar(rows):
+    print(f"scalar, {len(rows)} rows")
+    print(f"  {'expression':<48}{'mode':>9}{'plain':>10}{'optimized':>11}{'speedup':>9}")
+    for mode in ("float", "decimal", "fraction"):
+        backend = get_backend(mode)
+        env_rows = [{k: backend.literal(v) for k, v in row.items()} for row in rows]
+        for expr in EXPRESSIONS:
+            src = prep_expr_for_eval(expr)
+            t_plain, plain = timed(scalar_rows, compile_expression(src, backend, optimized=False), env_rows)
+            t_opt, opt = timed(scalar_rows, compile_expression(src, backend), env_rows)
+            assert all(close(a, b) for a, b in zip(plain, opt)), expr
+            label = expr if len(expr) <= 46 else expr[:43] + "..."
+            print(f"  {label:<48}{mode:>9}{t_plain:>9.3f}s{t_opt:>10.3f}s{t_plain / t_opt:>8.2f}x")
+
+
+def bench_vectorized(n):
+    import numpy as np
+
+    from calc_core.vectorized import VectorizedExpression
+
+    rng = np.random.default_rng(0)
+    columns = {"x": rng.uniform(0, 10, n), "y": rng.uniform(-5, 5, n)}
+    print(f"vectorized, {n} rows")
+    print(f"  {'expression':<48}{'plain':>10}{'optimized':>11}{'speedup':>9}")
+    for expr in EXPRESSIONS:
+        src = prep_expr_for_eval(expr)
+        plain = VectorizedExpression(src, parse(src), optimized=False)
+        opt = VectorizedExpression(src, parse(src))
+        best_plain = best_opt = math.inf
+        for _ in range(5):
+            t, a = timed(plain, columns)
+            best_plain = min(best_plain, t)
+            t, b = timed(opt, columns)
+            best_opt = min(best_opt, t)
+        assert (a.mask == b.mask).all() and np.allclose(a.values[~a.mask], b.values[~b.mask], rtol=1e-9)
+        label = expr if len(expr) <= 46 else expr[:43] + "..."
+        print(f"  {label:<48}{best_plain * 1e3:>8.1f}ms{best_opt * 1e3:>9.1f}ms{best_plain / best_opt:>8.2f}x")
+
+
+def main(rows=1_000_000):
+    scalar_count = min(rows, 20_000)
+    step = 10 / scalar_count
+    bench_scalar([{"x": round(i * step, 6), "y": round(5 - i * step, 6)} for i in range(scalar_count)])
+    try:
+        bench_vectorized(rows)
+    except ImportError:
+        print("vectorized: NumPy not installed, skipped")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
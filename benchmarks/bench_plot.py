@@ -0,0 +1,133 @@
+"""
+Benchmark: plotting (calc_core.plot) against the naive way, a dense uniform
+grid of 100k points, all sent to the chart.
+
+  - per expression: points evaluated, points sent (and their size as the
+    JSON rows the chart gets), time, and the largest distance between the
+    drawn line and the dense curve (as a fraction of the y range shown)
+  - the dense grid evaluated through the vectorized compiled form, and
+    (for the first expression) with evaluate_expression() per point
+  - a pan / zoom session: points evaluated with the range cache, and with
+    a new plot for every view
+
+Run from the repository root:
+    python benchmarks/bench_plot.py
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calc_core.evaluator import clear_cache, evaluate_expression
+from calc_core.plot import compile_plot
+from calc_core.vectorized import evaluate_batch
+
+DENSE = 100_000
+POINTS = 800
+CASES = [
+    ("sin(x)/x", -20, 20),
+    ("ln(x)", -1, 5),
+    ("tan(x)", -5, 5),
+    ("sin(x^2)", -10, 10),
+    ("sqrt(1-x^2)", -2, 2),
+    ("x^3-2*x", -3, 3),
+]
+_X = re.compile(r"\bx\b")
+
+
+def visual_error(data, xs, ys):
+    """Largest |drawn - true| over the dense grid, in units of the y range shown."""
+    low, high = data.y_range
+    x, y, piece = np.array(data.x), np.array(data.y), np.array(data.piece)
+    worst = 0.0
+    for p in np.unique(piece):
+        px, py = x[piece == p], y[piece == p]
+        inside = (xs >= px[0]) & (xs <= px[-1]) & np.isfinite(ys)
+        drawn = np.clip(np.interp(xs[inside], px, py), low, high)
+        true = np.clip(ys[inside], low, high)
+        if len(true):
+            worst = max(worst, float(np.max(np.abs(drawn - true))) / (high - low))
+    return worst
+
+
+def json_kib(x, y):
+    return len(json.dumps([{"x": a, "y": b} for a, b in zip(x, y)])) / 1024
+
+
+def naive_per_point(expr, xs):
+    clear_cache()
+    out = [evaluate_expression(_X.sub(f"({x!r})", expr)) for x in xs]
+    clear_cache()
+    return out
+
+
+def fmt(seconds):
+    return f"{seconds * 1e3:.1f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+def bench_views():
+    print(f"{'expression':<14}{'evaluated':>10}{'sent':>6}{'KiB':>6}{'time':>9}{'error':>9}"
+          f"{'dense: vectorized':>19}{'KiB':>7}")
+    for i, (expr, lo, hi) in enumerate(CASES):
+        xs = np.linspace(lo, hi, DENSE)
+        start = time.perf_counter()
+        ys = evaluate_batch(expr, x=xs).values
+        t_dense = time.perf_counter() - start
+
+        start = time.perf_counter()
+        data = compile_plot(expr).view(lo, hi, POINTS)
+        seconds = time.perf_counter() - start
+        dense_kib = json_kib(xs.tolist(), np.where(np.isfinite(ys), ys, None).tolist())
+        print(f"{expr:<14}{data.evaluated:>10}{len(data.x):>6}{json_kib(data.x, data.y):>6.0f}"
+              f"{fmt(seconds):>9}{visual_error(data, xs, ys):>9.4f}{fmt(t_dense):>19}{dense_kib:>7.0f}")
+        if i == 0:
+            n = DENSE // 10
+            start = time.perf_counter()
+            naive_per_point(expr, xs[::10])
+            per_point = (time.perf_counter() - start) / n
+            print(f"  evaluate_expression() per point: {per_point * 1e6:.1f}us, "
+                  f"so {fmt(per_point * DENSE)} for the dense grid")
+
+
+def bench_session():
+    expr, lo, hi = "sin(x)/x", -20.0, 20.0
+    views = []
+    for _ in range(8):               # pan right a quarter width at a time
+        views.append((lo, hi))
+        lo, hi = lo + (hi - lo) / 4, hi + (hi - lo) / 4
+    for _ in range(3):               # zoom in, then back out
+        mid, half = (lo + hi) / 2, (hi - lo) / 4
+        lo, hi = mid - half, mid + half
+        views.append((lo, hi))
+    for _ in range(3):
+        mid, half = (lo + hi) / 2, (hi - lo)
+        lo, hi = mid - half, mid + half
+        views.append((lo, hi))
+
+    plot = compile_plot(expr)
+    start = time.perf_counter()
+    cached = sum(plot.view(a, b, POINTS).evaluated for a, b in views)
+    t_cached = time.perf_counter() - start
+    start = time.perf_counter()
+    fresh = sum(compile_plot(expr).view(a, b, POINTS).evaluated for a, b in views)
+    t_fresh = time.perf_counter() - start
+    print(f"pan / zoom session on {expr}, {len(views)} views")
+    print(f"  with the range cache: {cached:>6} points evaluated, {fmt(t_cached)}")
+    print(f"  new plot every view:  {fresh:>6} points evaluated, {fmt(t_fresh)}")
+    print(f"  dense grid per view:  {DENSE * len(views):,} points")
+
+
+def main():
+    compile_plot("x").view(0, 1)   # imports and first-call costs out of the way
+    bench_views()
+    bench_session()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: what one keystroke costs the Streamlit app in each rendering
+mode: wall time of the rerun and the size of the elements it sends.
+
+  - classic: both tabs of st.button widgets, CSS and fresh snow every rerun
+  - fast:    cached CSS/snow, one keypad component, only the visible tab
+
+Each keystroke is applied to the session's CalculatorState and the page is
+rerun with Streamlit's AppTest. The payload is the serialized size of every
+element of the rerun (ForwardMsg framing not included). In fast mode a
+browser keystroke reruns only the keypad fragment, so the full rerun timed
+here is an upper bound for it; the "fragment" line is the part of the
+payload that fragment sends.
+
+Needs streamlit. Run from the repository root:
+    python benchmarks/bench_render.py [keystrokes]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "new_calculator.py")
+
+KEYS = ["1", "2", "➕", "3", "4", "×", "5", "−", "6", "÷", "7"]
+
+# Element types sent by the keypad fragment in fast mode
+FRAGMENT_TYPES = {"component_instance", "markdown"}
+
+
+def walk(node):
+    yield node
+    for child in getattr(node, "children", {}).values():
+        yield from walk(child)
+
+
+def payload(at):
+    """Serialized bytes per element type of the latest run."""
+    sizes = {}
+    for node in walk(at._tree):
+        proto = getattr(node, "proto", None)
+        if proto is None or not hasattr(proto, "ByteSize"):
+            continue
+        kind = getattr(node, "type", type(node).__name__)
+        sizes[kind] = sizes.get(kind, 0) + proto.ByteSize()
+    return sizes
+
+
+def bench(mode, keystrokes):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state["render_mode"] = mode
+    at.run()
+    times = []
+    for i in range(keystrokes):
+        at.session_state["calc"].press(KEYS[i % len(KEYS)])
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return times, payload(at)
+
+
+def main(keystrokes=50):
+    results = {}
+    for mode in ("classic", "fast"):
+        times, sizes = bench(mode, keystrokes)
+        results[mode] = (statistics.median(times), sum(sizes.values()))
+        print(f"{mode}: {keystrokes} keystrokes")
+        print(f"  rerun   median {statistics.median(times) * 1e3:7.1f}ms   "
+              f"p90 {sorted(times)[int(len(times) * 0.9)] * 1e3:7.1f}ms")
+        print(f"  payload {sum(sizes.values()):7d} bytes   "
+              + ", ".join(f"{k} {v}" for k, v in sorted(sizes.items(), key=lambda kv: -kv[1])))
+        if mode == "fast":
+            # The markdown total includes the cached assets, sent on full reruns only
+            fragment = sum(v for k, v in sizes.items() if k in FRAGMENT_TYPES)
+            print(f"  fragment at most {fragment} bytes per keystroke batch")
+    (t_classic, b_classic), (t_fast, b_fast) = results["classic"], results["fast"]
+    print(f"fast vs classic: rerun {t_classic / t_fast:.1f}x faster, payload {b_classic / b_fast:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
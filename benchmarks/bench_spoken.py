@@ -0,0 +1,146 @@
+"""
+Benchmark: the old str.replace-chain spoken_to_expr vs the single-pass
+phrase-trie version in calc_core.spoken, on growing dictated transcripts.
+
+Run from the repository root:
+    python benchmarks/bench_spoken.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calc_core.spoken import spoken_to_expr
+
+SENTENCE = (
+    "square root of three hundred forty two point five plus twelve times seven "
+    "divided by eight minus two to the power of three plus five percent of forty "
+)
+
+
+def replace_chain_spoken_to_expr(text: str) -> str:
+    """
+    Convert recognized speech into a calculator expression.
+
+    Supports verbal phrases like:
+      - "plus", "minus", "times", "divided by"
+      - "square root of", "sine of", "cosine of", "tangent of"
+      - "percent", "percentage of"
+      - powers: "to the power of", "squared", "cubed"
+    And converts simple number words ("one", "two", etc.) to digits.
+    """
+    t = text.lower().strip()
+
+    # Map common spoken phrases to operators / functions
+    phrase_replacements = {
+        # Division
+        "divided by": "/",
+        "divide by": "/",
+        "over": "/",
+
+        # Multiplication
+        "multiplied by": "*",
+        "times": "*",
+        "x": "*",
+
+        # Powers
+        "to the power of": "^",
+        "power of": "^",
+        "raised to the power of": "^",
+        "raised to": "^",
+
+        # Roots
+        "square root of": "sqrt",
+        "square root": "sqrt",
+        "root of": "sqrt",
+
+        # Trigonometric functions
+        "sine of": "sin",
+        "cosine of": "cos",
+        "tangent of": "tan",
+        "sin of": "sin",
+        "cos of": "cos",
+        "tan of": "tan",
+
+        # Percent / percentage
+        "percent of": "/ 100 *",
+        "percentage of": "/ 100 *",
+        "percent": "/ 100",
+        "percentage": "/ 100",
+
+        # Addition / subtraction
+        "plus": "+",
+        "add": "+",
+        "minus": "-",
+        "subtract": "-",
+    }
+
+    # Replace phrases with symbols
+    for phrase, sym in phrase_replacements.items():
+        t = t.replace(phrase, f" {sym} ")
+
+    # Simple mapping from spoken numbers to digits
+    number_words = {
+        "zero": "0",
+        "one": "1",
+        "two": "2",
+        "three": "3",
+        "four": "4",
+        "for": "4",   # common mis-recognition
+        "five": "5",
+        "six": "6",
+        "seven": "7",
+        "eight": "8",
+        "ate": "8",   # common mis-recognition
+        "nine": "9",
+        "ten": "10",
+    }
+
+    tokens = t.split()
+    out = []
+    open_funcs = 0  # count unclosed function parentheses
+
+    for tok in tokens:
+        if tok in number_words:
+            # Word-number -> digit
+            out.append(number_words[tok])
+        elif tok in {"+", "-", "*", "/", "^"}:
+            # Math operators
+            out.append(tok)
+        elif tok in {"sqrt", "sin", "cos", "tan"}:
+            # Functions get an opening parenthesis
+            out.append(tok + "(")
+            open_funcs += 1
+        elif tok in {"squared", "square"}:
+            out.append("^2")
+        elif tok in {"cubed", "cube"}:
+            out.append("^3")
+        else:
+            # If token looks like a number (including decimal)
+            if tok.replace(".", "", 1).isdigit():
+                out.append(tok)
+
+    # Close all opened function parentheses
+    out.extend(")" for _ in range(open_funcs))
+
+    # Join without spaces to create expression string
+    expr = "".join(out)
+    # If we couldn't parse anything, just return original text with no spaces
+    if not expr:
+        expr = text.replace(" ", "")
+    return expr
+
+
+def main(number=50):
+    print(f"{'words':>7}{'replace chain':>16}{'phrase trie':>14}{'speedup':>9}")
+    for repeat in (1, 10, 100, 1000):
+        text = SENTENCE * repeat
+        t_old = timeit.timeit(lambda: replace_chain_spoken_to_expr(text), number=number) / number
+        t_new = timeit.timeit(lambda: spoken_to_expr(text), number=number) / number
+        print(f"{len(text.split()):>7}{t_old * 1e3:>14.3f}ms{t_new * 1e3:>12.3f}ms{t_old / t_new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: one-pass statistics (calc_core.stats) against the exact way
+(read every value, sort, statistics module), over a generated file.
+
+  - time and peak traced memory of both
+  - worst rank error of the sketch quantiles, sequential and merged from
+    per-worker sketches
+  - summarize_stream() with 0 / 2 worker processes
+
+Run from the repository root:
+    python benchmarks/bench_stats.py [values]
+"""
+
+import bisect
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calc_core.batch import read_expressions
+from calc_core.stats import DEFAULT_QUANTILES, StreamSummary, summarize_stream
+
+
+def make_file(n):
+    rng = random.Random(0)
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, "w") as f:
+        for _ in range(n):
+            f.write(f"{rng.lognormvariate(0, 1):.9g}\n")
+    return path
+
+
+def measure(fn):
+    # Timed without tracing (it slows allocation down), then run again for the peak
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def exact(path):
+    with open(path) as f:
+        values = sorted(float(line) for line in f)
+    return values, statistics.fmean(values), statistics.stdev(values)
+
+
+def sketch(path, workers):
+    with open(path) as f:
+        return summarize_stream(read_expressions(f), workers=workers, chunk_size=20_000)
+
+
+def worst_rank_error(summary, ordered):
+    n = len(ordered)
+    return max(abs(bisect.bisect_right(ordered, summary.quantile(q)) / n - q) for q in DEFAULT_QUANTILES)
+
+
+def main(n=1_000_000):
+    path = make_file(n)
+    try:
+        (ordered, mean, stdev), t_exact, m_exact = measure(lambda: exact(path))
+        print(f"{n:,} values")
+        print(f"  exact (sort)    {t_exact:6.2f}s   peak {m_exact / 2**20:7.1f} MiB")
+        summary, t_sketch, m_sketch = measure(lambda: sketch(path, 0))
+        print(f"  one pass        {t_sketch:6.2f}s   peak {m_sketch / 2**20:7.1f} MiB"
+              f"   (mean off by {abs(summary.mean - mean):.2g}, stdev by {abs(summary.stdev - stdev):.2g})")
+        print(f"  sketch: {sum(len(c) for c in summary.sketch.compactors)} values kept, "
+              f"worst rank error {worst_rank_error(summary, ordered):.4f}")
+
+        # Per-worker sketches merged (as summarize_stream does with workers)
+        parts = [StreamSummary(seed=i) for i in range(8)]
+        for i, part in enumerate(parts):
+            part.update(ordered[i::8][::-1])
+        merged = parts[0]
+        for part in parts[1:]:
+            merged.merge(part)
+        print(f"  8 sketches merged: worst rank error {worst_rank_error(merged, ordered):.4f}")
+
+        for workers in (0, 2):
+            start = time.perf_counter()
+            sketch(path, workers)
+            print(f"  summarize_stream(workers={workers}): {time.perf_counter() - start:.2f}s")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
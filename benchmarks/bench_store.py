@@ -0,0 +1,99 @@
+"""
+Benchmark: the shared state stores (calc_core.store).
+
+  - get / set latency of the memory and SQLite stores
+  - saving and loading a session with a 200-cell workspace
+  - a heavy constant expression evaluated in a fresh process ("another
+    replica"), with and without the shared result cache filled
+
+Run from the repository root:
+    python benchmarks/bench_store.py [redis://host:6379/0]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calc_core.state import CalculatorState
+from calc_core.store import SessionStore, open_store
+from calc_core.workspace import Workspace
+
+# Exact fractions with huge numerators / denominators: a quarter second and more to compute
+HEAVY = [
+    "(3^100000+1)÷(7^60000−1) + (5^80000−3)÷(11^50000+1)",
+    "+".join(f"1÷{k}" for k in range(1, 1500)),
+]
+
+REPLICA = """
+import sys, time
+sys.set_int_max_str_digits(0)
+from calc_core.evaluator import configure_result_cache, evaluate_expression
+configure_result_cache(sys.argv[1])
+start = time.perf_counter()
+for expr in sys.argv[2:]:
+    evaluate_expression(expr, "fraction")
+print(time.perf_counter() - start)
+"""
+
+
+def per_op(fn, n):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n
+
+
+def bench_kv(url, n=5000):
+    store = open_store(url)
+    value = b"x" * 200
+    t_set = per_op(lambda i: store.set(f"bench:{i}", value, 60), n)
+    t_get = per_op(lambda i: store.get(f"bench:{i}"), n)
+    print(f"  {url.split('://')[0]:<8} set {t_set * 1e6:8.1f}µs   get {t_get * 1e6:8.1f}µs")
+    return store
+
+
+def bench_sessions(store):
+    ws = Workspace()
+    ws.enter("f(x) = x^2 + 1")
+    for i in range(200):
+        ws.enter(f"v{i} = f({i}) ÷ 3" if i % 2 else f"{i} × 1.5 + f(2)")
+    calc = CalculatorState(workspace=ws)
+    calc.expression = "12×34"
+    sessions = SessionStore(store)
+    t_save = per_op(lambda i: sessions.save("bench", calc), 50)
+    t_load = per_op(lambda i: sessions.load("bench"), 10)
+    raw = SessionStore.dumps(calc)
+    print(f"  session with {len(ws)} cells ({len(raw)} bytes): save {t_save * 1e3:.2f}ms   "
+          f"load {t_load * 1e3:.2f}ms (replays the cells)")
+
+
+def replica(url):
+    out = subprocess.run([sys.executable, "-c", REPLICA, url, *HEAVY], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout)
+
+
+def main(extra_url=None):
+    tmp = tempfile.mkdtemp()
+    urls = ["memory://", f"sqlite://{tmp}/bench.sqlite3"]
+    if extra_url:
+        urls.append(extra_url)
+    print("key-value stores")
+    stores = {url: bench_kv(url) for url in urls}
+    print("sessions")
+    bench_sessions(stores[urls[1]])
+    print("heavy constant expressions in a new process")
+    for url in urls[1:]:
+        cold = replica(url)
+        warm = replica(url)
+        print(f"  {url.split('://')[0]:<8} cold {cold * 1e3:8.1f}ms   warm {warm * 1e3:8.1f}ms"
+              f"   ({cold / warm:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -0,0 +1,122 @@
+"""
+Load generator for the HTTP evaluation service (calc_core.server).
+
+Starts a server on a free localhost port (unless --port is given), opens
+--concurrency keep-alive connections and sends --requests POSTs in total,
+then reports requests/second and latency percentiles.
+
+Run from the repository root:
+    python benchmarks/load_server.py --concurrency 64 --requests 20000 --workers 4
+    python benchmarks/load_server.py --endpoint batch --batch-size 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calc_core.batch import LatencyStats
+
+CONSTANT_EXPRESSIONS = ["2^10+sin(π÷6)", "sqrt(16)×3−1", "log(1000)+ln(1)", "(1.5+2.25)×(3−1)^2÷7"]
+VARIABLE_EXPRESSION = "sqrt(x^2+y^2)"
+
+
+def make_body(endpoint: str, rng: random.Random, batch_size: int) -> bytes:
+    if endpoint == "single":
+        if rng.random() < 0.5:
+            req = {"expression": VARIABLE_EXPRESSION,
+                   "variables": {"x": rng.uniform(-100, 100), "y": rng.uniform(-100, 100)}}
+        else:
+            req = {"expression": rng.choice(CONSTANT_EXPRESSIONS)}
+    else:
+        req = {"expressions": [f"{rng.randint(1, 999)}×{rng.randint(1, 999)}+sqrt({rng.randint(1, 99)})"
+                               for _ in range(batch_size)]}
+    return json.dumps(req).encode("utf-8")
+
+
+async def client(host, port, path, count, stats, statuses, seed, endpoint, batch_size):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            body = make_body(endpoint, rng, batch_size)
+            head = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1")
+            start = time.perf_counter()
+            writer.write(head + body)
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+
+            stats.add(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, args):
+    path = "/evaluate" if args.endpoint == "single" else "/evaluate/batch"
+    stats = LatencyStats()
+    statuses = {}
+    per_client, extra = divmod(args.requests, args.concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, path, per_client + (i < extra), stats, statuses, i, args.endpoint, args.batch_size)
+        for i in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    per_request = args.batch_size if args.endpoint == "batch" else 1
+    print(f"{stats.count} requests in {elapsed:.2f}s with {args.concurrency} connections")
+    print(f"  {stats.count / elapsed:,.0f} req/s, {stats.count * per_request / elapsed:,.0f} expr/s")
+    print("  latency " + " ".join(
+        f"p{p} {stats.percentile(p) * 1e3:.2f}ms" for p in (50, 90, 99, 99.9)))
+    print("  status " + ", ".join(f"{s}: {n}" for s, n in sorted(statuses.items())))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="use a server already running here")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes of the started server")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--endpoint", choices=["single", "batch"], default="single")
+    parser.add_argument("--batch-size", type=int, default=100, help="expressions per batch request")
+    args = parser.parse_args(argv)
+
+    proc = None
+    port = args.port
+    if port is None:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "calc_core.server", "--port", "0", "--workers", str(args.workers)],
+            cwd=ROOT, stdout=subprocess.PIPE, text=True,
+        )
+        # First line: "listening on http://host:port"
+        port = int(proc.stdout.readline().rsplit(":", 1)[1])
+    try:
+        asyncio.run(run_load(args.host, port, args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Benchmark and regression suite for every evaluation path of the project:
+prep_expr_for_eval, evaluate_expression (all number modes, cold and
+cached), spoken_to_expr, CalculatorState.press, the operation dispatch of
+Simple_Calculator.py (calc_core.operations) and the integer path of python_calculator.py.
+
+Workloads are generated from a fixed seed (short and long expressions,
+deep nesting, scientific-heavy formulas, dictated transcripts), so runs
+are comparable between machines and commits. Standard library only; runs
+offline.
+
+Run from the repository root:
+    python benchmarks/suite.py                              # print timings
+    python benchmarks/suite.py --save baseline.json         # store a baseline
+    python benchmarks/suite.py --compare baseline.json      # exit 1 on regressions
+    python benchmarks/suite.py --compare baseline.json --threshold 0.25 --filter evaluate
+
+Each case reports the best (minimum) time per operation over --rounds
+rounds; --compare fails when a case is slower than the baseline by more
+than --threshold (a fraction, default 0.10). Times are compared relative
+to a reference loop timed next to each case (unless --absolute), so a
+machine that is uniformly slower today does not count as a regression.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calc_core.evaluator import clear_cache, evaluate_expression, prep_expr_for_eval
+from calc_core.operations import SCIENTIFIC_OPERATIONS, calculate
+from calc_core.spoken import spoken_to_expr
+from calc_core.state import CalculatorState
+
+SEED = 2024
+
+
+# ---------------- WORKLOADS ----------------
+def _number(rng):
+    if rng.random() < 0.3:
+        return f"{rng.randint(0, 999)}.{rng.randint(0, 99)}"
+    return str(rng.randint(1, 999))
+
+
+def short_expressions(rng, n):
+    """2-4 operands with the basic keypad operators: "12×7−3"."""
+    out = []
+    for _ in range(n):
+        parts = [_number(rng)]
+        for _ in range(rng.randint(1, 3)):
+            parts += [rng.choice("➕−×÷"), _number(rng)]
+        out.append("".join(parts))
+    return out
+
+
+def long_expressions(rng, n, terms=100):
+    """Sums of `terms` products: the kind of line pasted into the display."""
+    return ["➕".join(f"{_number(rng)}×{_number(rng)}" for _ in range(terms)) for _ in range(n)]
+
+
+def nested_expressions(rng, n, depth=40):
+    """((((1+2)×3)−4)÷5 ...) nested `depth` levels deep."""
+    out = []
+    for _ in range(n):
+        expr = _number(rng)
+        for _ in range(depth):
+            expr = f"({expr}{rng.choice('➕−×')}{rng.randint(1, 9)})"
+        out.append(expr)
+    return out
+
+
+def scientific_expressions(rng, n):
+    """Formulas built on the scientific tab: sin(, sqrt(, ln(, log(, π, e, ^."""
+    atoms = ["π", "math.e", "2", "3.5", "10", "0.25"]
+    unary = ["sin(", "cos(", "tan(", "sqrt(", "ln(", "log("]
+    out = []
+    for _ in range(n):
+        terms = []
+        for _ in range(rng.randint(3, 6)):
+            inner = f"{rng.choice(atoms)}×{_number(rng)}"
+            term = f"{rng.choice(unary)}{inner})"
+            if rng.random() < 0.4:
+                term += f"^{rng.randint(2, 3)}"
+            terms.append(term)
+        out.append(rng.choice(["➕", "−"]).join(terms))
+    return out
+
+
+_NUMBER_WORDS = ["one", "two", "three", "seven", "twelve", "forty two", "three hundred forty two",
+                 "ninety nine", "five thousand six hundred", "eight point five"]
+_OPERATOR_WORDS = ["plus", "minus", "times", "divided by", "to the power of", "percent of"]
+_FUNCTION_WORDS = ["square root of", "sine of", "cosine of", "log of"]
+
+
+def transcripts(rng, n, words=12):
+    """Dictated calculations: "square root of forty two plus seven times three"."""
+    out = []
+    for _ in range(n):
+        parts = []
+        for i in range(words):
+            if i:
+                parts.append(rng.choice(_OPERATOR_WORDS))
+            if rng.random() < 0.25:
+                parts.append(rng.choice(_FUNCTION_WORDS))
+            parts.append(rng.choice(_NUMBER_WORDS))
+        out.append(" ".join(parts))
+    return out
+
+
+def int_pairs(rng, n):
+    return [(rng.randint(1, 4), rng.randint(-10 ** 6, 10 ** 6), rng.randint(1, 10 ** 6)) for _ in range(n)]
+
+
+# ---------------- CASES ----------------
+class Case:
+    """
+    fn is called once per item of the workload; before() runs (untimed)
+    before every round, e.g. to empty the expression cache for cold runs.
+    """
+
+    def __init__(self, name, fn, items, before=None):
+        self.name = name
+        self.fn = fn
+        self.items = items
+        self.before = before
+
+
+def _typing(expr):
+    calc = CalculatorState()
+    for key in expr:
+        calc.press(key)
+    calc.press("=")
+    return calc.display_result
+
+
+def build_cases(scale=1.0):
+    rng = random.Random(SEED)
+
+    def n(count):
+        return max(1, int(count * scale))
+
+    short = short_expressions(rng, n(2000))
+    long = long_expressions(rng, n(50))
+    nested = nested_expressions(rng, n(300))
+    scientific = scientific_expressions(rng, n(500))
+    spoken_short = transcripts(rng, n(1000), words=4)
+    spoken_long = transcripts(rng, n(200), words=60)
+    pairs = int_pairs(rng, n(2000))
+    cached = short[:20] * 50
+
+    cases = [
+        Case("prep/short", prep_expr_for_eval, short),
+        Case("prep/long", prep_expr_for_eval, long),
+        Case("prep/scientific", prep_expr_for_eval, scientific),
+        Case("evaluate/short", evaluate_expression, short, before=clear_cache),
+        Case("evaluate/long", evaluate_expression, long, before=clear_cache),
+        Case("evaluate/nested", evaluate_expression, nested, before=clear_cache),
+        Case("evaluate/scientific", evaluate_expression, scientific, before=clear_cache),
+        Case("evaluate/cached", evaluate_expression, cached),
+        Case("evaluate/decimal", lambda e: evaluate_expression(e, "decimal"), scientific, before=clear_cache),
+        Case("evaluate/fraction", lambda e: evaluate_expression(e, "fraction"), short, before=clear_cache),
+        Case("spoken/short", spoken_to_expr, spoken_short),
+        Case("spoken/long", spoken_to_expr, spoken_long),
+        Case("press/typing", _typing, short[:n(500)], before=clear_cache),
+    ]
+
+    # Simple_Calculator.py dispatches through calc_core.operations
+    calls = [(rng.choice(SCIENTIFIC_OPERATIONS), rng.uniform(1, 100), rng.uniform(1, 5)) for _ in range(n(5000))]
+    cases.append(Case("simple_calculator/dispatch", lambda c: calculate(*c), calls))
+
+    from python_calculator import calculate as integer_calculate
+
+    cases.append(Case("python_calculator/integer", lambda p: integer_calculate(*p), pairs, before=clear_cache))
+    return cases
+
+
+# ---------------- RUNNING ----------------
+def measure(case, rounds, min_time):
+    """
+    Per-operation times (seconds) of each round. A round repeats passes
+    over the workload until it has been timed for at least min_time, so
+    short cases are not at the mercy of the clock and the scheduler.
+    """
+    fn, items = case.fn, case.items
+    clock = time.perf_counter
+    times = []
+    for _ in range(rounds):
+        elapsed = 0.0
+        ops = 0
+        while elapsed < min_time or not ops:
+            if case.before is not None:
+                case.before()
+            start = clock()
+            for item in items:
+                fn(item)
+            elapsed += clock() - start
+            ops += len(items)
+        times.append(elapsed / ops)
+    return times
+
+
+def reference_time(repeat=3):
+    """
+    Best time of a fixed pure-Python loop. Measured next to every case, so
+    comparisons can factor out a machine that is slower overall right now
+    (frequency scaling, noisy neighbours on a shared box).
+    """
+    clock = time.perf_counter
+    best = math.inf
+    for _ in range(repeat):
+        start = clock()
+        total = 0
+        for i in range(100_000):
+            total += i * i % 7
+        best = min(best, clock() - start)
+    return best
+
+
+def run(cases, rounds, min_time=0.2):
+    results = {}
+    for case in cases:
+        reference = reference_time()
+        times = measure(case, rounds, min_time)
+        results[case.name] = {
+            "best_ns": min(times) * 1e9,
+            "median_ns": statistics.median(times) * 1e9,
+            "reference_ns": min(reference, reference_time()) * 1e9,
+            "ops": len(case.items),
+            "rounds": rounds,
+        }
+        print(f"  {case.name:<30}{min(times) * 1e6:>12.2f}us  (median {statistics.median(times) * 1e6:.2f}us)",
+              flush=True)
+    return results
+
+
+def compare(results, baseline, threshold, normalize=True):
+    """
+    Print old/new per case; return the names that regressed past threshold.
+    With normalize, times are taken relative to the reference loop
+    measured alongside each case.
+    """
+    regressed = []
+    print(f"\n  {'case':<30}{'baseline':>12}{'now':>12}{'change':>9}")
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"  {name:<30}{'-':>12}{new['best_ns'] / 1e3:>10.2f}us{'new':>9}")
+            continue
+        change = new["best_ns"] / old["best_ns"]
+        if normalize and "reference_ns" in old:
+            change *= old["reference_ns"] / new["reference_ns"]
+        change -= 1
+        flag = ""
+        if change > threshold:
+            regressed.append(name)
+            flag = "  REGRESSION"
+        print(f"  {name:<30}{old['best_ns'] / 1e3:>10.2f}us{new['best_ns'] / 1e3:>10.2f}us"
+              f"{change:>+8.0%}{flag}")
+    return regressed
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--save", metavar="JSON", help="write the results as a baseline file")
+    parser.add_argument("--compare", metavar="JSON", help="compare with a baseline file, exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed slowdown before --compare fails (0.10 = 10%%)")
+    parser.add_argument("--absolute", action="store_true",
+                        help="compare raw times, without correcting for overall machine speed")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--rounds", type=int, default=7, help="timed rounds per case (best one counts)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds each round is timed for, at least")
+    parser.add_argument("--scale", type=float, default=1.0, help="workload size factor (0.1 for a quick run)")
+    args = parser.parse_args(argv)
+
+    cases = [c for c in build_cases(args.scale) if args.filter in c.name]
+    info = machine_info()
+    print(f"Python {info['python']} on {info['platform']}, {args.rounds} rounds")
+    results = run(cases, args.rounds, args.min_time)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"machine": info, "results": results}, f, indent=2, sort_keys=True)
+        print(f"\nbaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["machine"].get("platform") != info["platform"]:
+            print(f"\nnote: baseline was recorded on {baseline['machine'].get('platform')}")
+        regressed = compare(results, baseline["results"], args.threshold, not args.absolute)
+        if regressed:
+            print(f"\n{len(regressed)} case(s) slower than the baseline by more than {args.threshold:.0%}: "
+                  + ", ".join(regressed))
+            return 1
+        print(f"\nno case slower than the baseline by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Calculator logic shared by the Streamlit apps and the command line tools.
+Nothing in this package imports Streamlit.
+
+The names below are loaded on first access, so `import calc_core` itself is
+almost free. Submodules with optional dependencies (vectorized -> NumPy,
+voice -> speech_recognition / pyttsx3) are never imported implicitly.
+"""
+
+# public name -> submodule that defines it
+_EXPORTS = {
+    "CompiledExpression": "engine",
+    "ExpressionError": "engine",
+    "compile_expression": "engine",
+    "parse": "engine",
+    "tokenize": "engine",
+    "cache_stats": "evaluator",
+    "clear_cache": "evaluator",
+    "configure_cache": "evaluator",
+    "configure_result_cache": "evaluator",
+    "evaluate_expression": "evaluator",
+    "get_compiled": "evaluator",
+    "prep_expr_for_eval": "evaluator",
+    "LiveExpression": "incremental",
+    "LimitExceeded": "limits",
+    "configure_limits": "limits",
+    "MODES": "numeric",
+    "format_result": "numeric",
+    "get_backend": "numeric",
+    "KEY_INPUT": "state",
+    "CalculatorState": "state",
+    "spoken_to_expr": "spoken",
+    "SessionStore": "store",
+    "open_store": "store",
+    "Workspace": "workspace",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,203 @@
+"""
+Getting arrays in and out of the matrix mode of Simple_Calculator.py.
+
+    a = parse_array("1 2; 3 4")                 # pasted text
+    b = load_array(upload, "data.csv")          # an uploaded CSV / .npy file
+    window = preview_window(result, 0, 0)       # what the page shows of it
+
+Small inputs are read into memory. Larger ones are spooled to a temporary
+.npy file and memory-mapped read-only, so a 100 MB upload costs page
+cache instead of a second (or, for CSV, a third) copy in the process.
+CSV is converted in blocks of rows straight into the mapped file.
+
+Results are never rendered whole: preview_window() cuts a page out of them
+and summary() gives shape and min / max / mean.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+
+# NumPy is optional for the rest of the package; only this module needs it.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Uploads above this size are memory-mapped
+MMAP_THRESHOLD = 8 * 1024 * 1024
+CSV_BLOCK_ROWS = 4096
+# summary() reads a (possibly mapped) result in blocks of about this many elements
+SUMMARY_BLOCK = 1 << 20
+
+_SEPARATORS = str.maketrans(",;\t", "   ")
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for matrix mode (pip install numpy)")
+
+
+def _rows(lines):
+    """Parse lines of numbers separated by commas, semicolons, tabs or spaces into a 2-D array."""
+    lines = [line.translate(_SEPARATORS) for line in lines if line.strip()]
+    if not lines:
+        return np.empty((0, 0))
+    # NumPy's C parser; raises ValueError for text and ragged rows
+    return np.loadtxt(lines, dtype=np.float64, ndmin=2)
+
+
+def parse_array(text: str):
+    """
+    Pasted numbers: one row per line (or separated by ";"), values by
+    commas or whitespace. A single row gives a vector, a single value a
+    0-d array.
+    """
+    _require_numpy()
+    arr = _rows(text.replace(";", "\n").splitlines())
+    if not arr.size:
+        raise ValueError("no numbers found")
+    if arr.shape == (1, 1):
+        return arr[0, 0]
+    return arr[0] if arr.shape[0] == 1 else arr
+
+
+def _spool(src, directory):
+    fd, path = tempfile.mkstemp(suffix=".npy", dir=directory)
+    with os.fdopen(fd, "wb") as out:
+        shutil.copyfileobj(src, out, 1024 * 1024)
+    return path
+
+
+def _map(path):
+    arr = np.load(path, mmap_mode="r")
+    try:
+        os.unlink(path)   # the mapping keeps the data; nothing to clean up later (POSIX)
+    except OSError:
+        pass
+    return arr
+
+
+def _csv_shape(src):
+    rows = 0
+    cols = None
+    for line in src:
+        if line.strip():
+            if cols is None:
+                cols = len(line.translate(_SEPARATORS).split())
+            rows += 1
+    return rows, cols
+
+
+def _csv_to_npy(src, directory):
+    """Convert a text stream of numbers to a mapped float64 array, one block of rows at a time."""
+    rows, cols = _csv_shape(src)
+    if not rows:
+        raise ValueError("no numbers found")
+    src.seek(0)
+    fd, path = tempfile.mkstemp(suffix=".npy", dir=directory)
+    os.close(fd)
+    out = None
+    try:
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(rows, cols))
+        start = 0
+        block = []
+        for line in src:
+            if line.strip():
+                block.append(line)
+                if len(block) == CSV_BLOCK_ROWS:
+                    out[start:start + len(block)] = _rows(block)
+                    start += len(block)
+                    block = []
+        if block:
+            out[start:start + len(block)] = _rows(block)
+        out.flush()
+    except BaseException:
+        # A bad row partway through: drop the half-written file
+        del out
+        os.unlink(path)
+        raise
+    del out
+    return _map(path)
+
+
+def load_array(file, name: str, directory: str = None):
+    """
+    An array from a binary file object (e.g. a Streamlit upload) named
+    name: .npy, or text (CSV / TSV / whitespace separated). Memory-mapped
+    (read-only) above MMAP_THRESHOLD bytes.
+    """
+    _require_numpy()
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    big = size > MMAP_THRESHOLD
+    if name.lower().endswith(".npy"):
+        if big:
+            return _map(_spool(file, directory))
+        return np.load(file, allow_pickle=False)
+
+    text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    try:
+        if big:
+            arr = _csv_to_npy(text, directory)
+        else:
+            arr = parse_array(text.read())
+    finally:
+        text.detach()   # leave the caller's file open
+    if arr.ndim == 2 and 1 in arr.shape:
+        arr = arr.reshape(-1)   # a single row or column is a vector
+    return arr
+
+
+def summary(arr) -> dict:
+    """
+    Shape, dtype and min / max / mean of the finite elements (NaN if there
+    are none). Read in blocks along the first axis, so a memory-mapped
+    result is never copied whole.
+    """
+    arr = np.asarray(arr)
+    out = {"shape": arr.shape, "dtype": str(arr.dtype), "size": int(arr.size)}
+    complex_ = arr.dtype.kind == "c"
+    if complex_:
+        out["of"] = "|z|"
+    if arr.ndim == 0:
+        arr = arr.reshape(1)
+    step = max(1, SUMMARY_BLOCK // max(1, arr.size // max(1, len(arr))))
+    low, high, total, count = np.inf, -np.inf, 0.0, 0
+    for start in range(0, len(arr), step):
+        block = arr[start:start + step]
+        if complex_:
+            block = np.abs(block)
+        finite = block[np.isfinite(block)]
+        if finite.size:
+            low = min(low, float(finite.min()))
+            high = max(high, float(finite.max()))
+            total += float(finite.sum(dtype=np.float64))
+            count += finite.size
+    if count:
+        out.update(min=low, max=high, mean=total / count)
+    else:
+        out.update(min=float("nan"), max=float("nan"), mean=float("nan"))
+    return out
+
+
+def preview_window(arr, row: int = 0, col: int = 0, rows: int = 20, cols: int = 20):
+    """
+    At most rows × cols elements starting at (row, col), as a 2-D array
+    copy: the only part of a large result that is ever converted for display.
+    """
+    arr = np.asarray(arr)
+    if arr.ndim == 0:
+        return arr.reshape(1, 1)
+    if arr.ndim == 1:
+        return np.array(arr[row:row + rows]).reshape(-1, 1)
+    return np.array(arr[row:row + rows, col:col + cols])
+
+
+def to_npy_bytes(arr) -> bytes:
+    """The array as a .npy file, for a download button."""
+    buf = io.BytesIO()
+    np.save(buf, np.asarray(arr), allow_pickle=False)
+    return buf.getvalue()
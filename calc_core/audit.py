@@ -0,0 +1,145 @@
+"""
+Re-evaluating archived calculator sessions.
+
+A session log is a text file of history lines as written by press("="):
+
+    2+3×4 = 14
+    50% = 0.5
+
+The file is memory-mapped and scanned for line boundaries with mmap.find(),
+so nothing is read or decoded up front. It is cut into byte ranges that end
+on a newline; each range is handled by a worker that maps the same file and
+decodes only one line at a time. Peak memory therefore does not depend on
+the file size.
+"""
+
+import math
+import mmap
+import numbers
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .evaluator import evaluate_expression
+from .limits import apply_worker_limits, timed
+from .numeric import format_result
+
+SEPARATOR = b" = "
+
+# Mismatches kept per byte range (the count is always exact)
+MAX_MISMATCHES_PER_RANGE = 1000
+
+
+def _map_file(f):
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    return mm
+
+
+def split_ranges(path: str, parts: int):
+    """
+    Split a file into at most `parts` (start, end) byte ranges, each ending
+    just after a newline (or at end of file).
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    parts = max(1, parts)
+    ranges = []
+    with open(path, "rb") as f, _map_file(f) as mm:
+        start = 0
+        for i in range(1, parts + 1):
+            if start >= size:
+                break
+            target = size * i // parts
+            if target <= start:
+                continue
+            nl = mm.find(b"\n", target - 1) if i < parts else -1
+            end = size if nl == -1 else nl + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def iter_records(buf, start: int, end: int):
+    """
+    Yield (offset, expression, recorded_result) for each history line in
+    buf[start:end]. buf is an mmap or bytes-like object; lines are sliced
+    through a memoryview and only the line itself is decoded.
+    """
+    view = memoryview(buf)
+    try:
+        pos = start
+        while pos < end:
+            nl = buf.find(b"\n", pos, end)
+            line_end = end if nl == -1 else nl
+            line = bytes(view[pos:line_end]).rstrip(b"\r")
+            sep = line.rfind(SEPARATOR)
+            if sep != -1:
+                expr = line[:sep].decode("utf-8", "replace").strip()
+                recorded = line[sep + len(SEPARATOR):].decode("utf-8", "replace").strip()
+                yield pos, expr, recorded
+            pos = line_end + 1
+    finally:
+        view.release()
+
+
+def reevaluate(expr: str):
+    """Recompute a history entry, including the "expr% = value" form."""
+    if expr.endswith("%"):
+        val = evaluate_expression(expr[:-1])
+        if isinstance(val, numbers.Number):
+            return val / 100
+        return "Error"
+    return evaluate_expression(expr)
+
+
+def results_match(recorded: str, value) -> bool:
+    """Compare a recorded result string with a recomputed value."""
+    text = format_result(value)
+    if text == recorded:
+        return True
+    try:
+        a, b = float(recorded), float(text)
+    except ValueError:
+        return False
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-12) or (math.isnan(a) and math.isnan(b))
+
+
+def audit_range(path: str, start: int, end: int) -> dict:
+    """Re-evaluate every history line in one byte range of the file."""
+    checked = 0
+    mismatches = []
+    mismatch_count = 0
+    with open(path, "rb") as f, _map_file(f) as mm:
+        for offset, expr, recorded in iter_records(mm, start, end):
+            checked += 1
+            value = timed(reevaluate, expr)
+            if not results_match(recorded, value):
+                mismatch_count += 1
+                if len(mismatches) < MAX_MISMATCHES_PER_RANGE:
+                    mismatches.append((offset, expr, recorded, format_result(value)))
+    return {"checked": checked, "mismatch_count": mismatch_count, "mismatches": mismatches}
+
+
+def audit_file(path: str, workers: int = 1, parts=None) -> dict:
+    """
+    Re-evaluate a whole session log. workers=0 runs in this process.
+    Returns totals plus a list of (byte_offset, expression, recorded, recomputed).
+    """
+    parts = parts or max(1, workers) * 4
+    ranges = split_ranges(path, parts)
+
+    if workers <= 0:
+        results = [audit_range(path, s, e) for s, e in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=apply_worker_limits) as pool:
+            futures = [pool.submit(audit_range, path, s, e) for s, e in ranges]
+            results = [f.result() for f in futures]
+
+    summary = {"checked": 0, "mismatch_count": 0, "mismatches": []}
+    for r in results:
+        summary["checked"] += r["checked"]
+        summary["mismatch_count"] += r["mismatch_count"]
+        summary["mismatches"].extend(r["mismatches"])
+    return summary
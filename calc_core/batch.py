@@ -0,0 +1,231 @@
+"""
+Bulk evaluation of expressions read from a file or stdin.
+
+Everything is a generator pipeline, so memory stays bounded no matter how
+large the input is:
+
+    read_expressions()  -> one expression at a time (text, CSV or JSONL)
+    chunked()           -> lists of chunk_size expressions
+    evaluate_stream()   -> chunks evaluated in a process pool, results
+                           yielded back in input order
+
+At most `workers * 2` chunks are in flight at any moment.
+"""
+
+import csv
+import io
+import json
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .evaluator import evaluate_expression
+from .limits import apply_worker_limits, timed
+from .numeric import format_result
+
+# Keys looked up (in order) when reading JSONL records
+JSON_KEYS = ("expression", "expr")
+
+
+class InvalidRecord(str):
+    """The text of an input record that holds no expression; its result is "Error"."""
+
+
+# ---------------- INPUT ----------------
+def read_expressions(stream, fmt: str = "text", column=None):
+    """
+    Yield expression strings from an open text stream.
+
+    fmt:
+      - "text": one expression per line (blank lines are skipped)
+      - "csv":  expression taken from `column` (header name), or the first column
+      - "jsonl": one JSON object per line, expression under `column` or
+                 "expression" / "expr" (a bare JSON string or number is the
+                 expression itself)
+
+    A JSONL line that is not valid JSON, or has no expression, is yielded as
+    an InvalidRecord of its text, so it gets an "Error" row of its own
+    instead of stopping (or silently shrinking) the run.
+    """
+    if fmt == "text":
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield line
+
+    elif fmt == "csv":
+        if column is None:
+            for row in csv.reader(stream):
+                if row and row[0].strip():
+                    yield row[0].strip()
+        else:
+            for row in csv.DictReader(stream):
+                value = (row.get(column) or "").strip()
+                if value:
+                    yield value
+
+    elif fmt == "jsonl":
+        keys = (column,) if column else JSON_KEYS
+        for line in stream:
+            text = line.strip()
+            if not text:
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError:
+                yield InvalidRecord(text)
+                continue
+            if isinstance(record, str):
+                yield record
+            elif isinstance(record, (int, float)) and not isinstance(record, bool):
+                yield text
+            elif isinstance(record, dict):
+                for key in keys:
+                    if key in record:
+                        yield str(record[key])
+                        break
+                else:
+                    yield InvalidRecord(text)
+            else:
+                yield InvalidRecord(text)   # list, true/false, null
+
+    else:
+        raise ValueError(f"Unknown input format: {fmt!r}")
+
+
+def chunked(items, size: int):
+    """Group an iterable into lists of at most `size` items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ---------------- WORKER ----------------
+def evaluate_chunk(exprs):
+    """
+    Evaluate a list of expressions. Runs inside a worker process.
+    Returns a list of (expression, result_text, seconds) tuples.
+    """
+    out = []
+    clock = time.perf_counter
+    for expr in exprs:
+        if isinstance(expr, InvalidRecord):
+            out.append((expr, "Error", 0.0))
+            continue
+        start = clock()
+        result = timed(evaluate_expression, expr)
+        out.append((expr, format_result(result), clock() - start))
+    return out
+
+
+def evaluate_stream(exprs, workers: int = 1, chunk_size: int = 1000):
+    """
+    Evaluate an iterable of expressions and yield (expression, result, seconds)
+    in input order. workers=0 evaluates in the current process.
+    """
+    chunks = chunked(exprs, chunk_size)
+
+    if workers <= 0:
+        for chunk in chunks:
+            yield from evaluate_chunk(chunk)
+        return
+
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=apply_worker_limits) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(evaluate_chunk, chunk))
+            # Wait for the oldest chunk before reading more input
+            if len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# ---------------- OUTPUT + STATS ----------------
+class LatencyStats:
+    """
+    Running count / total plus a fixed-size reservoir sample of latencies,
+    so percentiles can be reported without keeping every measurement.
+    """
+
+    def __init__(self, reservoir_size: int = 10_000, seed: int = 0):
+        self.count = 0
+        self.total = 0.0
+        self.reservoir_size = reservoir_size
+        self.sample = []
+        self._rng = random.Random(seed)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if len(self.sample) < self.reservoir_size:
+            self.sample.append(seconds)
+        else:
+            j = self._rng.randrange(self.count)
+            if j < self.reservoir_size:
+                self.sample[j] = seconds
+
+    def percentile(self, p: float) -> float:
+        if not self.sample:
+            return 0.0
+        ordered = sorted(self.sample)
+        idx = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[idx]
+
+
+def format_record(expr: str, result: str, fmt: str) -> str:
+    """One output line: 'expr = result', or a JSON object for JSONL input."""
+    if fmt == "jsonl":
+        return json.dumps({"expression": expr, "result": result}, ensure_ascii=False)
+    return f"{expr} = {result}"
+
+
+def run_batch(in_stream, out_stream, fmt: str = "text", column=None,
+              workers: int = 1, chunk_size: int = 1000) -> dict:
+    """
+    Read expressions from in_stream, write one result line per expression to
+    out_stream (in input order) and return throughput statistics.
+    """
+    stats = LatencyStats()
+    errors = 0
+    start = time.perf_counter()
+
+    exprs = read_expressions(in_stream, fmt, column)
+    for expr, result, seconds in evaluate_stream(exprs, workers, chunk_size):
+        out_stream.write(format_record(expr, result, fmt) + "\n")
+        stats.add(seconds)
+        if result == "Error":
+            errors += 1
+
+    elapsed = time.perf_counter() - start
+    return {
+        "count": stats.count,
+        "errors": errors,
+        "seconds": elapsed,
+        "per_second": stats.count / elapsed if elapsed > 0 else 0.0,
+        "p50_us": stats.percentile(50) * 1e6,
+        "p99_us": stats.percentile(99) * 1e6,
+    }
+
+
+def format_stats(stats: dict) -> str:
+    return (
+        f"{stats['count']} expressions ({stats['errors']} errors) in {stats['seconds']:.2f}s"
+        f" | {stats['per_second']:,.0f} expr/s"
+        f" | latency p50 {stats['p50_us']:.1f}us p99 {stats['p99_us']:.1f}us"
+    )
+
+
+def open_input(path: str):
+    """Open `path` for reading; '-' means stdin."""
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+    return open(path, encoding="utf-8", newline="")
@@ -0,0 +1,89 @@
+"""
+A small thread-safe LRU cache with hit / miss / eviction counters.
+
+Used process-wide for compiled expressions (see calc_core.evaluator), so
+that reruns of the Streamlit script and repeated "%" / "=" presses do not
+re-parse the same text.
+"""
+
+# _thread (the C module behind threading) and a plain dict keep this module
+# cheap to import; dicts preserve insertion order, which is all LRU needs.
+import _thread
+
+
+class LRUCache:
+    """
+    Bounded mapping that evicts the least recently used entry once it holds
+    more than maxsize items. All operations take a lock, so one instance can
+    be shared between threads (Streamlit runs every session in its own thread).
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self.maxsize = maxsize
+        self._data = {}   # oldest first
+        self._lock = _thread.allocate_lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data[key] = value   # re-insert as most recent
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            if self.maxsize == 0:
+                return
+            self._data.pop(key, None)
+            self._data[key] = value
+            self._evict()
+
+    def pop(self, key, default=None):
+        """Remove key and return its value (default if absent)."""
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def resize(self, maxsize: int):
+        """Change the capacity, evicting old entries if it shrinks."""
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def _evict(self):
+        # Caller holds the lock
+        while len(self._data) > self.maxsize:
+            del self._data[next(iter(self._data))]
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
@@ -0,0 +1,468 @@
+"""
+Numerical calculus over calculator expressions:
+
+    integrate(expr, x, a, b)    definite integral of expr for x from a to b
+    diff(expr, x, at)           derivative of expr with respect to x at x = at
+    solve(expr, x, guess)       a root of expr (expr = 0) near guess
+    solve(expr, x, lo, hi)      a root of expr between lo and hi
+
+These are special forms of calc_core.engine: the first argument is an
+expression in the variable named by the second, and it is compiled once,
+together with the rest of the line, then sampled as often as the method
+needs. The other arguments are ordinary expressions.
+
+  - integrate: adaptive Gauss-Kronrod quadrature (7-point Gauss inside a
+    15-point Kronrod rule). Each round, every interval still being refined
+    is sampled in a single vectorized NumPy call; an interval whose error
+    estimate fits its share of the tolerance is kept, the others are
+    bisected for the next round.
+  - diff: central differences with shrinking steps, combined by Richardson
+    extrapolation (Ridders' tableau), keeping the entry with the smallest
+    error estimate.
+  - solve: Brent's method (bisection, secant and inverse quadratic
+    interpolation) on a bracket with a sign change. From a single guess,
+    the bracket is first searched outward, a batch of points at a time.
+
+The methods work in floating point whatever the numeric mode; the result
+is converted to the mode's number type. In decimal and fraction modes the
+expression can use the built-in functions only. Without NumPy, or when the
+expression calls something NumPy cannot (a workspace function, a nested
+integrate ...), points are evaluated one at a time through the same
+compiled closures.
+
+The methods are also usable from Python, on compile_function() results:
+
+    f = compile_function("sin(x)^2").bind()
+    integrate(f, 0, math.pi)    # Estimate(value=1.5707963267948966, error=..., evaluations=15)
+"""
+
+import math
+from collections import namedtuple
+
+# Names handled here rather than as backend functions (see engine._compile_node)
+FORMS = frozenset({"integrate", "diff", "solve"})
+
+_USAGE = {
+    "integrate": "integrate(expr, x, a, b)",
+    "diff": "diff(expr, x, at)",
+    "solve": "solve(expr, x, guess) or solve(expr, x, lo, hi)",
+}
+_ARITY = {"integrate": (4,), "diff": (3,), "solve": (3, 4)}
+
+Estimate = namedtuple("Estimate", ["value", "error", "evaluations"])
+Estimate.__doc__ = """value, estimated absolute error, and number of points evaluated."""
+
+_EPS = 2.0 ** -52
+
+# Points that cannot be evaluated (domain errors, complex results) become NaN
+_FAILURES = (ArithmeticError, ValueError, TypeError)
+
+
+# ---------------- COMPILED FUNCTIONS ----------------
+class Function:
+    """
+    An expression as a function of one variable, compiled once: scalar
+    closures from calc_core.engine and, when NumPy can run it, array
+    closures from calc_core.vectorized. names holds the other variables it
+    reads; bind() fixes their values.
+    """
+
+    __slots__ = ("var", "names", "_scalar", "_vector")
+
+    def __init__(self, ast, var: str, backend=None, vectorized: bool = True):
+        from .engine import _compile_node, free_names
+        from .numeric import FLOAT
+        from .optimize import optimize
+
+        # Sampling is done in floats; a float backend is kept for its workspace functions
+        if backend is None or backend.name != "float":
+            backend = FLOAT
+        tree = optimize(ast, backend)
+        self.var = var
+        self.names = frozenset(free_names(ast) - {var})
+        self._scalar = _compile_node(tree, backend)
+        self._vector = _vector_form(tree) if vectorized and backend is FLOAT else None
+
+    def bind(self, env=None) -> "Sampler":
+        """A Sampler with the other variables taken (as floats) from env."""
+        return Sampler(self, {name: float(env[name]) for name in self.names} if self.names else {})
+
+
+def _vector_form(tree):
+    from .engine import ExpressionError
+    from .vectorized import _compile_vector_node, _ufuncs, np
+
+    if np is None:
+        return None
+    try:
+        return _compile_vector_node(tree, _ufuncs())
+    except ExpressionError:
+        return None   # calls something NumPy cannot run
+
+
+class Sampler:
+    """
+    A Function with the other variables fixed. f(x) evaluates one point
+    (and raises where the expression does); f.many(xs) evaluates a list
+    of points, NaN where one fails. evaluations counts the points.
+    """
+
+    __slots__ = ("_function", "_env", "evaluations")
+
+    def __init__(self, function: Function, env: dict):
+        self._function = function
+        self._env = env
+        self.evaluations = 0
+
+    @property
+    def vectorized(self) -> bool:
+        return self._function._vector is not None
+
+    def __call__(self, x: float) -> float:
+        self.evaluations += 1
+        env = dict(self._env)
+        env[self._function.var] = x
+        y = float(self._function._scalar(env))
+        if not math.isfinite(y):
+            raise ArithmeticError(f"the expression is not finite at {x:.17g}")
+        return y
+
+    def many(self, xs) -> list:
+        self.evaluations += len(xs)
+        fn = self._function
+        if fn._vector is not None:
+            from .vectorized import np
+
+            points = np.asarray(xs, dtype=float)
+            env = dict(self._env)
+            env[fn.var] = points
+            with np.errstate(all="ignore"):
+                try:
+                    ys = np.broadcast_to(fn._vector(env), points.shape).astype(float)
+                except _FAILURES:
+                    ys = np.full(points.shape, np.nan)   # a constant part failed, e.g. 1/0
+            ys[~np.isfinite(ys)] = np.nan
+            return ys.tolist()
+
+        env = dict(self._env)
+        ys = []
+        for x in xs:
+            env[fn.var] = x
+            try:
+                y = float(fn._scalar(env))
+            except _FAILURES:
+                y = math.nan
+            ys.append(y if math.isfinite(y) else math.nan)
+        return ys
+
+
+def compile_function(expr: str, var: str = "x", mode: str = "float", vectorized: bool = True) -> Function:
+    """
+    Compile a display expression (as typed in the calculator) as a function
+    of var. vectorized=False samples point by point even when NumPy could
+    (for comparisons).
+    """
+    from .engine import parse
+    from .evaluator import prep_expr_for_eval
+    from .numeric import get_backend
+
+    return Function(parse(prep_expr_for_eval(expr)), var, get_backend(mode), vectorized)
+
+
+# ---------------- INTEGRATION ----------------
+# 15-point Kronrod nodes on [-1, 1] (the odd ones are the 7-point Gauss nodes) and weights
+_XK = (0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+       0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+       0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+       0.207784955007898467600689403773245)
+_WK = (0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+       0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+       0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+       0.204432940075298892414161999234649)
+_WK0 = 0.209482141084727828012999174891714
+_WG = (0.129484966168869693270611432679082, 0.279705391489276667901467771423780,
+       0.381830050505118944950369775488975)
+_WG0 = 0.417959183673469387755102040816327
+
+_NODES = tuple(-x for x in _XK) + (0.0,) + _XK[::-1]
+_KRONROD = _WK + (_WK0,) + _WK[::-1]
+_GAUSS = (0, _WG[0], 0, _WG[1], 0, _WG[2], 0, _WG0, 0, _WG[2], 0, _WG[1], 0, _WG[0], 0)
+
+
+def _kronrod(ys, half):
+    """(integral, error estimate) of one interval from its 15 samples."""
+    k = math.fsum(w * y for w, y in zip(_KRONROD, ys))
+    g = math.fsum(w * y for w, y in zip(_GAUSS, ys))
+    mean = k / 2
+    # QUADPACK's error estimate: |K - G| scaled by how smooth f looks on the interval
+    asc = half * math.fsum(w * abs(y - mean) for w, y in zip(_KRONROD, ys))
+    err = half * abs(k - g)
+    if asc and err:
+        err = asc * min(1.0, (200 * err / asc) ** 1.5)
+    resabs = half * math.fsum(w * abs(y) for w, y in zip(_KRONROD, ys))
+    return half * k, max(err, 50 * _EPS * resabs)
+
+
+def _sample(f, spans):
+    """Gauss-Kronrod (integral, error) of several intervals from one f.many() call."""
+    from .vectorized import np
+
+    if np is None:
+        points = []
+        for lo, hi in spans:
+            mid, half = (lo + hi) / 2, (hi - lo) / 2
+            points.extend(mid + half * t for t in _NODES)
+        ys = f.many(points)
+        results = []
+        for i, (lo, hi) in enumerate(spans):
+            row = ys[15 * i:15 * i + 15]
+            if any(y != y for y in row):
+                bad = next(x for x, y in zip(points[15 * i:], row) if y != y)
+                raise ArithmeticError(f"the integrand is not finite at {bad:.17g}")
+            results.append(_kronrod(row, (hi - lo) / 2))
+        return results
+
+    # The same rule for all the intervals at once, as matrix products
+    bounds = np.array(spans)
+    mid = (bounds[:, 0] + bounds[:, 1]) / 2
+    half = (bounds[:, 1] - bounds[:, 0]) / 2
+    points = (mid[:, None] + half[:, None] * np.array(_NODES)).ravel()
+    ys = np.array(f.many(points.tolist())).reshape(-1, 15)
+    failed = np.isnan(ys).ravel()
+    if failed.any():
+        raise ArithmeticError(f"the integrand is not finite at {points[failed][0]:.17g}")
+    kronrod, gauss = np.array(_KRONROD), np.array(_GAUSS)
+    k = ys @ kronrod
+    err = half * np.abs(k - ys @ gauss)
+    asc = half * (np.abs(ys - k[:, None] / 2) @ kronrod)
+    with np.errstate(all="ignore"):
+        scaled = asc * np.minimum(1.0, (200 * err / asc) ** 1.5)
+    err = np.where((asc > 0) & (err > 0), scaled, err)
+    err = np.maximum(err, 50 * _EPS * half * (np.abs(ys) @ kronrod))
+    return list(zip((half * k).tolist(), err.tolist()))
+
+
+def integrate(f, a: float, b: float, abs_tol: float = 1e-12, rel_tol: float = 1e-10,
+              max_evaluations: int = 100_000) -> Estimate:
+    """
+    Adaptive Gauss-Kronrod integral of f from a to b. f is a Sampler (or
+    anything with many(xs) -> values).
+
+    Each round bisects the intervals with the largest error estimates,
+    as many as needed for the others to fit in half the tolerance, and
+    samples all the new halves together. Raises ArithmeticError where f is
+    not finite or if the tolerance is not met within max_evaluations.
+    """
+    if not (math.isfinite(a) and math.isfinite(b)):
+        raise ArithmeticError("integration bounds must be finite")
+    if a == b:
+        return Estimate(0.0, 0.0, 0)
+    sign = 1.0
+    if a > b:
+        a, b, sign = b, a, -1.0
+
+    spans = [(a, b)]
+    results = _sample(f, spans)
+    evaluations = 15
+    while True:
+        total = math.fsum(err for _, err in results)
+        tol = max(abs_tol, rel_tol * abs(math.fsum(k for k, _ in results)))
+        if total <= tol:
+            break
+        split = set()
+        rest = total
+        for i in sorted(range(len(spans)), key=lambda i: -results[i][1]):
+            if rest <= tol / 2:
+                break
+            lo, hi = spans[i]
+            # Down to the resolution of floats (an integrable singularity at an end)
+            if hi - lo > 64 * _EPS * max(abs(lo), abs(hi)):
+                split.add(i)
+                rest -= results[i][1]
+        if not split:
+            break
+        if evaluations + 30 * len(split) > max_evaluations:
+            raise ArithmeticError(f"the integral did not converge in {max_evaluations} evaluations")
+        halves = []
+        for i in split:
+            lo, hi = spans[i]
+            mid = (lo + hi) / 2
+            halves += [(lo, mid), (mid, hi)]
+        kept = [i for i in range(len(spans)) if i not in split]
+        spans = [spans[i] for i in kept] + halves
+        results = [results[i] for i in kept] + _sample(f, halves)
+        evaluations += 15 * len(halves)
+    return Estimate(sign * math.fsum(k for k, _ in results), total, evaluations)
+
+
+# ---------------- DIFFERENTIATION ----------------
+_STEPS = 10        # central differences in the tableau
+_SHRINK = 1.4      # step ratio between them
+_SAFE = 2.0        # stop once the tableau's error grows by this much
+
+
+def differentiate(f, x: float, h: float = None) -> Estimate:
+    """
+    Derivative of f at x by Ridders' method: central differences with
+    steps h, h/1.4, h/1.4^2 ... (all points in one f.many() call),
+    extrapolated to step 0. Steps whose points cannot be evaluated (too
+    close to the edge of the domain) are skipped.
+    """
+    if h is None:
+        h = 0.1 * max(abs(x), 0.01)
+    steps = [h / _SHRINK ** i for i in range(_STEPS)]
+    ys = f.many([x + s for s in steps] + [x - s for s in steps])
+    central = [(ys[i] - ys[_STEPS + i]) / (2 * s) for i, s in enumerate(steps)]
+    # The smallest steps go first when x is near a domain edge: start after the last failure
+    first = max((i + 1 for i, d in enumerate(central) if d != d), default=0)
+    if first == _STEPS:
+        raise ArithmeticError(f"the expression cannot be evaluated around {x:.17g}")
+
+    best, error = central[first], math.inf
+    previous = [central[first]]
+    for i in range(first + 1, _STEPS):
+        row = [central[i]]
+        factor = _SHRINK ** 2
+        for j in range(1, i - first + 1):
+            row.append((row[j - 1] * factor - previous[j - 1]) / (factor - 1))
+            factor *= _SHRINK ** 2
+            change = max(abs(row[j] - row[j - 1]), abs(row[j] - previous[j - 1]))
+            if change <= error:
+                best, error = row[j], change
+        if abs(row[-1] - previous[-1]) >= _SAFE * error:
+            break
+        previous = row
+    return Estimate(best, error, 2 * _STEPS)
+
+
+# ---------------- ROOTS ----------------
+_GROWTH = 1.6      # step ratio of the bracket search
+_BATCH = 8         # steps per side evaluated together
+_LEVELS = 64       # 0.01 * 1.6^64 ~ 10^11 times max(|guess|, 1)
+
+
+def _sign_change(xs, ys):
+    """First (x0, y0, x1, y1) along xs where y changes sign (or is 0), or None."""
+    for x0, y0, x1, y1 in zip(xs, ys, xs[1:], ys[1:]):
+        if y0 == y0 and y1 == y1 and (y1 == 0 or (y0 < 0) != (y1 < 0)):
+            return x0, y0, x1, y1
+    return None
+
+
+def _bracket(f, guess):
+    """Search outward from guess, on both sides, for the nearest sign change."""
+    step = 0.01 * max(abs(guess), 1.0)
+    right, left = [guess], [guess]
+    right_ys = left_ys = f.many([guess])
+    if right_ys[0] == 0:
+        return guess, 0.0, guess, 0.0
+    for start in range(0, _LEVELS, _BATCH):
+        offsets = [step * _GROWTH ** k for k in range(start, start + _BATCH)]
+        ys = f.many([guess + d for d in offsets] + [guess - d for d in offsets])
+        right, right_ys = right[-1:] + [guess + d for d in offsets], right_ys[-1:] + ys[:_BATCH]
+        left, left_ys = left[-1:] + [guess - d for d in offsets], left_ys[-1:] + ys[_BATCH:]
+        found = [b for b in (_sign_change(right, right_ys), _sign_change(left, left_ys)) if b]
+        if found:
+            return min(found, key=lambda b: abs(b[0] - guess))
+    raise ArithmeticError(f"no sign change found around {guess:.17g}")
+
+
+def _brent(f, a, fa, b, fb, max_iterations=200):
+    """Brent's method on [a, b] where fa and fb have opposite signs."""
+    c, fc = b, fb
+    d = e = b - a
+    for _ in range(max_iterations):
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol = 2 * _EPS * abs(b) + 1e-300
+        xm = (c - b) / 2
+        if abs(xm) <= tol or fb == 0:
+            return b
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:   # secant
+                p, q = 2 * xm * s, 1 - s
+            else:        # inverse quadratic interpolation
+                q, r = fa / fc, fb / fc
+                p = s * (2 * xm * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * xm * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = xm
+        else:
+            d = e = xm   # bisection
+        a, fa = b, fb
+        b += d if abs(d) > tol else math.copysign(tol, xm)
+        fb = f(b)
+    return b
+
+
+def find_root(f, guess: float, hi: float = None) -> Estimate:
+    """
+    A root of f by Brent's method: between guess and hi when hi is given,
+    otherwise in the nearest bracket found around guess. Raises
+    ArithmeticError when there is no sign change, or when the one found
+    is a pole (1/x, tan) rather than a root.
+    """
+    start = f.evaluations
+    if hi is None:
+        a, fa, b, fb = _bracket(f, guess)
+    else:
+        a, b = guess, hi
+        fa, fb = f(a), f(b)
+        if fa != 0 and fb != 0 and (fa < 0) == (fb < 0):
+            raise ArithmeticError("the expression has the same sign at both ends of the interval")
+    if fa == 0:
+        return Estimate(a, 0.0, f.evaluations - start)
+    if fb == 0:
+        return Estimate(b, 0.0, f.evaluations - start)
+    root = _brent(f, a, fa, b, fb)
+    if abs(f(root)) > 1e-6 * max(1.0, abs(fa), abs(fb)):
+        raise ArithmeticError(f"the sign change at {root:.17g} is a discontinuity, not a root")
+    return Estimate(root, 2 * _EPS * abs(root), f.evaluations - start)
+
+
+# ---------------- SPECIAL FORMS ----------------
+_METHODS = {"integrate": integrate, "diff": differentiate, "solve": find_root}
+
+
+def form_names(node, names_of):
+    """Variables read by a calculus call: those of the expression minus its own, plus the bounds'."""
+    args = node[2]
+    names = set()
+    if args:
+        names = names_of(args[0])
+        if len(args) > 1 and args[1][0] == "name":
+            names.discard(args[1][1])
+    for a in args[2:]:
+        names |= names_of(a)
+    return names
+
+
+def compile_form(node, backend):
+    """Closure (env -> value) for a ("call", form, args) node; see engine._compile_node."""
+    from .engine import ExpressionError, _compile_node
+    from .optimize import optimize
+
+    name, args = node[1], node[2]
+    if len(args) not in _ARITY[name]:
+        raise ExpressionError(f"usage: {_USAGE[name]}")
+    var = args[1]
+    if var[0] != "name" or var[1] in backend.constants or var[1] in backend.functions:
+        raise ExpressionError(f"the second argument of {name}() must be a variable name")
+    function = Function(args[0], var[1], backend)
+    bounds = [_compile_node(optimize(a, backend), backend) for a in args[2:]]
+    method = _METHODS[name]
+    literal = backend.literal
+
+    def form(env):
+        return literal(method(function.bind(env), *[float(a(env)) for a in bounds]).value)
+    return form
@@ -0,0 +1,331 @@
+"""
+Expression engine for the calculator.
+
+Instead of handing a rewritten string to eval() on every "=" press, the
+expression is:
+  1. tokenized in a single regex pass,
+  2. parsed by a small Pratt parser into a tuple-based AST,
+  3. simplified by calc_core.optimize (constant folding, identities,
+     common subexpressions),
+  4. compiled once into a tree of Python closures.
+
+The compiled form can then be evaluated any number of times without
+touching the parser again. Only functions and constants listed in
+FUNCTIONS / CONSTANTS can be reached, so there is no way to get at
+builtins or attributes the way eval() could.
+"""
+
+from .calculus import FORMS, compile_form, form_names
+from .limits import check_power
+from .numeric import FLOAT
+from .optimize import optimize
+
+# ---------------- WHITELISTED NAMES ----------------
+# These are the names produced by prep_expr_for_eval() (and the "e" button).
+# Each numeric backend (see calc_core.numeric) provides its own implementations.
+FUNCTIONS = FLOAT.functions
+CONSTANTS = FLOAT.constants
+BINARY_OPS = FLOAT.ops
+
+# Left binding power of each infix operator (higher binds tighter).
+_INFIX_BP = {
+    "+": 10, "-": 10,
+    "*": 20, "/": 20, "//": 20, "%": 20,
+    "**": 40,
+}
+# Unary +/- bind looser than ** so that -2**2 == -(2**2), like Python.
+_PREFIX_BP = 30
+
+_INF = float("inf")
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression cannot be tokenized, parsed or compiled."""
+
+
+# ---------------- TOKENIZER ----------------
+_TOKEN_PATTERN = r"""
+    \s*(?:
+        (?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<name>[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*)
+      | (?P<op>\*\*|//|[-+*/%(),])
+    )
+"""
+_token_re = None
+
+
+def _get_token_re():
+    # Compiled on first use: importing `re` is a large share of the import
+    # time of this package, and cached expressions never need the tokenizer.
+    global _token_re
+    if _token_re is None:
+        import re
+
+        _token_re = re.compile(_TOKEN_PATTERN, re.VERBOSE)
+    return _token_re
+
+
+def tokenize(src: str):
+    """
+    Split an expression into (kind, value) tokens in one left-to-right pass.
+    kind is "num", "name" or "op". Numbers are already converted to int/float.
+    """
+    token_re = _get_token_re()
+    tokens = []
+    pos = 0
+    end = len(src.rstrip())
+    while pos < end:
+        m = token_re.match(src, pos)
+        if m is None or m.end() == pos:
+            raise ExpressionError(f"Unexpected character at position {pos}: {src[pos:pos + 1]!r}")
+        kind = m.lastgroup
+        text = m.group(kind)
+        if kind == "num":
+            if "." in text or "e" in text or "E" in text:
+                tokens.append(("num", float(text)))
+            else:
+                tokens.append(("num", int(text)))
+        else:
+            tokens.append((kind, text))
+        pos = m.end()
+    return tokens
+
+
+# ---------------- PARSER (PRATT) ----------------
+# AST nodes are plain tuples:
+#   ("num", value)
+#   ("name", "math.pi" | variable name)
+#   ("neg", node) / ("pos", node)
+#   ("bin", op, left, right)
+#   ("call", "math.sin", (arg, ...))
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.i = 0
+
+    def peek(self):
+        if self.i < len(self.tokens):
+            return self.tokens[self.i]
+        return (None, None)
+
+    def advance(self):
+        tok = self.peek()
+        self.i += 1
+        return tok
+
+    def expect(self, value):
+        kind, val = self.advance()
+        if kind != "op" or val != value:
+            raise ExpressionError(f"Expected {value!r}")
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionError("Empty expression")
+        node = self.expr(0)
+        if self.i != len(self.tokens):
+            raise ExpressionError(f"Unexpected token {self.peek()[1]!r}")
+        return node
+
+    def expr(self, rbp):
+        left = self.nud()
+        while True:
+            kind, val = self.peek()
+            if kind != "op" or val not in _INFIX_BP:
+                return left
+            lbp = _INFIX_BP[val]
+            if lbp <= rbp:
+                return left
+            self.advance()
+            # ** is right associative, everything else is left associative
+            right = self.expr(lbp - 1 if val == "**" else lbp)
+            left = ("bin", val, left, right)
+
+    def nud(self):
+        kind, val = self.advance()
+        if kind == "num":
+            return ("num", val)
+        if kind == "name":
+            nkind, nval = self.peek()
+            if nkind == "op" and nval == "(":
+                self.advance()
+                args = []
+                if self.peek() != ("op", ")"):
+                    args.append(self.expr(0))
+                    while self.peek() == ("op", ","):
+                        self.advance()
+                        args.append(self.expr(0))
+                self.expect(")")
+                return ("call", val, tuple(args))
+            return ("name", val)
+        if kind == "op":
+            if val == "(":
+                node = self.expr(0)
+                self.expect(")")
+                return node
+            if val == "-":
+                return ("neg", self.expr(_PREFIX_BP))
+            if val == "+":
+                return ("pos", self.expr(_PREFIX_BP))
+        if kind is None:
+            raise ExpressionError("Unexpected end of expression")
+        raise ExpressionError(f"Unexpected token {val!r}")
+
+
+def parse(src: str):
+    """Parse an expression string into an AST (see the node list above)."""
+    return _Parser(tokenize(src)).parse()
+
+
+# ---------------- COMPILER ----------------
+def _compile_node(node, backend=FLOAT):
+    """
+    Turn an AST node into a closure taking one argument: the variable
+    environment (a dict). Constant leaves capture their value directly.
+    Literals, operators and functions come from the numeric backend.
+    """
+    kind = node[0]
+
+    if kind == "num":
+        value = backend.literal(node[1])
+        return lambda env: value
+
+    if kind == "name":
+        name = node[1]
+        if name in backend.constants:
+            value = backend.constants[name]
+            return lambda env: value
+        if name in backend.functions:
+            raise ExpressionError(f"{name} must be called")
+        return lambda env: env[name]
+
+    if kind == "neg":
+        inner = _compile_node(node[1], backend)
+        return lambda env: -inner(env)
+
+    if kind == "pos":
+        inner = _compile_node(node[1], backend)
+        return lambda env: +inner(env)
+
+    if kind == "bin":
+        op = backend.ops[node[1]]
+        left = _compile_node(node[2], backend)
+        right = _compile_node(node[3], backend)
+        return lambda env: op(left(env), right(env))
+
+    if kind == "call":
+        name = node[1]
+        if name in FORMS:
+            # integrate / diff / solve: the first argument is a function of the second
+            return compile_form(node, backend)
+        if name not in backend.functions:
+            raise ExpressionError(f"Unknown function {name!r}")
+        fn = backend.functions[name]
+        args = [_compile_node(a, backend) for a in node[2]]
+        # Specialize the common one-argument case to skip building a list
+        if len(args) == 1:
+            arg = args[0]
+            return lambda env: fn(arg(env))
+        return lambda env: fn(*[a(env) for a in args])
+
+    # Node kinds produced by calc_core.optimize
+    if kind == "const":
+        value = node[1]
+        return lambda env: value
+
+    if kind == "sq":
+        inner = _compile_node(node[1], backend)
+        # x ** 2 of an exact value is size-checked like any other power
+        if backend is FLOAT:
+            def square(env):
+                v = inner(env)
+                if type(v) is int:
+                    check_power(v, 2)
+                r = v * v
+                # x ** 2 raises on float overflow where x * x gives inf
+                if r == _INF and abs(v) != _INF:
+                    raise OverflowError("Numerical result out of range")
+                return r
+            return square
+
+        if backend.name == "fraction":
+            def square(env):
+                v = inner(env)
+                check_power(v, 2)
+                return v * v
+            return square
+
+        def square(env):
+            v = inner(env)
+            return v * v
+        return square
+
+    if kind == "let":
+        slots = tuple(zip(node[1], [_compile_node(n, backend) for n in node[2]]))
+        body = _compile_node(node[3], backend)
+
+        def let(env):
+            env = dict(env)
+            for slot, fn in slots:
+                env[slot] = fn(env)
+            return body(env)
+        return let
+
+    if kind == "ref":
+        slot = node[1]
+        return lambda env: env[slot]
+
+    raise ExpressionError(f"Unknown node {kind!r}")
+
+
+def free_names(node):
+    """Return the set of variable names (non-whitelisted names) used in an AST."""
+    kind = node[0]
+    if kind == "name":
+        return set() if node[1] in CONSTANTS else {node[1]}
+    if kind in ("neg", "pos"):
+        return free_names(node[1])
+    if kind == "bin":
+        return free_names(node[2]) | free_names(node[3])
+    if kind == "call":
+        if node[1] in FORMS:
+            return form_names(node, free_names)
+        names = set()
+        for a in node[2]:
+            names |= free_names(a)
+        return names
+    return set()
+
+
+class CompiledExpression:
+    """
+    An expression that has been parsed and compiled once.
+    Call evaluate() (or the object itself) as many times as needed.
+    """
+
+    __slots__ = ("source", "ast", "names", "backend", "_fn")
+
+    def __init__(self, source: str, ast, backend=FLOAT, optimized: bool = True):
+        self.source = source
+        self.ast = ast
+        self.names = frozenset(free_names(ast))
+        self.backend = backend
+        self._fn = _compile_node(optimize(ast, backend) if optimized else ast, backend)
+
+    def evaluate(self, env=None):
+        if self.backend.context is None:
+            return self._fn(env if env is not None else {})
+        return self.backend.run(self._fn, env if env is not None else {})
+
+    __call__ = evaluate
+
+    def __repr__(self):
+        return f"CompiledExpression({self.source!r})"
+
+
+def compile_expression(src: str, backend=FLOAT, optimized: bool = True) -> CompiledExpression:
+    """
+    Tokenize, parse and compile an expression string for a numeric backend.
+    optimized=False skips calc_core.optimize (for comparisons and debugging).
+    """
+    return CompiledExpression(src, parse(src), backend, optimized)
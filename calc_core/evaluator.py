@@ -0,0 +1,177 @@
+"""
+Turning the user-visible expression string into a result.
+
+prep_expr_for_eval() normalizes the display symbols (×, ÷, π, sin( ...) and
+evaluate_expression() runs the normalized text through the compiled
+expression engine in calc_core.engine.
+"""
+
+import os
+import sys
+
+from .cache import LRUCache
+from .engine import CompiledExpression, parse
+from .limits import check_cost
+from .numeric import DEFAULT_PRECISION, get_backend
+
+# Process-wide cache of compiled expressions, keyed by the normalized text
+# from prep_expr_for_eval() so "2×3" and "2*3" share one entry. The numeric
+# mode (and precision for "decimal") is part of the key, because literals
+# and constants are baked into the compiled form.
+# Size can be set with the CALC_EXPR_CACHE_SIZE environment variable.
+_EXPR_CACHE = LRUCache(int(os.environ.get("CALC_EXPR_CACHE_SIZE", "1024")))
+
+# Marker for cache entries that have no memoized result yet
+_NO_RESULT = object()
+
+# Optional calc_core.store.ResultCache shared with other processes
+_SHARED_RESULTS = None
+
+
+def prep_expr_for_eval(expr: str) -> str:
+    """
+    Take the user-visible expression string and convert it into a valid
+    expression for the engine (Python operator syntax and math.* names).
+    """
+    # Normalize special characters to Python operators
+    e = expr.replace("×", "*").replace("÷", "/").replace("−", "-").replace("–", "-")
+    e = e.replace("➕", "+")
+    # Handle ^ as exponentiation
+    e = e.replace("^", "**")
+    # π is the backend's own pi (full precision in decimal mode)
+    e = e.replace("π", "math.pi")
+    # "#3" (a previous result, see calc_core.workspace) is the variable _3
+    e = e.replace("#", "_")
+
+    # Map functions to math module
+    e = e.replace("sin(", "math.sin(")
+    e = e.replace("cos(", "math.cos(")
+    e = e.replace("tan(", "math.tan(")
+    e = e.replace("sqrt(", "math.sqrt(")
+
+    # Important: replace log() and ln() in a safe order to avoid "math.math.log10(" bugs.
+    # "log(" -> math.log10()  (base 10)
+    e = e.replace("log(", "math.log10(")
+    # "ln("  -> math.log()    (natural log)
+    e = e.replace("ln(", "math.log(")
+
+    return e
+
+
+class _CacheEntry:
+    """Compiled expression plus its result when it has no free variables."""
+
+    __slots__ = ("compiled", "result")
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.result = _NO_RESULT
+
+
+def configure_cache(maxsize: int):
+    """Set the maximum number of compiled expressions kept in memory."""
+    _EXPR_CACHE.resize(maxsize)
+
+
+def cache_stats() -> dict:
+    """Return size / hit / miss / eviction counters of the expression cache."""
+    return _EXPR_CACHE.stats()
+
+
+def clear_cache():
+    """Forget all compiled expressions and reset the counters."""
+    _EXPR_CACHE.clear()
+
+
+def configure_result_cache(store, ttl: float = None):
+    """
+    Share results of constant expressions with every process using the
+    same store (see calc_core.store). store is a store object or URL
+    ("sqlite:///path", "redis://host:6379/0"); None turns sharing off.
+    """
+    global _SHARED_RESULTS
+    if store is None:
+        _SHARED_RESULTS = None
+        return
+    from .store import DEFAULT_RESULT_TTL, ResultCache, open_store
+
+    if isinstance(store, str):
+        store = open_store(store)
+    _SHARED_RESULTS = ResultCache(store, DEFAULT_RESULT_TTL if ttl is None else ttl)
+
+
+def get_compiled(expr: str, mode: str = "float", precision: int = DEFAULT_PRECISION):
+    """
+    Return the compiled form of a user-visible expression, compiling it on a
+    cache miss. Raises ExpressionError if it cannot be parsed, and
+    LimitExceeded (calc_core.limits) if it would create oversized numbers.
+    """
+    return _get_entry(prep_expr_for_eval(expr), mode, precision).compiled
+
+
+def _get_entry(normalized: str, mode: str, precision: int, shared=None) -> _CacheEntry:
+    key = (normalized, mode, precision if mode == "decimal" else None)
+    entry = _EXPR_CACHE.get(key)
+    if entry is None and shared is not None:
+        # Compiling folds constants, i.e. already computes a constant
+        # expression: first see if another replica has its result
+        found, result = shared.get(normalized, mode, precision)
+        if found:
+            entry = _CacheEntry(None)
+            entry.result = result
+            _EXPR_CACHE.put(key, entry)
+            return entry
+    if entry is None or entry.compiled is None:
+        backend = get_backend(mode, precision)
+        ast = parse(normalized)
+        # Refuse 9^9^9-style expressions before they are ever run, or folded
+        # by the optimizer while compiling (raises LimitExceeded)
+        check_cost(ast, backend)
+        compiled = CompiledExpression(normalized, ast, backend)
+        result = _NO_RESULT if entry is None else entry.result
+        entry = _CacheEntry(compiled)
+        entry.result = result
+        _EXPR_CACHE.put(key, entry)
+    return entry
+
+
+def evaluate_expression(expr: str, mode: str = "float", precision: int = DEFAULT_PRECISION):
+    """
+    Safely evaluate the mathematical expression.
+
+    mode selects the number system ("float", "decimal" or "fraction", see
+    calc_core.numeric); precision is the number of digits for "decimal".
+    Returns either:
+      - a number (int/float, Decimal or Fraction depending on mode), or
+      - the string "Error" if evaluation fails.
+    The value is not rounded; use format_result() to display it.
+    """
+    if not expr:
+        return ""
+    normalized = prep_expr_for_eval(expr)
+    shared = _SHARED_RESULTS
+    try:
+        entry = _get_entry(normalized, mode, precision, shared)
+    except Exception:
+        return "Error"
+
+    # Pure-constant expressions always give the same answer: reuse it
+    if entry.result is not _NO_RESULT:
+        return entry.result
+
+    try:
+        result = entry.compiled.evaluate()
+        # Decimal reports log(0) and friends as infinities/NaN instead of raising
+        if "decimal" in sys.modules and isinstance(result, sys.modules["decimal"].Decimal):
+            if not result.is_finite():
+                result = "Error"
+    except Exception:
+        result = "Error"
+
+    if not entry.compiled.names:
+        entry.result = result
+        if shared is not None:
+            # Only results of constant expressions are shared, so a hit
+            # in _get_entry() never stands for one with variables
+            shared.put(normalized, mode, precision, result)
+    return result
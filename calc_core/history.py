@@ -0,0 +1,234 @@
+"""
+Persistent calculation history.
+
+Records are stored in SQLite (a file, so they survive restarts) with
+indexes on time and expression, and a full-text index when the SQLite
+build has FTS5. Every record carries the id of the session that made it,
+and all reads are scoped to one session: a store shared by the whole
+server (st.cache_resource) still shows each browser only its own history.
+The most recent records of each active session are also kept in a small
+in-memory ring buffer, so drawing the sidebar costs O(entries shown) no
+matter how long the history is.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+
+from .cache import LRUCache
+
+HistoryRecord = namedtuple("HistoryRecord", ["id", "timestamp", "expression", "result", "mode"])
+
+DEFAULT_PATH = os.environ.get("CALC_HISTORY_DB", "calc_history.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp  REAL NOT NULL,
+    expression TEXT NOT NULL,
+    result     TEXT NOT NULL,
+    mode       TEXT NOT NULL DEFAULT '',
+    session    TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS history_session ON history (session, id);
+CREATE INDEX IF NOT EXISTS history_session_time ON history (session, timestamp);
+CREATE INDEX IF NOT EXISTS history_session_expression ON history (session, expression);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts
+    USING fts5(expression, result, content='history', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts (rowid, expression, result)
+    VALUES (new.id, new.expression, new.result);
+END;
+CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts (history_fts, rowid, expression, result)
+    VALUES ('delete', old.id, old.expression, old.result);
+END;
+"""
+
+_COLUMNS = "id, timestamp, expression, result, mode"
+
+
+class HistoryStore:
+    """
+    SQLite-backed history, one shared store for every session. Each method
+    takes the caller's `session` id and only sees that session's records;
+    the latest `ring_size` records of up to `max_sessions` recently active
+    sessions are kept in memory. Safe to share between threads.
+
+    path=":memory:" gives a throwaway store (handy for tests and scripts).
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, ring_size: int = 50, max_sessions: int = 256):
+        self.path = path
+        self.ring_size = ring_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite compiled without FTS5: search falls back to LIKE
+            self.has_fts = False
+        self._conn.commit()
+        self._rings = LRUCache(max_sessions)   # session -> deque of its latest records
+
+    def _ring(self, session: str):
+        # Caller holds the lock. A session's ring is loaded on first use.
+        ring = self._rings.get(session)
+        if ring is None:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM history WHERE session = ? ORDER BY id DESC LIMIT ?",
+                (session, self.ring_size),
+            ).fetchall()
+            ring = deque((HistoryRecord(*r) for r in reversed(rows)), maxlen=self.ring_size)
+            self._rings.put(session, ring)
+        return ring
+
+    # ---------------- WRITING ----------------
+    def add(self, expression: str, result, mode: str = "", session: str = "") -> HistoryRecord:
+        """Append one calculation to `session` and return the stored record."""
+        ts = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO history (timestamp, expression, result, mode, session)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (ts, expression, str(result), mode, session),
+            )
+            self._conn.commit()
+            record = HistoryRecord(cur.lastrowid, ts, expression, str(result), mode)
+            ring = self._rings.get(session)
+            if ring is not None:
+                ring.append(record)
+        return record
+
+    def clear(self, session: str = ""):
+        """Delete every record of `session`."""
+        with self._lock:
+            self._conn.execute("DELETE FROM history WHERE session = ?", (session,))
+            self._conn.commit()
+            self._rings.put(session, deque(maxlen=self.ring_size))
+
+    # ---------------- READING ----------------
+    def recent(self, n: int, session: str = ""):
+        """The last n records of `session`, newest first. Served from memory when possible."""
+        if n <= self.ring_size:
+            with self._lock:
+                items = list(self._ring(session))[-n:] if n else []
+            return items[::-1]
+        return self.page(n, session=session)
+
+    def page(self, limit: int, offset: int = 0, session: str = ""):
+        """Records of `session` newest first, skipping `offset` (for "load more" paging)."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM history WHERE session = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+                (session, limit, offset),
+            ).fetchall()
+        return [HistoryRecord(*r) for r in rows]
+
+    def between(self, start: float, end: float, limit: int = 100, session: str = ""):
+        """Records with start <= timestamp < end, newest first (uses the time index)."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM history WHERE session = ? AND timestamp >= ? AND timestamp < ?"
+                " ORDER BY timestamp DESC LIMIT ?",
+                (session, start, end, limit),
+            ).fetchall()
+        return [HistoryRecord(*r) for r in rows]
+
+    def lookup(self, expression: str, limit: int = 20, session: str = ""):
+        """Records for exactly this expression, newest first (uses the expression index)."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM history WHERE session = ? AND expression = ?"
+                " ORDER BY id DESC LIMIT ?",
+                (session, expression, limit),
+            ).fetchall()
+        return [HistoryRecord(*r) for r in rows]
+
+    def search(self, query: str, limit: int = 20, session: str = ""):
+        """
+        Find records of `session` whose expression or result mentions `query`.
+        Word-like queries ("sqrt", "3.5") use the full-text index with prefix
+        matching; anything else (e.g. "×") uses a substring scan.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        words = re.findall(r"\w+", query)
+        with self._lock:
+            if self.has_fts and words and re.fullmatch(r"[\w\s.]+", query):
+                match = '"' + " ".join(words) + '"*'  # phrase query, last word as prefix
+                rows = self._conn.execute(
+                    f"SELECT {', '.join('h.' + c for c in _COLUMNS.split(', '))}"
+                    " FROM history_fts JOIN history h ON h.id = history_fts.rowid"
+                    " WHERE history_fts MATCH ? AND h.session = ? ORDER BY h.id DESC LIMIT ?",
+                    (match, session, limit),
+                ).fetchall()
+            else:
+                pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                rows = self._conn.execute(
+                    f"SELECT {_COLUMNS} FROM history WHERE session = ?"
+                    " AND (expression LIKE ? ESCAPE '\\' OR result LIKE ? ESCAPE '\\')"
+                    " ORDER BY id DESC LIMIT ?",
+                    (session, pattern, pattern, limit),
+                ).fetchall()
+        return [HistoryRecord(*r) for r in rows]
+
+    def count(self, session: str = "") -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM history WHERE session = ?", (session,)
+            ).fetchone()[0]
+
+    def for_session(self, session: str) -> "SessionHistory":
+        """This store seen from one session (what CalculatorState.history expects)."""
+        return SessionHistory(self, session)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SessionHistory:
+    """One session's view of a HistoryStore: the same methods, session filled in."""
+
+    def __init__(self, store: HistoryStore, session: str):
+        self.store = store
+        self.session = session
+
+    def add(self, expression: str, result, mode: str = "") -> HistoryRecord:
+        return self.store.add(expression, result, mode, session=self.session)
+
+    def clear(self):
+        self.store.clear(session=self.session)
+
+    def recent(self, n: int):
+        return self.store.recent(n, session=self.session)
+
+    def page(self, limit: int, offset: int = 0):
+        return self.store.page(limit, offset, session=self.session)
+
+    def between(self, start: float, end: float, limit: int = 100):
+        return self.store.between(start, end, limit, session=self.session)
+
+    def lookup(self, expression: str, limit: int = 20):
+        return self.store.lookup(expression, limit, session=self.session)
+
+    def search(self, query: str, limit: int = 20):
+        return self.store.search(query, limit, session=self.session)
+
+    def count(self) -> int:
+        return self.store.count(session=self.session)
+
+
+def format_record(record: HistoryRecord) -> str:
+    """The 'expression = result' line shown in the sidebar (and used in logs)."""
+    return f"{record.expression} = {record.result}"
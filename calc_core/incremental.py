@@ -0,0 +1,426 @@
+"""
+Incremental evaluation of an expression typed one key at a time.
+
+The calculator only ever appends to the expression (or drops its last
+character with ⌫), yet evaluate_expression() parses the whole text again.
+LiveExpression instead keeps a lexer and an operator-precedence parser
+running across keypresses:
+
+  - each character advances the lexer; finished tokens go to a
+    shunting-yard parser that evaluates an operator as soon as precedence
+    allows, so appending a key costs O(1) amortized,
+  - the state after every character is kept as a snapshot whose stacks are
+    immutable linked lists sharing their tails, so ⌫ drops one snapshot,
+  - preview() folds what is left on the stacks (usually one or two
+    operators) into the value of the whole expression.
+
+Grammar, binding powers and numeric backends are those of calc_core.engine,
+and display symbols (×, ÷, π, sin( ...) are normalized the same way as in
+prep_expr_for_eval(), so a preview that is not None always equals
+evaluate_expression() of the same text. The calculus forms (integrate,
+diff, solve) are not previewed: from their "(" on, preview() is None and
+the full evaluator runs them.
+"""
+
+import sys
+
+from .calculus import FORMS
+from .engine import _INFIX_BP, _PREFIX_BP
+from .evaluator import prep_expr_for_eval
+from .numeric import FLOAT
+
+# Display symbols that prep_expr_for_eval() rewrites character by character
+_CHAR_MAP = {
+    "×": "*", "÷": "/", "−": "-", "–": "-", "➕": "+",
+    "^": "**",
+    "π": "math.pi",
+    "#": "_",
+}
+
+# Lexer states that need more input to become a token ("1e" of "1e5",
+# "." of ".5", "math." of "math.e"). Their text is not an error yet.
+_UNFINISHED = ("dot", "e", "esign", "namedot")
+
+_SINGLE_OPS = "+-%(),"
+
+# Stack entries are (kind, right binding power, payload). Groups use -1 so
+# infix operators never reduce past them.
+_GROUP_BP = -1
+
+_UNSET = object()
+
+# State.err of a text that calls a calculus form
+_DEFERRED = object()
+
+
+def _is_name_start(c):
+    return c == "_" or "a" <= c <= "z" or "A" <= c <= "Z"
+
+
+def _is_word(c):
+    return c == "_" or c.isalnum()
+
+
+class _Invalid(Exception):
+    """The text can no longer become a valid expression (or failed to evaluate)."""
+
+
+class _Deferred(Exception):
+    """The text calls integrate / diff / solve, which only the full evaluator runs."""
+
+
+class _State:
+    """
+    Lexer + parser state after some prefix of the expression. Snapshots are
+    copied before each character and never modified afterwards.
+    """
+
+    __slots__ = ("vals", "ops", "operand", "name", "call_open", "lex", "lex_kind",
+                 "err", "preview")
+
+    def __init__(self):
+        self.vals = None        # value stack as (value, rest) cells
+        self.ops = None         # operator / group stack as (entry, rest) cells
+        self.operand = True     # an operand is expected next
+        self.name = None        # name token waiting to see whether "(" follows
+        self.call_open = False  # right after "name(": ")" closes an empty call
+        self.lex = ""           # text of the token being read
+        self.lex_kind = None    # lexer state for it, None between tokens
+        self.err = False
+        self.preview = _UNSET
+
+    def copy(self):
+        s = _State.__new__(_State)
+        s.vals = self.vals
+        s.ops = self.ops
+        s.operand = self.operand
+        s.name = self.name
+        s.call_open = self.call_open
+        s.lex = self.lex
+        s.lex_kind = self.lex_kind
+        s.err = self.err
+        s.preview = _UNSET
+        return s
+
+    # ---------------- LEXER ----------------
+    # Same tokens as the engine's regex:
+    #   num  (?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?
+    #   name [A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*
+    #   op   \*\*|//|[-+*/%(),]
+    def feed(self, c, live):
+        kind = self.lex_kind
+        if kind is not None:
+            nxt = _continue(kind, self.lex, c)
+            if nxt is not None:
+                self.lex += c
+                self.lex_kind = nxt
+                if nxt == "op2":
+                    self._end_token(None, live)
+                return
+            extra = self._end_token(c, live)
+            if extra:
+                for ch in extra + c:
+                    self.feed(ch, live)
+                return
+
+        if c.isdecimal():
+            self.lex, self.lex_kind = c, "int"
+        elif c == ".":
+            self.lex, self.lex_kind = c, "dot"
+        elif _is_name_start(c):
+            self.lex, self.lex_kind = c, "name"
+        elif c == "*" or c == "/":
+            self.lex, self.lex_kind = c, "op"
+        elif c in _SINGLE_OPS:
+            self._token("op", c, live)
+        elif not c.isspace():
+            raise _Invalid(c)
+
+    def _end_token(self, nxt, live):
+        """
+        Hand the pending token to the parser. Returns characters that have
+        to be read again when the lexer has to back off ("2e+" before a
+        non-digit is the number 2, the name e and the operator +).
+        """
+        kind, text = self.lex_kind, self.lex
+        self.lex, self.lex_kind = "", None
+        if kind in ("int", "frac", "exp"):
+            self._number(text, live)
+            return ""
+        if kind == "name":
+            if nxt == "(":
+                # prep_expr_for_eval() maps "sin(" -> "math.sin(", "ln(" -> "math.log(" ...
+                text = prep_expr_for_eval(text + "(")[:-1]
+            self._token("name", text, live)
+            return ""
+        if kind == "op" or kind == "op2":
+            self._token("op", text, live)
+            return ""
+        if kind == "e":
+            self._number(text[:-1], live)
+            return text[-1:]
+        if kind == "esign":
+            self._number(text[:-2], live)
+            return text[-2:]
+        if kind == "namedot":
+            self._token("name", text[:-1], live)
+            return "."
+        raise _Invalid(text)   # a lone "."
+
+    def _number(self, text, live):
+        if "." in text or "e" in text or "E" in text:
+            value = float(text)
+        else:
+            value = int(text)
+        self._token("num", value, live)
+
+    # ---------------- PARSER ----------------
+    def _token(self, kind, value, live):
+        if self.name is not None:
+            name = self.name
+            self.name = None
+            if kind == "op" and value == "(":
+                fn = live.backend.functions.get(name)
+                if fn is None:
+                    raise (_Deferred if name in FORMS else _Invalid)(name)
+                self.ops = (("call", _GROUP_BP, (fn, ())), self.ops)
+                self.operand = True
+                self.call_open = True
+                return
+            self.vals = (live.lookup(name), self.vals)
+
+        call_open = self.call_open
+        self.call_open = False
+
+        if kind == "num":
+            if not self.operand:
+                raise _Invalid(value)
+            self.vals = (live.backend.literal(value), self.vals)
+            self.operand = False
+        elif kind == "name":
+            if not self.operand:
+                raise _Invalid(value)
+            self.name = value
+            self.operand = False
+        elif value == "(":
+            if not self.operand:
+                raise _Invalid(value)
+            self.ops = (("(", _GROUP_BP, None), self.ops)
+        elif value == ")":
+            if self.operand:
+                if not call_open:
+                    raise _Invalid(value)
+                fn = self.ops[0][2][0]
+                self.ops = self.ops[1]
+                self.vals = (fn(), self.vals)
+                self.operand = False
+                return
+            self._reduce(0)
+            if self.ops is None:
+                raise _Invalid(value)
+            (group, _, payload), self.ops = self.ops
+            if group == "call":
+                fn, args = payload
+                arg, rest = self.vals
+                self.vals = (fn(*args, arg), rest)
+        elif value == ",":
+            if self.operand:
+                raise _Invalid(value)
+            self._reduce(0)
+            if self.ops is None or self.ops[0][0] != "call":
+                raise _Invalid(value)
+            fn, args = self.ops[0][2]
+            arg, self.vals = self.vals
+            self.ops = (("call", _GROUP_BP, (fn, args + (arg,))), self.ops[1])
+            self.operand = True
+        elif self.operand:
+            if value == "-":
+                self.ops = (("neg", _PREFIX_BP, None), self.ops)
+            elif value == "+":
+                self.ops = (("pos", _PREFIX_BP, None), self.ops)
+            else:
+                raise _Invalid(value)
+        else:
+            lbp = _INFIX_BP[value]
+            self._reduce(lbp)
+            # ** is right associative: an operand already waiting on ** stays put
+            rbp = lbp - 1 if value == "**" else lbp
+            self.ops = (("bin", rbp, live.backend.ops[value]), self.ops)
+            self.operand = True
+
+    def _reduce(self, lbp):
+        """Evaluate stacked operators that bind at least as tightly as lbp."""
+        ops, vals = self.ops, self.vals
+        while ops is not None and ops[0][1] >= lbp:
+            (kind, _, fn), ops = ops
+            right, vals = vals
+            if kind == "bin":
+                left, vals = vals
+                value = fn(left, right)
+            elif kind == "neg":
+                value = -right
+            else:
+                value = +right
+            vals = (value, vals)
+        self.ops, self.vals = ops, vals
+
+    def finish(self, live):
+        """
+        Value of the text read so far: a number, "Error", or None while the
+        text is incomplete (empty, trailing operator, open bracket).
+        """
+        if self.err:
+            return None if self.err is _DEFERRED else "Error"
+        if self.lex_kind in _UNFINISHED:
+            return None
+        s = self.copy()
+        try:
+            if s.lex_kind is not None:
+                s._end_token(None, live)
+            if s.name is not None:
+                s.vals = (live.lookup(s.name), s.vals)
+                s.name = None
+            elif s.operand:
+                return None
+            s._reduce(0)
+        except Exception:
+            return "Error"
+        if s.ops is not None:
+            return None
+        value = s.vals[0]
+        # Decimal reports log(0) and friends as infinities/NaN instead of raising
+        if "decimal" in sys.modules and isinstance(value, sys.modules["decimal"].Decimal):
+            if not value.is_finite():
+                return "Error"
+        return value
+
+
+def _continue(kind, text, c):
+    """Next lexer state if c extends the pending token, else None."""
+    if c.isdecimal():
+        if kind in ("int", "exp"):
+            return kind
+        if kind in ("dot", "frac"):
+            return "frac"
+        if kind in ("e", "esign"):
+            return "exp"
+        if kind == "name":
+            return "name"
+        return None
+    if kind == "int":
+        if c == ".":
+            return "frac"
+        return "e" if c in "eE" else None
+    if kind == "frac":
+        return "e" if c in "eE" else None
+    if kind == "e":
+        return "esign" if c in "+-" else None
+    if kind == "name":
+        if c == ".":
+            return "namedot"
+        return "name" if _is_word(c) else None
+    if kind == "namedot":
+        return "name" if _is_name_start(c) else None
+    if kind == "op":
+        return "op2" if c == text else None
+    return None
+
+
+class LiveExpression:
+    """
+    An expression kept evaluated while it is typed.
+
+        live = LiveExpression()
+        live.append("12×3")     # one state per character
+        live.preview()          # 36
+        live.append("+")
+        live.preview()          # None: incomplete
+        live.pop()              # back to "12×3"
+
+    backend is a calc_core.numeric backend; env optionally maps variable
+    names to values.
+    """
+
+    def __init__(self, backend=FLOAT, env=None):
+        self.backend = backend
+        self.env = env
+        self.text = ""
+        self._states = [_State()]   # _states[i]: after the first i characters
+
+    def __len__(self):
+        return len(self.text)
+
+    def lookup(self, name):
+        constants = self.backend.constants
+        if name in constants:
+            return constants[name]
+        if self.env is None or name in self.backend.functions or name not in self.env:
+            raise _Invalid(name)
+        return self.env[name]
+
+    def append(self, chars: str):
+        """Add characters of user-visible text (×, ÷, π, sin( ... allowed)."""
+        if not chars:
+            return
+        if self.backend.context is None:
+            self._append(chars)
+        else:
+            self.backend.run(lambda env: self._append(chars), None)
+        self.text += chars
+
+    def _append(self, chars):
+        states = self._states
+        s = states[-1]
+        for c in chars:
+            if not s.err:
+                s = s.copy()
+                try:
+                    for m in _CHAR_MAP.get(c, c):
+                        s.feed(m, self)
+                except _Deferred:
+                    s.err = _DEFERRED
+                except Exception:
+                    s.err = True
+            states.append(s)
+
+    def pop(self, n: int = 1):
+        """Remove the last n characters (⌫)."""
+        n = min(n, len(self.text))
+        if n > 0:
+            del self._states[-n:]
+            self.text = self.text[:-n]
+
+    def sync(self, text: str):
+        """
+        Make this expression equal to text, reusing the shared prefix:
+        appends and backspaces cost only the changed characters.
+        """
+        cur = self.text
+        if text == cur:
+            return
+        if cur.startswith(text):
+            self.pop(len(cur) - len(text))
+            return
+        if not text.startswith(cur):
+            keep = 0
+            limit = min(len(cur), len(text))
+            while keep < limit and cur[keep] == text[keep]:
+                keep += 1
+            self.pop(len(cur) - keep)
+        self.append(text[len(self.text):])
+
+    def preview(self):
+        """
+        Value of the whole expression, "Error", or None while it is
+        incomplete. Not rounded; use format_result() to display it.
+        """
+        s = self._states[-1]
+        if s.preview is _UNSET:
+            if self.backend.context is None:
+                s.preview = s.finish(self)
+            else:
+                s.preview = self.backend.run(lambda env: s.finish(self), None)
+        return s.preview
+
+    def __repr__(self):
+        return f"LiveExpression({self.text!r})"
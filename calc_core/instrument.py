@@ -0,0 +1,255 @@
+"""
+Lightweight instrumentation: named timers and counters for the hot paths
+of the front ends (a Streamlit rerun, button rendering, evaluation, voice
+I/O), optional cProfile / tracemalloc capture of one request, and an
+OpenMetrics text export.
+
+    with instrument.timer("render.buttons"):
+        ...
+
+    @instrument.timed("press")
+    def press(btn): ...
+
+    instrument.count("voice.recognize")
+
+Everything is off unless enabled (enable(), or CALC_INSTRUMENT=1 in the
+environment). While off, a timer or a timed() function costs one global
+flag check, and nothing is recorded.
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import deque
+
+_enabled = os.environ.get("CALC_INSTRUMENT", "") not in ("", "0")
+_lock = threading.Lock()
+_timings = {}     # name -> LatencyStats
+_counters = {}    # name -> int
+
+_clock = time.perf_counter
+
+# Reports of the latest profiled requests, newest last
+CAPTURES = deque(maxlen=10)
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """Forget all timings, counters and captures."""
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+        CAPTURES.clear()
+
+
+# ---------------- RECORDING ----------------
+def record(name: str, seconds: float):
+    """Add one measured duration to the timer called name (no-op while disabled)."""
+    if not _enabled:
+        return
+    with _lock:
+        stats = _timings.get(name)
+        if stats is None:
+            # Imported on first use: nothing of calc_core.batch is needed while disabled
+            from .batch import LatencyStats
+
+            stats = _timings[name] = LatencyStats(reservoir_size=2048)
+        stats.add(seconds)
+
+
+def count(name: str, n: int = 1):
+    """Increase the counter called name (no-op while disabled)."""
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+class timer:
+    """
+    Time a block: `with timer("name"):`, or start() ... stop() when the
+    block does not fit in a with statement (a whole script rerun).
+    """
+
+    __slots__ = ("name", "_start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._start = None
+
+    def start(self):
+        if _enabled:
+            self._start = _clock()
+        return self
+
+    def stop(self):
+        if self._start is not None:
+            record(self.name, _clock() - self._start)
+            self._start = None
+
+    __enter__ = start
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def timed(name: str):
+    """Decorator timing every call of a function under name."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = _clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, _clock() - start)
+        return wrapper
+    return decorate
+
+
+# ---------------- PROFILING ONE REQUEST ----------------
+class Capture:
+    """
+    cProfile and/or tracemalloc around one request (e.g. one rerun):
+
+        cap = Capture("rerun", profile=True, memory=True).start()
+        ...
+        cap.stop()    # appends a report to CAPTURES
+
+    tracemalloc is process-wide, so allocations of requests running at the
+    same time in other threads are included.
+    """
+
+    def __init__(self, label: str, profile: bool = True, memory: bool = False, top: int = 15):
+        self.label = label
+        self.profile = profile
+        self.memory = memory
+        self.top = top
+        self._profiler = None
+        self._started_tracing = False
+        self._start = None
+
+    def start(self):
+        if self.memory:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+        if self.profile:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:
+                self._profiler = None   # another profiler is already active in this process
+        self._start = _clock()
+        return self
+
+    def stop(self) -> dict:
+        report = {"label": self.label, "time": time.time(), "seconds": _clock() - self._start,
+                  "profile": [], "allocations": [], "peak_bytes": None}
+        if self._profiler is not None:
+            self._profiler.disable()
+            report["profile"] = self._profile_rows()
+        if self.memory:
+            import tracemalloc
+
+            if tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                report["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                if self._started_tracing:
+                    tracemalloc.stop()
+                report["allocations"] = [
+                    (str(stat.traceback[0]), stat.size, stat.count)
+                    for stat in snapshot.statistics("lineno")[:self.top]
+                ]
+        CAPTURES.append(report)
+        return report
+
+    def _profile_rows(self):
+        """Top functions by cumulative time: (function, calls, own seconds, cumulative seconds)."""
+        import pstats
+
+        stats = pstats.Stats(self._profiler).stats
+        rows = []
+        for (filename, line, func), (_, ncalls, tottime, cumtime, _) in stats.items():
+            where = f"{os.path.basename(filename)}:{line}({func})" if line else func
+            rows.append((where, ncalls, tottime, cumtime))
+        rows.sort(key=lambda r: r[3], reverse=True)
+        return rows[:self.top]
+
+
+# ---------------- READING ----------------
+def snapshot():
+    """
+    One dict per timer, sorted by name: count, total seconds and the 50th /
+    90th / 99th percentile in seconds.
+    """
+    with _lock:
+        items = sorted(_timings.items())
+        out = []
+        for name, stats in items:
+            out.append({
+                "name": name,
+                "count": stats.count,
+                "total": stats.total,
+                "p50": stats.percentile(50),
+                "p90": stats.percentile(90),
+                "p99": stats.percentile(99),
+            })
+    return out
+
+
+def counters() -> dict:
+    with _lock:
+        return dict(_counters)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_openmetrics(prefix: str = "calc_app") -> str:
+    """Timers as summaries and counters as counters, in OpenMetrics text format."""
+    lines = [
+        f"# HELP {prefix}_duration_seconds Time spent per instrumented section (sampled quantiles).",
+        f"# TYPE {prefix}_duration_seconds summary",
+        f"# UNIT {prefix}_duration_seconds seconds",
+    ]
+    for row in snapshot():
+        name = _escape(row["name"])
+        for q in (0.5, 0.9, 0.99):
+            lines.append(f'{prefix}_duration_seconds{{section="{name}",quantile="{q}"}} {row[f"p{int(q * 100)}"]:.6g}')
+        lines.append(f'{prefix}_duration_seconds_sum{{section="{name}"}} {row["total"]:.6f}')
+        lines.append(f'{prefix}_duration_seconds_count{{section="{name}"}} {row["count"]}')
+    lines += [
+        f"# HELP {prefix}_events Instrumented events.",
+        f"# TYPE {prefix}_events counter",
+    ]
+    for name, n in sorted(counters().items()):
+        lines.append(f'{prefix}_events_total{{event="{_escape(name)}"}} {n}')
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path: str, prefix: str = "calc_app"):
+    """
+    Write render_openmetrics() to path atomically, for a scraper that reads
+    text files (e.g. the node_exporter textfile collector).
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_openmetrics(prefix))
+    os.replace(tmp, path)
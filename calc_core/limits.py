@@ -0,0 +1,323 @@
+"""
+Resource limits, so that pathological input such as 9^9^9^9 fails fast
+with "Error" instead of pinning a CPU and eating memory.
+
+Three layers:
+
+  - estimate_bits() / check_cost(): a static pass over the parsed
+    expression, run once when it is compiled, that estimates how large the
+    exact integers / fractions it produces would get,
+  - check_power(): the same test at evaluation time for exact powers, for
+    values the static pass cannot see (variables, the live preview),
+  - apply_worker_limits() / timed(): for worker processes (batch, audit,
+    HTTP service), a per-expression deadline and an address-space cap.
+
+Limits are configured per deployment through environment variables or
+configure_limits():
+
+  CALC_MAX_BITS    largest exact value an expression may create (default 1,000,000 bits)
+  CALC_DEADLINE    seconds one expression may run in a worker (default 2, 0 = none)
+  CALC_MEMORY_MB   address-space cap of a worker process (default 4096, 0 = none)
+
+Floats and Decimals need no size limit: they overflow (and raise) quickly.
+"""
+
+import math
+import numbers
+import os
+import time
+
+# Exact values up to this size are simply computed by the static pass,
+# which keeps its estimates exact for everyday expressions.
+_SMALL_BITS = 4096
+
+# Size of a rational produced by approximating an irrational function result
+# (see calc_core.precise, 34 significant digits for numerator and denominator)
+_APPROX_BITS = 256
+
+
+class LimitExceeded(ArithmeticError):
+    """An expression needs more time or memory than the configured limits allow."""
+
+
+class Limits:
+    """
+    max_bits:  largest exact int / Fraction (in bits) an evaluation may create
+    deadline:  seconds one expression may run in a worker process (0 = no deadline)
+    memory_mb: address-space cap for worker processes (0 = no cap)
+    """
+
+    def __init__(self, max_bits: int, deadline: float, memory_mb: int):
+        self.max_bits = max_bits
+        self.deadline = deadline
+        self.memory_mb = memory_mb
+
+    def __repr__(self):
+        return f"Limits(max_bits={self.max_bits}, deadline={self.deadline}, memory_mb={self.memory_mb})"
+
+
+LIMITS = Limits(
+    max_bits=int(os.environ.get("CALC_MAX_BITS", "1000000")),
+    deadline=float(os.environ.get("CALC_DEADLINE", "2")),
+    memory_mb=int(os.environ.get("CALC_MEMORY_MB", "4096")),
+)
+
+
+def configure_limits(max_bits=None, deadline=None, memory_mb=None):
+    """Change the process-wide limits (None keeps the current value)."""
+    if max_bits is not None:
+        LIMITS.max_bits = max_bits
+    if deadline is not None:
+        LIMITS.deadline = deadline
+    if memory_mb is not None:
+        LIMITS.memory_mb = memory_mb
+
+
+# ---------------- EVALUATION-TIME GUARD ----------------
+def check_power(base, exponent: int):
+    """
+    Raise LimitExceeded if the exact (int / Fraction) base raised to
+    `exponent` would exceed max_bits. Bases 0, 1 and -1 never grow.
+    """
+    logs = _power_logs(base)
+    if any(logs):
+        bits = _power_bits(logs, exponent)
+        if bits > LIMITS.max_bits:
+            raise LimitExceeded(f"result would need {bits:,} bits (limit {LIMITS.max_bits:,})")
+
+
+def _log2_upper(n: int) -> float:
+    """An upper bound on log2(|n|), from the bit length and the leading 53 bits; 0 for |n| <= 1."""
+    n = abs(n)
+    if n <= 1:
+        return 0.0
+    shift = max(n.bit_length() - 53, 0)
+    top = n >> shift
+    if shift:
+        top += 1   # n < (top + 1) * 2**shift
+    # The margin covers log2's rounding; it is far below one bit
+    return (math.log2(top) + shift) * (1 + 1e-12)
+
+
+def _power_logs(value):
+    """Upper bounds on log2 of the parts (numerator, denominator) of an exact value."""
+    if isinstance(value, int):
+        return (_log2_upper(value),)
+    return (_log2_upper(value.numerator), _log2_upper(value.denominator))
+
+
+def _power_bits(logs, exponent):
+    """
+    Bits of x ** exponent (numerator + denominator for a fraction), given
+    upper bounds on log2 of x's parts: n ** e has floor(e * log2(n)) + 1
+    bits. Never below the true size, and equal to it but for the margin.
+    """
+    exponent = _to_float(exponent)
+    bits = 0
+    for log in logs:
+        size = exponent * log
+        if size == math.inf:
+            return math.inf
+        bits += math.floor(size) + 1
+    return bits
+
+
+# ---------------- STATIC COST ESTIMATE ----------------
+class _Abort(Exception):
+    """A sub-expression fails on its own; evaluation will stop there too."""
+
+
+def _bits(value) -> int:
+    """Size of an exact value (numerator + denominator bits), 0 for floats etc."""
+    if isinstance(value, int):
+        return value.bit_length()
+    if isinstance(value, numbers.Rational):
+        return value.numerator.bit_length() + value.denominator.bit_length()
+    return 0
+
+
+def _to_float(x) -> float:
+    try:
+        return float(x)
+    except OverflowError:
+        return math.inf
+
+
+def _pow2(bits) -> float:
+    return math.inf if bits > 1000 else 2.0 ** bits
+
+
+def estimate_bits(ast, backend) -> float:
+    """
+    Estimate the largest exact (int / Fraction) value, in bits, that
+    evaluating ast with the given numeric backend would create. Small
+    sub-results are computed outright; once a value would grow past
+    _SMALL_BITS only its size is carried forward. Variables are unknown
+    here and are left to check_power() at evaluation time.
+    """
+    if backend.name == "decimal":
+        return 0   # Decimal values are bounded by the context
+    exact_mode = backend.name == "fraction"
+    worst = 0
+
+    # Each node becomes (value, size, exact): value is None when it was not
+    # computed (too large, or depends on a variable); size is the estimated
+    # bit size when exact; exact is None for unknown variables.
+    def visit(node):
+        kind = node[0]
+
+        if kind == "num":
+            return known(backend.literal(node[1]))
+
+        if kind == "name":
+            if node[1] in backend.constants:
+                return known(backend.constants[node[1]])
+            return None, 0, None
+
+        if kind in ("neg", "pos"):
+            value, size, exact = visit(node[1])
+            if value is not None:
+                return known(-value if kind == "neg" else +value)
+            return None, size, exact
+
+        if kind == "call":
+            fn = backend.functions.get(node[1])
+            args = [visit(a) for a in node[2]]
+            if fn is not None and all(a[0] is not None for a in args):
+                return compute(fn, *[a[0] for a in args])
+            if not exact_mode:
+                return None, 0, False
+            if node[1] == "math.sqrt" and args:
+                return grown(max(args[0][1] / 2, _APPROX_BITS))
+            return grown(_APPROX_BITS)
+
+        # kind == "bin"
+        op = node[1]
+        left, right = visit(node[2]), visit(node[3])
+        lv, ls, lx = left
+        rv, rs, rx = right
+        if lx is None or rx is None:
+            return None, 0, None   # depends on a variable
+        if op == "**":
+            return power(left, right)
+        if lv is not None and rv is not None and ls <= _SMALL_BITS and rs <= _SMALL_BITS:
+            return compute(backend.ops[op], lv, rv)
+        if not (lx and rx):
+            return None, 0, False
+        if op in ("+", "-"):
+            return grown(ls + rs if exact_mode else max(ls, rs) + 1)
+        if op == "*" or (op == "/" and exact_mode):
+            return grown(ls + rs)
+        if op == "//":
+            return grown(ls)
+        if op == "%":
+            return grown(max(ls, rs))
+        return None, 0, False   # int / int is a float
+
+    def power(left, right):
+        lv, ls, lx = left
+        rv, rs, rx = right
+        if not lx:
+            return None, 0, False   # float base: overflows quickly instead
+        if rv is None:
+            if not rx:
+                return None, 0, False
+            # Exponent only known by size: |exponent| < 2**rs
+            logs = _power_logs(lv) if lv is not None else (ls,)
+            return grown(_power_bits(logs, _pow2(rs)) if any(logs) else ls)
+        if not isinstance(rv, numbers.Rational):
+            return None, 0, False   # float exponent: float result
+        if rv < 0 and not exact_mode:
+            return None, 0, False   # int ** negative int is a float
+        logs = _power_logs(lv) if lv is not None else (ls,)   # a value below 2**ls
+        if not any(logs):
+            size = ls   # 0, 1 and -1 (and 1/1) stay put
+        else:
+            size = _power_bits(logs, abs(rv))
+            if rv.denominator != 1:
+                size += _APPROX_BITS
+        if lv is not None and size <= _SMALL_BITS:
+            return compute(backend.ops["**"], lv, rv)
+        return grown(size)
+
+    def known(value):
+        nonlocal worst
+        size = _bits(value)
+        worst = max(worst, size)
+        return value, size, isinstance(value, numbers.Rational)
+
+    def grown(size):
+        nonlocal worst
+        worst = max(worst, size)
+        return None, size, True
+
+    def compute(fn, *args):
+        try:
+            return known(fn(*args))
+        except LimitExceeded:
+            raise
+        except Exception:
+            raise _Abort from None
+
+    try:
+        visit(ast)
+    except _Abort:
+        pass
+    return worst
+
+
+def check_cost(ast, backend):
+    """Raise LimitExceeded if ast would create values larger than max_bits."""
+    bits = estimate_bits(ast, backend)
+    if bits > LIMITS.max_bits:
+        raise LimitExceeded(f"result would need about {bits:,.0f} bits (limit {LIMITS.max_bits:,})")
+
+
+# ---------------- WORKER PROCESSES ----------------
+_started = None   # start time of the expression being evaluated under timed()
+
+
+def _watchdog(signum, frame):
+    global _started
+    if _started is not None and time.monotonic() - _started > LIMITS.deadline:
+        _started = None
+        raise LimitExceeded(f"evaluation took longer than {LIMITS.deadline}s")
+
+
+def apply_worker_limits():
+    """
+    Process-pool initializer: cap the address space at memory_mb and start
+    a watchdog timer that interrupts an expression evaluated with timed()
+    once it has run longer than the deadline. Unix only; elsewhere a no-op.
+    """
+    try:
+        import resource
+        import signal
+    except ImportError:
+        return
+    if LIMITS.memory_mb > 0:
+        cap = LIMITS.memory_mb * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            cap = min(cap, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (cap, hard))
+    if LIMITS.deadline > 0:
+        # One periodic timer for the whole process; timed() only records a start time
+        tick = max(LIMITS.deadline / 4, 0.01)
+        signal.signal(signal.SIGALRM, _watchdog)
+        signal.setitimer(signal.ITIMER_REAL, tick, tick)
+
+
+def timed(fn, *args):
+    """
+    Call fn(*args) under the worker deadline. A deadline or memory failure
+    gives "Error", like any other failed evaluation.
+    """
+    global _started
+    _started = time.monotonic()
+    try:
+        return fn(*args)
+    except (LimitExceeded, MemoryError):
+        return "Error"
+    finally:
+        _started = None
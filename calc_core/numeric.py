@@ -0,0 +1,162 @@
+"""
+Numeric backends for the expression engine.
+
+A backend decides what a number literal becomes and which implementation
+of + − × ÷ ^ and sin/cos/tan/sqrt/log/ln is used:
+
+  - "float":    native Python int/float (fast, the default)
+  - "decimal":  decimal.Decimal at a configurable precision
+  - "fraction": fractions.Fraction, exact for + − × ÷ and integer powers;
+                irrational results are rational approximations
+
+Results are returned unrounded. Turning a value into display text is a
+separate step, format_result(), which the front ends call when rendering.
+
+Only the float backend lives here; the other two are in calc_core.precise,
+which is imported the first time one of them is asked for.
+"""
+
+import math
+import operator
+import sys
+
+from .limits import check_power
+
+MODES = ("float", "decimal", "fraction")
+DEFAULT_PRECISION = 28
+
+# Significant digits shown for floats (same as the old .12g clean-up)
+DISPLAY_DIGITS = 12
+
+
+class NumericBackend:
+    """
+    Everything the compiler needs to evaluate numbers in one number system.
+
+    literal:   converts a parsed int/float literal into the backend's type
+    functions: engine function name -> implementation
+    constants: engine constant name -> value
+    ops:       binary operator symbol -> implementation
+    context:   optional decimal context active while evaluating
+    """
+
+    def __init__(self, name, literal, functions, constants, ops, context=None):
+        self.name = name
+        self.literal = literal
+        self.functions = functions
+        self.constants = constants
+        self.ops = ops
+        self.context = context
+
+    def run(self, fn, env):
+        if self.context is None:
+            return fn(env)
+        import decimal  # only the Decimal backend has a context
+
+        with decimal.localcontext(self.context):
+            return fn(env)
+
+    def __repr__(self):
+        prec = f", prec={self.context.prec}" if self.context is not None else ""
+        return f"NumericBackend({self.name!r}{prec})"
+
+
+def _checked_pow(base, exp):
+    # Exact integer powers can grow without bound (9**9**9); refuse those
+    # before CPython starts on them. Floats just overflow.
+    if type(exp) is int and type(base) is int and exp > 1:
+        check_power(base, exp)
+    return base ** exp
+
+
+_PY_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "%": operator.mod,
+    "**": _checked_pow,
+}
+
+# ---------------- FLOAT ----------------
+FLOAT = NumericBackend(
+    "float",
+    literal=lambda v: v,
+    functions={
+        "math.sin": math.sin,
+        "math.cos": math.cos,
+        "math.tan": math.tan,
+        "math.sqrt": math.sqrt,
+        "math.log10": math.log10,
+        "math.log": math.log,
+    },
+    constants={
+        "math.pi": math.pi,
+        "math.e": math.e,
+    },
+    ops=_PY_OPS,
+)
+
+
+def get_backend(mode: str = "float", precision: int = DEFAULT_PRECISION) -> NumericBackend:
+    """Look up the backend for a mode name ("float", "decimal" or "fraction")."""
+    if mode == "float":
+        return FLOAT
+    if mode == "decimal":
+        from .precise import decimal_backend
+
+        return decimal_backend(precision)
+    if mode == "fraction":
+        from .precise import fraction_backend
+
+        return fraction_backend()
+    raise ValueError(f"Unknown numeric mode: {mode!r}")
+
+
+# ---------------- DISPLAY ----------------
+def format_int(value: int, digits: int = DISPLAY_DIGITS) -> str:
+    """
+    All digits of an int, or scientific notation (1.23456789012e+5000) when
+    it has more digits than Python will convert (sys.get_int_max_str_digits).
+    """
+    try:
+        return str(value)
+    except ValueError:
+        pass
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    # log10 from the top 64 bits; plenty for `digits` significant digits
+    shift = value.bit_length() - 64
+    log10 = math.log10(value >> shift) + shift * math.log10(2)
+    exponent = math.floor(log10)
+    mantissa = f"{10 ** (log10 - exponent):.{digits - 1}f}".rstrip("0").rstrip(".")
+    return f"{sign}{mantissa}e+{exponent}"
+
+
+def format_result(value, digits: int = DISPLAY_DIGITS) -> str:
+    """
+    Turn an evaluation result into display text. Only the front ends call
+    this; evaluation itself never rounds.
+
+      float    -> up to `digits` significant digits (1.00000000000001 -> 1.0)
+      Decimal  -> full computed precision, without exponent noise
+      Fraction -> "p/q" (or an integer), falling back to a decimal when the
+                  denominator is huge (approximated irrational results)
+    """
+    if isinstance(value, bool) or value is None:
+        return str(value)
+    if isinstance(value, float):
+        return repr(float(f"{value:.{digits}g}"))
+    if isinstance(value, int):
+        return format_int(value, digits)
+    # A Decimal / Fraction can only exist if its module was imported
+    if "decimal" in sys.modules and isinstance(value, sys.modules["decimal"].Decimal):
+        from .precise import format_decimal
+
+        return format_decimal(value)
+    if "fractions" in sys.modules and isinstance(value, sys.modules["fractions"].Fraction):
+        from .precise import format_fraction
+
+        return format_fraction(value, digits)
+    return str(value)
@@ -0,0 +1,550 @@
+"""
+Number theory on arbitrarily large integers, for python_calculator.py.
+
+    modpow(3, 10**100, 10**9 + 7)     # pow(), or Barrett reduction for huge moduli
+    gcd(a, b, c), lcm(a, b, c)
+    factorial(10**5), binomial(10**6, 5 * 10**5)
+    is_prime(2**521 - 1)              # Miller-Rabin
+    factorize(2**64 + 1)              # trial division + Pollard rho (Brent)
+    to_base(factorial(10**5), 10)     # digits, sub-quadratic
+    from_base("123...", 10)           # parsing, sub-quadratic
+    format_integer(n, max_digits=10_000)   # "1234…6789 (456,574 digits)"
+
+CPython's own int <-> str conversion is quadratic (and refuses more than
+4300 decimal digits by default), and so is its long division. to_base()
+and from_base() split the number in halves with precomputed powers of
+the base: parsing then costs a few multiplications (Karatsuba), and
+printing a few divisions done with the recursive Burnikel-Ziegler scheme,
+which reduces a big division to multiplications too. Decimal digits are
+printed through the decimal module, whose multiplication is faster still.
+
+Results that would exceed limits.LIMITS.max_bits raise LimitExceeded
+before any work is done (factorial, binomial) or as soon as they grow
+past it (lcm); factorize() stops at a deadline. format_integer() keeps
+printing a huge answer cheap: beyond max_digits it computes only the
+leading and trailing digits.
+"""
+
+import decimal
+import math
+import random
+import time
+from functools import lru_cache
+
+from .limits import LIMITS, LimitExceeded
+
+_LOG2_10 = math.log2(10)
+
+
+# ---------------- SIZE GUARD ----------------
+def _check_bits(bits: float, what: str):
+    if bits > LIMITS.max_bits:
+        raise LimitExceeded(f"{what} would have about {int(bits):,} bits (limit {LIMITS.max_bits:,})")
+
+
+def _log2_factorial(n: int) -> float:
+    return math.lgamma(n + 1) / math.log(2)
+
+
+# ---------------- PRIMES & PRODUCTS ----------------
+def primes_upto(n: int):
+    """All primes <= n (sieve of Eratosthenes on a bytearray)."""
+    if n < 2:
+        return []
+    sieve = bytearray([1]) * (n + 1)
+    sieve[0] = sieve[1] = 0
+    for i in range(2, math.isqrt(n) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, n + 1, i)))
+    return [i for i, flag in enumerate(sieve) if flag]
+
+
+def _product(values):
+    """Product of a list of ints as a balanced tree, so the big multiplications are between equal sizes."""
+    values = list(values)
+    if not values:
+        return 1
+    while len(values) > 1:
+        pairs = [values[i] * values[i + 1] for i in range(0, len(values) - 1, 2)]
+        if len(values) & 1:
+            pairs.append(values[-1])
+        values = pairs
+    return values[0]
+
+
+_SMALL_PRIMES = primes_upto(1000)
+_SMALL_PRIMORIAL = _product(_SMALL_PRIMES)
+
+
+# ---------------- ARITHMETIC ----------------
+# Moduli from this size up use _barrett_pow() rather than pow()
+_BARRETT_BITS = 40_000
+_WINDOW = 5
+
+
+def _barrett_pow(base: int, exp: int, mod: int) -> int:
+    """
+    base ** exp % mod for a large mod > 0 and exp >= 0.
+    pow() reduces each product by long division, which is quadratic;
+    Barrett reduction replaces it with two multiplications (Karatsuba) by
+    a precomputed 2k-bit reciprocal. Exponent bits are consumed in windows
+    of up to _WINDOW bits (sliding window over odd powers).
+    """
+    k = mod.bit_length()
+    mu = (1 << (2 * k)) // mod
+
+    def reduce(x):
+        r = x - (((x >> (k - 1)) * mu) >> (k + 1)) * mod
+        while r >= mod:
+            r -= mod
+        return r
+
+    base %= mod
+    square = reduce(base * base)
+    odd = [base]   # base, base^3, base^5 ...
+    for _ in range((1 << (_WINDOW - 1)) - 1):
+        odd.append(reduce(odd[-1] * square))
+
+    bits = bin(exp)[2:]
+    result = 1
+    i = 0
+    while i < len(bits):
+        if bits[i] == "0":
+            result = reduce(result * result)
+            i += 1
+            continue
+        j = min(i + _WINDOW, len(bits))
+        while bits[j - 1] == "0":
+            j -= 1
+        for _ in range(j - i):
+            result = reduce(result * result)
+        result = reduce(result * odd[int(bits[i:j], 2) >> 1])
+        i = j
+    return result % mod
+
+
+def modpow(base: int, exp: int, mod: int) -> int:
+    """base ** exp % mod; a negative exp uses the modular inverse (ValueError if there is none)."""
+    if mod == 0:
+        raise ValueError("modulus must not be 0")
+    if mod < 0 or mod.bit_length() < _BARRETT_BITS:
+        return pow(base, exp, mod)
+    if exp < 0:
+        base, exp = pow(base, -1, mod), -exp
+    return _barrett_pow(base, exp, mod)
+
+
+def gcd(*values: int) -> int:
+    return math.gcd(*values)
+
+
+def lcm(*values: int) -> int:
+    result = 1
+    for v in values:
+        if v == 0:
+            return 0
+        result = result // math.gcd(result, v) * abs(v)
+        _check_bits(result.bit_length(), "lcm")
+    return result
+
+
+def factorial(n: int) -> int:
+    """
+    n! via math.factorial, whose C implementation is already the
+    binary-splitting algorithm (products of odd numbers in a balanced
+    tree, powers of two added as one shift); a Python version is slower.
+    """
+    if n < 0:
+        raise ValueError("factorial of a negative number")
+    _check_bits(_log2_factorial(n), f"{n}!")
+    return math.factorial(n)
+
+
+def binomial(n: int, k: int) -> int:
+    """
+    C(n, k). Large ones are the product of their prime powers (Legendre's
+    formula gives each exponent) multiplied in a balanced tree: no
+    division at all, where math.comb divides numbers of the result's size.
+    """
+    if n < 0:
+        raise ValueError("binomial of a negative n")
+    if k < 0 or k > n:
+        return 0
+    k = min(k, n - k)
+    _check_bits(_log2_factorial(n) - _log2_factorial(k) - _log2_factorial(n - k), f"C({n}, {k})")
+    if n < 2000 or k < 64:
+        return math.comb(n, k)
+    factors = []
+    m = n - k
+    for p in primes_upto(n):
+        if p > m:
+            factors.append(p)       # divides n! once, neither k! nor m!
+            continue
+        e = 0
+        q = p
+        while q <= n:
+            e += n // q - k // q - m // q
+            q *= p
+        if e:
+            factors.append(p if e == 1 else p ** e)
+    return _product(factors)
+
+
+# ---------------- PRIMALITY ----------------
+# Bases that make Miller-Rabin exact below the bound (Sorenson & Webster)
+_DETERMINISTIC_BOUND = 3317044064679887385961981
+_DETERMINISTIC_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def _strong_probable_prime(n: int, a: int, d: int, s: int) -> bool:
+    x = modpow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def is_prime(n: int, rounds: int = 32) -> bool:
+    """
+    Miller-Rabin: exact below 3.3e24; above, base 2 plus `rounds` random
+    bases, so a composite passes with probability below 4**-rounds.
+    """
+    if n < 2:
+        return False
+    if n <= _SMALL_PRIMES[-1]:
+        return n in _SMALL_PRIMES
+    if math.gcd(n, _SMALL_PRIMORIAL) != 1:
+        return False
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    if n < _DETERMINISTIC_BOUND:
+        bases = _DETERMINISTIC_BASES
+    else:
+        rng = random.Random(n)
+        bases = [2] + [rng.randrange(3, n - 1) for _ in range(rounds)]
+    return all(_strong_probable_prime(n, a, d, s) for a in bases)
+
+
+# ---------------- FACTORIZATION ----------------
+def _remove(n: int, p: int):
+    """(n without its factors p, how many there were); the divisor is squared at each level, not repeated."""
+    if n % p:
+        return n, 0
+    n, e = _remove(n // p, p * p)
+    e = 2 * e + 1
+    if n % p == 0:
+        n //= p
+        e += 1
+    return n, e
+
+
+def _rho(n: int, c: int, deadline):
+    """
+    One factor of the odd composite n (possibly n itself on failure) by
+    Brent's variant of Pollard rho: the differences are multiplied
+    together and a gcd taken every 128 steps.
+    """
+    y, r, q, g = 2, 1, 1, 1
+    x = ys = y
+    batch = 128
+    while g == 1:
+        x = y
+        for _ in range(r):
+            y = (y * y + c) % n
+        k = 0
+        while k < r and g == 1:
+            ys = y
+            for _ in range(min(batch, r - k)):
+                y = (y * y + c) % n
+                q = q * abs(x - y) % n
+            g = math.gcd(q, n)
+            k += batch
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+        r *= 2
+    if g == n:
+        # The batch overshot: redo its steps one gcd at a time
+        while True:
+            ys = (ys * ys + c) % n
+            g = math.gcd(abs(x - ys), n)
+            if g > 1:
+                break
+    return g
+
+
+def factorize(n: int, timeout: float = None) -> dict:
+    """
+    Prime factorization {prime: exponent} of n >= 1. Small primes are
+    found with one gcd against their product, the rest with Pollard rho.
+    Raises LimitExceeded, with the factors found so far, when timeout
+    seconds (default LIMITS.deadline, 0 for none) are not enough.
+    """
+    if n < 1:
+        raise ValueError("factorize needs a positive integer")
+    if timeout is None:
+        timeout = LIMITS.deadline
+    deadline = time.monotonic() + timeout if timeout else None
+    factors = {}
+
+    g = math.gcd(n, _SMALL_PRIMORIAL)
+    for p in _SMALL_PRIMES:
+        if g % p == 0:
+            n, factors[p] = _remove(n, p)
+
+    stack = [n] if n > 1 else []
+    while stack:
+        m = stack.pop()
+        if is_prime(m):
+            factors[m] = factors.get(m, 0) + 1
+            continue
+        root = math.isqrt(m)
+        if root * root == m:
+            stack += [root, root]
+            continue
+        for c in range(1, 64):
+            d = _rho(m, c, deadline)
+            if d is None:
+                found = format_factors(dict(sorted(factors.items()))) if factors else ""
+                raise LimitExceeded(
+                    f"no factor of a {digit_count(m)}-digit composite within {timeout}s"
+                    + (f" (found so far: {found})" if found else ""))
+            if d != m:
+                stack += [d, m // d]
+                break
+        else:
+            raise LimitExceeded(f"Pollard rho found no factor of {m}")
+    return dict(sorted(factors.items()))
+
+
+# ---------------- BASE CONVERSION ----------------
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+_FORMATS = {2: "b", 8: "o", 16: "x"}
+
+# Below these sizes CPython's own conversions are used (well under its
+# 4300-digit str limit)
+_STR_BITS = 8000
+_SMALL_BITS = 2000
+_SMALL_DIGITS = 1000
+# Size of the pieces _decimal_digits() converts directly
+_DECIMAL_LEAF_BITS = 4000
+# Divisions of numbers below this many bits are left to divmod()
+_DIV_LIMIT = 4000
+
+
+def _div2n1n(a: int, b: int, n: int):
+    """
+    divmod(a, b) for b of exactly n bits and 0 <= a < 2**n * b, by
+    Burnikel-Ziegler recursion: two half-size divisions plus
+    multiplications, so it is as fast as multiplication asymptotically.
+    """
+    if a.bit_length() - n <= _DIV_LIMIT:
+        return divmod(a, b)
+    pad = n & 1
+    if pad:
+        a <<= 1
+        b <<= 1
+        n += 1
+    half = n >> 1
+    mask = (1 << half) - 1
+    b1, b2 = b >> half, b & mask
+    q1, r = _div3n2n(a >> n, (a >> half) & mask, b, b1, b2, half)
+    q2, r = _div3n2n(r, a & mask, b, b1, b2, half)
+    if pad:
+        r >>= 1
+    return q1 << half | q2, r
+
+
+def _div3n2n(a12: int, a3: int, b: int, b1: int, b2: int, n: int):
+    if a12 >> n == b1:
+        q, r = (1 << n) - 1, a12 - (b1 << n) + b1
+    else:
+        q, r = _div2n1n(a12, b1, n)
+    r = (r << n | a3) - q * b2
+    while r < 0:
+        q -= 1
+        r += b
+    return q, r
+
+
+@lru_cache(maxsize=36)
+def _digit_table(base: int):
+    """(width, the strings of 0 .. base**width - 1 padded to width digits), for at most 4096 strings."""
+    width = max(1, int(math.log(4096, base)))
+    table = [""]
+    for _ in range(width):
+        table = [prefix + d for prefix in table for d in _DIGITS[:base]]
+    return width, table
+
+
+def _small_to_base(n: int, base: int) -> str:
+    if base == 10:
+        return str(n)
+    width, table = _digit_table(base)
+    step = base ** width
+    parts = []
+    while n >= step:
+        n, r = divmod(n, step)
+        parts.append(table[r])
+    parts.append(table[n].lstrip("0") or "0")
+    return "".join(reversed(parts))
+
+
+def _decimal_digits(n: int) -> str:
+    """
+    Decimal digits of a large n >= 0 through the decimal module: n is split
+    on bit boundaries (shifts, no division) and put back together as
+    Decimals, whose multiplication (libmpdec, number-theoretic transform)
+    is faster than anything int offers; str() of a Decimal is linear.
+    """
+    ctx = decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN)
+    ctx.traps[decimal.Inexact] = True
+    powers = {}
+
+    def convert(m, bits):
+        if bits <= _DECIMAL_LEAF_BITS:
+            return decimal.Decimal(m)
+        half = bits >> 1
+        hi = m >> half
+        if half not in powers:
+            powers[half] = ctx.power(2, half)
+        return ctx.add(ctx.multiply(convert(hi, bits - half), powers[half]),
+                       convert(m - (hi << half), half))
+
+    return str(convert(n, n.bit_length()))
+
+
+def to_base(n: int, base: int = 10) -> str:
+    """All digits of n in base 2..36 (lowercase letters above 9)."""
+    if not 2 <= base <= 36:
+        raise ValueError("base must be between 2 and 36")
+    if n < 0:
+        return "-" + to_base(-n, base)
+    if base in _FORMATS:
+        return format(n, _FORMATS[base])   # linear: the bits regroup directly
+    if base == 10:
+        return str(n) if n.bit_length() <= _STR_BITS else _decimal_digits(n)
+    chunk = int(_SMALL_BITS / math.log2(base))
+    powers = [base ** chunk]   # powers[k] = base ** (chunk * 2**k)
+    while powers[-1] <= n:
+        powers.append(powers[-1] * powers[-1])
+    if len(powers) == 1:
+        return _small_to_base(n, base)
+
+    out = []
+
+    def convert(m, k, pad):
+        # m < powers[k + 1]; pad: write exactly chunk * 2**(k + 1) digits
+        if k < 0:
+            s = _small_to_base(m, base)
+            out.append(s.zfill(chunk) if pad else s)
+            return
+        p = powers[k]
+        if not pad and m < p:
+            convert(m, k - 1, False)
+            return
+        hi, lo = _div2n1n(m, p, p.bit_length())
+        convert(hi, k - 1, pad)
+        convert(lo, k - 1, True)
+
+    convert(n, len(powers) - 2, False)
+    return "".join(out)
+
+
+@lru_cache(maxsize=64)
+def _power(base: int, exp: int) -> int:
+    return base ** exp
+
+
+def from_base(text: str, base: int = 10) -> int:
+    """
+    Parse an integer written in base 2..36 (sign, spaces and underscores
+    allowed), however many digits it has.
+    """
+    if not 2 <= base <= 36:
+        raise ValueError("base must be between 2 and 36")
+    s = text.strip().replace("_", "").replace(" ", "")
+    sign = 1
+    if s[:1] in ("+", "-"):
+        sign = -1 if s[0] == "-" else 1
+        s = s[1:]
+    # Only letters and digits are left to check; int() rejects those out of range
+    if not (s.isascii() and s.isalnum()):
+        raise ValueError(f"invalid base-{base} integer: {text[:40]!r}")
+    try:
+        if base & (base - 1) == 0 or len(s) <= _SMALL_DIGITS:
+            return sign * int(s, base)   # power-of-two bases: linear
+        return sign * _parse(s, base)
+    except ValueError:
+        raise ValueError(f"invalid base-{base} integer: {text[:40]!r}") from None
+
+
+def _parse(s: str, base: int) -> int:
+    def parse(lo_end, hi_end):
+        # s[lo_end:hi_end] as an int, split so the low half has a power-of-two number of chunks
+        size = hi_end - lo_end
+        if size <= _SMALL_DIGITS:
+            return int(s[lo_end:hi_end], base)
+        low = _SMALL_DIGITS
+        while low * 2 < size:
+            low *= 2
+        mid = hi_end - low
+        return parse(lo_end, mid) * _power(base, low) + parse(mid, hi_end)
+
+    return parse(0, len(s))
+
+
+def digit_count(n: int) -> int:
+    """Number of decimal digits of |n| (exact, without converting it)."""
+    n = abs(n)
+    if n < 10:
+        return 1
+    estimate = int(n.bit_length() / _LOG2_10) + 1
+    # The estimate is exact or one too high
+    return estimate if n >= _power(10, estimate - 1) else estimate - 1
+
+
+def _digits_in_base(n: int, base: int) -> int:
+    if base == 10:
+        return digit_count(n)
+    n = abs(n)
+    count = max(1, math.ceil(n.bit_length() / math.log2(base)))
+    # The estimate is exact or one too high
+    return count if n >= _power(base, count - 1) else count - 1
+
+
+def format_integer(n: int, base: int = 10, max_digits: int = 10_000, edge: int = 40) -> str:
+    """
+    n in base `base`, or, if it has more than max_digits digits (0: no
+    limit), only its first and last `edge` digits and the count:
+    "1234…6789 (456,574 digits)".
+    Only those digits are computed, so printing an answer never costs more
+    than computing it.
+    """
+    digits = _digits_in_base(n, base)
+    if not max_digits or digits <= max_digits or digits <= 2 * edge:
+        return to_base(n, base)
+    sign = "-" if n < 0 else ""
+    n = abs(n)
+    head = to_base(n // _power(base, digits - edge), base)
+    tail = to_base(n % _power(base, edge), base).zfill(edge)
+    return f"{sign}{head}…{tail} ({digits:,} digits)"
+
+
+def format_factors(factors: dict) -> str:
+    return " × ".join(f"{p}^{e}" if e > 1 else str(p) for p, e in factors.items()) or "1"
+
+
+# name -> (operand count or None for any number of operands, function)
+OPERATIONS = {
+    "modpow": (3, modpow),
+    "gcd": (None, gcd),
+    "lcm": (None, lcm),
+    "factorial": (1, factorial),
+    "binomial": (2, binomial),
+    "is_prime": (1, is_prime),
+    "factorize": (1, factorize),
+}
@@ -0,0 +1,146 @@
+"""
+The named operations of Simple_Calculator.py as dispatch tables.
+
+    calculate("Division", 6.0, 3.0)            # scalars, as the app always did
+    array_calculate("Sine", a)                 # element-wise over NumPy arrays
+    array_calculate("Solve", a, b)             # linear algebra (LAPACK / BLAS)
+
+Each table maps an operation name to (operand count, function). Scalar
+results are exactly what the old if/elif chain produced, including the
+"❌ Cannot divide by zero!" message and angles in degrees. Element-wise
+versions follow NumPy: division by zero gives inf / NaN elements instead
+of a message (array_calculate() counts them), and the second operand
+broadcasts, so a single number works too.
+
+NumPy is only imported by the array operations.
+"""
+
+import math
+
+DIVIDE_BY_ZERO = "❌ Cannot divide by zero!"
+
+
+# ---------------- SCALARS ----------------
+def _divide(num1, num2):
+    return num1 / num2 if num2 != 0 else DIVIDE_BY_ZERO
+
+
+SCALAR_OPERATIONS = {
+    "Addition": (2, lambda num1, num2: num1 + num2),
+    "Subtraction": (2, lambda num1, num2: num1 - num2),
+    "Multiplication": (2, lambda num1, num2: num1 * num2),
+    "Division": (2, _divide),
+    "Power": (2, lambda num1, num2: num1 ** num2),
+    "Modulus": (2, lambda num1, num2: num1 % num2),
+    "Square Root": (1, math.sqrt),
+    "Sine": (1, lambda num1: math.sin(math.radians(num1))),
+    "Cosine": (1, lambda num1: math.cos(math.radians(num1))),
+    "Tangent": (1, lambda num1: math.tan(math.radians(num1))),
+}
+
+BASIC_OPERATIONS = ("Addition", "Subtraction", "Multiplication", "Division")
+SCIENTIFIC_OPERATIONS = tuple(SCALAR_OPERATIONS)
+
+
+def calculate(operation: str, num1, num2=None):
+    """Result of a scalar operation; raises like the operation itself (ValueError, ZeroDivisionError ...)."""
+    count, fn = SCALAR_OPERATIONS[operation]
+    return fn(num1, num2) if count == 2 else fn(num1)
+
+
+# ---------------- ARRAYS ----------------
+def _elementwise():
+    import numpy as np
+
+    def angle(fn):
+        return lambda a: fn(np.radians(a))
+
+    return {
+        "Addition": (2, np.add),
+        "Subtraction": (2, np.subtract),
+        "Multiplication": (2, np.multiply),
+        "Division": (2, np.divide),
+        "Power": (2, np.power),
+        "Modulus": (2, np.mod),
+        "Square Root": (1, np.sqrt),
+        "Sine": (1, angle(np.sin)),
+        "Cosine": (1, angle(np.cos)),
+        "Tangent": (1, angle(np.tan)),
+    }
+
+
+def _symmetric(a):
+    import numpy as np
+
+    return a.shape[0] == a.shape[1] and np.allclose(a, a.T)
+
+
+def _eigenvalues(a):
+    import numpy as np
+
+    # eigh: real, sorted, and several times faster when it applies
+    return np.linalg.eigvalsh(a) if _symmetric(a) else np.linalg.eigvals(a)
+
+
+def _eigenvectors(a):
+    import numpy as np
+
+    return (np.linalg.eigh(a) if _symmetric(a) else np.linalg.eig(a))[1]
+
+
+def _linalg():
+    import numpy as np
+
+    return {
+        "Matrix Multiply": (2, np.matmul),
+        "Inverse": (1, np.linalg.inv),
+        "Determinant": (1, np.linalg.det),
+        "Solve": (2, np.linalg.solve),
+        "Eigenvalues": (1, _eigenvalues),
+        "Eigenvectors": (1, _eigenvectors),
+    }
+
+
+ELEMENTWISE_NAMES = SCIENTIFIC_OPERATIONS
+MATRIX_NAMES = ("Matrix Multiply", "Inverse", "Determinant", "Solve", "Eigenvalues", "Eigenvectors")
+
+_ARRAY_OPERATIONS = None
+
+
+def array_operations() -> dict:
+    """Name -> (operand count, function) of every array operation (imports NumPy)."""
+    global _ARRAY_OPERATIONS
+    if _ARRAY_OPERATIONS is None:
+        _ARRAY_OPERATIONS = {**_elementwise(), **_linalg()}
+    return _ARRAY_OPERATIONS
+
+
+def arity(operation: str) -> int:
+    """How many operands an operation takes, without importing NumPy."""
+    if operation in SCALAR_OPERATIONS:
+        return SCALAR_OPERATIONS[operation][0]
+    return 2 if operation in ("Matrix Multiply", "Solve") else 1
+
+
+def array_calculate(operation: str, a, b=None):
+    """
+    (result, invalid): the operation over arrays, and how many elements of
+    the result are inf / NaN (division by zero, sqrt of a negative ...).
+    Linear algebra errors (singular matrix, mismatched shapes) raise
+    numpy.linalg.LinAlgError / ValueError.
+    """
+    import numpy as np
+
+    count, fn = array_operations()[operation]
+    if operation in MATRIX_NAMES:
+        a = np.asarray(a, dtype=np.float64)
+        if operation != "Matrix Multiply" and (a.ndim != 2 or a.shape[0] != a.shape[1]):
+            raise ValueError(f"{operation} needs a square matrix, got shape {a.shape}")
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        result = fn(a, b) if count == 2 else fn(a)
+    result = np.asarray(result)
+    if result.dtype.kind in "fc":
+        invalid = int(result.size - np.count_nonzero(np.isfinite(result)))
+    else:
+        invalid = 0
+    return result, invalid
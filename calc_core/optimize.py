@@ -0,0 +1,192 @@
+"""
+Optimization pass over the engine's AST, run once when an expression is
+compiled so that repeated evaluations (the batch runner, the HTTP service,
+vectorized columns) do less work each time:
+
+  - constant folding: subtrees without variables (π, math.e, sqrt(2),
+    log(100) ...) are computed once, with the backend's own arithmetic, so
+    the result is the same number the unoptimized tree would produce,
+  - safe identities: x*1, 1*x, x+0, 0+x, x-0 and x^1 become x, and x^2
+    becomes a single multiplication x*x,
+  - common subexpressions: a subtree that occurs more than once, such as
+    (x+1) in (x+1)^2+3*(x+1), is evaluated once per evaluation.
+
+The result uses a few node kinds beyond those of the parser:
+
+    ("const", value)            an already converted backend value
+    ("sq", node)                node * node
+    ("let", (slot, ...), (node, ...), body)
+                                evaluate each node into its slot, in order,
+                                then body
+    ("ref", slot)               the value stored in a slot
+
+Slots are "#0", "#1" ... which cannot clash with variable names. Folding
+never raises: a constant subtree that fails (1/0, sqrt(-1)) is left in
+place, so it fails at evaluation time exactly as before.
+
+Calls of the calculus forms (integrate, diff, solve) are left as they are:
+their first argument is a function of their own variable, which
+calc_core.calculus optimizes separately.
+"""
+
+from .calculus import FORMS
+from .numeric import FLOAT
+
+_LEAVES = ("num", "name", "const")
+
+
+def optimize(ast, backend=FLOAT):
+    """Return an equivalent, cheaper AST for evaluation with backend."""
+    if backend.context is None:
+        return _eliminate_common(_simplify(ast, backend))
+    # Decimal arithmetic is folded at the precision it will run with
+    return backend.run(lambda env: _eliminate_common(_simplify(ast, backend)), None)
+
+
+# ---------------- FOLDING AND IDENTITIES ----------------
+def _is_const(node, value, backend):
+    """True for a constant equal to value that leaves the other operand's type alone."""
+    if node[0] != "const" or node[1] != value:
+        return False
+    # 1.0 and 0.0 would turn an int operand into a float
+    return type(node[1]) is not float if backend is FLOAT else True
+
+
+def _fold(fn, args, node):
+    try:
+        return ("const", fn(*args))
+    except Exception:
+        return node   # fails at evaluation time instead
+
+
+def _simplify(node, backend):
+    kind = node[0]
+
+    if kind == "num":
+        return ("const", backend.literal(node[1]))
+
+    if kind == "name":
+        if node[1] in backend.constants:
+            return ("const", backend.constants[node[1]])
+        return node
+
+    if kind in ("neg", "pos"):
+        inner = _simplify(node[1], backend)
+        if inner[0] == "const":
+            value = inner[1]
+            return _fold((lambda v: -v) if kind == "neg" else (lambda v: +v), (value,), (kind, inner))
+        if kind == "pos" and backend.context is None:
+            return inner   # +x is x (except for Decimal, where it rounds)
+        return (kind, inner)
+
+    if kind == "bin":
+        op = node[1]
+        left = _simplify(node[2], backend)
+        right = _simplify(node[3], backend)
+        if left[0] == "const" and right[0] == "const":
+            return _fold(backend.ops[op], (left[1], right[1]), ("bin", op, left, right))
+        if op == "*":
+            if _is_const(right, 1, backend):
+                return left
+            if _is_const(left, 1, backend):
+                return right
+        elif op == "+":
+            if _is_const(right, 0, backend):
+                return left
+            if _is_const(left, 0, backend):
+                return right
+        elif op == "-":
+            if _is_const(right, 0, backend):
+                return left
+        elif op == "**":
+            if _is_const(right, 1, backend):
+                return left
+            if _is_const(right, 2, backend):
+                return ("sq", left)
+        return ("bin", op, left, right)
+
+    if kind == "call":
+        if node[1] in FORMS:
+            return node
+        args = tuple(_simplify(a, backend) for a in node[2])
+        fn = backend.functions.get(node[1])
+        if fn is not None and all(a[0] == "const" for a in args):
+            return _fold(fn, [a[1] for a in args], ("call", node[1], args))
+        return ("call", node[1], args)
+
+    return node
+
+
+# ---------------- COMMON SUBEXPRESSIONS ----------------
+def _key(node):
+    """
+    Hashable identity of a subtree. Values are tagged with their type:
+    the tuples ("const", 1) and ("const", 1.0) compare equal but are not
+    interchangeable.
+    """
+    kind = node[0]
+    if kind in _LEAVES:
+        return (kind, type(node[1]), node[1])
+    if kind in ("neg", "pos", "sq"):
+        return (kind, _key(node[1]))
+    if kind == "bin":
+        return (kind, node[1], _key(node[2]), _key(node[3]))
+    return (kind, node[1], tuple(_key(a) for a in node[2]))
+
+
+def _children(node):
+    kind = node[0]
+    if kind in ("neg", "pos", "sq"):
+        return (node[1],)
+    if kind == "bin":
+        return (node[2], node[3])
+    if kind == "call" and node[1] not in FORMS:
+        return node[2]
+    return ()
+
+
+def _eliminate_common(ast):
+    # Count occurrences, without descending into repeats of a subtree that
+    # was already seen: its inner nodes are shared along with it.
+    counts = {}
+    keys = {}
+
+    def count(node):
+        key = keys[id(node)] = _key(node)
+        seen = key in counts
+        counts[key] = counts.get(key, 0) + 1
+        if not seen:
+            for child in _children(node):
+                count(child)
+
+    count(ast)
+    if all(n == 1 for k, n in counts.items() if k[0] not in _LEAVES):
+        return ast
+
+    slots = {}      # key -> slot name
+    bindings = []   # (slot, node), dependencies first
+
+    def rewrite(node):
+        kind = node[0]
+        if kind in _LEAVES:
+            return node
+        key = keys.get(id(node)) or _key(node)
+        slot = slots.get(key)
+        if slot is not None:
+            return ("ref", slot)
+        if kind in ("neg", "pos", "sq"):
+            new = (kind, rewrite(node[1]))
+        elif kind == "bin":
+            new = ("bin", node[1], rewrite(node[2]), rewrite(node[3]))
+        elif node[1] in FORMS:
+            new = node   # shared as a whole, never taken apart
+        else:
+            new = ("call", node[1], tuple(rewrite(a) for a in node[2]))
+        if counts.get(key, 1) > 1:
+            slot = slots[key] = f"#{len(bindings)}"
+            bindings.append((slot, new))
+            return ("ref", slot)
+        return new
+
+    body = rewrite(ast)
+    return ("let", tuple(s for s, _ in bindings), tuple(n for _, n in bindings), body)
@@ -0,0 +1,302 @@
+"""
+Graphs of calculator expressions, sampled adaptively and downsampled on
+the server, so a chart gets a few hundred points instead of a dense grid.
+
+    plot = compile_plot("sin(x)/x")
+    data = plot.view(-20, 20, points=800)    # PlotData(x, y, piece, ...)
+    data = plot.view(-10, 30, points=800)    # evaluates only x in (20, 30]
+
+  - sampling: a uniform grid of GRID points across the view, then rounds
+    of bisection wherever a point strays from the chord of its neighbours
+    by more than TOLERANCE of the visible y span (curvature), or where
+    the expression starts or stops being defined (ln(x) at 0, poles).
+    Each round evaluates all its new points in one call through the
+    compiled form of the expression (calc_core.calculus).
+  - downsampling: Largest-Triangle-Three-Buckets (Steinarsson, 2013) keeps
+    the points that carry the visible shape, per continuous piece.
+  - caching: the samples and the x ranges they cover are kept between
+    views. Panning evaluates only the newly exposed part; zooming in
+    refines the points already there where the finer view needs it.
+
+Where the curve jumps (1/x, tan(x)) or is undefined, it is split into
+pieces; the y range of the view leaves out poles. NumPy is required.
+"""
+
+import math
+import numbers
+from collections import namedtuple
+
+from .engine import ExpressionError
+
+# NumPy is optional for the rest of the package
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+GRID = 256                # initial samples across a view
+TOLERANCE = 1e-3          # allowed chord deviation, as a fraction of the y span
+MIN_WIDTH = 1e-6          # narrowest segment refined, as a fraction of the view width
+MAX_ROUNDS = 30           # refinement rounds per view
+MAX_NEW_POINTS = 50_000   # evaluations per view, at most
+MAX_CACHED = 200_000      # samples kept before the cache is cut down to the view
+
+PlotData = namedtuple("PlotData", ["x", "y", "piece", "y_range", "evaluated", "sampled"])
+PlotData.__doc__ = """
+x, y, piece: the downsampled points (lists); points of one continuous piece
+             share a piece number
+y_range:     (low, high) suggested for the y axis, leaving out poles
+evaluated:   points evaluated for this view (0 when it was all cached)
+sampled:     samples in the view before downsampling
+"""
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for plotting (pip install numpy)")
+
+
+# ---------------- DOWNSAMPLING ----------------
+def lttb(x, y, n: int):
+    """
+    Indices of n of the points (x, y) picked by Largest-Triangle-Three-
+    Buckets: the first and last, plus from each of n - 2 equal buckets the
+    point making the largest triangle with the previous pick and the mean
+    of the next bucket. x and y are arrays of finite values.
+    """
+    size = len(x)
+    if n >= size:
+        return np.arange(size)
+    if n < 3:
+        return np.array([0, size - 1][:max(n, 1)])
+    edges = np.linspace(1, size - 1, n - 1).astype(int)
+    # Bucket means, and the last point standing in for the bucket after the last
+    counts = np.diff(edges)
+    mean_x = np.append(np.add.reduceat(x[1:size - 1], edges[:-1] - 1) / counts, x[-1])
+    mean_y = np.append(np.add.reduceat(y[1:size - 1], edges[:-1] - 1) / counts, y[-1])
+
+    picked = np.empty(n, dtype=int)
+    picked[0], picked[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        # Twice the triangle area, up to sign
+        area = np.abs((ax - mean_x[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (mean_y[i + 1] - ay))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def _pieces(y):
+    """(start, stop) of the runs of finite values in y."""
+    finite = np.isfinite(y)
+    change = np.flatnonzero(np.diff(finite.astype(np.int8))) + 1
+    bounds = np.concatenate(([0], change, [len(y)]))
+    return [(int(s), int(e)) for s, e in zip(bounds[:-1], bounds[1:]) if finite[s]]
+
+
+def downsample(x, y, points: int, breaks=()):
+    """
+    LTTB over each continuous piece of (x, y), with the budget of points
+    shared in proportion to their sizes. breaks are indices i where the
+    curve jumps between i - 1 and i (see FunctionPlot). Returns (x, y,
+    piece) lists.
+    """
+    spans = []
+    cuts = sorted(set(breaks))
+    for start, stop in _pieces(y):
+        inner = [c for c in cuts if start < c < stop]
+        spans += list(zip([start] + inner, inner + [stop]))
+    total = sum(stop - start for start, stop in spans)
+    out_x, out_y, out_piece = [], [], []
+    for number, (start, stop) in enumerate(spans):
+        share = max(2, round(points * (stop - start) / total))
+        px, py = x[start:stop], y[start:stop]
+        keep = lttb(px, py, share)
+        out_x += px[keep].tolist()
+        out_y += py[keep].tolist()
+        out_piece += [number] * len(keep)
+    return out_x, out_y, out_piece
+
+
+# ---------------- Y RANGE ----------------
+def y_range(x, y):
+    """
+    (low, high) to show: the range of the values, except that a tail
+    reaching far beyond the bulk of the curve (a pole) is cut at the 1st /
+    99th percentile, weighting each sample by the width it stands for so
+    that dense sampling near a pole does not count more.
+    """
+    finite = np.isfinite(y)
+    if not finite.any():
+        return (-1.0, 1.0)
+    fx, fy = x[finite], y[finite]
+    lo, hi = float(fy.min()), float(fy.max())
+    if len(fy) > 2:
+        width = np.gradient(fx)
+        order = np.argsort(fy)
+        cumulative = np.cumsum(width[order])
+        cumulative /= cumulative[-1]
+        q01 = float(fy[order[np.searchsorted(cumulative, 0.01)]])
+        q99 = float(fy[order[min(np.searchsorted(cumulative, 0.99), len(fy) - 1)]])
+        bulk = q99 - q01
+        if lo < q01 - 4 * bulk:
+            lo = q01 - 0.1 * bulk
+        if hi > q99 + 4 * bulk:
+            hi = q99 + 0.1 * bulk
+    if hi - lo <= 1e-12 * max(abs(lo), abs(hi), 1.0):
+        pad = max(abs(hi), 1.0) / 2
+        return (lo - pad, hi + pad)
+    return (lo, hi)
+
+
+# ---------------- SAMPLING ----------------
+def _to_refine(x, y, span, min_width):
+    """Indices i of the segments [x[i], x[i+1]] to bisect."""
+    finite = np.isfinite(y)
+    flags = finite[1:] != finite[:-1]     # defined on one side only
+    if len(x) > 2:
+        x0, x1, x2 = x[:-2], x[1:-1], x[2:]
+        y0, y1, y2 = y[:-2], y[1:-1], y[2:]
+        with np.errstate(all="ignore"):
+            chord = y0 + (y2 - y0) * (x1 - x0) / (x2 - x0)
+            bent = np.abs(y1 - chord) > TOLERANCE * span   # False where any is NaN
+        flags[:-1] |= bent
+        flags[1:] |= bent
+    flags &= np.diff(x) > min_width
+    return np.flatnonzero(flags)
+
+
+class FunctionPlot:
+    """
+    Samples of one function (a calc_core.calculus Sampler) kept across
+    views, with the x ranges they cover.
+    """
+
+    def __init__(self, sampler):
+        _require_numpy()
+        self.sampler = sampler
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.covered = []   # sorted, disjoint (lo, hi) ranges already sampled
+        self._last = None   # (lo, hi, points) -> PlotData of the latest view
+
+    def _add(self, xs):
+        xs = np.unique(np.asarray(xs, dtype=float))
+        if len(self.x):
+            # Points already sampled (shared edges of ranges) are not evaluated again
+            at = np.searchsorted(self.x, xs).clip(max=len(self.x) - 1)
+            xs = xs[self.x[at] != xs]
+        if not len(xs):
+            return 0
+        ys = np.array(self.sampler.many(xs.tolist()), dtype=float)
+        at = np.searchsorted(self.x, xs)
+        self.x = np.insert(self.x, at, xs)
+        self.y = np.insert(self.y, at, ys)
+        return len(xs)
+
+    def _gaps(self, lo, hi):
+        """Parts of [lo, hi] not covered yet."""
+        gaps = []
+        start = lo
+        for c_lo, c_hi in self.covered:
+            if c_hi < start or c_lo > hi:
+                continue
+            if c_lo > start:
+                gaps.append((start, c_lo))
+            start = max(start, c_hi)
+        if start < hi:
+            gaps.append((start, hi))
+        return gaps
+
+    def _cover(self, lo, hi):
+        merged = []
+        for c_lo, c_hi in sorted(self.covered + [(lo, hi)]):
+            if merged and c_lo <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], c_hi))
+            else:
+                merged.append((c_lo, c_hi))
+        self.covered = merged
+
+    def _window(self, lo, hi):
+        """Slice of the samples in [lo, hi], plus one on each side (for the edges of the chart)."""
+        start = max(int(np.searchsorted(self.x, lo, "left")) - 1, 0)
+        stop = min(int(np.searchsorted(self.x, hi, "right")) + 1, len(self.x))
+        return start, stop
+
+    def view(self, lo: float, hi: float, points: int = 800) -> PlotData:
+        """The curve over [lo, hi], downsampled to about `points` points."""
+        lo, hi = float(lo), float(hi)
+        if not (math.isfinite(lo) and math.isfinite(hi) and lo < hi):
+            raise ExpressionError("the x range must be finite, with min < max")
+        key = (lo, hi, points)
+        if self._last is not None and self._last[0] == key:
+            return self._last[1]._replace(evaluated=0)
+        if len(self.x) > MAX_CACHED:
+            start, stop = self._window(lo, hi)
+            self.x, self.y = self.x[start:stop], self.y[start:stop]
+            self.covered = [(max(c_lo, lo), min(c_hi, hi)) for c_lo, c_hi in self.covered
+                            if c_hi >= lo and c_lo <= hi]
+
+        width = hi - lo
+        evaluated = 0
+        gaps = self._gaps(lo, hi)
+        if gaps:
+            grid = [np.linspace(g_lo, g_hi, max(2, math.ceil(GRID * (g_hi - g_lo) / width) + 1))
+                    for g_lo, g_hi in gaps]
+            evaluated += self._add(np.concatenate(grid))
+            for g_lo, g_hi in gaps:
+                self._cover(g_lo, g_hi)
+
+        for _ in range(MAX_ROUNDS):
+            start, stop = self._window(lo, hi)
+            x, y = self.x[start:stop], self.y[start:stop]
+            low, high = y_range(x, y)
+            split = _to_refine(x, y, high - low, MIN_WIDTH * width)
+            if not len(split) or evaluated + len(split) > MAX_NEW_POINTS:
+                break
+            evaluated += self._add((x[split] + x[split + 1]) / 2)
+
+        start, stop = self._window(lo, hi)
+        x, y = self.x[start:stop], self.y[start:stop]
+        low, high = y_range(x, y)
+        out_x, out_y, piece = downsample(x, y, points, _jumps(x, y, high - low, MIN_WIDTH * width))
+        data = PlotData(out_x, out_y, piece, (low, high), evaluated, len(x))
+        self._last = (key, data)
+        return data
+
+
+def _jumps(x, y, span, min_width):
+    """
+    Indices i where the curve jumps between samples i - 1 and i, as at a
+    pole of tan(x) or 1/x: the segment was refined down to min_width and
+    still changes by more than the visible span, and by more than the
+    segments on either side of it.
+    """
+    with np.errstate(invalid="ignore"):
+        change = np.abs(np.diff(y))
+        padded = np.concatenate(([0.0], change, [0.0]))
+        jump = ((np.diff(x) <= 2 * min_width) & (change > span)
+                & (change >= padded[:-2]) & (change >= padded[2:]))
+    return (np.flatnonzero(jump) + 1).tolist()
+
+
+def compile_plot(expr: str, var: str = "x", backend=None, env=None) -> FunctionPlot:
+    """
+    FunctionPlot of a display expression (as typed in the calculator) in
+    var. backend and env (e.g. a Workspace's backend and values) supply
+    user functions and the other variables.
+    """
+    from .calculus import Function
+    from .engine import parse
+    from .evaluator import prep_expr_for_eval
+
+    _require_numpy()
+    function = Function(parse(prep_expr_for_eval(expr)), var, backend)
+    for name in sorted(function.names):
+        if env is None or name not in env:
+            raise ExpressionError(f"Unknown variable {name!r}")
+        if not isinstance(env[name], numbers.Number):
+            raise ExpressionError(f"{name} has no value")
+    return FunctionPlot(function.bind(env))
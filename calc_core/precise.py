@@ -0,0 +1,239 @@
+"""
+The Decimal and Fraction numeric backends (see calc_core.numeric).
+
+Kept apart from the float backend so that importing the calculator core does
+not pay for the decimal / fractions modules until one of these modes is used.
+"""
+
+import decimal
+import functools
+from decimal import Decimal
+from fractions import Fraction
+
+from .limits import check_power
+from .numeric import _PY_OPS, DEFAULT_PRECISION, NumericBackend, format_int
+
+
+# ---------------- DECIMAL ----------------
+# pi / sin / cos follow the recipes in the decimal module documentation and
+# use whatever context is active (backend.run() installs the right one).
+def _dec_pi():
+    with decimal.localcontext() as ctx:
+        ctx.prec += 2
+        three = Decimal(3)
+        lasts, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+        while s != lasts:
+            lasts = s
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            t = (t * n) / d
+            s += t
+    return +s
+
+
+def _dec_reduce(x):
+    # Bring the angle into [-2π, 2π] so the series converges quickly
+    two_pi = 2 * _dec_pi()
+    return x % two_pi if abs(x) > two_pi else x
+
+
+def _dec_sin(x):
+    x = _dec_reduce(Decimal(x))
+    with decimal.localcontext() as ctx:
+        ctx.prec += 2
+        i, lasts, s, fact, num, sign = 1, 0, x, 1, x, 1
+        while s != lasts:
+            lasts = s
+            i += 2
+            fact *= i * (i - 1)
+            num *= x * x
+            sign *= -1
+            s += num / fact * sign
+    return +s
+
+
+def _dec_cos(x):
+    x = _dec_reduce(Decimal(x))
+    with decimal.localcontext() as ctx:
+        ctx.prec += 2
+        i, lasts, s, fact, num, sign = 0, 0, 1, 1, 1, 1
+        while s != lasts:
+            lasts = s
+            i += 2
+            fact *= i * (i - 1)
+            num *= x * x
+            sign *= -1
+            s += num / fact * sign
+    return +s
+
+
+def _dec_tan(x):
+    return _dec_sin(x) / _dec_cos(x)
+
+
+def _dec_log(x, base=None):
+    x = Decimal(x)
+    if base is None:
+        return x.ln()
+    return x.ln() / Decimal(base).ln()
+
+
+def _dec_literal(v):
+    # repr() of a float literal is its shortest round-trip text, so "0.1" stays 0.1
+    return Decimal(v) if isinstance(v, int) else Decimal(repr(v))
+
+
+@functools.lru_cache(maxsize=16)
+def decimal_backend(precision: int = DEFAULT_PRECISION) -> NumericBackend:
+    """Decimal backend working with `precision` significant digits."""
+    ctx = decimal.Context(prec=precision)
+    with decimal.localcontext(ctx):
+        pi = _dec_pi()
+        e = Decimal(1).exp()
+    return NumericBackend(
+        "decimal",
+        literal=_dec_literal,
+        functions={
+            "math.sin": _dec_sin,
+            "math.cos": _dec_cos,
+            "math.tan": _dec_tan,
+            "math.sqrt": lambda x: Decimal(x).sqrt(),
+            "math.log10": lambda x: Decimal(x).log10(),
+            "math.log": _dec_log,
+        },
+        constants={"math.pi": pi, "math.e": e},
+        ops=_PY_OPS,
+        context=ctx,
+    )
+
+
+# ---------------- FRACTION ----------------
+# Digits used when a function has no exact rational result
+_FRACTION_APPROX_PRECISION = 34
+
+
+def _iroot(n: int, k: int) -> int:
+    """Integer k-th root (floor) of a non-negative int, by Newton's method."""
+    if n < 2:
+        return n
+    if k >= n.bit_length():
+        return 1   # n < 2**k
+    x = 1 << -(-n.bit_length() // k)
+    while True:
+        y = ((k - 1) * x + n // x ** (k - 1)) // k
+        if y >= x:
+            return x
+        x = y
+
+
+def _exact_root(q: Fraction, k: int):
+    """Exact k-th root of q if it is rational, else None."""
+    if q < 0:
+        if k % 2 == 0:
+            return None
+        r = _exact_root(-q, k)
+        return None if r is None else -r
+    rn, rd = _iroot(q.numerator, k), _iroot(q.denominator, k)
+    if rn ** k == q.numerator and rd ** k == q.denominator:
+        return Fraction(rn, rd)
+    return None
+
+
+def _via_decimal(fn):
+    """Evaluate fn with the Decimal implementation and convert back exactly."""
+    def wrapper(*args):
+        with decimal.localcontext(decimal.Context(prec=_FRACTION_APPROX_PRECISION)):
+            dargs = [Decimal(a.numerator) / Decimal(a.denominator) for a in map(Fraction, args)]
+            return Fraction(fn(*dargs))
+    return wrapper
+
+
+def _frac_sqrt(x):
+    x = Fraction(x)
+    if x < 0:
+        raise ValueError("math domain error")
+    exact = _exact_root(x, 2)
+    return exact if exact is not None else _via_decimal(lambda d: d.sqrt())(x)
+
+
+def _frac_pow(base, exp):
+    base, exp = Fraction(base), Fraction(exp)
+    if exp.denominator == 1:
+        check_power(base, abs(exp.numerator))
+        return base ** exp.numerator
+    root = _exact_root(base, exp.denominator)
+    if root is not None:
+        check_power(root, abs(exp.numerator))
+        return root ** exp.numerator
+    if base < 0:
+        raise ValueError("math domain error")
+    return _via_decimal(lambda b, p: b ** p)(base, exp)
+
+
+def _frac_special(exact, fn):
+    """Use `exact(x)` when it knows the rational answer, otherwise approximate."""
+    approx = _via_decimal(fn)
+
+    def wrapper(*args):
+        value = exact(*args)
+        return value if value is not None else approx(*args)
+    return wrapper
+
+
+def _frac_log10_exact(x, *_):
+    x = Fraction(x)
+    if x > 0 and x.denominator == 1:
+        s = str(x.numerator)
+        if s.startswith("1") and s.count("0") == len(s) - 1:
+            return Fraction(len(s) - 1)
+    return None
+
+
+def _frac_literal(v):
+    return Fraction(v) if isinstance(v, int) else Fraction(repr(v))
+
+
+@functools.lru_cache(maxsize=1)
+def fraction_backend() -> NumericBackend:
+    """Exact rational backend (built on first use)."""
+    approx = decimal_backend(_FRACTION_APPROX_PRECISION)
+    return NumericBackend(
+        "fraction",
+        literal=_frac_literal,
+        functions={
+            "math.sin": _frac_special(lambda x: Fraction(0) if x == 0 else None, _dec_sin),
+            "math.cos": _frac_special(lambda x: Fraction(1) if x == 0 else None, _dec_cos),
+            "math.tan": _frac_special(lambda x: Fraction(0) if x == 0 else None, _dec_tan),
+            "math.sqrt": _frac_sqrt,
+            "math.log10": _frac_special(_frac_log10_exact, lambda x: x.log10()),
+            "math.log": _frac_special(lambda x, *b: Fraction(0) if x == 1 else None, _dec_log),
+        },
+        constants={
+            "math.pi": Fraction(approx.constants["math.pi"]),
+            "math.e": Fraction(approx.constants["math.e"]),
+        },
+        ops=dict(_PY_OPS, **{"**": _frac_pow}),
+    )
+
+
+# ---------------- DISPLAY ----------------
+def format_decimal(value: Decimal) -> str:
+    """Full computed precision, without exponent noise or trailing zeros."""
+    if value == value.to_integral_value() and abs(value) < Decimal(10) ** 28:
+        return str(value.quantize(Decimal(1)))
+    # Strip trailing zeros without rounding to the (smaller) default context
+    digits = len(value.as_tuple().digits)
+    return str(value.normalize(decimal.Context(prec=digits)))
+
+
+def format_fraction(value: Fraction, digits: int) -> str:
+    """Show p/q (or an integer), or a rounded decimal when the denominator is huge."""
+    if value.denominator == 1:
+        return format_int(value.numerator, digits)
+    try:
+        if value.denominator <= 10 ** 6:
+            return f"{value.numerator}/{value.denominator}"
+        return repr(float(f"{float(value):.{digits}g}"))
+    except (ValueError, OverflowError):
+        # Too many digits to print / beyond float range: show the magnitude
+        return format_int(value.numerator // value.denominator, digits)
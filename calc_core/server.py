@@ -0,0 +1,571 @@
+"""
+HTTP/JSON evaluation service (standard library only; NumPy optional).
+
+    python -m calc_core.server --port 8765 --workers 4
+
+Endpoints:
+  POST /evaluate        {"expression": "sqrt(16)+2", "mode": "float", "precision": 28}
+                        {"expression": "x^2+1", "variables": {"x": 3}}
+                          -> {"expression": ..., "result": "6.0"}
+  POST /evaluate/batch  {"expressions": ["1+1", "2^10"], "mode": ...}
+                          -> {"results": ["2", "1024"]}
+                        {"expression": "x^2", "variables": {"x": [1, 2, 3]}}
+                          -> {"results": ["1.0", "4.0", "9.0"]}
+  GET  /metrics         Prometheus text format counters and latency quantiles
+
+Results are display text (format_result), "Error" where the calculator
+would show Error; with or without variables, a float that overflows is
+"inf", as on the calculator display. In float mode variables are floats.
+
+Single requests that arrive close together are collected for up to
+`batch_window` seconds (or `max_batch` requests) and evaluated as one
+batch: identical expressions are evaluated once, and float requests that
+share an expression but bind different variables become one NumPy call in
+calc_core.vectorized. Batches run in a process pool, so a slow expression
+never blocks the event loop, and at most `workers * 2` batches are in
+flight. Beyond `max_pending` queued expressions requests get 503 with
+Retry-After; a request still unanswered after `timeout` seconds gets 504.
+Its worker keeps computing until the expression finishes, and until then
+the job keeps its slot and still counts as pending, so requests that time
+out cannot pile more work into the pool than the limits allow.
+
+Any other failure is answered with 500. If a worker process dies (killed
+for going over CALC_MEMORY_MB, say) the pool is broken: the requests it
+was serving get 500 and the server starts a new pool for the next ones.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlsplit
+
+from .batch import LatencyStats
+from .evaluator import evaluate_expression, get_compiled
+from .limits import apply_worker_limits, timed
+from .numeric import DEFAULT_PRECISION, MODES, format_result, get_backend
+
+MAX_PRECISION = 1000
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class RequestError(ValueError):
+    """A request that cannot be served; carries the HTTP status to answer with."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------------- EVALUATION (runs in worker processes) ----------------
+# A job is (expression, mode, precision, variables or None).
+
+def _evaluate_with(expr, mode, precision, variables):
+    """Scalar evaluation with variables bound."""
+    try:
+        backend = get_backend(mode, precision)
+        compiled = get_compiled(expr, mode, precision)
+        if mode == "float":
+            env = {k: float(v) for k, v in variables.items()}
+        else:
+            env = {k: backend.literal(v) for k, v in variables.items()}
+        value = compiled.evaluate(env)
+    except Exception:
+        return "Error"
+    return format_result(value)
+
+
+def _vectorize(expr, rows):
+    """
+    Evaluate expr for several variable bindings in one NumPy call.
+    Returns result texts, or None when the vectorized path does not apply.
+    """
+    from . import vectorized
+
+    if vectorized.np is None:
+        return None
+    try:
+        compiled = vectorized.compile_vectorized(expr)
+        if not compiled.names:
+            return None
+        columns = {name: [float(row[name]) for row in rows] for name in compiled.names}
+    except Exception:
+        return None   # syntax error or a missing variable: let the scalar path report it
+    values, mask = compiled(columns)
+    return ["Error" if bad else format_result(float(v)) for v, bad in zip(values.tolist(), mask.tolist())]
+
+
+def evaluate_jobs(jobs):
+    """Evaluate a list of jobs, returning one result text per job, in order."""
+    results = [None] * len(jobs)
+    plain = {}       # (expr, mode, precision) -> job indexes
+    with_vars = {}   # expr -> job indexes (float mode)
+    for i, (expr, mode, precision, variables) in enumerate(jobs):
+        if not variables:
+            plain.setdefault((expr, mode, precision), []).append(i)
+        elif mode == "float":
+            with_vars.setdefault(expr, []).append(i)
+        else:
+            results[i] = timed(_evaluate_with, expr, mode, precision, variables)
+
+    for (expr, mode, precision), idx in plain.items():
+        text = format_result(timed(evaluate_expression, expr, mode, precision))
+        for i in idx:
+            results[i] = text
+
+    for expr, idx in with_vars.items():
+        texts = _vectorize(expr, [jobs[i][3] for i in idx]) if len(idx) > 1 else None
+        if texts is None:
+            texts = [timed(_evaluate_with, expr, "float", DEFAULT_PRECISION, jobs[i][3]) for i in idx]
+        for i, text in zip(idx, texts):
+            results[i] = text
+    return results
+
+
+def evaluate_columns(expr, mode, precision, columns):
+    """Evaluate one expression over equal-length lists of variable values."""
+    n = len(next(iter(columns.values())))
+    rows = [{name: values[i] for name, values in columns.items()} for i in range(n)]
+    return evaluate_jobs([(expr, mode, precision, row) for row in rows])
+
+
+# ---------------- METRICS ----------------
+class Metrics:
+    """Counters and a latency reservoir, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self.requests = {}          # (path, status) -> count
+        self.expressions = 0
+        self.batches = 0
+        self.batched_expressions = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.pool_restarts = 0
+        self.latency = LatencyStats()
+
+    def record(self, path: str, status: int, seconds: float):
+        key = (path, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.latency.add(seconds)
+
+    def render(self, pending: int, in_flight: int) -> str:
+        lines = [
+            "# HELP calc_requests_total HTTP requests by path and status.",
+            "# TYPE calc_requests_total counter",
+        ]
+        for (path, status), count in sorted(self.requests.items()):
+            lines.append(f'calc_requests_total{{path="{path}",status="{status}"}} {count}')
+        lines += [
+            "# HELP calc_expressions_total Expressions evaluated.",
+            "# TYPE calc_expressions_total counter",
+            f"calc_expressions_total {self.expressions}",
+            "# HELP calc_batches_total Micro-batches sent to the worker pool.",
+            "# TYPE calc_batches_total counter",
+            f"calc_batches_total {self.batches}",
+            "# HELP calc_batched_expressions_total Expressions sent to the worker pool in batches.",
+            "# TYPE calc_batched_expressions_total counter",
+            f"calc_batched_expressions_total {self.batched_expressions}",
+            "# HELP calc_rejected_total Requests refused with 503 (queue full).",
+            "# TYPE calc_rejected_total counter",
+            f"calc_rejected_total {self.rejected}",
+            "# HELP calc_timeouts_total Requests answered with 504.",
+            "# TYPE calc_timeouts_total counter",
+            f"calc_timeouts_total {self.timeouts}",
+            "# HELP calc_pool_restarts_total Worker pools replaced after a worker process died.",
+            "# TYPE calc_pool_restarts_total counter",
+            f"calc_pool_restarts_total {self.pool_restarts}",
+            "# HELP calc_pending_expressions Expressions queued or being evaluated.",
+            "# TYPE calc_pending_expressions gauge",
+            f"calc_pending_expressions {pending}",
+            "# HELP calc_batches_in_flight Batches being evaluated right now.",
+            "# TYPE calc_batches_in_flight gauge",
+            f"calc_batches_in_flight {in_flight}",
+            "# HELP calc_request_seconds Request latency (sampled).",
+            "# TYPE calc_request_seconds summary",
+        ]
+        for q in (0.5, 0.9, 0.99):
+            lines.append(f'calc_request_seconds{{quantile="{q}"}} {self.latency.percentile(q * 100):.6f}')
+        lines.append(f"calc_request_seconds_sum {self.latency.total:.6f}")
+        lines.append(f"calc_request_seconds_count {self.latency.count}")
+        return "\n".join(lines) + "\n"
+
+
+# ---------------- SERVER ----------------
+class EvaluationServer:
+    """
+    asyncio HTTP/1.1 server (keep-alive, Content-Length bodies) in front of
+    a micro-batcher and a process pool. workers=0 evaluates in the event
+    loop's process, which is handy for tests and tiny deployments.
+    """
+
+    def __init__(self, workers=None, max_batch: int = 256, batch_window: float = 0.002,
+                 max_pending: int = 10_000, timeout: float = 5.0, max_body: int = 1 << 20):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.max_body = max_body
+        self.metrics = Metrics()
+        self._pool = None
+        self._queue = None
+        self._slots = None
+        self._pending = 0
+        self._in_flight = 0
+        self._tasks = set()
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765):
+        if self.workers > 0:
+            self._pool = self._new_pool()
+            # Start the workers before accepting connections: forked later,
+            # they would inherit client sockets and hold them open.
+            await asyncio.get_running_loop().run_in_executor(self._pool, evaluate_jobs, [])
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max(1, self.workers) * 2)
+        self._spawn(self._collect())
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=apply_worker_limits)
+
+    def _replace_pool(self, broken):
+        """Swap in a new pool for one whose worker died (once, however many jobs failed)."""
+        if self._pool is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+            self.metrics.pool_restarts += 1
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    # -------- evaluation --------
+    def _start(self, count, fn, *args):
+        """
+        Run fn in the pool (or inline without one) and return its future.
+        The caller holds a slot; it is released, and the job's `count`
+        expressions stop counting as pending, when the work itself is done,
+        whether or not anyone still waits for it.
+        """
+        self._in_flight += 1
+        loop = asyncio.get_running_loop()
+        pool = self._pool
+        if pool is None:
+            work = loop.create_future()
+            try:
+                work.set_result(fn(*args))
+            except Exception as exc:
+                work.set_exception(exc)
+        else:
+            try:
+                work = loop.run_in_executor(pool, fn, *args)
+            except BrokenProcessPool:
+                # Broken since the last job finished: this one goes to a new pool
+                self._replace_pool(pool)
+                pool = self._pool
+                work = loop.run_in_executor(pool, fn, *args)
+        work.add_done_callback(lambda done: self._finish(done, count, pool))
+        return work
+
+    def _finish(self, work, count, pool):
+        self._in_flight -= 1
+        self._pending -= count
+        self._slots.release()
+        if not work.cancelled():
+            # Retrieved, so a job nobody waits for any more is not logged
+            if isinstance(work.exception(), BrokenProcessPool):
+                self._replace_pool(pool)
+
+    async def _run(self, count, fn, *args):
+        """Wait for a slot, then run fn; the `count` pending expressions are released with the job."""
+        try:
+            await self._slots.acquire()
+        except asyncio.CancelledError:
+            self._pending -= count   # timed out before it started
+            raise
+        # shield: a timeout stops the wait, not the work (see _start)
+        return await asyncio.shield(self._start(count, fn, *args))
+
+    def _admit(self, count: int):
+        if self._pending + count > self.max_pending:
+            self.metrics.rejected += 1
+            raise RequestError(503, "server busy, retry later")
+        self._pending += count
+        self.metrics.expressions += count
+
+    async def _collect(self):
+        """Drain the single-request queue into micro-batches."""
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            if self.batch_window > 0 and queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.batch_window)
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            # Waiting for a free slot here is the backpressure: the queue grows
+            # until _admit() starts refusing requests. The job releases it.
+            await self._slots.acquire()
+            self._spawn(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        queued = len(batch)
+        batch = [(job, fut) for job, fut in batch if not fut.done()]   # drop timed-out requests
+        if not batch:
+            self._pending -= queued
+            self._slots.release()
+            return
+        self.metrics.batches += 1
+        self.metrics.batched_expressions += len(batch)
+        try:
+            results = await self._start(queued, evaluate_jobs, [job for job, _ in batch])
+        except Exception as exc:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    async def evaluate(self, expr, mode="float", precision=DEFAULT_PRECISION, variables=None) -> str:
+        """Queue one expression for the next micro-batch and wait for its result."""
+        self._admit(1)
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(((expr, mode, precision, variables), fut))
+        # On timeout the job stays counted as pending until its batch has run
+        return await asyncio.wait_for(fut, self.timeout)
+
+    async def evaluate_many(self, exprs, mode="float", precision=DEFAULT_PRECISION):
+        """Evaluate a list of expressions, split into max_batch sized pool jobs."""
+        chunks = [
+            [(e, mode, precision, None) for e in exprs[i:i + self.max_batch]]
+            for i in range(0, len(exprs), self.max_batch)
+        ]
+        self._admit(len(exprs))
+        self.metrics.batches += len(chunks)
+        self.metrics.batched_expressions += len(exprs)
+        # Each chunk releases its own pending count when its job is done
+        parts = await asyncio.wait_for(
+            asyncio.gather(*(self._run(len(c), evaluate_jobs, c) for c in chunks)), self.timeout)
+        return [r for part in parts for r in part]
+
+    async def evaluate_over(self, expr, mode, precision, columns):
+        """Evaluate one expression over columns of variable values."""
+        n = len(next(iter(columns.values()))) if columns else 0
+        self._admit(n)
+        self.metrics.batches += 1
+        self.metrics.batched_expressions += n
+        return await asyncio.wait_for(
+            self._run(n, evaluate_columns, expr, mode, precision, columns), self.timeout)
+
+    # -------- HTTP --------
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "bad Content-Length"}, False)
+                    break
+                if length > self.max_body:
+                    await self._respond(writer, 413, {"error": "request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                start = time.perf_counter()
+                path = urlsplit(target).path
+                status, payload, extra = await self._dispatch(method, path, body)
+                await self._respond(writer, status, payload, keep_alive, extra)
+                self.metrics.record(path, status, time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive, extra=None):
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+            ctype = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            ctype = "application/json"
+        head = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            f"Content-Type: {ctype}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        head += [f"{k}: {v}" for k, v in (extra or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method, path, body):
+        routes = {
+            "/evaluate": ("POST", self._evaluate_one),
+            "/evaluate/batch": ("POST", self._evaluate_batch),
+            "/metrics": ("GET", None),
+        }
+        if path not in routes:
+            return 404, {"error": f"no such endpoint: {path}"}, None
+        allowed, handler = routes[path]
+        if method != allowed:
+            return 405, {"error": f"use {allowed}"}, {"Allow": allowed}
+        if handler is None:
+            return 200, self.metrics.render(self._pending, self._in_flight), None
+        try:
+            return 200, await handler(_parse_body(body)), None
+        except RequestError as exc:
+            extra = {"Retry-After": "1"} if exc.status == 503 else None
+            return exc.status, {"error": str(exc)}, extra
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            return 504, {"error": f"evaluation took longer than {self.timeout}s"}, None
+        except Exception as exc:
+            # A dead worker process (BrokenProcessPool) or a bug: answer rather than hang up
+            return 500, {"error": f"evaluation failed ({type(exc).__name__})"}, None
+
+    async def _evaluate_one(self, req):
+        expr = _get_expression(req, "expression")
+        mode, precision = _get_mode(req)
+        variables = req.get("variables")
+        if variables is not None and not _is_number_map(variables):
+            raise RequestError(400, '"variables" must map names to numbers')
+        result = await self.evaluate(expr, mode, precision, variables or None)
+        return {"expression": expr, "result": result}
+
+    async def _evaluate_batch(self, req):
+        mode, precision = _get_mode(req)
+        if "expressions" in req:
+            exprs = req["expressions"]
+            if not isinstance(exprs, list) or not all(isinstance(e, str) for e in exprs):
+                raise RequestError(400, '"expressions" must be a list of strings')
+            return {"results": await self.evaluate_many(exprs, mode, precision)}
+
+        expr = _get_expression(req, "expression")
+        columns = req.get("variables")
+        if (not isinstance(columns, dict) or not columns
+                or not all(isinstance(v, list) and all(_is_number(x) for x in v) for v in columns.values())
+                or len({len(v) for v in columns.values()}) != 1):
+            raise RequestError(400, '"variables" must map names to equal-length lists of numbers')
+        return {"results": await self.evaluate_over(expr, mode, precision, columns)}
+
+
+# ---------------- REQUEST VALIDATION ----------------
+def _parse_body(body: bytes) -> dict:
+    try:
+        req = json.loads(body or b"{}")
+    except ValueError:
+        raise RequestError(400, "body must be JSON") from None
+    if not isinstance(req, dict):
+        raise RequestError(400, "body must be a JSON object")
+    return req
+
+
+def _get_expression(req, key):
+    expr = req.get(key)
+    if not isinstance(expr, str):
+        raise RequestError(400, f'"{key}" must be a string')
+    return expr
+
+
+def _get_mode(req):
+    mode = req.get("mode", "float")
+    if mode not in MODES:
+        raise RequestError(400, f'"mode" must be one of {", ".join(MODES)}')
+    precision = req.get("precision", DEFAULT_PRECISION)
+    if not isinstance(precision, int) or not 1 <= precision <= MAX_PRECISION:
+        raise RequestError(400, f'"precision" must be an integer from 1 to {MAX_PRECISION}')
+    return mode, precision
+
+
+def _is_number(x):
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+def _is_number_map(variables):
+    return isinstance(variables, dict) and all(_is_number(v) for v in variables.values())
+
+
+# ---------------- COMMAND LINE ----------------
+async def serve(host, port, **options):
+    server = EvaluationServer(**options)
+    await server.start(host, port)
+    # The load generator reads this line to find the port when started with --port 0
+    print(f"listening on http://{host}:{server.port}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calculator HTTP/JSON evaluation service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count, 0 = evaluate in the server process)")
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="most single requests evaluated together")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0,
+                        help="how long to wait for more requests before evaluating a batch")
+    parser.add_argument("--max-pending", type=int, default=10_000,
+                        help="queued expressions beyond which requests get 503")
+    parser.add_argument("--timeout", type=float, default=5.0, help="seconds before a request gets 504")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers, max_batch=args.max_batch,
+                          batch_window=args.batch_window_ms / 1000, max_pending=args.max_pending,
+                          timeout=args.timeout))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
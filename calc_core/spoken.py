@@ -0,0 +1,248 @@
+"""
+Turning a speech transcript into a calculator expression.
+
+The phrase table is loaded into a word trie at import time. The transcript
+is split into words once and scanned left to right; at each word the trie
+gives the longest matching phrase ("raised to the power of" wins over
+"raised to"). Phrases only ever match whole words, so "x" inside "six" or
+"over" inside "moreover" are left alone, and the result no longer depends
+on replacement order. Runs of number words ("three hundred forty two point
+five") are read as one number.
+"""
+
+# ---------------- PHRASE TABLE ----------------
+# Spoken phrase -> output tokens (space separated)
+PHRASES = {
+    # Division
+    "divided by": "/",
+    "divide by": "/",
+    "over": "/",
+
+    # Multiplication
+    "multiplied by": "*",
+    "times": "*",
+    "x": "*",
+
+    # Powers
+    "to the power of": "^",
+    "power of": "^",
+    "raised to the power of": "^",
+    "raised to": "^",
+    "squared": "^2",
+    "square": "^2",
+    "cubed": "^3",
+    "cube": "^3",
+
+    # Roots
+    "square root of": "sqrt(",
+    "square root": "sqrt(",
+    "root of": "sqrt(",
+    "sqrt": "sqrt(",
+
+    # Trigonometric functions
+    "sine of": "sin(",
+    "cosine of": "cos(",
+    "tangent of": "tan(",
+    "sin of": "sin(",
+    "cos of": "cos(",
+    "tan of": "tan(",
+    "sin": "sin(",
+    "cos": "cos(",
+    "tan": "tan(",
+
+    # Logarithms
+    "log of": "log(",
+    "natural log of": "ln(",
+
+    # Percent / percentage
+    "percent of": "/ 100 *",
+    "percentage of": "/ 100 *",
+    "percent": "/ 100",
+    "percentage": "/ 100",
+
+    # Addition / subtraction
+    "plus": "+",
+    "add": "+",
+    "minus": "-",
+    "subtract": "-",
+}
+
+# ---------------- NUMBER WORDS ----------------
+UNITS = {
+    "zero": 0, "oh": 0, "one": 1, "two": 2, "three": 3, "four": 4,
+    "for": 4,   # common mis-recognition
+    "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "ate": 8,   # common mis-recognition
+    "nine": 9,
+}
+TEENS = {
+    "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+SCALES = {"thousand": 10 ** 3, "million": 10 ** 6, "billion": 10 ** 9, "trillion": 10 ** 12}
+
+# "oh" only counts as zero after "point" ("two point oh five")
+_NUMBER_START = (set(UNITS) - {"oh"}) | set(TEENS) | set(TENS)
+
+OPERATORS = {"+": "+", "-": "-", "*": "*", "/": "/", "^": "^", "×": "*", "÷": "/"}
+
+_END = None  # trie key marking "a phrase ends here"
+
+
+def _build_trie(phrases):
+    """
+    Nested dicts keyed by word. A node where a phrase ends holds, under
+    _END, the output text and how many "(" it opens.
+    """
+    root = {}
+    for phrase, symbols in phrases.items():
+        node = root
+        for word in phrase.split():
+            node = node.setdefault(word, {})
+        output = symbols.replace(" ", "")
+        node[_END] = (output, output.count("("))
+    return root
+
+
+_TRIE = _build_trie(PHRASES)
+
+# Splits words glued to symbols, e.g. "2+3" -> "2", "+", "3" (rare in transcripts,
+# so the regex and the `re` import are only set up when first needed)
+_WORD_PATTERN = r"[a-z]+|\d+(?:\.\d+)?|\S"
+_word_re = None
+
+
+def _split_glued(word: str):
+    global _word_re
+    if _word_re is None:
+        import re
+
+        _word_re = re.compile(_WORD_PATTERN)
+    return _word_re.findall(word)
+
+
+def _match_number(words, i):
+    """
+    Read a run of number words starting at words[i].
+    Returns (digits text, next index) or None if words[i] starts no number.
+    """
+    if words[i] not in _NUMBER_START:
+        # "point five" is 0.5: no whole part, straight to the decimals below
+        if not (words[i] == "point" and i + 1 < len(words) and words[i + 1] in UNITS):
+            return None
+
+    total = 0      # completed thousands/millions groups
+    current = 0    # group being built (< 1000)
+    last = None    # kind of the previous word
+    j = i
+    n = len(words)
+    while j < n:
+        w = words[j]
+        if w in UNITS and w != "oh" and last in (None, "tens", "hundred", "scale"):
+            current += UNITS[w]
+            last = "unit"
+        elif w in TEENS and last in (None, "hundred", "scale"):
+            current += TEENS[w]
+            last = "teen"
+        elif w in TENS and last in (None, "hundred", "scale"):
+            current += TENS[w]
+            last = "tens"
+        elif w == "hundred" and last in ("unit", "teen") and current < 100:
+            current *= 100
+            last = "hundred"
+        elif w in SCALES and last in ("unit", "teen", "tens", "hundred"):
+            total += current * SCALES[w]
+            current = 0
+            last = "scale"
+        elif w == "and" and last in ("hundred", "scale") and j + 1 < n and words[j + 1] in _NUMBER_START:
+            pass  # "one hundred and five"
+        else:
+            break
+        j += 1
+
+    text = str(total + current)
+
+    # Decimal part: "point" followed by single digit words
+    if j + 1 < n and words[j] == "point" and words[j + 1] in UNITS:
+        digits = []
+        j += 1
+        while j < n and words[j] in UNITS:
+            digits.append(str(UNITS[words[j]]))
+            j += 1
+        text += "." + "".join(digits)
+
+    return text, j
+
+
+def spoken_to_expr(text: str) -> str:
+    """
+    Convert recognized speech into a calculator expression.
+
+    Supports verbal phrases like:
+      - "plus", "minus", "times", "divided by"
+      - "square root of", "sine of", "cosine of", "tangent of", "log of"
+      - "percent", "percentage of"
+      - powers: "to the power of", "squared", "cubed"
+    And converts number words ("three hundred forty two point five") to digits.
+    """
+    words = text.lower().split()
+    out = []
+    open_funcs = 0  # count unclosed function parentheses
+
+    i = 0
+    n = len(words)
+    while i < n:
+        w = words[i]
+
+        # Longest phrase starting here: walk the trie word by word
+        node = _TRIE.get(w)
+        if node is not None:
+            best = node.get(_END)
+            end = j = i + 1
+            while j < n:
+                node = node.get(words[j])
+                if node is None:
+                    break
+                j += 1
+                if _END in node:
+                    best, end = node[_END], j
+            if best is not None:
+                out.append(best[0])
+                open_funcs += best[1]
+                i = end
+                continue
+
+        number = _match_number(words, i)
+        if number is not None:
+            # Word-number -> digits
+            digits, i = number
+            out.append(digits)
+            continue
+
+        if w in OPERATORS:
+            # Math operators
+            out.append(OPERATORS[w])
+        elif w.replace(".", "", 1).isdigit():
+            # Token looks like a number (including decimal)
+            out.append(w)
+        elif not w.isalpha():
+            parts = _split_glued(w)
+            if len(parts) > 1:
+                words[i:i + 1] = parts
+                n = len(words)
+                continue
+        i += 1
+
+    # Close all opened function parentheses
+    out.extend(")" for _ in range(open_funcs))
+
+    # Join without spaces to create expression string
+    expr = "".join(out)
+    # If we couldn't parse anything, just return original text with no spaces
+    if not expr:
+        expr = text.replace(" ", "")
+    return expr
@@ -0,0 +1,185 @@
+"""
+The calculator's button state machine, independent of any UI.
+
+CalculatorState holds what the user is typing (`expression`) and what the
+big display shows (`display_result`). Front ends turn clicks into
+press(label) calls and read the two fields back when rendering.
+
+The expression is also kept evaluated as it is typed (calc_core.incremental),
+so preview() is cheap after every key and "=" / "%" do not parse it again.
+
+With a calc_core.workspace.Workspace attached, expressions can use the
+session's variables, functions, ans and #n, and every "=" becomes the
+next #n.
+"""
+
+import numbers
+
+from .evaluator import evaluate_expression
+from .incremental import LiveExpression
+from .numeric import DEFAULT_PRECISION, format_result, get_backend
+
+# Scientific-tab labels that insert something other than their own text
+KEY_INPUT = {
+    "x^y": "^",        # becomes ** in prep_expr_for_eval()
+    "x^2": "**2",      # direct Python exponent operator for squaring
+    "e": "math.e",     # avoids replacing every 'e' character
+    "➕": "+",          # fancy plus sign
+    "∫(": "integrate(",  # calculus forms, see calc_core.calculus
+    "d/dx(": "diff(",
+}
+
+# The keys that evaluate the expression; every other key only edits it
+EVALUATING_KEYS = frozenset({"=", "%"})
+
+
+class CalculatorState:
+    """
+    Expression + result of one calculator.
+
+    mode / precision choose the numeric backend (see calc_core.numeric).
+    history, if given, is anything with an add(expression, result, mode)
+    method (e.g. HistoryStore.for_session() in calc_core.history); "=" and "%" record there.
+    workspace, if given, is a calc_core.workspace.Workspace.
+    """
+
+    def __init__(self, mode: str = "float", precision: int = DEFAULT_PRECISION, history=None,
+                 workspace=None):
+        self.expression = ""        # current expression string
+        self.display_result = ""    # current result to display
+        self.mode = mode
+        self.precision = precision
+        self.history = history
+        self.workspace = workspace
+        self._live = None           # LiveExpression following `expression`
+        self._live_key = None       # (backend, workspace version) it was built for
+
+    def evaluate(self, expr: str):
+        if self.workspace is not None:
+            self.workspace.set_mode(self.mode, self.precision)
+            return self.workspace.evaluate(expr)
+        return evaluate_expression(expr, self.mode, self.precision)
+
+    def preview(self):
+        """
+        Live value of the expression typed so far, "Error", or None while it
+        is incomplete (empty, trailing operator, open bracket). Only the
+        characters changed since the last call are parsed.
+        """
+        ws = self.workspace
+        if ws is None:
+            key = (get_backend(self.mode, self.precision), None)
+        else:
+            ws.set_mode(self.mode, self.precision)
+            key = (ws.backend, ws.version)
+        live = self._live
+        if live is None or key != self._live_key:
+            # New backend, or workspace values changed since the last preview
+            live = self._live = LiveExpression(key[0], None if ws is None else ws.values)
+            self._live_key = key
+        live.sync(self.expression)
+        return live.preview()
+
+    def result(self):
+        """Value of the whole expression, as evaluate_expression() would give it."""
+        value = self.preview()
+        if value is None:
+            # Incomplete or empty: let the full evaluator report it
+            value = self.evaluate(self.expression)
+        return value
+
+    def _record(self, expression: str, result):
+        if self.history is not None:
+            self.history.add(expression, format_result(result), self.mode)
+
+    def _enter(self):
+        """Record the expression as the workspace's next #n and return its value."""
+        self.workspace.set_mode(self.mode, self.precision)
+        try:
+            cell = self.workspace.enter(self.expression)
+        except ValueError:
+            return "Error"   # syntax error / circular definition
+        if cell.name.startswith("_"):
+            return self.workspace.values[cell.name]
+        # A definition typed on the keypad ("rate = 0.05"): show its value
+        return self.workspace.values.get(cell.name, "")
+
+    def press(self, btn: str):
+        """Handle one button press (AC, ⌫, +/-, %, =, or any text to append)."""
+        if btn in EVALUATING_KEYS:
+            self._evaluate_key(btn)
+        else:
+            self.expression = self._edit(self.expression, btn)
+
+    def apply_events(self, events) -> int:
+        """
+        Apply a batch of button presses, e.g. keys buffered by a client,
+        with the same result as press() for each in turn. Editing keys
+        only change a local string; the expression (and the live preview
+        following it) is updated once per batch, or before an "=" / "%".
+        Returns the number of evaluations.
+        """
+        expr = self.expression
+        evaluations = 0
+        for btn in events:
+            if btn in EVALUATING_KEYS:
+                self.expression = expr
+                self._evaluate_key(btn)
+                expr = self.expression
+                evaluations += 1
+            else:
+                expr = self._edit(expr, btn)
+        self.expression = expr
+        return evaluations
+
+    def _edit(self, exp: str, btn: str) -> str:
+        """The expression after an editing key (anything but = and %)."""
+        # Clear everything
+        if btn == "AC":
+            self.display_result = ""
+            return ""
+
+        # Backspace: remove last character
+        if btn == "⌫":
+            return exp[:-1]
+
+        # Toggle sign of the entire current expression
+        if btn == "+/-":
+            if exp:
+                return exp[1:] if exp.startswith("-") else "-" + exp
+            return exp
+
+        # Otherwise, just append the button text to the expression
+        return exp + KEY_INPUT.get(btn, btn)
+
+    def _evaluate_key(self, btn: str):
+        # Percentage: evaluate current expression and divide by 100
+        if btn == "%":
+            val = self.result()
+            try:
+                res = val / 100 if isinstance(val, numbers.Number) else None
+            except ArithmeticError:
+                res = None   # an exact int too large for a float
+            if res is not None:
+                self.display_result = res
+                self._record(f"{self.expression}%", res)
+                self.expression = format_result(res)
+            else:
+                self.display_result = "Error"
+            return
+
+        # Equals: evaluate full expression
+        if self.workspace is not None:
+            res = self._enter()
+        else:
+            res = self.result()
+        self.display_result = res
+        self._record(self.expression, res)
+
+    def display(self) -> str:
+        """Big display text: result if available, otherwise the expression, or 0."""
+        if self.display_result not in ("", None):
+            return format_result(self.display_result)
+        if self.expression:
+            return self.expression
+        return "0"
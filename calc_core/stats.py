@@ -0,0 +1,338 @@
+"""
+One-pass statistics over a stream of numbers, in constant memory.
+
+    summary = StreamSummary()
+    for chunk in chunks:
+        summary.update(chunk)          # or summary.add(x) one value at a time
+    summary.mean, summary.stdev, summary.quantile(0.99)
+
+    summarize_stream(values, workers=4)   # chunks summarized in worker processes
+
+  - RunningStats: count, mean, variance, min and max. Single values are
+    added with Welford's update; whole chunks are summarized first and
+    combined with Chan et al.'s pairwise formula, which is also how two
+    partial results (other chunks, other processes) are merged.
+  - KLLSketch: approximate quantiles (Karnin, Lang & Liberty). Values pile
+    up in a stack of compactors; a full one is sorted and every other
+    value moves one level up, with twice the weight. About 3k values are
+    kept whatever the stream length, and the rank error is around 1.7/k
+    (under 1% for the default k=200). Two sketches merge level by level.
+
+Both merge exactly like they update, so a summary built from chunks in
+any order, in any number of processes, is as good as a sequential one.
+Non-numeric input and NaN / infinite values are counted as skipped.
+"""
+
+import math
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+DEFAULT_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+# ---------------- MOMENTS ----------------
+class RunningStats:
+    """Count, mean, M2 (sum of squared deviations), min and max of the values seen."""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float):
+        """Welford's update for one value."""
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def update(self, values):
+        """Add a list of values (two passes over the chunk, none over the stream)."""
+        n = len(values)
+        if not n:
+            return
+        mean = math.fsum(values) / n
+        m2 = math.fsum([(x - mean) ** 2 for x in values])
+        self._combine(n, mean, m2, min(values), max(values))
+
+    def merge(self, other: "RunningStats"):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(self, n, mean, m2, lo, hi):
+        # Chan, Golub & LeVeque: moments of the union of two samples
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (n - 1 in the denominator); NaN below two values."""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+# ---------------- QUANTILES ----------------
+class KLLSketch:
+    """
+    Mergeable quantile sketch. k sets the accuracy: memory grows linearly
+    with it, the rank error shrinks as 1/k.
+    """
+
+    # Each compactor is this much smaller than the one above it
+    SHRINK = 2 / 3
+
+    def __init__(self, k: int = 200, seed: int = None):
+        self.k = k
+        self.n = 0
+        self.compactors = [[]]
+        self._rng = random.Random(seed)
+        self._max_size = self._capacity(0)
+        self._cdf = None
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return max(2, math.ceil(self.k * self.SHRINK ** depth))
+
+    def _size(self) -> int:
+        return sum(len(c) for c in self.compactors)
+
+    def add(self, x: float):
+        self.compactors[0].append(x)
+        self.n += 1
+        self._cdf = None
+        if len(self.compactors[0]) >= self._max_size:
+            self._compress()
+
+    def update(self, values):
+        self.compactors[0].extend(values)
+        self.n += len(values)
+        self._cdf = None
+        if self._size() >= self._max_size:
+            self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for mine, theirs in zip(self.compactors, other.compactors):
+            mine.extend(theirs)
+        self.n += other.n
+        self._cdf = None
+        self._compress()
+
+    def _compress(self):
+        """Compact every level over its capacity, bottom up (adding levels as needed)."""
+        level = 0
+        while level < len(self.compactors):
+            buf = self.compactors[level]
+            if len(buf) >= self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append([])
+                buf.sort()
+                # An odd one out stays; a random half of the rest moves up
+                keep = [buf.pop()] if len(buf) & 1 else []
+                self.compactors[level + 1].extend(buf[self._rng.getrandbits(1)::2])
+                self.compactors[level] = keep
+            level += 1
+        self._max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _weighted(self):
+        if self._cdf is None:
+            items = sorted((x, 1 << level) for level, buf in enumerate(self.compactors) for x in buf)
+            values = [x for x, _ in items]
+            cumulative = []
+            total = 0
+            for _, w in items:
+                total += w
+                cumulative.append(total)
+            self._cdf = (values, cumulative)
+        return self._cdf
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile (0 <= q <= 1); NaN for an empty sketch."""
+        values, cumulative = self._weighted()
+        if not values:
+            return math.nan
+        target = q * cumulative[-1]
+        lo, hi = 0, len(cumulative) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if cumulative[mid] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return values[lo]
+
+    def rank(self, x: float) -> float:
+        """Approximate fraction of the values <= x."""
+        values, cumulative = self._weighted()
+        if not values:
+            return math.nan
+        lo, hi = 0, len(values)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if values[mid] <= x:
+                lo = mid + 1
+            else:
+                hi = mid
+        return cumulative[lo - 1] / cumulative[-1] if lo else 0.0
+
+    def __getstate__(self):
+        # What is sent back from a worker process: no cached CDF
+        return {"k": self.k, "n": self.n, "compactors": self.compactors,
+                "rng": self._rng.getstate()}
+
+    def __setstate__(self, state):
+        self.k = state["k"]
+        self.n = state["n"]
+        self.compactors = state["compactors"]
+        self._rng = random.Random()
+        self._rng.setstate(state["rng"])
+        self._max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+        self._cdf = None
+
+
+# ---------------- SUMMARY ----------------
+class StreamSummary:
+    """RunningStats + KLLSketch over the same values, plus the count of skipped inputs."""
+
+    def __init__(self, k: int = 200, seed: int = None):
+        self.moments = RunningStats()
+        self.sketch = KLLSketch(k, seed)
+        self.skipped = 0
+
+    def add(self, x: float):
+        if math.isfinite(x):
+            self.moments.add(x)
+            self.sketch.add(x)
+        else:
+            self.skipped += 1
+
+    def update(self, values):
+        """Add a chunk of floats (NaN / infinite ones are skipped)."""
+        finite = [x for x in values if math.isfinite(x)]
+        self.skipped += len(values) - len(finite)
+        self.moments.update(finite)
+        self.sketch.update(finite)
+
+    def merge(self, other: "StreamSummary"):
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.skipped += other.skipped
+
+    @property
+    def count(self) -> int:
+        return self.moments.count
+
+    @property
+    def mean(self) -> float:
+        return self.moments.mean if self.count else math.nan
+
+    @property
+    def variance(self) -> float:
+        return self.moments.variance
+
+    @property
+    def stdev(self) -> float:
+        return self.moments.stdev
+
+    def quantile(self, q: float) -> float:
+        # The extremes are known exactly
+        if self.count and q <= 0:
+            return self.moments.min
+        if self.count and q >= 1:
+            return self.moments.max
+        return self.sketch.quantile(q)
+
+    def as_dict(self, quantiles=DEFAULT_QUANTILES) -> dict:
+        empty = not self.count
+        return {
+            "count": self.count,
+            "skipped": self.skipped,
+            "mean": self.mean,
+            "variance": self.variance,
+            "stdev": self.stdev,
+            "min": math.nan if empty else self.moments.min,
+            "max": math.nan if empty else self.moments.max,
+            "quantiles": {q: self.quantile(q) for q in quantiles},
+        }
+
+
+def format_summary(summary: dict) -> str:
+    """A summary as aligned "name  value" lines."""
+    lines = [f"{'count':<10}{summary['count']}"]
+    if summary["skipped"]:
+        lines.append(f"{'skipped':<10}{summary['skipped']}")
+    for name in ("mean", "stdev", "variance", "min", "max"):
+        lines.append(f"{name:<10}{summary[name]:.10g}")
+    for q, value in summary["quantiles"].items():
+        lines.append(f"{f'p{q * 100:g}':<10}{value:.10g}")
+    return "\n".join(lines)
+
+
+# ---------------- STREAMS ----------------
+def parse_numbers(texts):
+    """(floats, count of texts that are not numbers) for a list of strings."""
+    values = []
+    bad = 0
+    for text in texts:
+        try:
+            values.append(float(text))
+        except ValueError:
+            bad += 1
+    return values, bad
+
+
+def summarize_chunk(texts, k: int = 200) -> StreamSummary:
+    """Summary of one chunk of number strings. Runs inside a worker process."""
+    values, bad = parse_numbers(texts)
+    summary = StreamSummary(k)
+    summary.update(values)
+    summary.skipped += bad
+    return summary
+
+
+def summarize_stream(texts, workers: int = 1, chunk_size: int = 10_000, k: int = 200) -> StreamSummary:
+    """
+    Summary of an iterable of number strings (e.g. batch.read_expressions()
+    over a file), read chunk by chunk. workers=0 summarizes in this process;
+    otherwise chunks are summarized in a process pool and merged as they
+    complete, with at most `workers * 2` in flight.
+    """
+    from .batch import chunked
+
+    total = StreamSummary(k)
+    chunks = chunked(texts, chunk_size)
+    if workers <= 0:
+        for chunk in chunks:
+            total.merge(summarize_chunk(chunk, k))
+        return total
+
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(summarize_chunk, chunk, k))
+            if len(pending) >= max_in_flight:
+                # Merge whatever is done; one slow chunk holds back nothing else
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    total.merge(fut.result())
+        for fut in as_completed(pending):
+            total.merge(fut.result())
+    return total
@@ -0,0 +1,349 @@
+"""
+Shared state for running several replicas of the app behind a load
+balancer: a small key-value store interface with three backends, the
+calculator sessions kept in it, and a cross-replica cache of results.
+
+    store = open_store("sqlite:///var/lib/calc/state.sqlite3")
+    sessions = SessionStore(store)
+    calc = sessions.load(session_id) or CalculatorState()
+    ...
+    sessions.save(session_id, calc)
+
+    configure_result_cache(store)     # evaluate_expression() shares results
+
+Backends (open_store() URLs):
+
+  - "memory://":          in this process only (the default; no sharing)
+  - "sqlite:///path":     a SQLite file, shared by the replicas on one host
+                          or a shared volume
+  - "redis://host:6379/0": any server speaking the Redis protocol (Redis,
+                          Valkey, KeyDB ...), through the optional `redis`
+                          package. RedisStore(client=...) accepts any client
+                          with get/set/delete, e.g. fakeredis for a local
+                          stand-in.
+
+Every entry can have a TTL. The memory and SQLite stores also evict the
+least recently used entries beyond maxsize; a Redis server does that
+itself when configured with maxmemory-policy allkeys-lru.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from .cache import LRUCache
+
+DEFAULT_SESSION_TTL = 7 * 24 * 3600
+DEFAULT_RESULT_TTL = 24 * 3600
+
+
+# ---------------- BACKENDS ----------------
+class MemoryStore:
+    """In-process store: an LRU of (expires, value). Safe to share between threads."""
+
+    def __init__(self, maxsize: int = 10_000):
+        self._cache = LRUCache(maxsize)
+
+    def get(self, key: str):
+        """The bytes stored under key, or None if absent or expired."""
+        item = self._cache.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires is not None and expires <= time.time():
+            self._cache.pop(key)
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float = None):
+        """Store value under key, for ttl seconds (None: until evicted)."""
+        self._cache.put(key, (None if ttl is None else time.time() + ttl, value))
+
+    def delete(self, key: str):
+        self._cache.pop(key)
+
+    def close(self):
+        pass
+
+
+_KV_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key     TEXT PRIMARY KEY,
+    value   BLOB NOT NULL,
+    expires REAL,
+    used    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS kv_used ON kv (used);
+"""
+
+
+class SQLiteStore:
+    """
+    Store in a SQLite file that several processes can open at once (WAL
+    journal, so readers do not wait for a writer). Expired entries are
+    dropped when read and in periodic sweeps; a sweep also deletes the
+    least recently used entries beyond maxsize.
+    """
+
+    # Last-use times are refreshed at most this often per key, so hot
+    # reads do not turn into a write each
+    TOUCH_INTERVAL = 1.0
+    SWEEP_EVERY = 256   # writes between sweeps
+
+    def __init__(self, path: str, maxsize: int = 100_000, timeout: float = 5.0):
+        self.path = path
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_KV_SCHEMA)
+        self._conn.commit()
+        self._writes = 0
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires, used FROM kv WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires, used = row
+            if expires is not None and expires <= now:
+                self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            if now - used > self.TOUCH_INTERVAL:
+                self._conn.execute("UPDATE kv SET used = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+        return bytes(value)
+
+    def set(self, key: str, value: bytes, ttl: float = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires, used) VALUES (?, ?, ?, ?)",
+                (key, value, None if ttl is None else now + ttl, now),
+            )
+            self._writes += 1
+            if self._writes % self.SWEEP_EVERY == 0:
+                self._sweep(now)
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def sweep(self):
+        """Drop expired entries and the least recently used ones beyond maxsize."""
+        with self._lock:
+            self._sweep(time.time())
+            self._conn.commit()
+
+    def _sweep(self, now):
+        # Caller holds the lock
+        self._conn.execute("DELETE FROM kv WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        extra = self._conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0] - self.maxsize
+        if extra > 0:
+            self._conn.execute(
+                "DELETE FROM kv WHERE key IN (SELECT key FROM kv ORDER BY used LIMIT ?)", (extra,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisStore:
+    """
+    Store on a Redis-protocol server. TTLs use the server's own expiry;
+    LRU eviction is the server's maxmemory-policy.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", client=None):
+        if client is None:
+            import redis  # optional dependency, only needed for this backend
+
+            client = redis.Redis.from_url(url)
+        self._client = client
+
+    def get(self, key: str):
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float = None):
+        if ttl is None:
+            self._client.set(key, value)
+        else:
+            self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str):
+        self._client.delete(key)
+
+    def close(self):
+        self._client.close()
+
+
+def open_store(url: str = "memory://", maxsize: int = None):
+    """A store from a URL: memory://, sqlite:///path or redis://host:port/db."""
+    scheme, sep, rest = url.partition("://")
+    if not sep:
+        raise ValueError(f"Not a store URL: {url!r}")
+    if scheme == "memory":
+        return MemoryStore() if maxsize is None else MemoryStore(maxsize)
+    if scheme == "sqlite":
+        # sqlite:///abs/path, sqlite://relative/path
+        return SQLiteStore(rest) if maxsize is None else SQLiteStore(rest, maxsize)
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisStore(url)
+    raise ValueError(f"Unknown store: {scheme!r}")
+
+
+# ---------------- VALUES ----------------
+def encode_value(value) -> str:
+    """
+    A result as text that decode_value() turns back into the same type:
+    int, float, Decimal, Fraction, or a string ("" / "Error").
+    Ints are hex, so huge exact results do not hit the int->str digit limit.
+    """
+    if isinstance(value, str):
+        return "s:" + value
+    if isinstance(value, bool):
+        return "i:" + format(int(value), "x")
+    if isinstance(value, int):
+        return "i:" + format(value, "x")
+    if isinstance(value, float):
+        return "f:" + repr(value)
+    kind = type(value).__name__
+    if kind == "Decimal":
+        return "d:" + str(value)
+    if kind == "Fraction":
+        return f"q:{value.numerator:x}/{value.denominator:x}"
+    raise TypeError(f"cannot encode {kind}")
+
+
+def decode_value(text: str):
+    tag, body = text[:2], text[2:]
+    if tag == "s:":
+        return body
+    if tag == "i:":
+        return int(body, 16)
+    if tag == "f:":
+        return float(body)
+    if tag == "d:":
+        from decimal import Decimal
+
+        return Decimal(body)
+    if tag == "q:":
+        from fractions import Fraction
+
+        num, den = body.split("/")
+        # Fraction() reduces and validates: the store may be shared, so its
+        # data is not trusted to be in lowest terms (or to have den != 0)
+        return Fraction(int(num, 16), int(den, 16))
+    raise ValueError(f"bad encoded value: {text[:20]!r}")
+
+
+# ---------------- SESSIONS ----------------
+class SessionStore:
+    """
+    CalculatorState of each browser session, by session id, so that any
+    replica can continue any session. Entries expire ttl seconds after the
+    last save.
+    """
+
+    def __init__(self, store, ttl: float = DEFAULT_SESSION_TTL, prefix: str = "calc:session:"):
+        self.store = store
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @staticmethod
+    def dumps(calc) -> bytes:
+        """The saved form of a CalculatorState (history is not part of it)."""
+        data = {
+            "expression": calc.expression,
+            "display_result": encode_value(calc.display_result),
+            "mode": calc.mode,
+            "precision": calc.precision,
+            "workspace": None if calc.workspace is None else calc.workspace.snapshot(),
+        }
+        return json.dumps(data, separators=(",", ":")).encode()
+
+    @staticmethod
+    def loads(raw: bytes):
+        from .state import CalculatorState
+        from .workspace import Workspace
+
+        data = json.loads(raw)
+        workspace = data["workspace"]
+        calc = CalculatorState(
+            data["mode"],
+            data["precision"],
+            workspace=None if workspace is None else Workspace.from_snapshot(workspace),
+        )
+        calc.expression = data["expression"]
+        calc.display_result = decode_value(data["display_result"])
+        return calc
+
+    def load(self, session_id: str):
+        """The saved CalculatorState, or None for an unknown (or expired) session."""
+        raw = self.store.get(self.prefix + session_id)
+        return None if raw is None else self.loads(raw)
+
+    def save(self, session_id: str, calc, raw: bytes = None):
+        """Save calc (raw: its dumps(), if already computed)."""
+        self.store.set(self.prefix + session_id, self.dumps(calc) if raw is None else raw, self.ttl)
+
+    def delete(self, session_id: str):
+        self.store.delete(self.prefix + session_id)
+
+
+# ---------------- RESULTS ----------------
+class ResultCache:
+    """
+    Results of constant expressions (no variables), shared by every process
+    using the same store. Keyed by the normalized text, mode and
+    precision. A store that fails (a Redis server restarting ...) counts
+    as a miss; evaluation never depends on the cache.
+    """
+
+    def __init__(self, store, ttl: float = DEFAULT_RESULT_TTL, prefix: str = "calc:result:"):
+        self.store = store
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, normalized, mode, precision):
+        if mode != "decimal":
+            precision = None   # only Decimal results depend on it
+        digest = hashlib.sha1(f"{mode}\0{precision}\0{normalized}".encode()).hexdigest()
+        return self.prefix + digest
+
+    def get(self, normalized: str, mode: str, precision):
+        """(True, value) on a hit, (False, None) on a miss."""
+        try:
+            raw = self.store.get(self._key(normalized, mode, precision))
+        except Exception:
+            self.errors += 1
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, decode_value(raw.decode())
+
+    def put(self, normalized: str, mode: str, precision, value):
+        try:
+            self.store.set(self._key(normalized, mode, precision), encode_value(value).encode(), self.ttl)
+        except Exception:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
@@ -0,0 +1,275 @@
+"""
+Vectorized evaluation: one expression over whole NumPy arrays.
+
+The expression uses the same language as the calculator display
+(sin(, sqrt(, log(, ln(, ^, π ...) plus named variables, e.g.
+
+    res = evaluate_batch("sqrt(x^2+y^2)", x=xs, y=ys)
+
+It is parsed once with calc_core.engine, simplified by calc_core.optimize
+(constants folded, shared subexpressions computed once per call) and
+compiled to NumPy ufunc calls, so the per-row cost is a few array operations instead of a Python call.
+
+Where the scalar evaluate_expression() would return "Error" (division by
+zero, sqrt/log of a negative number, ^ overflowing ...), the element
+becomes NaN and is flagged in res.mask. Each operation flags the rows
+where its Python counterpart raises, so results the scalar path returns
+as they are (1e308*10 is inf, inf-inf is nan) stay unmasked. The one
+difference: a negative number to a fractional power is complex in the
+scalar path, and is masked here.
+"""
+
+import functools
+import operator
+from collections import namedtuple
+
+# NumPy is optional for the rest of the package; only this module needs it.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .cache import LRUCache
+from .engine import CONSTANTS, ExpressionError, free_names, parse
+from .evaluator import prep_expr_for_eval
+from .optimize import optimize
+
+BatchResult = namedtuple("BatchResult", ["values", "mask"])
+BatchResult.__doc__ = """values: float64 array (NaN where an element failed); mask: True where it failed."""
+
+_VECTOR_CACHE = LRUCache(256)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for vectorized evaluation (pip install numpy)")
+
+
+def _ufuncs():
+    """Engine function names -> NumPy equivalents."""
+    return {
+        "math.sin": np.sin,
+        "math.cos": np.cos,
+        "math.tan": np.tan,
+        "math.sqrt": np.sqrt,
+        "math.log10": np.log10,
+        "math.log": np.log,
+    }
+
+
+# env key of the boolean array of rows that failed (not a valid name, so no
+# variable can clash with it). Without it, as in calc_core.calculus, nothing
+# is flagged and failed rows are just inf / NaN.
+_ERRORS = "#errors"
+
+
+def _flag(env, failed):
+    np.logical_or(env[_ERRORS], failed, out=env[_ERRORS])
+
+
+def _checked_divide(op):
+    # Python's / // % raise ZeroDivisionError for any zero divisor
+    def divide(env, a, b):
+        if _ERRORS in env:
+            _flag(env, b == 0)
+        return op(a, b)
+    return divide
+
+
+def _checked_pow(env, base, exp):
+    # Python raises for a finite power overflowing (0 to a negative power
+    # included); a negative base to a fractional power is complex there
+    out = base ** exp
+    if _ERRORS in env:
+        finite = np.isfinite(base) & np.isfinite(exp)
+        _flag(env, (np.isinf(out) & finite)
+              | ((base < 0) & finite & (exp != np.floor(exp))))
+    return out
+
+
+def _checked_call(env, fn, args):
+    # math functions raise instead of returning inf from finite arguments
+    # (log(0)) or NaN from arguments that are not NaN (sqrt(-1), sin(inf))
+    out = fn(*args)
+    if _ERRORS in env:
+        finite = functools.reduce(operator.and_, [np.isfinite(a) for a in args])
+        nan = functools.reduce(operator.or_, [np.isnan(a) for a in args])
+        _flag(env, (np.isinf(out) & finite) | (np.isnan(out) & ~nan))
+    return out
+
+
+_VECTOR_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+}
+
+# Operators that raise in Python floats: called as op(env, left, right)
+_CHECKED_OPS = {
+    "/": _checked_divide(operator.truediv),
+    "//": _checked_divide(operator.floordiv),
+    "%": _checked_divide(operator.mod),
+    "**": _checked_pow,
+}
+
+
+def _compile_vector_node(node, ufuncs):
+    """Same shape as engine._compile_node, but producing array closures."""
+    kind = node[0]
+
+    if kind == "num":
+        try:
+            value = float(node[1])
+        except OverflowError:
+            # An integer literal past float range: exact only in the scalar path
+            raise ExpressionError(f"{node[1]} is too large for a float") from None
+        return lambda env: value
+
+    if kind == "name":
+        name = node[1]
+        if name in CONSTANTS:
+            value = CONSTANTS[name]
+            return lambda env: value
+        if name in ufuncs:
+            raise ExpressionError(f"{name} must be called")
+        return lambda env: env[name]
+
+    if kind == "neg":
+        inner = _compile_vector_node(node[1], ufuncs)
+        return lambda env: -inner(env)
+
+    if kind == "pos":
+        return _compile_vector_node(node[1], ufuncs)
+
+    if kind == "bin":
+        left = _compile_vector_node(node[2], ufuncs)
+        right = _compile_vector_node(node[3], ufuncs)
+        if node[1] in _CHECKED_OPS:
+            checked = _CHECKED_OPS[node[1]]
+            return lambda env: checked(env, left(env), right(env))
+        op = _VECTOR_OPS[node[1]]
+        return lambda env: op(left(env), right(env))
+
+    if kind == "call":
+        name = node[1]
+        if name not in ufuncs:
+            raise ExpressionError(f"Unknown function {name!r}")
+        fn = ufuncs[name]
+        args = [_compile_vector_node(a, ufuncs) for a in node[2]]
+        if name == "math.log" and len(args) == 2:
+            # math.log(x, base) is log(x) / log(base), each part raising as in Python
+            x, base = args
+            divide = _CHECKED_OPS["/"]
+            return lambda env: divide(env, _checked_call(env, fn, [x(env)]),
+                                      _checked_call(env, fn, [base(env)]))
+        return lambda env: _checked_call(env, fn, [a(env) for a in args])
+
+    # Node kinds produced by calc_core.optimize
+    if kind == "const":
+        # A NumPy scalar, so that constant parts left unfolded (1/0, log(0))
+        # give inf/NaN and get masked like the array parts
+        try:
+            value = np.float64(node[1])
+        except (OverflowError, TypeError):
+            # A huge folded int (exact only in the scalar path) or a complex
+            # number, e.g. (-8)^(1/3): every row fails
+            value = np.float64(np.nan)
+
+            def failed(env):
+                if _ERRORS in env:
+                    _flag(env, True)
+                return value
+            return failed
+        return lambda env: value
+
+    if kind == "sq":
+        inner = _compile_vector_node(node[1], ufuncs)
+
+        def square(env):
+            v = inner(env)
+            r = v * v
+            if _ERRORS in env:
+                # as x ** 2, which raises on overflow where x * x gives inf
+                _flag(env, np.isinf(r) & np.isfinite(v))
+            return r
+        return square
+
+    if kind == "let":
+        slots = tuple(zip(node[1], [_compile_vector_node(n, ufuncs) for n in node[2]]))
+        body = _compile_vector_node(node[3], ufuncs)
+
+        def let(env):
+            env = dict(env)
+            for slot, fn in slots:
+                env[slot] = fn(env)
+            return body(env)
+        return let
+
+    if kind == "ref":
+        slot = node[1]
+        return lambda env: env[slot]
+
+    raise ExpressionError(f"Unknown node {kind!r}")
+
+
+class VectorizedExpression:
+    """
+    An expression compiled to NumPy operations.
+    names holds the variables that must be supplied when calling it.
+    """
+
+    __slots__ = ("source", "names", "_fn")
+
+    def __init__(self, source: str, ast, optimized: bool = True):
+        self.source = source
+        self.names = frozenset(free_names(ast))
+        self._fn = _compile_vector_node(optimize(ast) if optimized else ast, _ufuncs())
+
+    def __call__(self, columns) -> BatchResult:
+        env = {}
+        for name in self.names:
+            try:
+                col = columns[name]
+            except KeyError:
+                raise ExpressionError(f"Missing input column {name!r}") from None
+            env[name] = np.asarray(col, dtype=np.float64)
+
+        shape = np.broadcast_shapes(*(a.shape for a in env.values())) if env else ()
+        mask = env[_ERRORS] = np.zeros(shape, dtype=bool)
+        with np.errstate(all="ignore"):
+            values = np.asarray(self._fn(env), dtype=np.float64)
+        values = np.array(np.broadcast_to(values, shape), dtype=np.float64)
+        values[mask] = np.nan
+        return BatchResult(values, mask)
+
+
+def compile_vectorized(expr: str) -> VectorizedExpression:
+    """
+    Compile a display-style expression with named variables for array input.
+    Compiled forms are cached by normalized text.
+    """
+    _require_numpy()
+    normalized = prep_expr_for_eval(expr)
+    compiled = _VECTOR_CACHE.get(normalized)
+    if compiled is None:
+        compiled = VectorizedExpression(normalized, parse(normalized))
+        _VECTOR_CACHE.put(normalized, compiled)
+    return compiled
+
+
+def evaluate_batch(expr: str, columns=None, **arrays) -> BatchResult:
+    """
+    Evaluate expr once over arrays of inputs.
+
+    Inputs can be given as a mapping (dict of arrays, a pandas DataFrame, an
+    npz file ...) and/or as keyword arguments; keywords win on conflicts.
+    Returns BatchResult(values, mask).
+    """
+    compiled = compile_vectorized(expr)
+    if columns is not None and arrays:
+        merged = {n: columns[n] for n in compiled.names if n not in arrays and n in columns}
+        merged.update(arrays)
+        columns = merged
+    elif columns is None:
+        columns = arrays
+    return compiled(columns)
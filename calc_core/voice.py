@@ -0,0 +1,244 @@
+"""
+Background voice input / output.
+
+VoiceService owns two worker threads:
+  - a speech worker holding ONE long-lived text-to-speech engine and a
+    request queue (pyttsx3 engines must stay on the thread that made them),
+  - a recognition worker that captures microphone audio in small chunks
+    and hands the finished phrase to a recognizer.
+
+Both return concurrent.futures.Future objects immediately, so a UI can
+keep running and pick the result up later (new_calculator.py polls it).
+
+Recognition and speech backends are pluggable. ScriptedRecognizer and
+RecordingSpeaker are offline stand-ins that need no audio hardware.
+The optional libraries (speech_recognition, pyttsx3) are only imported
+when the real backends are first used.
+"""
+
+import array
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+# ---------------- RECOGNITION BACKENDS ----------------
+class MicrophoneRecognizer:
+    """
+    Listen on the local microphone with speech_recognition and transcribe
+    with Google's free API. Audio is read chunk by chunk: capture stops at
+    `phrase_time_limit` seconds, or once `silence_after` seconds of quiet
+    follow some speech.
+    """
+
+    def __init__(self, phrase_time_limit: float = 5.0, silence_after: float = 0.8):
+        self.phrase_time_limit = phrase_time_limit
+        self.silence_after = silence_after
+        self._sr = None
+        self._recognizer = None
+
+    def available(self) -> bool:
+        try:
+            self._load()
+        except ImportError:
+            return False
+        return True
+
+    def _load(self):
+        if self._sr is None:
+            import speech_recognition as sr
+
+            self._sr = sr
+            self._recognizer = sr.Recognizer()
+        return self._sr
+
+    def stream_chunks(self, source):
+        """Yield raw audio chunks until the phrase is over."""
+        seconds_per_chunk = source.CHUNK / source.SAMPLE_RATE
+        threshold = self._recognizer.energy_threshold
+        elapsed = quiet = 0.0
+        heard = False
+        while elapsed < self.phrase_time_limit:
+            chunk = source.stream.read(source.CHUNK)
+            if not chunk:
+                break
+            yield chunk
+            elapsed += seconds_per_chunk
+            if _rms(chunk, source.SAMPLE_WIDTH) > threshold:
+                heard, quiet = True, 0.0
+            else:
+                quiet += seconds_per_chunk
+                if heard and quiet >= self.silence_after:
+                    break
+
+    def recognize(self) -> str:
+        sr = self._load()
+        with sr.Microphone() as source:
+            # Try to reduce background noise
+            self._recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            frames = b"".join(self.stream_chunks(source))
+            audio = sr.AudioData(frames, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+        return self._recognizer.recognize_google(audio)
+
+
+def _rms(chunk: bytes, sample_width: int) -> float:
+    """Root-mean-square energy of a chunk of signed 16-bit samples."""
+    if sample_width != 2 or len(chunk) < 2:
+        return 0.0
+    samples = array.array("h", chunk[: len(chunk) - len(chunk) % 2])
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class ScriptedRecognizer:
+    """
+    Offline stand-in: returns the given phrases one per call (then "").
+    `delay` simulates the time spent listening.
+    """
+
+    def __init__(self, phrases=(), delay: float = 0.0):
+        self._phrases = list(phrases)
+        self.delay = delay
+
+    def available(self) -> bool:
+        return True
+
+    def recognize(self) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+        return self._phrases.pop(0) if self._phrases else ""
+
+
+# ---------------- SPEECH BACKENDS ----------------
+class Pyttsx3Speaker:
+    """Text-to-speech through pyttsx3; the engine is created once, on first use."""
+
+    def __init__(self):
+        self._engine = None
+
+    def available(self) -> bool:
+        try:
+            import pyttsx3  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def say(self, text: str):
+        if self._engine is None:
+            import pyttsx3
+
+            self._engine = pyttsx3.init()
+        self._engine.say(str(text))
+        self._engine.runAndWait()
+
+    def close(self):
+        if self._engine is not None:
+            self._engine.stop()
+            self._engine = None
+
+
+class RecordingSpeaker:
+    """Offline stand-in that just remembers what it was asked to say."""
+
+    def __init__(self):
+        self.spoken = []
+
+    def available(self) -> bool:
+        return True
+
+    def say(self, text: str):
+        self.spoken.append(str(text))
+
+    def close(self):
+        pass
+
+
+# ---------------- SERVICE ----------------
+_STOP = object()
+
+
+class _Worker(threading.Thread):
+    """Daemon thread running queued jobs one at a time, resolving their futures."""
+
+    def __init__(self, name: str, on_exit=None):
+        super().__init__(name=name, daemon=True)
+        self.jobs = queue.Queue()
+        self._on_exit = on_exit
+
+    def submit(self, fn, *args) -> Future:
+        fut = Future()
+        self.jobs.put((fut, fn, args))
+        return fut
+
+    def run(self):
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is _STOP:
+                    return
+                fut, fn, args = job
+                if not fut.set_running_or_notify_cancel():
+                    continue
+                try:
+                    fut.set_result(fn(*args))
+                except Exception as exc:
+                    fut.set_exception(exc)
+        finally:
+            if self._on_exit is not None:
+                self._on_exit()
+
+
+class VoiceService:
+    """
+    Non-blocking voice input/output.
+
+        voice = VoiceService()
+        fut = voice.recognize_async()   # returns at once
+        ...
+        if fut.done(): text = fut.result()   # "" when nothing was understood
+        voice.speak("42")               # queued, returns at once
+
+    If a backend's library is missing, its calls resolve to "" / None.
+    """
+
+    def __init__(self, recognizer=None, speaker=None):
+        self.recognizer = recognizer if recognizer is not None else MicrophoneRecognizer()
+        self.speaker = speaker if speaker is not None else Pyttsx3Speaker()
+        self._listen_worker = _Worker("voice-recognition")
+        self._speech_worker = _Worker("voice-speech", on_exit=self.speaker.close)
+        self._listen_worker.start()
+        self._speech_worker.start()
+
+    def recognize_async(self) -> Future:
+        """Queue one listen + transcribe; the future resolves to the text."""
+        return self._listen_worker.submit(self._recognize)
+
+    def speak(self, text) -> Future:
+        """Queue text to be spoken by the long-lived TTS engine."""
+        return self._speech_worker.submit(self._say, str(text))
+
+    def _recognize(self) -> str:
+        if not self.recognizer.available():
+            return ""
+        try:
+            return self.recognizer.recognize() or ""
+        except Exception:
+            # Any error (no mic, no network, nothing understood) -> empty text
+            return ""
+
+    def _say(self, text: str):
+        if not self.speaker.available():
+            return
+        try:
+            self.speaker.say(text)
+        except Exception:
+            # Silent failure to avoid breaking the app
+            pass
+
+    def shutdown(self, wait: bool = True):
+        self._listen_worker.jobs.put(_STOP)
+        self._speech_worker.jobs.put(_STOP)
+        if wait:
+            self._listen_worker.join()
+            self._speech_worker.join()
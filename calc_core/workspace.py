@@ -0,0 +1,389 @@
+"""
+Named variables, user-defined functions and reusable results, kept
+consistent like the cells of a spreadsheet.
+
+    ws = Workspace()
+    ws.enter("rate = 0.05")
+    ws.enter("f(x) = x^2 + 1")
+    ws.enter("1000 × (1 + rate)")      # becomes #1 (also "ans")
+    ws.enter("f(ans) − #1")            # becomes #2
+    ws.enter("rate = 0.06")            # recomputes #1 and #2, nothing else
+
+Every definition and every evaluated line is a cell. The names a cell uses
+are edges of a dependency graph (a DAG: circular definitions are
+refused), so changing a cell recomputes only the cells downstream of it,
+in topological order, each from the memoized values of the cells it
+reads. A cell may use a name that is not defined yet; it is "Error" until
+the name appears, then recomputed.
+
+Lines are typed in the calculator's own notation (×, ÷, ^, π, sin( ...).
+Results are referred to as #n (the n-th evaluated line) or ans (the latest
+one at the time the line is entered); in the engine #n is the variable _n.
+Only the latest max_results results are kept, plus older ones that another
+cell still reads: every "=" on the keypad is a result, and a long session
+would otherwise keep (and save, and replay) all of them.
+"""
+
+import re
+import sys
+
+from .calculus import FORMS
+from .engine import CompiledExpression, ExpressionError, free_names, parse
+from .evaluator import prep_expr_for_eval
+from .limits import check_cost
+from .numeric import DEFAULT_PRECISION, NumericBackend, get_backend
+
+# "name = expr" or "name(a, b) = expr"
+_DEFINITION = re.compile(
+    r"\s*([A-Za-z]\w*)\s*(?:\(\s*((?:[A-Za-z]\w*\s*,\s*)*[A-Za-z]\w*)?\s*\))?\s*=(.*)\Z", re.S)
+_ANS = re.compile(r"\bans\b")
+
+_RESERVED = {"ans", "math"} | FORMS
+
+# Results (#n) kept beyond the ones other cells read
+MAX_RESULTS = 200
+
+
+class Cell:
+    """
+    One definition or evaluated line.
+
+    name:     variable / function name, or "_n" for the n-th evaluated line
+    text:     what the user typed for the right-hand side
+    source:   text with "ans" resolved to the #n it meant (what snapshots keep)
+    params:   parameter names for a function, None otherwise
+    refs:     names of the cells it reads (variables, results and functions)
+    compiled: the compiled right-hand side, None if it could not be compiled
+    """
+
+    __slots__ = ("name", "text", "source", "params", "ast", "refs", "compiled")
+
+    def __init__(self, name, text, source, params, ast, refs):
+        self.name = name
+        self.text = text
+        self.source = source
+        self.params = params
+        self.ast = ast
+        self.refs = refs
+        self.compiled = None
+
+    @property
+    def label(self) -> str:
+        """How the cell is referred to: "rate", "f(x)" or "#3"."""
+        if self.params is not None:
+            return f"{self.name}({', '.join(self.params)})"
+        return _label(self.name)
+
+    def __repr__(self):
+        return f"Cell({self.label} = {self.text!r})"
+
+
+def _label(name):
+    return "#" + name[1:] if name.startswith("_") else name
+
+
+def _calls(node, out):
+    """Collect the names of all functions called in an AST."""
+    kind = node[0]
+    if kind == "call":
+        out.add(node[1])
+        for a in node[2]:
+            _calls(a, out)
+    elif kind in ("neg", "pos"):
+        _calls(node[1], out)
+    elif kind == "bin":
+        _calls(node[2], out)
+        _calls(node[3], out)
+    return out
+
+
+class Workspace:
+    """
+    Variables, functions and evaluated lines of one session, with
+    incremental recomputation (see the module docstring).
+
+    values maps variable names, "_n" results and "ans" to their current
+    value (or "Error"); it can be passed as the env of a LiveExpression.
+    version goes up whenever any value may have changed. max_results
+    (None: no limit) bounds the results kept that no cell reads.
+    """
+
+    def __init__(self, mode: str = "float", precision: int = DEFAULT_PRECISION,
+                 max_results: int = MAX_RESULTS):
+        self.cells = {}         # name -> Cell, in definition order
+        self.values = {}
+        self.entries = []       # cell names of kept evaluated lines: "_1", "_2", ...
+        self._dependents = {}   # name -> names of the cells that read it
+        self.max_results = max_results
+        self.version = 0
+        self.mode = None
+        self.set_mode(mode, precision)
+
+    # ---------------- NUMBER SYSTEM ----------------
+    def set_mode(self, mode: str, precision: int = DEFAULT_PRECISION):
+        """Switch the numeric backend; every cell is recompiled and recomputed."""
+        if self.mode == mode and (mode != "decimal" or self.precision == precision):
+            return
+        base = get_backend(mode, precision)
+        self.mode = mode
+        self.precision = precision
+        self._base_functions = base.functions
+        functions = dict(base.functions)
+        for cell in self.cells.values():
+            if cell.params is not None:
+                functions[cell.name] = self._function(cell.name)
+        # The base backend plus one entry per user function
+        self.backend = NumericBackend(base.name, base.literal, functions, base.constants,
+                                      base.ops, base.context)
+        self._recompute(set(self.cells), recompile=set(self.cells))
+
+    # ---------------- INPUT ----------------
+    def enter(self, line: str) -> Cell:
+        """
+        Handle one line: "name = expr" and "f(x, y) = expr" define a cell,
+        anything else is evaluated as the next #n. Raises ExpressionError
+        for syntax errors and circular definitions.
+        """
+        m = _DEFINITION.match(line)
+        if m is not None:
+            name, params, text = m.groups()
+            if params is not None:
+                params = tuple(p.strip() for p in params.split(","))
+            elif "(" in line[:m.start(3)]:
+                params = ()
+            return self.define(name, text.strip(), params)
+        name = f"_{int(self.entries[-1][1:]) + 1 if self.entries else 1}"
+        cell = self._set(name, line.strip(), None)
+        self.entries.append(name)
+        self.values["ans"] = self.values[name]
+        self._prune()
+        return cell
+
+    def define(self, name: str, text: str, params=None) -> Cell:
+        """Define or redefine a variable (params None) or a function."""
+        if name in _RESERVED or name.startswith("_"):
+            raise ExpressionError(f"{name!r} is a reserved name")
+        if params is not None:
+            # prep_expr_for_eval() would rewrite "plan(" / "asin(" into math.* calls
+            if prep_expr_for_eval(name + "(") != name + "(":
+                raise ExpressionError(f"{name!r} cannot be a function name")
+            if len(set(params)) != len(params):
+                raise ExpressionError("duplicate parameter name")
+            cell = self.cells.get(name)
+            if cell is not None and cell.params is None:
+                raise ExpressionError(f"{name!r} is a variable")
+        elif name in self.cells and self.cells[name].params is not None:
+            raise ExpressionError(f"{name!r} is a function")
+        return self._set(name, text, params)
+
+    def remove(self, name: str):
+        """Delete a variable or function; cells using it become "Error"."""
+        cell = self.cells.pop(name)
+        for ref in cell.refs:
+            self._dependents.get(ref, set()).discard(name)
+        self.values.pop(name, None)
+        if cell.params is not None:
+            del self.backend.functions[name]
+        downstream = self._dependents.get(name, set())
+        self._recompute(set(downstream), recompile=set(downstream))
+
+    def _prune(self):
+        """Drop the oldest results beyond max_results that no cell reads."""
+        excess = len(self.entries) - (self.max_results or len(self.entries))
+        if excess <= 0:
+            return
+        dropped = []
+        for name in self.entries[:-1]:
+            if not self._dependents.get(name):
+                dropped.append(name)
+                if len(dropped) == excess:
+                    break
+        for name in dropped:
+            cell = self.cells.pop(name)
+            for ref in cell.refs:
+                self._dependents[ref].discard(name)
+            self._dependents.pop(name, None)
+            del self.values[name]
+        if dropped:
+            gone = set(dropped)
+            self.entries = [n for n in self.entries if n not in gone]
+            self.version += 1
+
+    def evaluate(self, expr: str):
+        """Evaluate an expression against the current values without recording it."""
+        try:
+            normalized = prep_expr_for_eval(_ANS.sub(self._last_entry(), expr))
+            ast = parse(normalized)
+            check_cost(ast, self.backend)   # before compiling folds its constants
+            compiled = CompiledExpression(normalized, ast, self.backend)
+            return self._finish(compiled.evaluate(self.values))
+        except Exception:
+            return "Error"
+
+    # ---------------- READING ----------------
+    def __contains__(self, name):
+        return name in self.cells
+
+    def __iter__(self):
+        return iter(self.cells.values())
+
+    def __len__(self):
+        return len(self.cells)
+
+    def value(self, name: str):
+        """Current value of a variable or result ("#3" or "_3"), "Error" if it failed."""
+        if name.startswith("#"):
+            name = "_" + name[1:]
+        return self.values[name]
+
+    def dependents(self, name: str):
+        """Names of all cells that (directly or indirectly) depend on name."""
+        return self._downstream({name}) - {name}
+
+    # ---------------- SNAPSHOTS ----------------
+    def snapshot(self) -> dict:
+        """The cells as plain (JSON-friendly) data, for from_snapshot()."""
+        return {
+            "mode": self.mode,
+            "precision": self.precision,
+            "max_results": self.max_results,
+            "cells": [[c.name, c.source, None if c.params is None else list(c.params)]
+                      for c in self.cells.values()],
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: dict) -> "Workspace":
+        """
+        Rebuild a workspace from snapshot() data (e.g. in another process).
+        Cells are re-entered in their original order; values are recomputed.
+        """
+        ws = cls(data["mode"], data["precision"], data.get("max_results", MAX_RESULTS))
+        for name, source, params in data["cells"]:
+            ws._set(name, source, None if params is None else tuple(params))
+            if name.startswith("_"):
+                ws.entries.append(name)
+        if ws.entries:
+            ws.values["ans"] = ws.values[ws.entries[-1]]
+        return ws
+
+    # ---------------- GRAPH ----------------
+    def _last_entry(self) -> str:
+        return self.entries[-1] if self.entries else "ans"
+
+    def _set(self, name, text, params):
+        source = _ANS.sub(_label(self._last_entry()), text)
+        normalized = prep_expr_for_eval(source)
+        # prep_expr_for_eval() turned #3 into _3
+        ast = parse(normalized)
+        refs = (free_names(ast) | {c for c in _calls(ast, set())
+                                   if c not in self._base_functions and c not in FORMS})
+        if params is not None:
+            refs -= set(params)
+
+        downstream = self._downstream({name})
+        if refs & downstream:
+            cycle = _label(sorted(refs & downstream)[0])
+            raise ExpressionError(f"circular definition: {_label(name)} depends on itself through {cycle}")
+
+        old = self.cells.get(name)
+        if old is not None:
+            for ref in old.refs:
+                self._dependents[ref].discard(name)
+        for ref in refs:
+            self._dependents.setdefault(ref, set()).add(name)
+        cell = Cell(name, text, source, params, ast, refs)
+        self.cells[name] = cell
+        if params is not None and name not in self.backend.functions:
+            self.backend.functions[name] = self._function(name)
+        self._recompute({name}, recompile={name})
+        return cell
+
+    def _downstream(self, names):
+        """names plus every cell that depends on one of them."""
+        seen = set(names)
+        stack = list(names)
+        dependents = self._dependents
+        while stack:
+            for d in dependents.get(stack.pop(), ()):
+                if d not in seen:
+                    seen.add(d)
+                    stack.append(d)
+        return seen
+
+    def _recompute(self, changed, recompile):
+        """
+        Recompute the cells in changed and everything downstream of them,
+        in topological order. Cells calling a function that changed are
+        compiled again: calls with constant arguments were folded into
+        their compiled form (calc_core.optimize).
+        """
+        self.version += 1
+        affected = self._downstream(changed) & self.cells.keys()
+        changed_functions = {n for n in affected if self.cells[n].params is not None}
+
+        # Kahn's algorithm restricted to the affected cells
+        waiting = {}
+        ready = []
+        for name in affected:
+            n = len(self.cells[name].refs & affected)
+            if n:
+                waiting[name] = n
+            else:
+                ready.append(name)
+        while ready:
+            name = ready.pop()
+            cell = self.cells[name]
+            if name in recompile or cell.refs & changed_functions:
+                self._compile(cell)
+            if cell.params is None:
+                self._evaluate(cell)
+            for d in self._dependents.get(name, ()):
+                if d in waiting:
+                    waiting[d] -= 1
+                    if not waiting[d]:
+                        del waiting[d]
+                        ready.append(d)
+        if self.entries:
+            self.values["ans"] = self.values[self.entries[-1]]
+
+    def _compile(self, cell):
+        try:
+            # Refuse 9^9^9-style cells up front, before compiling folds their
+            # constants (parameters are unknown here; check_power sees them when called)
+            check_cost(cell.ast, self.backend)
+            cell.compiled = CompiledExpression(cell.text, cell.ast, self.backend)
+        except Exception:
+            cell.compiled = None   # unknown function, oversized ...: the cell is "Error"
+
+    def _evaluate(self, cell):
+        values = self.values
+        if cell.compiled is None:
+            values[cell.name] = "Error"
+            return
+        env = {r: values[r] for r in cell.refs if r in values}
+        try:
+            values[cell.name] = self._finish(cell.compiled.evaluate(env))
+        except Exception:
+            values[cell.name] = "Error"
+
+    @staticmethod
+    def _finish(value):
+        # Decimal reports log(0) and friends as infinities/NaN instead of raising
+        if "decimal" in sys.modules and isinstance(value, sys.modules["decimal"].Decimal):
+            if not value.is_finite():
+                return "Error"
+        return value
+
+    def _function(self, name):
+        """What the engine calls for a user function: the current definition of name."""
+        def call(*args):
+            cell = self.cells[name]
+            if cell.compiled is None:
+                raise ExpressionError(f"{cell.label} cannot be evaluated")
+            if len(args) != len(cell.params):
+                raise TypeError(f"{cell.label} takes {len(cell.params)} arguments")
+            values = self.values
+            env = {r: values[r] for r in cell.refs if r in values}
+            env.update(zip(cell.params, args))
+            return cell.compiled.evaluate(env)
+        return call
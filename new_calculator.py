@@ -1,28 +1,50 @@
 import streamlit as st
-import math
+import os
 import random
+import uuid
 
-# ---------------- OPTIONAL VOICE LIBS (LOCAL ONLY) ----------------
-# These libraries are only required if you want to use voice input/output locally.
-# If they are not installed, the app will still run (voice features will just do nothing).
-try:
-    import speech_recognition as sr
-except ImportError:
-    sr = None
-
-try:
-    import pyttsx3
-except ImportError:
-    pyttsx3 = None
+from calc_core import (KEY_INPUT, MODES, CalculatorState, SessionStore, Workspace, configure_result_cache,
+                       format_result, instrument, open_store)
+from calc_core.cache import LRUCache
+from calc_core.history import HistoryStore, format_record
+from calc_core.spoken import spoken_to_expr
+from calc_core.voice import VoiceService
 
 # ---------------- PAGE CONFIG ----------------
 # Basic Streamlit page settings: title, icon, and layout.
 st.set_page_config(page_title="Python Calculator", page_icon="🧮", layout="centered")
 
+# ---------------- INSTRUMENTATION ----------------
+# Timers around the parts of a rerun that cost time (calc_core.instrument).
+# They are off unless the deployment turns them on: CALC_INSTRUMENT=1, or
+# CALC_DIAGNOSTICS=1, which also makes the hidden Diagnostics page (with its
+# profiling and reset controls) available at ?diagnostics=1. Visitors can
+# neither switch instrumentation on for the whole server nor open the page.
+diagnostics_allowed = os.environ.get("CALC_DIAGNOSTICS", "") not in ("", "0")
+if diagnostics_allowed and not instrument.is_enabled():
+    instrument.enable()
+show_diagnostics = diagnostics_allowed and st.query_params.get("diagnostics") == "1"
+rerun_timer = instrument.timer("rerun").start()
+capture = None
+if show_diagnostics and (st.session_state.get("diag_profile") or st.session_state.get("diag_memory")):
+    capture = instrument.Capture(
+        "rerun",
+        profile=st.session_state.get("diag_profile", False),
+        memory=st.session_state.get("diag_memory", False),
+    ).start()
+
+# ---------------- RENDERING MODE ----------------
+# "fast" (the default) sends the static CSS/snow markup as one cached
+# element, draws every keypad as a single custom component that batches
+# keystrokes in the browser, renders only the visible keypad, and reruns
+# just the display + keypad fragment on a keystroke. "classic" is the
+# original page: one st.button per key, both tabs, fresh snow every rerun.
+# The selector itself is in the sidebar below.
+render_mode = st.session_state.get("render_mode", "fast")
+
 # ---------------- CSS (snow + styles) ----------------
 # All the styling of the app (backgrounds, fonts, buttons, etc.) is done here.
-st.markdown(
-    """
+APP_CSS = """
 <style>
 @import url('https://fonts.cdnfonts.com/css/algerian');
 
@@ -85,6 +107,15 @@ st.markdown(
   margin-bottom: 16px;
 }
 
+.calc-display-preview {
+  text-align: right;
+  color: #9e9e9e;
+  font-size: 20px;
+  padding-right: 24px;
+  margin-top: -12px;
+  margin-bottom: 12px;
+}
+
 /* -------- GRID & BUTTONS LAYOUT -------- */
 .calc-grid { padding-left: 24px; padding-right: 24px; margin-bottom: 12px; }
 .calc-row { display:flex; gap:12px; margin-bottom:12px; }
@@ -149,24 +180,38 @@ button[title="voice_result"] {
   .calc-display-res { font-size: 30px; }
 }
 </style>
-""",
-    unsafe_allow_html=True,
-)
+"""
 
 # ---------------- SNOW HTML (ACTUAL SNOW DOT ELEMENTS) ----------------
-# This builds several "•" elements with random positions and animation speeds to look like snow.
-snow_html = '<div class="snow">\n'
-for i in range(30):
-    left = random.uniform(0, 100)   # horizontal position in percentage
-    dur = random.uniform(4, 10)     # animation duration
-    delay = random.uniform(0, 6)    # animation delay
-    size = random.uniform(6, 12)    # font size (dot size)
-    snow_html += (
-        f'<div class="dot" style="left:{left}%; font-size:{size}px; '
-        f'animation-duration:{dur}s; animation-delay:{delay}s;">•</div>\n'
-    )
-snow_html += "</div>"
-st.markdown(snow_html, unsafe_allow_html=True)
+def snow_markup() -> str:
+    """Several "•" elements with random positions and animation speeds to look like snow."""
+    snow_html = '<div class="snow">\n'
+    for i in range(30):
+        left = random.uniform(0, 100)   # horizontal position in percentage
+        dur = random.uniform(4, 10)     # animation duration
+        delay = random.uniform(0, 6)    # animation delay
+        size = random.uniform(6, 12)    # font size (dot size)
+        snow_html += (
+            f'<div class="dot" style="left:{left}%; font-size:{size}px; '
+            f'animation-duration:{dur}s; animation-delay:{delay}s;">•</div>\n'
+        )
+    snow_html += "</div>"
+    return snow_html
+
+@st.cache_resource
+def static_assets() -> str:
+    """CSS and snow built once per server process: every rerun sends the same markup."""
+    return APP_CSS + snow_markup()
+
+if render_mode == "fast":
+    with instrument.timer("render.assets"):
+        st.markdown(static_assets(), unsafe_allow_html=True)
+else:
+    with instrument.timer("render.css"):
+        st.markdown(APP_CSS, unsafe_allow_html=True)
+    # New random dots on every rerun, so the browser re-diffs all 30
+    with instrument.timer("render.snow"):
+        st.markdown(snow_markup(), unsafe_allow_html=True)
 
 # ---------------- SIDEBAR (THEME + HISTORY) ----------------
 st.sidebar.title("⚙️ Extra Features")
@@ -191,195 +236,177 @@ if theme == "🌕 Light":
         unsafe_allow_html=True,
     )
 
+# How the page is drawn (see RENDERING MODE above)
+st.sidebar.selectbox(
+    "🖥️ Rendering",
+    ["fast", "classic"],
+    format_func={"fast": "Fast (one keypad component)", "classic": "Classic (Streamlit buttons)"}.get,
+    key="render_mode",
+)
+
+# ---------------- SHARED STATE (SEVERAL REPLICAS) ----------------
+# Each session's calculator (expression, display, variables and results)
+# is saved in a store after every change, under a session id kept in a
+# browser cookie. The id grants access to the session's state and history,
+# so it is never put in the URL, where a shared or bookmarked link would
+# hand it over. With CALC_STORE=sqlite:///path or redis://host:6379/0
+# every replica behind the load balancer uses the same store, so any of
+# them can continue any session, and results of constant expressions
+# computed by one replica are reused by the others (calc_core.store).
+# The default, memory://, keeps it all in this process.
+@st.cache_resource
+def get_session_store() -> SessionStore:
+    url = os.environ.get("CALC_STORE", "memory://")
+    store = open_store(url)
+    if not url.startswith("memory://"):
+        configure_result_cache(store)
+    return SessionStore(store)
+
+SESSION_COOKIE = "calc_sid"
+
+def _is_session_id(value) -> bool:
+    try:
+        return uuid.UUID(hex=value).hex == value
+    except (TypeError, ValueError):
+        return False
+
+def remember_session_id(session_id: str, max_age: float):
+    """Set the session cookie from the browser (Streamlit cannot set cookies itself)."""
+    import streamlit.components.v1 as components
+
+    components.html(
+        "<script>window.parent.document.cookie = "
+        f"'{SESSION_COOKIE}={session_id}; path=/; max-age={int(max_age)}; SameSite=Strict'"
+        " + (window.parent.location.protocol === 'https:' ? '; Secure' : '');</script>",
+        height=0,
+    )
+
+sessions = get_session_store()
+if "session_id" not in st.session_state:
+    cookie = st.context.cookies.get(SESSION_COOKIE)
+    if _is_session_id(cookie):
+        st.session_state.session_id = cookie
+    else:
+        st.session_state.session_id = uuid.uuid4().hex
+        remember_session_id(st.session_state.session_id, sessions.ttl)
+session_id = st.session_state.session_id
+if "sid" in st.query_params:
+    del st.query_params["sid"]   # links from before the cookie no longer carry a session
+
 # ---------------- SESSION STATE INITIALIZATION ----------------
-# We use Streamlit's session_state to remember data across interactions.
-if "history" not in st.session_state:
-    st.session_state.history = []           # list of past calculations
-if "expression" not in st.session_state:
-    st.session_state.expression = ""        # current expression string
-if "display_result" not in st.session_state:
-    st.session_state.display_result = ""    # current result to display
-
-# Show history in the sidebar (latest at the top)
+# The button logic lives in calc_core.state.CalculatorState; each browser
+# session keeps one instance in Streamlit's session_state, together with
+# its variables, functions and numbered results (calc_core.workspace).
+# A session this server has not seen yet may have been saved by another replica.
+if "calc" not in st.session_state:
+    restored = sessions.load(session_id)
+    if restored is not None:
+        # Before the widgets below are created, so they show the restored choice
+        st.session_state.number_mode = restored.mode
+        st.session_state.precision = restored.precision
+    else:
+        restored = CalculatorState(workspace=Workspace())
+    st.session_state.calc = restored
+
+def save_session():
+    """Save this session's calculator if it changed since the last save."""
+    raw = SessionStore.dumps(st.session_state.calc)
+    if raw != st.session_state.get("saved_calc"):
+        sessions.save(session_id, st.session_state.calc, raw)
+        st.session_state.saved_calc = raw
+
+# Number system used for evaluation (see calc_core.numeric).
+# The session's CalculatorState picks the choice up below.
+number_mode = st.sidebar.selectbox(
+    "🔢 Number Mode",
+    MODES,
+    format_func={"float": "Float (fast)", "decimal": "Decimal", "fraction": "Exact fraction"}.get,
+    key="number_mode",
+)
+if number_mode == "decimal":
+    st.sidebar.slider("Decimal digits", min_value=8, max_value=100, value=28, key="precision")
+
+# ---------------- HISTORY STORE ----------------
+# Past calculations live in a SQLite file (see calc_core.history) so they
+# survive restarts; one store is shared by every session of this server,
+# and each session reads and writes only its own records.
+@st.cache_resource
+def get_history_store() -> HistoryStore:
+    return HistoryStore()
+
+history = get_history_store().for_session(session_id)
+
+calc = st.session_state.calc
+calc.mode = number_mode
+calc.precision = st.session_state.get("precision", 28)
+calc.history = history
+workspace = calc.workspace
+workspace.set_mode(calc.mode, calc.precision)
+
+# Show history in the sidebar (latest at the top), or search results
 st.sidebar.subheader("📜 Calculation History")
-if st.session_state.history:
-    for h in reversed(st.session_state.history[-12:]):  # show up to last 12 entries
-        st.sidebar.write(h)
+history_query = st.sidebar.text_input("🔍 Search history", key="history_query")
+if history_query:
+    records = history.search(history_query, limit=12)
+else:
+    records = history.recent(12)  # show up to last 12 entries, straight from memory
+if records:
+    for rec in records:
+        st.sidebar.write(format_record(rec))
+elif history_query:
+    st.sidebar.info("No matching calculations.")
 else:
     st.sidebar.info("No calculations yet.")
 
+# Variables, functions and numbered results of this session. Changing a
+# variable recomputes only the lines that use it.
+st.sidebar.subheader("🧮 Variables & Functions")
+with st.sidebar.form("workspace_form", clear_on_submit=True):
+    workspace_line = st.text_input("Define or evaluate", placeholder="rate = 0.05, f(x) = x^2+1, f(ans)×#1")
+    workspace_submitted = st.form_submit_button("Enter")
+if workspace_submitted and workspace_line.strip():
+    try:
+        workspace.enter(workspace_line)
+    except ValueError as exc:  # syntax error or circular definition
+        st.sidebar.error(str(exc))
+cells = list(workspace)[-20:]  # the latest definitions and results
+if cells:
+    for cell in reversed(cells):
+        line = f"{cell.label} = {cell.text}"
+        if cell.params is None:
+            line += f" → {format_result(workspace.values[cell.name])}"
+        st.sidebar.write(line)
+else:
+    st.sidebar.info("Try rate = 0.05, then 1000×(1+rate) and change rate.")
+
 # ---------------- MAIN TITLE ----------------
 st.markdown("<div class='title'>🧮 Python Calculator</div>", unsafe_allow_html=True)
 
-# ---------------- VOICE HELPER FUNCTIONS (LOCAL ONLY) ----------------
-def recognize_speech_from_mic() -> str:
-    """
-    Listen once from the local microphone and return recognized text using Google Speech.
-    If speech_recognition is not installed or something fails, return an empty string.
-    """
-    if sr is None:
-        return ""
-    try:
-        recog = sr.Recognizer()
-        with sr.Microphone() as source:
-            # Try to reduce background noise
-            recog.adjust_for_ambient_noise(source, duration=0.5)
-            # Listen for up to 5 seconds
-            audio = recog.listen(source, phrase_time_limit=5)
-        # Use Google's free speech recognition API
-        text = recog.recognize_google(audio)
-        return text
-    except Exception:
-        # Any error -> return empty so the app does not crash
-        return ""
-
-def speak_text_out_loud(text: str):
-    """
-    Speak given text out loud using the local speakers (pyttsx3).
-    If pyttsx3 is not installed or something fails, do nothing.
-    """
-    if pyttsx3 is None:
-        return
-    try:
-        engine = pyttsx3.init()
-        engine.say(str(text))
-        engine.runAndWait()
-        engine.stop()
-    except Exception:
-        # Silent failure to avoid breaking the app
-        pass
-
-def spoken_to_expr(text: str) -> str:
-    """
-    Convert recognized speech into a calculator expression.
-
-    Supports verbal phrases like:
-      - "plus", "minus", "times", "divided by"
-      - "square root of", "sine of", "cosine of", "tangent of"
-      - "percent", "percentage of"
-      - powers: "to the power of", "squared", "cubed"
-    And converts simple number words ("one", "two", etc.) to digits.
-    """
-    t = text.lower().strip()
-
-    # Map common spoken phrases to operators / functions
-    phrase_replacements = {
-        # Division
-        "divided by": "/",
-        "divide by": "/",
-        "over": "/",
-
-        # Multiplication
-        "multiplied by": "*",
-        "times": "*",
-        "x": "*",
-
-        # Powers
-        "to the power of": "^",
-        "power of": "^",
-        "raised to the power of": "^",
-        "raised to": "^",
-
-        # Roots
-        "square root of": "sqrt",
-        "square root": "sqrt",
-        "root of": "sqrt",
-
-        # Trigonometric functions
-        "sine of": "sin",
-        "cosine of": "cos",
-        "tangent of": "tan",
-        "sin of": "sin",
-        "cos of": "cos",
-        "tan of": "tan",
-
-        # Percent / percentage
-        "percent of": "/ 100 *",
-        "percentage of": "/ 100 *",
-        "percent": "/ 100",
-        "percentage": "/ 100",
-
-        # Addition / subtraction
-        "plus": "+",
-        "add": "+",
-        "minus": "-",
-        "subtract": "-",
-    }
+# ---------------- VOICE SERVICE (LOCAL ONLY) ----------------
+# Listening and speaking run on background threads (see calc_core.voice),
+# so the page never freezes while the microphone is open. speech_recognition
+# and pyttsx3 are optional: without them the voice buttons just do nothing.
+@st.cache_resource
+def get_voice_service() -> VoiceService:
+    return VoiceService()
 
-    # Replace phrases with symbols
-    for phrase, sym in phrase_replacements.items():
-        t = t.replace(phrase, f" {sym} ")
-
-    # Simple mapping from spoken numbers to digits
-    number_words = {
-        "zero": "0",
-        "one": "1",
-        "two": "2",
-        "three": "3",
-        "four": "4",
-        "for": "4",   # common mis-recognition
-        "five": "5",
-        "six": "6",
-        "seven": "7",
-        "eight": "8",
-        "ate": "8",   # common mis-recognition
-        "nine": "9",
-        "ten": "10",
-    }
-
-    tokens = t.split()
-    out = []
-    open_funcs = 0  # count unclosed function parentheses
-
-    for tok in tokens:
-        if tok in number_words:
-            # Word-number -> digit
-            out.append(number_words[tok])
-        elif tok in {"+", "-", "*", "/", "^"}:
-            # Math operators
-            out.append(tok)
-        elif tok in {"sqrt", "sin", "cos", "tan"}:
-            # Functions get an opening parenthesis
-            out.append(tok + "(")
-            open_funcs += 1
-        elif tok in {"squared", "square"}:
-            out.append("^2")
-        elif tok in {"cubed", "cube"}:
-            out.append("^3")
-        else:
-            # If token looks like a number (including decimal)
-            if tok.replace(".", "", 1).isdigit():
-                out.append(tok)
-
-    # Close all opened function parentheses
-    out.extend(")" for _ in range(open_funcs))
-
-    # Join without spaces to create expression string
-    expr = "".join(out)
-    # If we couldn't parse anything, just return original text with no spaces
-    if not expr:
-        expr = text.replace(" ", "")
-    return expr
+voice = get_voice_service()
 
 # ---------------- VOICE BUTTONS ROW ----------------
 # Two big buttons at the top for voice input and voice output.
 col_v1, col_v2 = st.columns(2)
 
 with col_v1:
-    # 🎙️ Speak button: listens to microphone and fills the expression.
+    # 🎙️ Speak button: starts listening in the background.
     if st.button(
         "🎙️ Speak",
         key="speak_expr_btn",
         help="voice_speak",              # used as HTML title for CSS targeting
         use_container_width=True,
     ):
-        spoken_raw = recognize_speech_from_mic()
-        if spoken_raw:
-            expr_from_voice = spoken_to_expr(spoken_raw)
-            if expr_from_voice:
-                st.session_state.expression = expr_from_voice
-                # Clear result so expression appears as the main display
-                st.session_state.display_result = ""
+        if st.session_state.get("voice_pending") is None:
+            instrument.count("voice.recognize")
+            st.session_state.voice_pending = voice.recognize_async()
 
 with col_v2:
     # 🔊 Result button: speaks the current result or expression.
@@ -389,113 +416,81 @@ with col_v2:
         help="voice_result",             # used as HTML title for CSS targeting
         use_container_width=True,
     ):
-        value = st.session_state.display_result
-        # If there is no result yet, speak the expression or "0"
-        if value in ("", None):
-            value = st.session_state.expression or "0"
-        speak_text_out_loud(value)
-
-# ---------------- CALCULATION HELPER FUNCTIONS ----------------
-def prep_expr_for_eval(expr: str) -> str:
-    """
-    Take the user-visible expression string and convert it into a valid
-    Python expression that can be safely evaluated.
-    """
-    # Normalize special characters to Python operators
-    e = expr.replace("×", "*").replace("÷", "/").replace("−", "-").replace("–", "-")
-    e = e.replace("➕", "+")
-    # Handle ^ as exponentiation
-    e = e.replace("^", "**")
-    # Replace pi character with its numeric value
-    e = e.replace("π", str(math.pi))
-
-    # Map functions to math module
-    e = e.replace("sin(", "math.sin(")
-    e = e.replace("cos(", "math.cos(")
-    e = e.replace("tan(", "math.tan(")
-    e = e.replace("sqrt(", "math.sqrt(")
-
-    # Important: replace log() and ln() in a safe order to avoid "math.math.log10(" bugs.
-    # "log(" -> math.log10()  (base 10)
-    e = e.replace("log(", "math.log10(")
-    # "ln("  -> math.log()    (natural log)
-    e = e.replace("ln(", "math.log(")
-
-    return e
-
-def evaluate_expression(expr: str):
-    """
-    Safely evaluate the mathematical expression.
-    Returns either:
-      - a number (int or float), or
-      - the string "Error" if evaluation fails.
-    """
-    if not expr:
-        return ""
-    try:
-        safe = prep_expr_for_eval(expr)
-        # Evaluate with no builtins and only 'math' module allowed.
-        result = eval(safe, {"__builtins__": None, "math": math}, {})
-        # Clean up float representation to avoid long tails like 1.00000000000001
-        if isinstance(result, float):
-            result = float(f"{result:.12g}")
-        return result
-    except Exception:
-        return "Error"
+        # The displayed text: result, or the expression, or "0"
+        with instrument.timer("voice.speak"):
+            voice.speak(calc.display())           # queued, returns immediately
 
-def press(btn: str):
+@st.fragment(run_every=0.5)
+def poll_voice_input():
     """
-    Handle button presses for all calculator buttons.
-    This function updates st.session_state.expression and st.session_state.display_result.
+    While a recognition is pending, check on it twice a second. When the text
+    arrives, fill the expression and rerun the whole page to show it.
     """
-    # Clear everything
-    if btn == "AC":
-        st.session_state.expression = ""
-        st.session_state.display_result = ""
-        return
-
-    # Backspace: remove last character
-    if btn == "⌫":
-        st.session_state.expression = st.session_state.expression[:-1]
+    pending = st.session_state.get("voice_pending")
+    if pending is None:
         return
-
-    # Toggle sign of the entire current expression
-    if btn == "+/-":
-        exp = st.session_state.expression
-        if exp:
-            st.session_state.expression = exp[1:] if exp.startswith("-") else "-" + exp
-        return
-
-    # Percentage: evaluate current expression and divide by 100
-    if btn == "%":
-        val = evaluate_expression(st.session_state.expression)
-        if isinstance(val, (int, float)):
-            res = val / 100
-            st.session_state.display_result = res
-            st.session_state.history.append(f"{st.session_state.expression}% = {res}")
-            st.session_state.expression = str(res)
-        else:
-            st.session_state.display_result = "Error"
-        return
-
-    # Equals: evaluate full expression
-    if btn == "=":
-        res = evaluate_expression(st.session_state.expression)
-        st.session_state.display_result = res
-        st.session_state.history.append(f"{st.session_state.expression} = {res}")
-        return
-
-    # Special mapping for ➕ (fancy plus sign) to '+'
-    if btn == "➕":
-        st.session_state.expression += "+"
+    if not pending.done():
+        st.caption("🎙️ Listening…")
         return
+    st.session_state.voice_pending = None
+    spoken_raw = pending.result()
+    if spoken_raw:
+        with instrument.timer("voice.spoken_to_expr"):
+            expr_from_voice = spoken_to_expr(spoken_raw)
+        if expr_from_voice:
+            calc.expression = expr_from_voice
+            # Clear result so expression appears as the main display
+            calc.display_result = ""
+    st.rerun()
 
-    # Otherwise, just append the button text to the expression
-    st.session_state.expression += btn
+if st.session_state.get("voice_pending") is not None:
+    poll_voice_input()
 
-# ---------------- TABS (BASIC & SCIENTIFIC) ----------------
-tab1, tab2 = st.tabs(["Basic", "Scientific"])
+# ---------------- CALCULATION HELPER FUNCTIONS ----------------
+# Button handling (AC, ⌫, +/-, %, =, label -> input mapping) lives in
+# calc_core.state so it can run without Streamlit.
 
+@instrument.timed("press")
+def press(btn: str):
+    """Handle a button press on this session's calculator."""
+    if btn in ("=", "%"):
+        # The only keys that evaluate the whole expression
+        with instrument.timer("evaluate"):
+            st.session_state.calc.press(btn)
+    else:
+        st.session_state.calc.press(btn)
+
+# ---------------- KEYPAD LAYOUTS ----------------
+# Layout for basic calculator buttons
+BASIC_ROWS = [
+    ["AC", "⌫", "%", "÷"],
+    ["7", "8", "9", "×"],
+    ["4", "5", "6", "−"],
+    ["1", "2", "3", "➕"],
+    ["00", "0", ".", "="],
+]
+
+# First block of scientific function buttons
+# (KEY_INPUT in calc_core.state maps labels like x^y / x^2 / e to their input)
+SCI_ROWS = [
+    ["sin(", "cos(", "tan(", "sqrt("],
+    ["ln(", "log(", "π", "e"],
+    ["x^y", "x^2", "+/-", "⌫"],
+    ["AC", "%", "÷", "×"],
+    # integrate(expr, x, a, b) / diff(expr, x, at) / solve(expr, x, guess), see calc_core.calculus
+    ["∫(", "d/dx(", "solve(", ","],
+    ["(", ")", "x"],
+]
+
+# Numeric keypad section in scientific tab (same layout as basic)
+SCI_NUM_ROWS = [
+    ["7", "8", "9", "×"],
+    ["4", "5", "6", "−"],
+    ["1", "2", "3", "➕"],
+    ["00", "0", ".", "="],
+]
+
+@instrument.timed("render.button")
 def render_col_button(col, label, key, on_click=None, args=()):
     """
     Helper that renders a calculator button inside a given Streamlit column.
@@ -511,115 +506,292 @@ def render_col_button(col, label, key, on_click=None, args=()):
         type=btn_type,
     )
 
-# -------- BASIC TAB --------
-with tab1:
+@instrument.timed("render.preview")
+def render_preview():
+    """
+    Small live result under the display while typing. calc.preview() is
+    updated incrementally, so this stays cheap for long expressions.
+    """
+    if calc.display_result not in ("", None):
+        return
+    value = calc.preview()
+    if value is None or value == "Error":
+        return
+    text = format_result(value)
+    if text != calc.expression:
+        st.markdown(f"<div class='calc-display-preview'>= {text}</div>", unsafe_allow_html=True)
+
+def render_display():
+    """Small expression line, big display and the live preview."""
     # Small expression display (top)
     st.markdown(
-        f"<div class='calc-display-exp'>{st.session_state.expression}</div>",
+        f"<div class='calc-display-exp'>{calc.expression}</div>",
         unsafe_allow_html=True,
     )
 
     # Big display: show result if available, otherwise current expression, or 0
-    if st.session_state.display_result not in ("", None):
-        big_display = st.session_state.display_result
-    elif st.session_state.expression:
-        big_display = st.session_state.expression
-    else:
-        big_display = "0"
+    big_display = calc.display()
 
     st.markdown(
         f"<div class='calc-display-res'>{big_display}</div>",
         unsafe_allow_html=True,
     )
-
-    # Layout for basic calculator buttons
-    rows_basic = [
-        ["AC", "⌫", "%", "÷"],
-        ["7", "8", "9", "×"],
-        ["4", "5", "6", "−"],
-        ["1", "2", "3", "➕"],
-        ["00", "0", ".", "="],
-    ]
-
-    # Render each row of buttons
-    for r in rows_basic:
+    render_preview()
+
+# ---------------- PLOT ----------------
+# Graph of an expression in x (calc_core.plot). It is sampled adaptively,
+# cut down to PLOT_POINTS points with LTTB before it is sent, and the
+# samples are kept per expression, so the pan / zoom buttons evaluate only
+# the newly exposed x range. Variables and functions come from the workspace.
+PLOT_POINTS = 800
+
+def move_plot(pan=0.0, zoom=1.0):
+    """Shift the x range by pan widths and scale its width by zoom (button callback)."""
+    lo, hi = st.session_state.plot_lo, st.session_state.plot_hi
+    mid = (lo + hi) / 2 + pan * (hi - lo)
+    half = (hi - lo) / 2 * zoom
+    st.session_state.plot_lo, st.session_state.plot_hi = mid - half, mid + half
+
+def get_plot(expr):
+    """This session's FunctionPlot of expr, reused while the workspace values stay the same."""
+    from calc_core.plot import compile_plot
+
+    plots = st.session_state.setdefault("plots", LRUCache(4))
+    key = (expr, workspace.backend, workspace.version)
+    plot = plots.get(key)
+    if plot is None:
+        plot = compile_plot(expr, backend=workspace.backend, env=workspace.values)
+        plots.put(key, plot)
+    return plot
+
+@st.fragment
+def render_plot():
+    """Expression, x range, pan / zoom buttons and the chart; reruns only this fragment."""
+    st.session_state.setdefault("plot_lo", -10.0)
+    st.session_state.setdefault("plot_hi", 10.0)
+    with st.expander("📈 Plot", expanded=bool(st.session_state.get("plot_expr"))):
+        expr = st.text_input("f(x) =", key="plot_expr", placeholder="sin(x)/x, ln(x), a×x^2, f(x)")
+        col_lo, col_hi = st.columns(2)
+        col_lo.number_input("x min", key="plot_lo", format="%g")
+        col_hi.number_input("x max", key="plot_hi", format="%g")
         cols = st.columns(4, gap="small")
-        for i, label in enumerate(r):
-            key = f"basic_{label}_{i}"
-            render_col_button(cols[i], label, key, on_click=press, args=(label,))
-
-# -------- SCIENTIFIC TAB --------
-with tab2:
-    # Small expression display (top)
-    st.markdown(
-        f"<div class='calc-display-exp'>{st.session_state.expression}</div>",
-        unsafe_allow_html=True,
-    )
-
-    # Big display: show result if available, otherwise current expression, or 0
-    if st.session_state.display_result not in ("", None):
-        big_display = st.session_state.display_result
-    elif st.session_state.expression:
-        big_display = st.session_state.expression
-    else:
-        big_display = "0"
-
-    st.markdown(
-        f"<div class='calc-display-res'>{big_display}</div>",
-        unsafe_allow_html=True,
+        cols[0].button("◀", key="plot_left", on_click=move_plot, kwargs={"pan": -0.25}, use_container_width=True)
+        cols[1].button("▶", key="plot_right", on_click=move_plot, kwargs={"pan": 0.25}, use_container_width=True)
+        cols[2].button("➕", key="plot_in", on_click=move_plot, kwargs={"zoom": 0.5}, use_container_width=True)
+        cols[3].button("➖", key="plot_out", on_click=move_plot, kwargs={"zoom": 2.0}, use_container_width=True)
+        if not expr.strip():
+            return
+        lo, hi = st.session_state.plot_lo, st.session_state.plot_hi
+        try:
+            with instrument.timer("plot.view"):
+                data = get_plot(expr).view(lo, hi, PLOT_POINTS)
+        except (ValueError, ArithmeticError, ImportError) as exc:
+            st.error(str(exc))
+            return
+        import altair as alt
+
+        rows = [{"x": x, "y": y, "piece": p} for x, y, p in zip(data.x, data.y, data.piece)]
+        chart = alt.Chart(alt.Data(values=rows)).mark_line(clip=True).encode(
+            x=alt.X("x:Q", scale=alt.Scale(domain=[lo, hi], nice=False)),
+            y=alt.Y("y:Q", scale=alt.Scale(domain=list(data.y_range), nice=False), title=f"f(x) = {expr}"),
+            detail="piece:N",   # no line across a pole or where f is undefined
+        )
+        st.altair_chart(chart, use_container_width=True)
+        st.caption(f"{len(data.x)} of {data.sampled} samples drawn · {data.evaluated} evaluated for this view")
+
+# ---------------- CLASSIC: TABS OF STREAMLIT BUTTONS ----------------
+def render_classic():
+    """Both tabs, one st.button per key (st.tabs renders the hidden tab too)."""
+    tab1, tab2 = st.tabs(["Basic", "Scientific"])
+
+    # -------- BASIC TAB --------
+    with tab1:
+        render_display()
+
+        # Render each row of buttons
+        for r in BASIC_ROWS:
+            cols = st.columns(4, gap="small")
+            for i, label in enumerate(r):
+                key = f"basic_{label}_{i}"
+                render_col_button(cols[i], label, key, on_click=press, args=(label,))
+
+    # -------- SCIENTIFIC TAB --------
+    with tab2:
+        render_display()
+
+        for r_idx, row in enumerate(SCI_ROWS):
+            cols = st.columns(4, gap="small")
+            for c_idx, label in enumerate(row):
+                render_col_button(
+                    cols[c_idx],
+                    label,
+                    key=f"sci_{r_idx}_{label}",
+                    on_click=press,
+                    args=(label,),
+                )
+
+        for r_idx, row in enumerate(SCI_NUM_ROWS):
+            cols = st.columns(4, gap="small")
+            for c_idx, label in enumerate(row):
+                render_col_button(
+                    cols[c_idx],
+                    label,
+                    key=f"sci_num_{r_idx}_{label}",
+                    on_click=press,
+                    args=(label,),
+                )
+
+        render_plot()
+
+# ---------------- FAST: ONE KEYPAD COMPONENT ----------------
+# frontend/keypad/index.html draws a whole keypad in one iframe and buffers
+# the keys pressed: they reach the server as one batch {"id", "seq", "keys"}
+# when typing pauses for KEYPAD_DEBOUNCE_MS, or at once on "=" / "%". So a
+# typed expression costs a round trip or two instead of one per key.
+KEYPAD_DEBOUNCE_MS = 400
+
+@st.cache_resource
+def get_keypad_component():
+    import streamlit.components.v1 as components
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "keypad")
+    return components.declare_component("calc_keypad", path=path)
+
+def apply_keypad_batch(batch) -> bool:
+    """
+    Apply a batch of keys from the keypad component (CalculatorState.apply_events).
+    The component keeps returning its latest batch on later reruns, so
+    each (id, seq) is applied only once. Returns True if a key evaluated
+    the expression.
+    """
+    if not batch:
+        return False
+    batch_id = [batch["id"], batch["seq"]]
+    if st.session_state.get("keypad_batch") == batch_id:
+        return False
+    st.session_state.keypad_batch = batch_id
+
+    # Round trips per expression = keypad.round_trips / keypad.expressions
+    instrument.count("keypad.round_trips")
+    instrument.count("keypad.keys", len(batch["keys"]))
+    if batch.get("rtt_ms") is not None:
+        # Measured in the browser: batch sent -> rerun that applied it rendered
+        instrument.record("keypad.round_trip", batch["rtt_ms"] / 1000)
+    with instrument.timer("apply_events"):
+        evaluations = calc.apply_events(batch["keys"])
+    instrument.count("keypad.expressions", evaluations)
+    return evaluations > 0
+
+@st.fragment
+def render_keypad(rows):
+    """
+    Display + keypad. A keystroke batch reruns only this fragment, so the
+    CSS, snow, sidebar and voice row are not sent again.
+    """
+    # The component's latest value is in session_state before it is drawn
+    evaluated = apply_keypad_batch(st.session_state.get("keypad"))
+    save_session()   # a fragment rerun does not reach the end of the script
+    render_display()
+    with instrument.timer("render.keypad"):
+        get_keypad_component()(
+            rows=rows,
+            light=theme == "🌕 Light",
+            debounce_ms=KEYPAD_DEBOUNCE_MS,
+            expression=calc.expression,
+            key_input=KEY_INPUT,
+            ack=st.session_state.get("keypad_batch"),
+            key="keypad",
+            default=None,
+        )
+    if evaluated:
+        st.rerun()   # "=" / "%" added a history entry and a #n: refresh the sidebar too
+
+def render_fast():
+    """Only the selected keypad is built and sent."""
+    tab = st.radio(
+        "Keypad",
+        ["Basic", "Scientific"],
+        horizontal=True,
+        label_visibility="collapsed",
+        key="keypad_tab",
     )
+    render_keypad(BASIC_ROWS if tab == "Basic" else SCI_ROWS + SCI_NUM_ROWS)
+    if tab == "Scientific":
+        render_plot()
 
-    # First block of scientific function buttons
-    sci_rows = [
-        ["sin(", "cos(", "tan(", "sqrt("],
-        ["ln(", "log(", "π", "e"],
-        ["x^y", "x^2", "+/-", "⌫"],
-        ["AC", "%", "÷", "×"],
-    ]
-
-    for r_idx, row in enumerate(sci_rows):
-        cols = st.columns(4, gap="small")
-        for c_idx, label in enumerate(row):
-
-            # Each scientific button uses a small wrapper to map its label to the correct input
-            def _click(l=label):
-                if l == "x^y":
-                    # Insert ^ which later becomes ** in prep_expr_for_eval()
-                    press("^")
-                elif l == "x^2":
-                    # Direct Python exponent operator for squaring
-                    press("**2")
-                elif l == "π":
-                    # Insert pi symbol; will be replaced with number later
-                    press("π")
-                elif l == "e":
-                    # Insert math.e directly to avoid replacing every 'e' character
-                    press("math.e")
-                else:
-                    press(l)
-
-            render_col_button(
-                cols[c_idx],
-                label,
-                key=f"sci_{r_idx}_{label}",
-                on_click=_click,
+if render_mode == "fast":
+    render_fast()
+else:
+    render_classic()
+
+# ---------------- END OF RERUN ----------------
+save_session()
+rerun_timer.stop()
+if capture is not None:
+    capture.stop()
+# Scraped by dashboards (e.g. the node_exporter textfile collector)
+if instrument.is_enabled() and os.environ.get("CALC_METRICS_FILE"):
+    instrument.write_metrics_file(os.environ["CALC_METRICS_FILE"])
+
+# ---------------- DIAGNOSTICS (HIDDEN PAGE) ----------------
+def render_diagnostics():
+    """Where the time of a rerun goes: timers, counters, profiles, allocations."""
+    st.sidebar.subheader("🩺 Diagnostics")
+    st.sidebar.checkbox("Profile each rerun (cProfile)", key="diag_profile")
+    st.sidebar.checkbox("Trace allocations (tracemalloc)", key="diag_memory")
+
+    rows = instrument.snapshot()
+    if rows:
+        st.sidebar.dataframe(
+            [
+                {
+                    "section": r["name"],
+                    "calls": r["count"],
+                    "p50 ms": round(r["p50"] * 1e3, 3),
+                    "p90 ms": round(r["p90"] * 1e3, 3),
+                    "p99 ms": round(r["p99"] * 1e3, 3),
+                    "total s": round(r["total"], 3),
+                }
+                for r in rows
+            ],
+            hide_index=True,
+        )
+    counts = instrument.counters()
+    for name, n in sorted(counts.items()):
+        st.sidebar.write(f"{name}: {n}")
+    if counts.get("keypad.expressions"):
+        trips = counts.get("keypad.round_trips", 0) / counts["keypad.expressions"]
+        st.sidebar.write(f"Round trips per expression: {trips:.2f}")
+
+    if instrument.CAPTURES:
+        report = instrument.CAPTURES[-1]
+        st.sidebar.caption(f"Last captured rerun: {report['seconds'] * 1e3:.1f} ms")
+        if report["profile"]:
+            st.sidebar.dataframe(
+                [
+                    {"function": where, "calls": calls, "own ms": round(own * 1e3, 3), "cum ms": round(cum * 1e3, 3)}
+                    for where, calls, own, cum in report["profile"]
+                ],
+                hide_index=True,
+            )
+        if report["allocations"]:
+            st.sidebar.caption(f"Allocation hot spots (peak {report['peak_bytes'] / 1024:.0f} KiB)")
+            st.sidebar.dataframe(
+                [
+                    {"line": where, "KiB": round(size / 1024, 1), "blocks": blocks}
+                    for where, size, blocks in report["allocations"]
+                ],
+                hide_index=True,
             )
 
-    # Numeric keypad section in scientific tab (same layout as basic)
-    sci_num_rows = [
-        ["7", "8", "9", "×"],
-        ["4", "5", "6", "−"],
-        ["1", "2", "3", "➕"],
-        ["00", "0", ".", "="],
-    ]
+    st.sidebar.download_button(
+        "⬇️ OpenMetrics export",
+        instrument.render_openmetrics(),
+        file_name="calc_metrics.txt",
+        mime="application/openmetrics-text",
+    )
+    if st.sidebar.button("Reset diagnostics"):
+        instrument.reset()
 
-    for r_idx, row in enumerate(sci_num_rows):
-        cols = st.columns(4, gap="small")
-        for c_idx, label in enumerate(row):
-            render_col_button(
-                cols[c_idx],
-                label,
-                key=f"sci_num_{r_idx}_{label}",
-                on_click=press,
-                args=(label,),
-            )
\ No newline at end of file
+if show_diagnostics:
+    render_diagnostics()
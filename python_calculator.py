@@ -1,28 +1,218 @@
-print("PYTHON CALCULATOR")
-print("1 - Addition")
-print("2 - Subtraction")
-print("3 - Multiplication")
-print("4 - Division")
-option = int(input("Choose An Operation : "))
-  
-result = 0
-if(option in [1,2,3,4,5]):
-    num1 = int(input("Enter First Number : "))
-    num2 = int(input("Enter Second Number : "))
-
-    if(option == 1):
-        result = num1 + num2
-    elif(option == 2):
-        result = num1 - num2
-    elif(option == 3):
-        result = num1 * num2
-    elif(option == 4):
-        result = num1 / num2
-
-else:
-     print("Invalid Operation Entered")
-     
-    
-
-print("The result of the operation is : {}".format(result))
-         
\ No newline at end of file
+import argparse
+import sys
+
+
+OPERATORS = {1: "+", 2: "-", 3: "*", 4: "/"}
+# Menu number -> calc_core.numtheory operation
+NUMBER_THEORY = {5: "modpow", 6: "gcd", 7: "lcm", 8: "factorial", 9: "binomial",
+                 10: "is_prime", 11: "factorize"}
+# Answers longer than this are printed as leading digits…trailing digits
+MAX_DIGITS = 10_000
+
+
+def calculate(option, num1, num2):
+    # Exact on the ints themselves, however many digits; only division
+    # gives a float ("Error" for a zero divisor or a quotient past float range)
+    if option == 1:
+        return num1 + num2
+    if option == 2:
+        return num1 - num2
+    if option == 3:
+        return num1 * num2
+    try:
+        return num1 / num2
+    except (ZeroDivisionError, OverflowError):
+        return "Error"
+
+
+def format_result(result, max_digits=MAX_DIGITS):
+    # str() refuses ints of more than 4300 digits; long answers are shortened
+    from calc_core.numtheory import format_integer
+
+    if isinstance(result, int) and not isinstance(result, bool):
+        return format_integer(result, 10, max_digits)
+    return str(result)
+
+
+def number_theory(name, operands, base=10, max_digits=MAX_DIGITS):
+    # Big-integer operations, printed through the output-size guard
+    from calc_core.numtheory import OPERATIONS, format_factors, format_integer
+
+    count, fn = OPERATIONS[name]
+    if count is not None and len(operands) != count:
+        raise ValueError(f"{name} takes {count} operand(s), got {len(operands)}")
+    result = fn(*operands)
+    if isinstance(result, bool):
+        return "prime" if result else "composite"
+    if isinstance(result, dict):
+        return format_factors(result)
+    return format_integer(result, base, max_digits)
+
+
+def read_int(prompt):
+    # Any number of digits (int() refuses more than 4300)
+    from calc_core.numtheory import from_base
+
+    return from_base(input(prompt))
+
+
+def interactive():
+    print("PYTHON CALCULATOR")
+    print("1 - Addition")
+    print("2 - Subtraction")
+    print("3 - Multiplication")
+    print("4 - Division")
+    print("5 - Modular Power (a^b mod m)")
+    print("6 - Greatest Common Divisor")
+    print("7 - Least Common Multiple")
+    print("8 - Factorial")
+    print("9 - Binomial Coefficient")
+    print("10 - Primality Test")
+    print("11 - Prime Factorization")
+    option = int(input("Choose An Operation : "))
+
+    result = 0
+    if(option in OPERATORS):
+        num1 = read_int("Enter First Number : ")
+        num2 = read_int("Enter Second Number : ")
+
+        result = calculate(option, num1, num2)
+
+    elif(option in NUMBER_THEORY):
+        name = NUMBER_THEORY[option]
+        if name == "modpow":
+            operands = [read_int("Enter Base : "), read_int("Enter Exponent : "), read_int("Enter Modulus : ")]
+        elif name in ("factorial", "is_prime", "factorize"):
+            operands = [read_int("Enter Number : ")]
+        else:
+            operands = [read_int("Enter First Number : "), read_int("Enter Second Number : ")]
+        from calc_core import LimitExceeded
+
+        try:
+            result = number_theory(name, operands)
+        except (ValueError, LimitExceeded) as exc:
+            result = f"Error ({exc})"
+
+    else:
+         print("Invalid Operation Entered")
+
+    print("The result of the operation is : {}".format(format_result(result)))
+
+
+def number_theory_command(args):
+    # One number-theory operation from the command line: --nt OP N [N ...]
+    from calc_core import LimitExceeded
+    from calc_core.numtheory import OPERATIONS, from_base
+
+    name, *operands = args.nt
+    if name not in OPERATIONS:
+        print(f"unknown operation {name!r} (one of: {', '.join(OPERATIONS)})", file=sys.stderr)
+        return 2
+    try:
+        # "@file" reads an operand from a file, for numbers too long for a command line
+        values = []
+        for text in operands:
+            if text.startswith("@"):
+                with open(text[1:], encoding="ascii") as f:
+                    text = f.read()
+            values.append(from_base(text, args.input_base))
+        answer = number_theory(name, values, args.base, args.max_digits)
+    except (ValueError, LimitExceeded) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            print(answer, file=out)
+    else:
+        print(answer)
+    return 0
+
+
+def batch(args):
+    # Non-interactive mode: evaluate a whole file of expressions
+    from calc_core.batch import format_stats, open_input, run_batch
+
+    with open_input(args.batch) as src:
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            stats = run_batch(src, out, fmt=args.format, column=args.column,
+                              workers=args.workers, chunk_size=args.chunk_size)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    print(format_stats(stats), file=sys.stderr)
+
+
+def statistics(args):
+    # One pass over a column of numbers: moments and quantile sketches, merged across workers
+    from calc_core.batch import open_input, read_expressions
+    from calc_core.stats import format_summary, summarize_stream
+
+    quantiles = [float(q) for q in args.quantiles.split(",")]
+    with open_input(args.stats) as src:
+        summary = summarize_stream(read_expressions(src, args.format, args.column),
+                                   workers=args.workers, chunk_size=args.chunk_size)
+    text = format_summary(summary.as_dict(quantiles))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            print(text, file=out)
+    else:
+        print(text)
+    return 0
+
+
+def audit(args):
+    # Re-evaluate an archived session log ("expr = result" lines)
+    from calc_core.audit import audit_file
+
+    summary = audit_file(args.audit, workers=args.workers)
+    for offset, expr, recorded, value in summary["mismatches"]:
+        print(f"byte {offset}: {expr} = {recorded} (recomputed: {value})")
+    print(f"{summary['checked']} entries checked, {summary['mismatch_count']} mismatches",
+          file=sys.stderr)
+    return 1 if summary["mismatch_count"] else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Python calculator")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="evaluate expressions from FILE ('-' for stdin) instead of asking interactively")
+    parser.add_argument("--audit", metavar="LOG",
+                        help="re-evaluate a session history log and report mismatches")
+    parser.add_argument("--stats", metavar="FILE",
+                        help="summarize a column of numbers from FILE ('-' for stdin): count, mean, "
+                             "variance, min / max and quantiles, in one pass")
+    parser.add_argument("--quantiles", default="0.01,0.05,0.25,0.5,0.75,0.95,0.99",
+                        help="comma-separated quantiles reported by --stats")
+    parser.add_argument("--format", choices=["text", "csv", "jsonl"], default="text",
+                        help="input format for --batch / --stats (default: one value per line)")
+    parser.add_argument("--column", help="CSV column / JSON key holding the expression or number")
+    parser.add_argument("--output", "-o", help="write results here instead of stdout")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for --batch / --audit / --stats (0 = work in this process)")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="expressions (or numbers) sent to a worker at a time")
+    parser.add_argument("--nt", nargs="+", metavar="ARG",
+                        help="number theory: OP N [N ...], OP one of modpow, gcd, lcm, factorial, "
+                             "binomial, is_prime, factorize (N may be @FILE)")
+    parser.add_argument("--base", type=int, default=10, help="output base for --nt (2-36)")
+    parser.add_argument("--input-base", type=int, default=10, help="base of the --nt operands (2-36)")
+    parser.add_argument("--max-digits", type=int, default=MAX_DIGITS,
+                        help="print longer --nt answers as leading…trailing digits (0 = print all)")
+    args = parser.parse_args(argv)
+
+    if args.nt is not None:
+        return number_theory_command(args)
+    if args.audit is not None:
+        return audit(args)
+    if args.stats is not None:
+        return statistics(args)
+    if args.batch is not None:
+        batch(args)
+    else:
+        interactive()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
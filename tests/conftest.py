@@ -0,0 +1,9 @@
+"""
+Behaviour tests for calc_core. Run from the repository root:
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,44 @@
+"""Matrix-mode input: big CSV conversion and summaries of large results."""
+
+import io
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from calc_core import arrays  # noqa: E402
+
+
+def test_bad_csv_leaves_no_temp_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(arrays, "CSV_BLOCK_ROWS", 2)
+    with pytest.raises(ValueError):
+        arrays._csv_to_npy(io.StringIO("1,2\n3,4\n5,6\n7,x\n"), str(tmp_path))
+    assert os.listdir(tmp_path) == []
+    arr = arrays._csv_to_npy(io.StringIO("1,2\n3,4\n5,6\n"), str(tmp_path))
+    assert arr.tolist() == [[1, 2], [3, 4], [5, 6]] and os.listdir(tmp_path) == []
+
+
+def test_summary_in_blocks(monkeypatch):
+    monkeypatch.setattr(arrays, "SUMMARY_BLOCK", 7)
+    arr = np.arange(60, dtype=float).reshape(20, 3)
+    arr[3, 1] = np.inf
+    arr[5, 2] = np.nan
+    finite = arr[np.isfinite(arr)]
+    out = arrays.summary(arr)
+    assert (out["min"], out["max"]) == (finite.min(), finite.max())
+    assert out["mean"] == pytest.approx(finite.mean())
+
+
+@pytest.mark.parametrize("arr, expected", [
+    (np.float64(3), (3, 3, 3)),
+    (np.array([3 + 4j, 0j]), (0, 5, 2.5)),
+    (np.array([np.nan, np.inf]), None),
+    (np.array([]), None),
+])
+def test_summary_edge_cases(arr, expected):
+    out = arrays.summary(arr)
+    if expected is None:
+        assert all(np.isnan(out[k]) for k in ("min", "max", "mean"))
+    else:
+        assert (out["min"], out["max"], out["mean"]) == expected
@@ -0,0 +1,67 @@
+"""Session-log audit: byte ranges on line boundaries, CRLF, result comparison."""
+
+import pytest
+
+from calc_core.audit import audit_file, iter_records, results_match, split_ranges
+
+LINES = ["2+3×4 = 14", "50% = 0.5", "1÷0 = Error", "0.1+0.2 = 0.3", "2^10 = 1000", "sqrt(16) = 4.0"]
+
+
+@pytest.fixture(params=["\n", "\r\n"], ids=["lf", "crlf"])
+def log(request, tmp_path):
+    # No newline after the last line
+    path = tmp_path / "session.log"
+    path.write_bytes(request.param.join(LINES * 5).encode("utf-8"))
+    return str(path)
+
+
+@pytest.mark.parametrize("parts", [1, 2, 3, 7, 30, 100])
+def test_ranges_cover_the_file_on_line_boundaries(log, parts):
+    data = open(log, "rb").read()
+    ranges = split_ranges(log, parts)
+    assert 1 <= len(ranges) <= parts
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and data[end - 1:end] == b"\n"
+
+
+def test_records_are_the_same_however_the_file_is_split(log):
+    data = open(log, "rb").read()
+    whole = list(iter_records(data, 0, len(data)))
+    assert [(e, r) for _, e, r in whole] == [tuple(line.split(" = ")) for line in LINES * 5]
+    for parts in (2, 7, 30):
+        split = [rec for s, e in split_ranges(log, parts) for rec in iter_records(data, s, e)]
+        assert split == whole
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.log"
+    path.write_bytes(b"")
+    assert split_ranges(str(path), 4) == []
+    assert audit_file(str(path), workers=0) == {"checked": 0, "mismatch_count": 0, "mismatches": []}
+
+
+@pytest.mark.parametrize("recorded, value, same", [
+    ("14", 14, True),
+    ("0.3", 0.30000000000000004, True),
+    ("4.0", 4.0, True),
+    ("1000", 1024, False),
+    ("Error", "Error", True),
+    ("Error", 0.0, False),
+    ("4", "Error", False),
+    ("nan", float("nan"), True),
+    ("inf", float("inf"), True),
+])
+def test_results_match(recorded, value, same):
+    assert results_match(recorded, value) is same
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_audit_finds_the_wrong_lines(log, workers):
+    report = audit_file(log, workers=workers, parts=7)
+    assert report["checked"] == len(LINES) * 5
+    assert report["mismatch_count"] == 5
+    data = open(log, "rb").read()
+    for offset, expr, recorded, recomputed in sorted(report["mismatches"]):
+        assert (expr, recorded, recomputed) == ("2^10", "1000", "1024")
+        assert data[offset:].startswith(b"2^10 = 1000")
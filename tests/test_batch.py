@@ -0,0 +1,59 @@
+"""Batch mode: reading text / CSV / JSONL, and results in input order."""
+
+import io
+import json
+
+from calc_core.batch import InvalidRecord, evaluate_stream, read_expressions, run_batch
+
+
+def read(text, fmt, column=None):
+    return list(read_expressions(io.StringIO(text), fmt, column))
+
+
+def test_text_skips_blank_lines():
+    assert read("1+1\n\n  2×3  \n", "text") == ["1+1", "2×3"]
+
+
+def test_csv_first_column_or_named_column():
+    data = "name,expr\na,1+1\nb,\nc,2^10\n"
+    assert read(data, "csv") == ["name", "a", "b", "c"]
+    assert read(data, "csv", column="expr") == ["1+1", "2^10"]
+    assert read(data, "csv", column="missing") == []
+
+
+def test_jsonl_records():
+    data = '{"expression": "1+1"}\n{"expr": "2*3"}\n"4-1"\n\n{"q": "9", "expression": "5/2"}\n'
+    assert read(data, "jsonl") == ["1+1", "2*3", "4-1", "5/2"]
+    assert read('{"q": "9"}\n', "jsonl", column="q") == ["9"]
+
+
+def test_jsonl_bare_number_is_the_expression():
+    assert read("5\n2.5\n", "jsonl") == ["5", "2.5"]
+
+
+def test_jsonl_unusable_lines_become_error_rows():
+    data = '{"expression": "1+1"}\n{oops\n[1, 2]\n{"other": 1}\nnull\ntrue\n{"expression": "2+2"}\n'
+    items = read(data, "jsonl")
+    assert items == ["1+1", "{oops", "[1, 2]", '{"other": 1}', "null", "true", "2+2"]
+    assert [isinstance(x, InvalidRecord) for x in items] == [False] + [True] * 5 + [False]
+
+
+def test_run_batch_keeps_going_past_bad_lines():
+    out = io.StringIO()
+    stats = run_batch(io.StringIO('{"expression": "1+1"}\n5\n{oops\n[1]\n"2*3"\n'), out, "jsonl", workers=0)
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["result"] for r in rows] == ["2", "5", "Error", "Error", "6"]
+    assert stats["count"] == 5 and stats["errors"] == 2
+
+
+def test_evaluate_stream_keeps_input_order_with_workers():
+    exprs = [f"{i}*2" for i in range(500)] + ["1/0"]
+    rows = list(evaluate_stream(iter(exprs), workers=2, chunk_size=7))
+    assert [r[0] for r in rows] == exprs
+    assert [r[1] for r in rows[:-1]] == [str(i * 2) for i in range(500)]
+    assert rows[-1][1] == "Error"
+
+
+def test_invalid_records_cross_process_boundary():
+    rows = list(evaluate_stream(iter(["1+2", InvalidRecord("[1]")]), workers=1, chunk_size=1))
+    assert [(r[0], r[1]) for r in rows] == [("1+2", "3"), ("[1]", "Error")]
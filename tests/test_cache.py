@@ -0,0 +1,72 @@
+"""LRUCache: eviction order, recency, resizing and counters."""
+
+import threading
+
+import pytest
+
+from calc_core.cache import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(3)
+    for k in "abc":
+        cache.put(k, k.upper())
+    assert cache.get("a") == "A"   # a is now the most recent
+    cache.put("d", "D")            # evicts b
+    assert "b" not in cache
+    assert [k for k in "acd" if k in cache] == ["a", "c", "d"]
+    cache.put("c", "C2")           # overwrite refreshes c
+    cache.put("e", "E")            # evicts a
+    assert "a" not in cache and cache.get("c") == "C2"
+    assert cache.stats() == {"size": 3, "maxsize": 3, "hits": 2, "misses": 0, "evictions": 2}
+
+
+def test_miss_and_default():
+    cache = LRUCache(2)
+    assert cache.get("x") is None
+    assert cache.get("x", 5) == 5
+    assert cache.stats()["misses"] == 2
+
+
+def test_resize_and_pop():
+    cache = LRUCache(4)
+    for i in range(4):
+        cache.put(i, i)
+    cache.resize(2)
+    assert len(cache) == 2 and 2 in cache and 3 in cache
+    assert cache.pop(3) == 3 and cache.pop(3, "gone") == "gone"
+    with pytest.raises(ValueError):
+        cache.resize(-1)
+
+
+def test_zero_size_keeps_nothing():
+    cache = LRUCache(0)
+    cache.put("a", 1)
+    assert len(cache) == 0 and cache.get("a") is None
+
+
+def test_clear_resets_counters():
+    cache = LRUCache(1)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("b")
+    cache.clear()
+    assert cache.stats() == {"size": 0, "maxsize": 1, "hits": 0, "misses": 0, "evictions": 0}
+
+
+def test_shared_between_threads():
+    cache = LRUCache(50)
+
+    def work(base):
+        for i in range(2000):
+            cache.put((base, i % 80), i)
+            cache.get((base, (i * 7) % 80))
+
+    threads = [threading.Thread(target=work, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = cache.stats()
+    assert len(cache) == 50 == stats["size"]
+    assert stats["hits"] + stats["misses"] == 8000
@@ -0,0 +1,96 @@
+"""integrate / diff / solve against closed forms, and their error paths."""
+
+import math
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from calc_core.calculus import compile_function, differentiate, find_root, integrate
+from calc_core.evaluator import evaluate_expression
+from calc_core.workspace import Workspace
+
+
+@pytest.mark.parametrize("expr, exact", [
+    ("integrate(sin(x), x, 0, π)", 2.0),
+    ("integrate(x^2, x, 0, 3)", 9.0),
+    ("integrate(x^2, x, 3, 0)", -9.0),                 # reversed bounds
+    ("integrate(1÷(1+x^2), x, 0, 1)", math.pi / 4),
+    ("integrate(sqrt(x), x, 0, 1)", 2 / 3),           # infinite slope at 0
+    ("integrate(math.e^(−x^2), x, −6, 6)", math.sqrt(math.pi)),
+    ("integrate(ln(x), x, 1, 2)", 2 * math.log(2) - 1),
+    ("integrate(x, x, 5, 5)", 0.0),
+])
+def test_integrate(expr, exact):
+    assert evaluate_expression(expr) == pytest.approx(exact, rel=1e-10, abs=1e-12)
+
+
+@pytest.mark.parametrize("expr, exact", [
+    ("diff(sin(x), x, 1)", math.cos(1)),
+    ("diff(x^3, x, 2)", 12.0),
+    ("diff(math.e^x, x, 0)", 1.0),
+    ("diff(ln(x), x, 0.001)", 1000.0),                # steps must stay inside the domain
+    ("diff(sqrt(x), x, 4)", 0.25),
+    ("diff(7, x, 1)", 0.0),
+])
+def test_diff(expr, exact):
+    assert evaluate_expression(expr) == pytest.approx(exact, rel=1e-7, abs=1e-9)
+
+
+@pytest.mark.parametrize("expr, exact", [
+    ("solve(x^2−2, x, 1)", math.sqrt(2)),
+    ("solve(x^2−2, x, −1)", -math.sqrt(2)),            # nearest root to the guess
+    ("solve(cos(x)−x, x, 0, 1)", 0.7390851332151607),
+    ("solve(x^3−x−2, x, 100)", 1.5213797068045676),
+    ("solve(x−3, x, 3)", 3.0),                         # the guess is the root
+    ("solve(ln(x), x, 0.5, 5)", 1.0),
+])
+def test_solve(expr, exact):
+    assert evaluate_expression(expr) == pytest.approx(exact, rel=1e-12)
+
+
+@pytest.mark.parametrize("expr", [
+    "solve(x^2+1, x, 0)",          # no sign change anywhere: no bracket
+    "solve(x^2+1, x, −1, 1)",      # same sign at both ends
+    "solve(1÷x, x, −1, 2)",        # a pole, not a root
+    "integrate(1÷x, x, −1, 1)",    # not finite at 0
+    "integrate(x, x, 0, 1÷0)",
+    "diff(sqrt(x), x, −1)",        # nowhere defined around the point
+    "integrate(x, x, 0)",          # wrong number of arguments
+    "diff(x^2, 2, 1)",             # second argument is not a variable
+    "solve(x, π, 1)",
+])
+def test_errors(expr):
+    assert evaluate_expression(expr) == "Error"
+
+
+def test_no_bracket_raises_from_python():
+    f = compile_function("x^2+1").bind()
+    with pytest.raises(ArithmeticError, match="no sign change"):
+        find_root(f, 0.0)
+
+
+def test_python_api():
+    f = compile_function("sin(x)^2").bind()
+    estimate = integrate(f, 0, math.pi)
+    assert estimate.value == pytest.approx(math.pi / 2, rel=1e-12) and estimate.error < 1e-10
+    assert differentiate(f, 1.0).value == pytest.approx(math.sin(2), rel=1e-8)
+    g = compile_function("a×t−1", var="t")
+    assert g.names == {"a"}
+    assert find_root(g.bind({"a": 4.0}), 0.0).value == pytest.approx(0.25)
+
+
+def test_other_modes_return_their_number_type():
+    assert isinstance(evaluate_expression("integrate(x, x, 0, 2)", "decimal", 30), Decimal)
+    value = evaluate_expression("solve(x−1÷4, x, 0, 1)", "fraction")
+    assert isinstance(value, Fraction) and value == pytest.approx(Fraction(1, 4))
+
+
+def test_workspace_variables_and_functions():
+    ws = Workspace()
+    ws.enter("a = 3")
+    ws.enter("f(t) = t^2")
+    assert ws.evaluate("integrate(a×x, x, 0, 2)") == pytest.approx(6.0)
+    assert ws.evaluate("integrate(f(x), x, 0, 3)") == pytest.approx(9.0)   # one point at a time
+    ws.enter("a = 5")
+    assert ws.evaluate("diff(a×x^2, x, 1)") == pytest.approx(10.0)
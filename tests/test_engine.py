@@ -0,0 +1,84 @@
+"""The compiled engine gives what eval() of the same (prepared) text gave."""
+
+import math
+import random
+
+import pytest
+
+from calc_core.engine import ExpressionError, compile_expression
+from calc_core.evaluator import evaluate_expression, prep_expr_for_eval
+
+
+def python_eval(expr):
+    """The baseline: eval() of the prepared text, "Error" where it raised."""
+    try:
+        return eval(prep_expr_for_eval(expr), {"__builtins__": {}, "math": math})
+    except Exception:
+        return "Error"
+
+
+def same(a, b):
+    if type(a) is not type(b):
+        return False
+    return a == b or (isinstance(a, float) and math.isnan(a) and math.isnan(b))
+
+
+@pytest.mark.parametrize("expr", [
+    # precedence and associativity
+    "2+3*4", "2*3+4", "10-4-3", "100/10/5", "2**3**2", "(2**3)**2", "2+3*4**2",
+    "7-2*3+8/4", "(1+2)*(3+4)",
+    # unary minus binds looser than ** and tighter than * /
+    "-2**2", "(-2)**2", "2**-1", "-2**-2", "--3", "-(-3)", "3*-2", "-3**2*2", "+5-+2",
+    # floor division and modulo with signs
+    "7//2", "-7//2", "7//-2", "7.5//2", "7%3", "-7%3", "7%-3", "-7.5%2", "2**3//3%2",
+    # floats and display symbols
+    "0.1+0.2", "1e3/8", "2×3÷4", "2^10", "π×2", "10−3", "sqrt(16)+2", "sin(0)", "ln(1)",
+    "log(1000)", "sqrt(2)^2",
+    # complex and overflow follow Python floats
+    "(-8)**(1/3)", "1e308*10", "1e308*10-1e308*10",
+])
+def test_matches_eval(expr):
+    assert same(evaluate_expression(expr), python_eval(expr))
+
+
+@pytest.mark.parametrize("expr", [
+    "1/0", "5//0", "5%0", "0**-1", "10.0**400", "sqrt(-1)", "ln(0)", "log(-5)",
+    "2+", "(1+2", "1+2)", "2 3", "foo", "abc(2)", "__import__('os')", "().__class__",
+])
+def test_errors(expr):
+    assert evaluate_expression(expr) == "Error"
+
+
+def test_empty_expression_is_blank():
+    assert evaluate_expression("") == ""
+
+
+def test_syntax_error_raises_expression_error():
+    with pytest.raises(ExpressionError):
+        compile_expression("1 +* 2")
+
+
+def _random_expr(rng, depth):
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice([str(rng.randint(0, 9)), f"{rng.randint(0, 20)}.{rng.randint(0, 9)}", "0"])
+    r = rng.random()
+    if r < 0.15:
+        return "-" + _random_expr(rng, depth - 1)
+    if r < 0.25:
+        return "(" + _random_expr(rng, depth - 1) + ")"
+    op = rng.choice(["+", "-", "*", "/", "//", "%", "**"])
+    if op == "**":
+        return _random_expr(rng, depth - 1) + "**" + rng.choice(["2", "3", "0", "-1", "0.5", "(-2)"])
+    return _random_expr(rng, depth - 1) + op + _random_expr(rng, depth - 1)
+
+
+def test_random_expressions_match_eval():
+    rng = random.Random(1)
+    for _ in range(3000):
+        expr = _random_expr(rng, 4)
+        assert same(evaluate_expression(expr), python_eval(expr)), expr
+
+
+def test_constant_results_are_memoized_consistently():
+    # The second call is served from the result cache
+    assert evaluate_expression("2**10//3") == evaluate_expression("2**10//3") == 341
@@ -0,0 +1,31 @@
+"""HistoryStore: one store, each session sees only its own calculations."""
+
+from calc_core.history import HistoryStore
+
+
+def test_sessions_are_separate():
+    store = HistoryStore(":memory:", ring_size=3)
+    a, b = store.for_session("a"), store.for_session("b")
+    for i in range(5):
+        a.add(f"{i}+sqrt(4)", i + 2, "float")
+    b.add("9×9", 81)
+    assert [r.expression for r in a.recent(2)] == ["4+sqrt(4)", "3+sqrt(4)"]
+    assert [r.expression for r in a.recent(10)] == [f"{i}+sqrt(4)" for i in range(4, -1, -1)]
+    assert [r.expression for r in b.recent(5)] == ["9×9"]
+    assert len(a.search("sqrt")) == 5 and b.search("sqrt") == []
+    assert [r.result for r in b.search("×")] == ["81"]
+    assert [r.expression for r in a.page(2, offset=1)] == ["3+sqrt(4)", "2+sqrt(4)"]
+    assert (a.count(), b.count()) == (5, 1)
+    a.clear()
+    assert a.recent(3) == [] and b.count() == 1
+
+
+def test_ring_buffer_loaded_from_disk(tmp_path):
+    path = str(tmp_path / "h.sqlite3")
+    store = HistoryStore(path)
+    store.add("1+1", 2, session="s")
+    store.close()
+    again = HistoryStore(path)
+    assert [r.expression for r in again.recent(5, session="s")] == ["1+1"]
+    assert again.recent(5, session="other") == []
+
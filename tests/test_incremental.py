@@ -0,0 +1,65 @@
+"""Typing key by key (LiveExpression) agrees with evaluating the whole text."""
+
+import math
+import random
+
+import pytest
+
+from calc_core.evaluator import evaluate_expression
+from calc_core.incremental import LiveExpression
+from calc_core.numeric import MODES, get_backend
+
+KEYS = list("0123456789") + ["+", "−", "×", "÷", "^", "(", ")", ".", "π", "sqrt(", "sin(", "ln(",
+                             "%", "//", "e", "1e"]
+
+
+def same(a, b):
+    return a == b or (isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b))
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_preview_matches_full_evaluation(mode):
+    rng = random.Random(3)
+    checked = 0
+    for _ in range(300):
+        live = LiveExpression(get_backend(mode))
+        text = ""
+        for _ in range(rng.randint(1, 14)):
+            if text and rng.random() < 0.15:
+                text = text[:-1]   # ⌫
+            else:
+                text += rng.choice(KEYS)
+            live.sync(text)
+            value = live.preview()
+            if value is not None:
+                checked += 1
+                assert same(value, evaluate_expression(text, mode)), text
+    assert checked > 1000
+
+
+@pytest.mark.parametrize("text", ["12×3", "2^3^2", "−2^2", "7÷2", "(1+2)×(3", "1+", "sqrt(", "3.", "1e"])
+def test_append_pop_and_sync(text):
+    live = LiveExpression()
+    for c in text:
+        live.append(c)
+    expected = live.preview()
+    live.append("+9")
+    live.pop(2)
+    assert live.text == text and same(live.preview(), expected)
+    other = LiveExpression()
+    other.sync("99×" + text)
+    other.sync(text)   # no common prefix: rebuilt
+    assert same(other.preview(), expected)
+
+
+def test_incomplete_is_none():
+    live = LiveExpression()
+    for text in ["", "1+", "(2", "sqrt(4", "2×"]:
+        live.sync(text)
+        assert live.preview() is None, text
+
+
+def test_variables_from_env():
+    live = LiveExpression(env={"x": 4.0})
+    live.sync("x^2+1")
+    assert live.preview() == evaluate_expression("4.0^2+1") == 17.0
@@ -0,0 +1,31 @@
+"""Instrumentation records nothing while it is off."""
+
+import pytest
+
+from calc_core import instrument
+
+
+@pytest.fixture
+def clean():
+    was = instrument.is_enabled()
+    instrument.reset()
+    yield
+    instrument.enable(was)
+    instrument.reset()
+
+
+def test_disabled_records_nothing(clean):
+    instrument.enable(False)
+    instrument.record("keypad.round_trip", 0.01)
+    instrument.count("keys")
+    with instrument.timer("rerun"):
+        pass
+    assert instrument.snapshot() == [] and instrument.counters() == {}
+
+
+def test_enabled_records(clean):
+    instrument.enable()
+    instrument.record("keypad.round_trip", 0.01)
+    instrument.count("keys", 3)
+    assert [row["name"] for row in instrument.snapshot()] == ["keypad.round_trip"]
+    assert instrument.counters() == {"keys": 3}
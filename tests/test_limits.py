@@ -0,0 +1,79 @@
+"""Size limits on exact values."""
+
+import math
+from fractions import Fraction
+
+import pytest
+
+from calc_core.evaluator import clear_cache, evaluate_expression, get_compiled
+from calc_core.limits import LIMITS, LimitExceeded, check_power, configure_limits
+
+
+@pytest.fixture(autouse=True)
+def default_limit():
+    # The default, whatever CALC_MAX_BITS says; results are cached, so start cold
+    old = LIMITS.max_bits
+    configure_limits(max_bits=1_000_000)
+    clear_cache()
+    yield
+    configure_limits(max_bits=old)
+    clear_cache()
+
+
+@pytest.mark.parametrize("expr, allowed", [
+    ("2^600000", True),      # 600,001 bits
+    ("2^999999", True),
+    ("2^1000000", False),
+    ("3^600000", True),
+    ("3^630929", True),      # 999,999 bits
+    ("3^630930", False),     # 1,000,001 bits: over, though (2-1) bits × exponent is not
+    ("9^9^9", False),
+    ("1^999999999", True),
+    ("(-1)^999999999", True),
+])
+def test_exact_powers(expr, allowed):
+    assert (evaluate_expression(expr) != "Error") == allowed
+
+
+def largest_allowed_exponent(base):
+    """The largest e with base ** e within max_bits, found from the exact sizes."""
+    q = Fraction(base)
+    e = int(LIMITS.max_bits / (math.log2(abs(q.numerator)) + math.log2(q.denominator))) - 3
+    while _exact_bits(base ** (e + 1)) <= LIMITS.max_bits:
+        e += 1
+    return e
+
+
+def _exact_bits(value):
+    if isinstance(value, int):
+        return value.bit_length()
+    return value.numerator.bit_length() + value.denominator.bit_length()
+
+
+@pytest.mark.parametrize("base", [2, 3, -3, 10, 255, 2**64 + 1, 3**100, Fraction(3, 2)])
+def test_check_power_just_below_and_above_the_limit(base):
+    configure_limits(max_bits=100_003)   # smaller powers to compute; the fixture restores it
+    e = largest_allowed_exponent(base)
+    assert _exact_bits(base ** e) <= LIMITS.max_bits < _exact_bits(base ** (e + 1))
+    check_power(base, e)
+    with pytest.raises(LimitExceeded):
+        check_power(base, e + 1)
+
+
+def test_bases_that_never_grow():
+    for base in (0, 1, -1, Fraction(1)):
+        check_power(base, 10**12)
+
+
+def test_square_of_a_variable_is_checked():
+    square = get_compiled("x^2")
+    assert square({"x": 2**499_999}) == 2**999_998   # 999,999 bits
+    with pytest.raises(LimitExceeded):
+        square({"x": 2**500_000})
+    with pytest.raises(LimitExceeded):
+        get_compiled("x^2", "fraction")({"x": Fraction(2**300_000, 3**200_000)})
+
+
+def test_fraction_mode_powers():
+    assert evaluate_expression("2^600000", "fraction") != "Error"
+    assert evaluate_expression("(3/2)^2000000", "fraction") == "Error"
@@ -0,0 +1,26 @@
+"""Number modes: π and other constants come from the backend, at its precision."""
+
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from calc_core.evaluator import evaluate_expression
+
+PI_50 = Decimal("3.1415926535897932384626433832795028841971693993751")
+
+
+def test_decimal_pi_has_every_digit():
+    assert evaluate_expression("π", "decimal", 50) == PI_50
+    assert evaluate_expression("2×π", "decimal", 50) == Decimal("6.2831853071795864769252867665590057683943387987502")
+
+
+@pytest.mark.parametrize("precision", [10, 28, 50, 80])
+def test_decimal_pi_matches_math_pi_at_any_precision(precision):
+    assert evaluate_expression("π", "decimal", precision) == evaluate_expression("math.pi", "decimal", precision)
+
+
+def test_float_and_fraction_pi():
+    assert evaluate_expression("π") == 3.141592653589793
+    value = evaluate_expression("π", "fraction")
+    assert isinstance(value, Fraction) and abs(value - Fraction(PI_50)) < Fraction(1, 10**33)
@@ -0,0 +1,116 @@
+"""calc_core.numtheory against Python's int and math."""
+
+import math
+import random
+import sys
+
+import pytest
+
+from calc_core import numtheory as nt
+from calc_core.limits import LimitExceeded
+
+rng = random.Random(7)
+
+
+@pytest.fixture
+def unlimited_str():
+    # Lets the tests compare with str(n) / int(text) beyond 4300 digits
+    old = sys.get_int_max_str_digits()
+    sys.set_int_max_str_digits(0)
+    yield
+    sys.set_int_max_str_digits(old)
+
+
+def test_modpow_matches_pow():
+    for _ in range(300):
+        base = rng.randrange(-10**30, 10**30)
+        exp = rng.randrange(0, 10**6)
+        mod = rng.randrange(2, 10**40)
+        assert nt.modpow(base, exp, mod) == pow(base, exp, mod)
+    big = rng.getrandbits(3000) | 1
+    assert nt.modpow(3, big - 1, big) == pow(3, big - 1, big)
+
+
+def test_modpow_negative_exponent_uses_inverse():
+    assert nt.modpow(3, -1, 7) == pow(3, -1, 7) == 5
+    with pytest.raises(ValueError):
+        nt.modpow(2, -1, 4)
+
+
+def test_gcd_lcm_match_math():
+    for _ in range(300):
+        values = [rng.randrange(-10**12, 10**12) for _ in range(rng.randint(2, 4))]
+        assert nt.gcd(*values) == math.gcd(*values)
+        assert nt.lcm(*values) == math.lcm(*values)
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 5, 20, 100, 1000, 5000, 12345])
+def test_factorial_matches_math(n):
+    assert nt.factorial(n) == math.factorial(n)
+
+
+def test_factorial_negative():
+    with pytest.raises(ValueError):
+        nt.factorial(-1)
+
+
+def test_binomial_matches_comb():
+    for n, k in [(0, 0), (5, 2), (5, 7), (50, 25), (1000, 3), (3000, 1500), (10**5, 7)]:
+        assert nt.binomial(n, k) == math.comb(n, k)
+
+
+def test_is_prime_matches_trial_division():
+    def trial(n):
+        return n >= 2 and all(n % d for d in range(2, math.isqrt(n) + 1))
+
+    for n in range(-5, 3000):
+        assert nt.is_prime(n) == trial(n), n
+    assert nt.primes_upto(100) == [n for n in range(101) if trial(n)]
+
+
+def test_is_prime_large():
+    assert nt.is_prime(2**127 - 1)
+    assert not nt.is_prime((2**61 - 1) * (2**31 - 1))
+    assert not nt.is_prime(3215031751)   # strong pseudoprime to bases 2, 3, 5, 7
+
+
+def test_factorize_multiplies_back():
+    for n in [2, 12, 97, 360, 2**20 * 3**5, 600851475143, (2**31 - 1) * (2**61 - 1), 10**18 + 9]:
+        factors = nt.factorize(n)
+        assert all(nt.is_prime(p) for p in factors)
+        assert math.prod(p ** e for p, e in factors.items()) == n
+
+
+@pytest.mark.parametrize("base", [2, 3, 7, 8, 10, 16, 36])
+def test_to_from_base_round_trip(base, unlimited_str):
+    for bits in [0, 1, 64, 5000, 40000]:
+        n = rng.getrandbits(bits) if bits else 0
+        for value in (n, -n):
+            text = nt.to_base(value, base)
+            assert int(text, base) == value
+            assert nt.from_base(text, base) == value
+    if base == 10:
+        n = rng.getrandbits(60000)
+        assert nt.to_base(n) == str(n)
+
+
+def test_from_base_beyond_int_limit(unlimited_str):
+    text = "9" * 10000
+    assert nt.from_base(text) == int(text)
+    assert nt.from_base("-1_000 000") == -1000000
+    with pytest.raises(ValueError):
+        nt.from_base("12a")
+
+
+def test_format_integer_shortens(unlimited_str):
+    n = math.factorial(3000)
+    digits = str(n)
+    assert nt.format_integer(n, max_digits=0) == digits
+    short = nt.format_integer(n, max_digits=100, edge=10)
+    assert short == f"{digits[:10]}…{digits[-10:]} ({len(digits):,} digits)"
+    assert nt.digit_count(n) == len(digits)
+
+
+def test_limits_refuse_huge_results():
+    with pytest.raises(LimitExceeded):
+        nt.factorial(10**9)
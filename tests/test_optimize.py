@@ -0,0 +1,113 @@
+"""calc_core.optimize: optimized trees agree with plain ones, share repeats, fold within limits."""
+
+import math
+import random
+import time
+
+import pytest
+
+from calc_core.engine import compile_expression, parse
+from calc_core.evaluator import clear_cache, evaluate_expression, prep_expr_for_eval
+from calc_core.limits import LIMITS, configure_limits
+from calc_core.numeric import get_backend
+from calc_core.optimize import optimize
+from calc_core.workspace import Workspace
+
+# 50 factors of a 1,000,000-bit constant: about 1.9 s to fold, and refused anyway
+CHAIN = "×".join(["(2^999999)"] * 50)
+
+
+@pytest.fixture(autouse=True)
+def default_limit():
+    old = LIMITS.max_bits
+    configure_limits(max_bits=1_000_000)
+    clear_cache()
+    yield
+    configure_limits(max_bits=old)
+    clear_cache()
+
+
+def test_oversized_chain_is_refused_before_folding():
+    for _ in range(2):   # a retry is just as quick
+        start = time.perf_counter()
+        assert evaluate_expression(CHAIN) == "Error"
+        assert time.perf_counter() - start < 0.5
+
+
+def test_oversized_chain_in_a_workspace():
+    ws = Workspace()
+    start = time.perf_counter()
+    assert ws.evaluate(CHAIN) == "Error"
+    ws.enter("f(x) = x + " + CHAIN)
+    assert ws.evaluate("f(1)") == "Error"
+    assert time.perf_counter() - start < 0.5
+
+
+def run(src, mode, env, optimized):
+    try:
+        return compile_expression(prep_expr_for_eval(src), get_backend(mode, 40), optimized)(env)
+    except Exception as exc:
+        return type(exc)
+
+
+def close(a, b):
+    if isinstance(a, type) or isinstance(b, type):
+        return a == b
+    if isinstance(a, complex) or isinstance(b, complex):
+        return abs(a - b) <= 1e-9 * max(1.0, abs(a), abs(b))
+    if isinstance(a, float) and not math.isfinite(a):
+        return repr(a) == repr(b)   # nan, inf, -inf
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-12)
+
+
+def _random_expr(rng, depth):
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(["x", "y", "(x+1)", str(rng.randint(0, 9)), f"{rng.randint(0, 9)}.5", "π"])
+    r = rng.random()
+    if r < 0.1:
+        return "-" + _random_expr(rng, depth - 1)
+    if r < 0.25:
+        return rng.choice(["sqrt(", "sin(", "ln("]) + _random_expr(rng, depth - 1) + ")"
+    op = rng.choice(["+", "−", "×", "÷", "^", "*1+", "+0×"])
+    if op == "^":
+        return "(" + _random_expr(rng, depth - 1) + ")^" + rng.choice(["2", "1", "3", "0.5"])
+    return _random_expr(rng, depth - 1) + op + _random_expr(rng, depth - 1)
+
+
+@pytest.mark.parametrize("mode", ["float", "decimal", "fraction"])
+def test_optimized_matches_unoptimized(mode):
+    rng = random.Random(7)
+    backend = get_backend(mode, 40)
+    for _ in range(600):
+        src = _random_expr(rng, 4)
+        env = {"x": backend.literal(rng.choice([0, 1, 2, -3, 0.5])), "y": backend.literal(rng.choice([2, 7, -1]))}
+        plain, fast = run(src, mode, env, False), run(src, mode, env, True)
+        assert close(plain, fast), (src, env, plain, fast)
+
+
+def test_repeats_become_slots():
+    tree = optimize(parse("(x+1)**2+3*(x+1)"))
+    assert tree == ("let", ("#0",), (("bin", "+", ("name", "x"), ("const", 1)),),
+                    ("bin", "+", ("sq", ("ref", "#0")), ("bin", "*", ("const", 3), ("ref", "#0"))))
+    # A repeated subtree inside a repeated subtree: dependencies first
+    names, nodes, _ = optimize(parse("math.sin(x*y)+math.sin(x*y)+x*y"))[1:]
+    assert names == ("#0", "#1")
+    assert nodes[0] == ("bin", "*", ("name", "x"), ("name", "y"))
+    assert nodes[1] == ("call", "math.sin", (("ref", "#0"),))
+
+
+def test_nothing_shared_leaves_the_tree_alone():
+    assert optimize(parse("x*1+0+2*3")) == ("bin", "+", ("name", "x"), ("const", 6))
+    assert optimize(parse("x+y"))[0] == "bin"
+
+
+def test_identities_keep_the_operand_type():
+    assert optimize(parse("x*1.0")) == ("bin", "*", ("name", "x"), ("const", 1.0))   # x*1.0 is a float
+    assert compile_expression("x*1")({"x": 3}) == 3 and type(compile_expression("x*1")({"x": 3})) is int
+
+
+def test_failing_constants_fail_at_evaluation():
+    compiled = compile_expression("x+1/0")       # compiling does not raise
+    with pytest.raises(ZeroDivisionError):
+        compiled({"x": 1})
+    assert evaluate_expression("x+sqrt(-1)") == "Error"
@@ -0,0 +1,111 @@
+"""Plots: LTTB keeps the endpoints and the point count, and curves break at poles."""
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from calc_core.engine import ExpressionError                # noqa: E402
+from calc_core.plot import compile_plot, downsample, lttb   # noqa: E402
+
+
+@pytest.mark.parametrize("size, n", [(10, 3), (100, 7), (1000, 100), (1001, 500), (5000, 800), (50, 49)])
+def test_lttb_keeps_endpoints_and_count(size, n):
+    rng = np.random.default_rng(size)
+    x = np.sort(rng.uniform(-5, 5, size))
+    y = np.sin(x) + rng.normal(0, 0.1, size)
+    picked = lttb(x, y, n)
+    assert len(picked) == n
+    assert picked[0] == 0 and picked[-1] == size - 1
+    assert (np.diff(picked) > 0).all()
+
+
+def test_lttb_small_budgets():
+    x = np.arange(10.0)
+    assert lttb(x, x, 10).tolist() == lttb(x, x, 50).tolist() == list(range(10))
+    assert lttb(x, x, 2).tolist() == [0, 9]
+    assert lttb(x, x, 1).tolist() == [0]
+
+
+def test_lttb_keeps_a_spike():
+    x = np.arange(1000.0)
+    y = np.zeros(1000)
+    y[437] = 5.0
+    assert 437 in lttb(x, y, 20)
+
+
+def test_downsample_splits_at_undefined_points_and_breaks():
+    x = np.arange(100.0)
+    y = x.copy()
+    y[40:45] = np.nan
+    out_x, out_y, piece = downsample(x, y, 20, breaks=[70])
+    # Pieces [0, 40), [45, 70) and [70, 100), each keeping its own endpoints
+    assert sorted(set(piece)) == [0, 1, 2]
+    for number, (first, last) in enumerate([(0, 39), (45, 69), (70, 99)]):
+        xs = [px for px, p in zip(out_x, piece) if p == number]
+        assert xs[0] == first and xs[-1] == last
+    assert not any(40 <= px < 45 for px in out_x)
+    assert abs(len(out_x) - 20) <= 3
+
+
+def pieces(data):
+    """x values of each piece, in order."""
+    out = {}
+    for x, p in zip(data.x, data.piece):
+        out.setdefault(p, []).append(x)
+    return [out[p] for p in sorted(out)]
+
+
+def test_pole_breaks_the_curve():
+    data = compile_plot("1÷x").view(-1, 1, points=400)
+    parts = pieces(data)
+    assert len(parts) == 2
+    assert max(parts[0]) < 0 < min(parts[1])
+    # The y range shows the bulk of the curve, not the samples next to the pole
+    low, high = data.y_range
+    assert math.isfinite(low) and math.isfinite(high) and high - low < 1e4
+    assert abs(len(data.x) - 400) <= 10
+
+
+def test_tan_breaks_at_every_pole():
+    data = compile_plot("tan(x)").view(-4, 4, points=600)
+    parts = pieces(data)
+    assert len(parts) == 3
+    poles = [-math.pi / 2, math.pi / 2]
+    for part, (lo, hi) in zip(parts, [(-4, poles[0]), (poles[0], poles[1]), (poles[1], 4)]):
+        assert lo <= min(part) and max(part) <= hi
+    # Endpoints of the view are kept
+    assert data.x[0] == -4 and data.x[-1] == 4
+
+
+def test_continuous_curve_is_one_piece():
+    data = compile_plot("x×sin(x)").view(-20, 20, points=300)
+    assert set(data.piece) == {0}
+    assert data.x[0] == -20 and data.x[-1] == 20 and len(data.x) == 300
+    assert data.y_range[1] == pytest.approx(20 * math.sin(20))   # highest at the ends
+
+
+def test_undefined_region_is_left_out():
+    data = compile_plot("ln(x)").view(-1, 2, points=200)
+    assert min(data.x) > 0 and set(data.piece) == {0}
+
+
+def test_views_reuse_samples():
+    plot = compile_plot("x^2")
+    first = plot.view(-10, 10)
+    assert first.evaluated > 0
+    assert plot.view(-10, 10).evaluated == 0
+    panned = plot.view(-5, 15)
+    assert 0 < panned.evaluated < first.evaluated
+    assert max(plot.x) == 15
+
+
+def test_bad_input():
+    with pytest.raises(ExpressionError):
+        compile_plot("x").view(1, 1)
+    with pytest.raises(ExpressionError):
+        compile_plot("x").view(0, math.inf)
+    with pytest.raises(ExpressionError):
+        compile_plot("a×x")
+    assert compile_plot("a×x", env={"a": 2.0}).view(0, 1).y[-1] == 2.0
@@ -0,0 +1,31 @@
+"""python_calculator.py menu arithmetic on integers of any size."""
+
+import io
+
+import pytest
+
+import python_calculator as pc
+from calc_core.numtheory import from_base
+
+
+@pytest.mark.parametrize("option, a, b, expected", [
+    (1, 2, 3, 5), (2, 2, 5, -3), (3, -4, 6, -24), (4, 7, 2, 3.5), (4, 1, 0, "Error"),
+])
+def test_small_operands(option, a, b, expected):
+    assert pc.calculate(option, a, b) == expected
+
+
+def test_operands_past_the_int_str_limit():
+    a = from_base("7" * 5000)
+    b = from_base("3" * 3000)
+    assert pc.format_result(pc.calculate(1, a, a)) == "1" + "5" * 4999 + "4"
+    product = pc.format_result(pc.calculate(3, b, b))   # 6000 digits, printed in full
+    assert len(product) == 6000 and product.endswith("8889")
+    assert pc.calculate(4, a, 1) == "Error"              # quotient past float range
+    assert "digits)" in pc.format_result(a ** 3)          # 15000 digits: shortened
+
+
+def test_interactive_prints_big_results(monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", io.StringIO("3\n" + "9" * 3000 + "\n" + "9" * 3000 + "\n"))
+    pc.interactive()
+    assert capsys.readouterr().out.rstrip().endswith("8" + "0" * 2999 + "1")
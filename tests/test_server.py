@@ -0,0 +1,101 @@
+"""HTTP service: result texts, backpressure when requests time out, dead workers."""
+
+import asyncio
+import json
+import os
+import signal
+import time
+
+import pytest
+
+from calc_core import server
+
+
+def test_non_finite_results_agree_across_paths():
+    jobs = [
+        ("1e308*10", "float", 28, None),            # plain
+        ("x*10", "float", 28, {"x": 1e308}),        # scalar with variables
+        ("y*10", "float", 28, {"y": 1e308}),        # vectorized (two rows)
+        ("y*10", "float", 28, {"y": 2.0}),
+        ("1/y", "float", 28, {"y": 0.0}),
+        ("1/y", "float", 28, {"y": 0.0}),
+    ]
+    assert server.evaluate_jobs(jobs) == ["inf", "inf", "inf", "20.0", "Error", "Error"]
+
+
+def slow_jobs(jobs):
+    time.sleep(0.5)
+    return ["slow"] * len(jobs)
+
+
+def test_timed_out_jobs_keep_their_slots(monkeypatch):
+    # Runs in the forked workers too: the pool is started after the patch
+    monkeypatch.setattr(server, "evaluate_jobs", slow_jobs)
+
+    async def scenario():
+        srv = server.EvaluationServer(workers=1, timeout=0.1, max_batch=1)
+        await srv.start(port=0)
+        try:
+            slots = max(1, srv.workers) * 2
+            for _ in range(4):
+                with pytest.raises(asyncio.TimeoutError):
+                    await srv.evaluate_many(["1", "2", "3", "4"])
+                # The running jobs still hold every slot; nothing more was queued
+                assert srv._in_flight == slots and srv._pending == slots
+            await asyncio.sleep(1.5)
+            assert (srv._in_flight, srv._pending, srv._slots._value) == (0, 0, slots)
+        finally:
+            await srv.close()
+
+    asyncio.run(scenario())
+
+
+_real_evaluate_jobs = server.evaluate_jobs
+
+
+def crashing_jobs(jobs):
+    # What the kernel does to a worker over its memory cap
+    if any(expr == "crash" for expr, *_ in jobs):
+        os.kill(os.getpid(), signal.SIGKILL)
+    return _real_evaluate_jobs(jobs)
+
+
+async def post(port, path, payload):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                 + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    data = json.loads(await reader.readexactly(length))
+    writer.close()
+    return status, data
+
+
+def test_dead_worker_gets_500_and_a_new_pool(monkeypatch):
+    monkeypatch.setattr(server, "evaluate_jobs", crashing_jobs)
+
+    async def scenario():
+        srv = server.EvaluationServer(workers=1, timeout=10)
+        await srv.start(port=0)
+        try:
+            status, data = await post(srv.port, "/evaluate", {"expression": "crash"})
+            assert status == 500 and "BrokenProcessPool" in data["error"]
+            assert srv.metrics.pool_restarts == 1
+            assert await post(srv.port, "/evaluate", {"expression": "1+1"}) == (
+                200, {"expression": "1+1", "result": "2"})
+            assert await post(srv.port, "/evaluate/batch", {"expressions": ["2^10", "crash", "3"]}) == (
+                500, {"error": "evaluation failed (BrokenProcessPool)"})
+            assert await post(srv.port, "/evaluate/batch", {"expressions": ["2^10", "3"]}) == (
+                200, {"results": ["1024", "3"]})
+            assert srv.metrics.pool_restarts == 2
+            assert (srv._in_flight, srv._pending) == (0, 0)
+        finally:
+            await srv.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,21 @@
+"""Speech transcripts to calculator expressions."""
+
+import pytest
+
+from calc_core.spoken import spoken_to_expr
+
+
+@pytest.mark.parametrize("text, expr", [
+    ("three hundred forty two point five", "342.5"),
+    ("point five plus one", "0.5+1"),
+    ("two plus point five", "2+0.5"),
+    ("point oh five times two", "0.05*2"),
+    ("zero point five", "0.5"),
+    ("point plus one", "+1"),
+    ("one hundred and five divided by five", "105/5"),
+    ("square root of sixteen", "sqrt(16)"),
+    ("six x two", "6*2"),
+    ("two raised to the power of ten", "2^10"),
+])
+def test_spoken_to_expr(text, expr):
+    assert spoken_to_expr(text) == expr
@@ -0,0 +1,73 @@
+"""CalculatorState: a batch of key events ends where pressing them one by one does."""
+
+import random
+
+import pytest
+
+from calc_core.state import CalculatorState
+from calc_core.workspace import Workspace
+
+KEYS = list("0123456789") + ["+", "−", "×", "÷", "x^y", "x^2", "(", ")", ".", "π", "sqrt(",
+                             "AC", "⌫", "+/-", "%", "="]
+
+
+class History:
+    def __init__(self):
+        self.records = []
+
+    def add(self, expression, result, mode=""):
+        self.records.append((expression, result, mode))
+
+
+def make(mode, workspace):
+    return CalculatorState(mode=mode, history=History(), workspace=Workspace(mode) if workspace else None)
+
+
+def observe(calc):
+    values = None if calc.workspace is None else dict(calc.workspace.values)
+    return (calc.expression, repr(calc.display_result), calc.display(), repr(calc.preview()),
+            calc.history.records, values)
+
+
+@pytest.mark.parametrize("workspace", [False, True])
+@pytest.mark.parametrize("mode", ["float", "fraction"])
+def test_apply_events_equals_sequential_press(mode, workspace):
+    rng = random.Random(11)
+    for _ in range(150):
+        events = [rng.choice(KEYS) for _ in range(rng.randint(1, 25))]
+        one_by_one = make(mode, workspace)
+        for key in events:
+            one_by_one.press(key)
+        batched = make(mode, workspace)
+        evaluations = 0
+        for start in range(0, len(events), 4):   # a client flushing every 4 keys
+            evaluations += batched.apply_events(events[start:start + 4])
+        assert observe(batched) == observe(one_by_one), events
+        assert evaluations == sum(key in ("=", "%") for key in events)
+
+
+def test_equals_and_percent():
+    calc = make("float", False)
+    calc.apply_events(["1", "2", "×", "3", "="])
+    assert calc.display_result == 36 and calc.display() == "36"
+    calc.apply_events(["AC", "5", "0", "%"])
+    assert calc.display_result == 0.5 and calc.expression == "0.5"
+    assert calc.history.records == [("12×3", "36", "float"), ("50%", "0.5", "float")]
+
+
+def test_editing_keys():
+    calc = make("float", False)
+    calc.apply_events(["1", "2", "⌫", "+/-"])
+    assert calc.expression == "-1"
+    calc.press("+/-")
+    assert calc.expression == "1"
+    calc.press("AC")
+    assert calc.expression == "" and calc.display() == "0"
+
+
+def test_workspace_numbers_results():
+    calc = make("float", True)
+    calc.apply_events(["2", "+", "3", "="])
+    calc.apply_events(["AC", "#", "1", "×", "2", "="])
+    assert calc.display_result == 10
+    assert calc.workspace.value("#2") == 10
@@ -0,0 +1,87 @@
+"""Streaming statistics: merged moments, KLL rank error, empty input, worker streams."""
+
+import math
+import random
+import statistics
+
+import pytest
+
+from calc_core.stats import (DEFAULT_QUANTILES, KLLSketch, RunningStats, StreamSummary, format_summary,
+                             summarize_stream)
+
+
+def data(n=50_000, seed=3):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(0, 1.5) + 1e6 for _ in range(n)]   # skewed, with a large offset
+
+
+def test_merged_moments_match_one_pass():
+    values = data()
+    exact_mean, exact_var = statistics.fmean(values), statistics.variance(values)
+
+    one_by_one = RunningStats()
+    for x in values:
+        one_by_one.add(x)
+    merged = RunningStats()
+    for i in range(0, len(values), 7_000):
+        part = RunningStats()
+        part.update(values[i:i + 7_000])
+        merged.merge(part)
+    merged.merge(RunningStats())   # merging nothing changes nothing
+
+    for stats in (one_by_one, merged):
+        assert stats.count == len(values)
+        assert math.isclose(stats.mean, exact_mean, rel_tol=1e-12)
+        assert math.isclose(stats.variance, exact_var, rel_tol=1e-9)
+        assert (stats.min, stats.max) == (min(values), max(values))
+
+
+def rank_error(values_sorted, x, q):
+    lo = sum(1 for v in values_sorted if v < x) / len(values_sorted)
+    hi = sum(1 for v in values_sorted if v <= x) / len(values_sorted)
+    return 0.0 if lo <= q <= hi else min(abs(q - lo), abs(q - hi))
+
+
+@pytest.mark.parametrize("chunks", [1, 13])
+def test_kll_rank_error_is_within_bound(chunks):
+    values = data(40_000)
+    ordered = sorted(values)
+    sketch = KLLSketch(k=200, seed=1)
+    size = -(-len(values) // chunks)
+    for i, start in enumerate(range(0, len(values), size)):
+        part = KLLSketch(k=200, seed=i)
+        part.update(values[start:start + size])
+        sketch.merge(part)
+    assert sketch.n == len(values)
+    assert sum(len(c) for c in sketch.compactors) < 3 * 200 + 50   # constant memory
+    for q in DEFAULT_QUANTILES + (0.1, 0.9):
+        assert rank_error(ordered, sketch.quantile(q), q) < 0.02, q
+    assert abs(sketch.rank(ordered[len(ordered) // 2]) - 0.5) < 0.02
+
+
+def test_empty_stream():
+    summary = summarize_stream([], workers=0)
+    assert summary.count == 0 and summary.skipped == 0
+    result = summary.as_dict()
+    assert all(math.isnan(result[k]) for k in ("mean", "variance", "stdev", "min", "max"))
+    assert all(math.isnan(v) for v in result["quantiles"].values())
+    assert math.isnan(KLLSketch().rank(1.0))
+    format_summary(result)   # prints nan, does not raise
+
+
+def test_single_value():
+    summary = StreamSummary()
+    summary.add(4.0)
+    assert (summary.mean, summary.quantile(0), summary.quantile(0.5), summary.quantile(1)) == (4.0, 4.0, 4.0, 4.0)
+    assert math.isnan(summary.variance)
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_stream_skips_non_numbers(workers):
+    texts = [str(x) for x in range(1, 10_001)] + ["abc", "nan", "inf", "-inf", ""]
+    random.Random(0).shuffle(texts)
+    summary = summarize_stream(texts, workers=workers, chunk_size=999)
+    assert summary.count == 10_000 and summary.skipped == 5
+    assert summary.mean == pytest.approx(5000.5)
+    assert (summary.quantile(0), summary.quantile(1)) == (1.0, 10_000.0)
+    assert abs(summary.quantile(0.5) - 5000) < 200
@@ -0,0 +1,133 @@
+"""Shared store: value encoding, TTL expiry and eviction, session round trips."""
+
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from calc_core import store as store_module
+from calc_core.state import CalculatorState
+from calc_core.store import MemoryStore, ResultCache, SessionStore, SQLiteStore, decode_value, encode_value
+from calc_core.workspace import Workspace
+
+
+@pytest.mark.parametrize("value", [
+    0, -1, 42, 7 ** 5000, -(3 ** 20000),      # past the int->str digit limit
+    0.1, -2.5e-300, float("inf"),
+    Decimal("3.14159265358979323846264338327950288"), Decimal("-1E+400"), Decimal("0.000"),
+    Fraction(1, 3), Fraction(-22, 7), Fraction(2 ** 4000 + 1, 3 ** 3000),
+    "", "Error",
+], ids=lambda v: type(v).__name__)
+def test_values_round_trip_with_their_type(value):
+    back = decode_value(encode_value(value))
+    assert type(back) is type(value) and back == value
+    if isinstance(value, Decimal):
+        assert str(back) == str(value)   # same digits, not just an equal value
+
+
+def test_nan_round_trips():
+    assert repr(decode_value(encode_value(float("nan")))) == "nan"
+
+
+def test_fractions_from_the_store_are_reduced_and_checked():
+    assert decode_value("q:6/-4") == Fraction(-3, 2)
+    assert decode_value("q:6/4").denominator == 2
+    with pytest.raises(ZeroDivisionError):
+        decode_value("q:1/0")
+    with pytest.raises(ValueError):
+        decode_value("x:1")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(store_module.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def kv(request, tmp_path):
+    if request.param == "memory":
+        s = MemoryStore(maxsize=3)
+    else:
+        s = SQLiteStore(str(tmp_path / "kv.sqlite3"), maxsize=3)
+    yield s
+    s.close()
+
+
+def test_entries_expire(kv, clock):
+    kv.set("a", b"1", ttl=10)
+    kv.set("b", b"2")                 # no TTL
+    clock[0] += 9.9
+    assert kv.get("a") == b"1"
+    clock[0] += 0.2
+    assert kv.get("a") is None and kv.get("b") == b"2"
+    kv.delete("b")
+    assert kv.get("b") is None
+
+
+def test_least_recently_used_beyond_maxsize_go(kv, clock):
+    for key in "abc":
+        kv.set(key, key.encode())
+        clock[0] += 2
+    assert kv.get("a") == b"a"        # now the most recently used
+    clock[0] += 2
+    kv.set("d", b"d")
+    if isinstance(kv, SQLiteStore):
+        kv.sweep()                    # SQLite evicts in periodic sweeps
+    assert kv.get("b") is None
+    assert [kv.get(k) for k in "acd"] == [b"a", b"c", b"d"]
+
+
+def test_session_round_trip(tmp_path):
+    calc = CalculatorState("decimal", 40, workspace=Workspace())
+    calc.workspace.enter("rate = 0.05")
+    calc.expression = "1000×(1+rate)"
+    calc.press("=")
+    calc.expression = "1÷3"
+    sessions = SessionStore(SQLiteStore(str(tmp_path / "s.sqlite3")))
+    sessions.save("abc", calc)
+
+    other_replica = SessionStore(SQLiteStore(str(tmp_path / "s.sqlite3")))
+    back = other_replica.load("abc")
+    assert (back.mode, back.precision, back.expression) == ("decimal", 40, "1÷3")
+    assert back.display_result == calc.display_result == Decimal("1050.00")
+    assert back.workspace.entries == calc.workspace.entries
+    back.workspace.enter("rate = 0.1")
+    assert back.workspace.value("#1") == Decimal("1100.0")
+    assert other_replica.load("nobody") is None
+    other_replica.delete("abc")
+    assert sessions.load("abc") is None
+
+
+def test_session_expires(clock):
+    sessions = SessionStore(MemoryStore(), ttl=60)
+    sessions.save("s", CalculatorState())
+    clock[0] += 61
+    assert sessions.load("s") is None
+
+
+def test_result_cache_shares_by_mode_and_precision():
+    cache = ResultCache(MemoryStore())
+    cache.put("1/3", "decimal", 10, Decimal("0.3333333333"))
+    cache.put("1/3", "decimal", 30, Decimal("0." + "3" * 30))
+    cache.put("1/3", "fraction", 10, Fraction(1, 3))
+    assert cache.get("1/3", "decimal", 10) == (True, Decimal("0.3333333333"))
+    assert cache.get("1/3", "decimal", 30)[1] == Decimal("0." + "3" * 30)
+    assert cache.get("1/3", "fraction", 99) == (True, Fraction(1, 3))   # precision only matters for Decimal
+    assert cache.get("1/3", "float", 10) == (False, None)
+    assert cache.stats() == {"hits": 3, "misses": 1, "errors": 0}
+
+
+def test_failing_store_is_a_miss():
+    class Broken:
+        def get(self, key):
+            raise ConnectionError("down")
+
+        def set(self, key, value, ttl=None):
+            raise ConnectionError("down")
+
+    cache = ResultCache(Broken())
+    cache.put("1+1", "float", 28, 2)
+    assert cache.get("1+1", "float", 28) == (False, None)
+    assert cache.stats() == {"hits": 0, "misses": 1, "errors": 2}
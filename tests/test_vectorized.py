@@ -0,0 +1,59 @@
+"""Vectorized evaluation flags exactly the rows where the scalar path gives Error."""
+
+import itertools
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from calc_core.engine import ExpressionError, parse                     # noqa: E402
+from calc_core.evaluator import get_compiled                            # noqa: E402
+from calc_core.vectorized import VectorizedExpression, compile_vectorized, evaluate_batch  # noqa: E402
+
+VALUES = [0.0, -0.0, 1.0, -1.0, 2.5, -2.5, 0.5, 3.0, 1e308, -1e308, 1e-308, 1e200,
+          math.inf, -math.inf, math.nan]
+
+
+def scalar(compiled, env):
+    """Scalar result, or "Error" where the calculator would show it (complex included)."""
+    try:
+        value = compiled.evaluate(env)
+    except Exception:
+        return "Error"
+    return "Error" if isinstance(value, complex) else float(value)
+
+
+@pytest.mark.parametrize("expr", [
+    "x/y", "x//y", "x%y", "x^y", "x*y", "x+y", "x-y", "sqrt(x)", "ln(x)", "log(x)", "sin(x)",
+    "cos(x)", "tan(x)", "x^2", "-x^3", "ln(x, y)", "sqrt(x)*0+y", "1/(x-1)+y*0", "2^x",
+    "(x*y)^2+x*y",
+])
+def test_mask_matches_scalar_errors(expr):
+    compiled = get_compiled(expr)
+    vector = compile_vectorized(expr)
+    names = sorted(vector.names)
+    rows = list(itertools.product(VALUES, repeat=len(names)))
+    result = vector({n: [r[i] for r in rows] for i, n in enumerate(names)})
+    for row, value, failed in zip(rows, result.values.tolist(), result.mask.tolist()):
+        expected = scalar(compiled, dict(zip(names, row)))
+        assert failed == (expected == "Error"), (expr, row)
+        if not failed and not (math.isnan(expected) and math.isnan(value)):
+            assert value == pytest.approx(expected, rel=1e-12), (expr, row)
+
+
+def test_non_finite_results_are_not_errors():
+    result = evaluate_batch("x*10 - y", x=[1e308, 1.0, 1e308], y=[0.0, 1.0, math.inf])
+    assert result.mask.tolist() == [False, False, False]
+    assert result.values[0] == math.inf and result.values[1] == 9.0 and math.isnan(result.values[2])
+
+
+def test_constant_failure_masks_every_row():
+    assert evaluate_batch("1/0 + x", x=[1.0, 2.0]).mask.tolist() == [True, True]
+    assert evaluate_batch("x + 10^400", x=[1.0]).mask.tolist() == [True]
+
+
+def test_huge_integer_literal_is_an_expression_error():
+    src = "x+1" + "0" * 400
+    with pytest.raises(ExpressionError):
+        VectorizedExpression(src, parse(src), optimized=False)
@@ -0,0 +1,119 @@
+"""VoiceService with the offline stand-ins: futures, one engine, errors, shutdown."""
+
+import sys
+import threading
+import types
+
+import pytest
+
+from calc_core.voice import MicrophoneRecognizer, RecordingSpeaker, ScriptedRecognizer, VoiceService
+
+
+@pytest.fixture
+def voice():
+    service = VoiceService(ScriptedRecognizer(["two plus three", "sqrt of nine"]), RecordingSpeaker())
+    yield service
+    service.shutdown()
+
+
+def test_listen_future_resolves_to_the_phrase(voice):
+    first, second, third = (voice.recognize_async() for _ in range(3))
+    assert first.result(timeout=5) == "two plus three"
+    assert second.result(timeout=5) == "sqrt of nine"
+    assert third.result(timeout=5) == ""      # nothing more was said
+
+
+def test_listening_does_not_block_the_caller():
+    service = VoiceService(ScriptedRecognizer(["one"], delay=0.3), RecordingSpeaker())
+    fut = service.recognize_async()
+    assert not fut.done()
+    assert fut.result(timeout=5) == "one"
+    service.shutdown()
+
+
+def test_speech_is_queued_in_order(voice):
+    futures = [voice.speak(v) for v in (42, "Error", 1.5)]
+    for fut in futures:
+        fut.result(timeout=5)
+    assert voice.speaker.spoken == ["42", "Error", "1.5"]
+
+
+class _Failing(ScriptedRecognizer):
+    def recognize(self):
+        raise RuntimeError("no microphone")
+
+
+class _FailingSpeaker(RecordingSpeaker):
+    def say(self, text):
+        raise OSError("no audio device")
+
+
+def test_backend_errors_come_back_empty():
+    service = VoiceService(_Failing(), _FailingSpeaker())
+    assert service.recognize_async().result(timeout=5) == ""
+    assert service.speak("7").result(timeout=5) is None
+    # The workers survive the errors
+    assert service.recognize_async().result(timeout=5) == ""
+    service.shutdown()
+
+
+def _fake_speech_recognition(made):
+    """Just enough of speech_recognition for MicrophoneRecognizer, without audio."""
+
+    class Recognizer:
+        energy_threshold = 100
+
+        def __init__(self):
+            made.append(self)
+
+        def adjust_for_ambient_noise(self, source, duration):
+            pass
+
+        def recognize_google(self, audio):
+            return f"{len(audio.frames)} bytes"
+
+    class Stream:
+        def read(self, n):
+            return b"\x00\x00" * (n // 2)   # silence
+
+    class Microphone:
+        CHUNK, SAMPLE_RATE, SAMPLE_WIDTH = 1024, 16000, 2
+
+        def __enter__(self):
+            self.stream = Stream()
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    class AudioData:
+        def __init__(self, frames, rate, width):
+            self.frames = frames
+
+    return types.SimpleNamespace(Recognizer=Recognizer, Microphone=Microphone, AudioData=AudioData)
+
+
+def test_recognizer_engine_is_built_once(monkeypatch):
+    made = []
+    monkeypatch.setitem(sys.modules, "speech_recognition", _fake_speech_recognition(made))
+    service = VoiceService(MicrophoneRecognizer(phrase_time_limit=0.2), RecordingSpeaker())
+    results = [service.recognize_async().result(timeout=5) for _ in range(3)]
+    service.shutdown()
+    assert len(made) == 1
+    assert results[0] == results[2] and results[0].endswith("bytes")
+
+
+def test_shutdown_stops_both_workers():
+    closed = threading.Event()
+
+    class Speaker(RecordingSpeaker):
+        def close(self):
+            closed.set()
+
+    service = VoiceService(ScriptedRecognizer(["x"], delay=0.1), Speaker())
+    pending = service.recognize_async()
+    service.shutdown()
+    assert pending.result(timeout=0) == "x"   # queued work finishes first
+    assert not service._listen_worker.is_alive()
+    assert not service._speech_worker.is_alive()
+    assert closed.is_set()                     # the TTS engine was released
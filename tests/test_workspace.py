@@ -0,0 +1,47 @@
+"""Workspace: dependent recomputation, and the bound on kept #n results."""
+
+from calc_core.store import SessionStore
+from calc_core.state import CalculatorState
+from calc_core.workspace import Workspace
+
+
+def test_changing_a_variable_recomputes_dependents():
+    ws = Workspace()
+    ws.enter("rate = 0.05")
+    ws.enter("f(x) = x^2 + 1")
+    ws.enter("1000 × (1 + rate)")
+    ws.enter("f(ans) − #1")
+    ws.enter("rate = 0.1")
+    assert ws.value("#1") == 1100.0
+    assert ws.value("#2") == 1100.0 ** 2 + 1 - 1100.0
+
+
+def test_old_unreferenced_results_are_dropped():
+    ws = Workspace(max_results=5)
+    ws.enter("7")
+    ws.enter("k = #1 × 2")
+    for i in range(20):
+        ws.enter(f"{i} + 1")
+    assert ws.entries == ["_1", "_18", "_19", "_20", "_21"]   # #1 is read by k
+    assert ws.value("k") == 14 and ws.values["ans"] == 20
+    assert ws.enter("#21 + 1").name == "_22"                    # numbering continues
+
+
+def test_long_keypad_session_stays_small():
+    calc = CalculatorState(workspace=Workspace())
+    for i in range(1000):
+        calc.expression = f"{i}+1"
+        calc.press("=")
+    assert len(calc.workspace.cells) == calc.workspace.max_results
+    restored = SessionStore.loads(SessionStore.dumps(calc))
+    assert restored.workspace.entries == calc.workspace.entries
+    restored.expression = "ans+1"
+    restored.press("=")
+    assert restored.display_result == 1001 and restored.workspace.entries[-1] == "_1001"
+
+
+def test_unlimited():
+    ws = Workspace(max_results=None)
+    for i in range(300):
+        ws.enter(str(i))
+    assert len(ws.entries) == 300